@@ -70,11 +70,6 @@ class GenerateVouchers
      * Create one or more vouchers with customizable instructions for disbursement.
      *
      * @operationId generateVouchers
-     *
-     * @response 201 {"count":2,"vouchers":[{"code":"ABC-1234","amount":100}],"total_amount":200,"currency":"PHP"}
-     * @response 400 {"message":"Idempotency-Key header is required for this request."}
-     * @response 403 {"message":"Insufficient wallet balance to generate vouchers."}
-     * @response 422 {"message":"The given data was invalid.","errors":{"amount":["The amount field is required."]}}
      */
     #[BodyParameter('amount', description: '**REQUIRED**. Voucher amount in major units (whole PHP). Minimum: 0. This is the exact amount that will be disbursed to the redeemer. Example: 500 = ₱500.00', type: 'number', example: 500)]
     #[BodyParameter('count', description: '**REQUIRED**. Number of vouchers to generate. Range: 1-1000. Cannot be 0 (minimum is 1 for production use).', type: 'integer', example: 10)]
@@ -291,6 +286,14 @@ public function asController(ActionRequest $request): JsonResponse
         // Calculate totals
         $totalAmount = $vouchers->sum(fn ($v) => $v->instructions->cash->amount ?? 0);
 
+        /**
+         * Scramble cannot see through ApiResponse::created(), so the status and
+         * envelope are spelled out here (see api.json).
+         *
+         * @status 201
+         *
+         * @body array{data: array{count: int, vouchers: list<object>, total_amount: float, currency: string}, meta: array{timestamp: string, version: string}}
+         */
         return ApiResponse::created([
             'count' => $vouchers->count(),
             'vouchers' => $voucherData,
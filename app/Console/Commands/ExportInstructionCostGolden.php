@@ -0,0 +1,118 @@
+<?php
+
+namespace App\Console\Commands;
+
+use App\Models\User;
+use App\Repositories\InstructionItemRepository;
+use App\Services\InstructionCostEvaluator;
+use Illuminate\Console\Command;
+use Illuminate\Support\Facades\Log;
+use LBHurtado\Voucher\Data\VoucherInstructionsData;
+use Throwable;
+
+class ExportInstructionCostGolden extends Command
+{
+    /**
+     * The name and signature of the console command.
+     *
+     * @var string
+     */
+    protected $signature = 'billing:export-cost-golden
+                            {payloads : JSONL file written by scripts/cost_diff.py payloads}
+                            {output : Where to write the golden JSONL file}
+                            {--user= : Customer email (default: first user)}';
+
+    /**
+     * The console command description.
+     *
+     * @var string
+     */
+    protected $description = 'Evaluate fuzzed voucher instructions with InstructionCostEvaluator for scripts/cost_diff.py';
+
+    /**
+     * Execute the console command.
+     */
+    public function handle(InstructionCostEvaluator $evaluator, InstructionItemRepository $repository): int
+    {
+        $email = $this->option('user');
+        $user = $email ? User::where('email', $email)->first() : User::query()->orderBy('id')->first();
+
+        if (! $user) {
+            $this->error($email ? "User not found: {$email}" : 'No users in the database.');
+
+            return self::FAILURE;
+        }
+
+        $input = @fopen($this->argument('payloads'), 'r');
+        if (! $input) {
+            $this->error('Cannot read '.$this->argument('payloads'));
+
+            return self::FAILURE;
+        }
+
+        $header = json_decode((string) fgets($input), true);
+        if (! is_array($header) || ! isset($header['skeleton'])) {
+            $this->error('Payload file has no header line; regenerate it with scripts/cost_diff.py payloads');
+
+            return self::FAILURE;
+        }
+
+        // The evaluator logs every item at debug level; keep the export fast and the logs clean
+        Log::setDefaultDriver('null');
+
+        // Ask the rule that decides (InstructionItem::getAmountProduct) rather
+        // than re-deriving it: it reads env('SYSTEM_USER_ID'), which is null
+        // once the config is cached
+        $transactionFee = $repository->findByIndex('cash.amount');
+        $exempt = $transactionFee !== null && $transactionFee->price > 0
+            && (int) $transactionFee->getAmountProduct($user) === 0;
+
+        $output = fopen($this->argument('output'), 'w');
+        fwrite($output, json_encode([
+            'dimensions' => $header['dimensions'] ?? null,
+            'seed' => $header['seed'] ?? null,
+            'customer' => $user->email,
+            'exempt' => $exempt,
+            'items' => $repository->all()->mapWithKeys(fn ($item) => [$item->index => (int) $item->price]),
+        ])."\n");
+
+        $this->info("📖 Evaluating payloads for {$user->email}...");
+
+        $evaluated = 0;
+        $errors = 0;
+        while (($line = fgets($input)) !== false) {
+            if (trim($line) === '') {
+                continue;
+            }
+            $row = json_decode($line, true);
+            $result = ['id' => $row['id'], 'dims' => $row['dims']];
+
+            try {
+                $instructions = VoucherInstructionsData::from(
+                    array_replace_recursive($header['skeleton'], $row['instructions'])
+                );
+                $result['charges'] = $evaluator->evaluate($user, $instructions)
+                    ->map(fn (array $charge) => [
+                        $charge['index'],
+                        (int) $charge['unit_price'],
+                        $charge['quantity'],
+                        $charge['pay_count'],
+                    ])
+                    ->values();
+            } catch (Throwable $e) {
+                $result['error'] = class_basename($e).': '.$e->getMessage();
+                $errors++;
+            }
+
+            fwrite($output, json_encode($result)."\n");
+            $evaluated++;
+        }
+
+        fclose($input);
+        fclose($output);
+
+        $this->info("💾 {$evaluated} results ({$errors} errors) → ".$this->argument('output'));
+
+        return self::SUCCESS;
+    }
+}
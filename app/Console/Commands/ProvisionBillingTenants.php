@@ -0,0 +1,155 @@
+<?php
+
+namespace App\Console\Commands;
+
+use App\Models\Campaign;
+use App\Models\User;
+use Illuminate\Console\Command;
+use Illuminate\Support\Facades\Hash;
+use Illuminate\Support\Str;
+use LBHurtado\Voucher\Data\VoucherInstructionsData;
+
+class ProvisionBillingTenants extends Command
+{
+    /**
+     * The name and signature of the console command.
+     *
+     * @var string
+     */
+    protected $signature = 'billing:provision-tenants
+                            {count : Number of tenants (one per folder or shard)}
+                            {--balance=10000 : Wallet balance each tenant starts the run with}
+                            {--prefix=billing-tenant : Tenant emails are <prefix>-<n>@example.com}
+                            {--output=storage/app/billing-tenants.json : Where to write the tenants file}
+                            {--campaigns= : Campaigns file from scripts/bulk_vouchers.py export, created for every tenant}
+                            {--mobile-prefix= : Give tenant n the mobile <prefix><n>, zero-padded to 11 digits (scripts/webhook_replay.py)}';
+
+    /**
+     * The console command description.
+     *
+     * @var string
+     */
+    protected $description = 'Create funded API users for running billing folders in isolation (scripts/collection_runner.py --tenants)';
+
+    private const TOKEN_NAME = 'billing-tenants';
+
+    /**
+     * Execute the console command.
+     */
+    public function handle(): int
+    {
+        if (app()->environment('production')) {
+            $this->error('Refusing to provision test tenants in production.');
+
+            return self::FAILURE;
+        }
+
+        $count = (int) $this->argument('count');
+        $balance = (float) $this->option('balance');
+        $prefix = $this->option('prefix');
+
+        if ($count < 1) {
+            $this->error('Count must be at least 1.');
+
+            return self::FAILURE;
+        }
+
+        $mobilePrefix = (string) $this->option('mobile-prefix');
+        if ($mobilePrefix !== '' && ! preg_match('/^09\d{0,7}$/', $mobilePrefix)) {
+            $this->error('Mobile prefix must be 2 to 9 digits starting with 09.');
+
+            return self::FAILURE;
+        }
+
+        $campaigns = [];
+        if ($path = $this->option('campaigns')) {
+            if (! is_readable($path)) {
+                $this->error("Campaigns file not found: {$path}");
+
+                return self::FAILURE;
+            }
+            $campaigns = json_decode(file_get_contents($path), true)['campaigns'] ?? [];
+        }
+
+        $this->info("🏗️  Provisioning {$count} tenant(s) with ₱".number_format($balance, 2).' each...');
+
+        $tenants = [];
+        foreach (range(1, $count) as $n) {
+            $user = User::firstOrCreate(
+                ['email' => "{$prefix}-{$n}@example.com"],
+                ['name' => 'Billing Tenant '.$n, 'password' => Hash::make(Str::random(32))]
+            );
+
+            if ($mobilePrefix !== '') {
+                $user->mobile = $mobilePrefix.str_pad((string) $n, 11 - strlen($mobilePrefix), '0', STR_PAD_LEFT);
+                $user->save();
+            }
+
+            // Same call as POST /api/v1/auth/tokens; earlier run tokens are revoked
+            $user->tokens()->where('name', self::TOKEN_NAME)->delete();
+            $token = $user->createToken(self::TOKEN_NAME, ['*'])->plainTextToken;
+
+            $credited = $this->fund($user, $balance);
+            $user->refresh();
+
+            foreach ($campaigns as $campaign) {
+                $this->provisionCampaign($user, $campaign);
+            }
+
+            $tenants[] = [
+                'email' => $user->email,
+                'token' => $token,
+                'balance' => $user->balanceFloat,
+            ] + ($mobilePrefix !== '' ? ['mobile' => $user->account_number] : []);
+
+            $this->line("   {$user->email}: ₱".number_format($user->balanceFloat, 2)
+                .($credited > 0 ? ' (topped up ₱'.number_format($credited, 2).')' : '')
+                .($campaigns ? ', '.count($campaigns).' campaign(s)' : ''));
+        }
+
+        $output = $this->option('output');
+        file_put_contents($output, json_encode(['balance' => $balance, 'tenants' => $tenants], JSON_PRETTY_PRINT)."\n");
+
+        $this->info("💾 {$output}");
+
+        return self::SUCCESS;
+    }
+
+    /**
+     * Create or refresh a campaign template for /vouchers/bulk-create, matched by name.
+     */
+    private function provisionCampaign(User $user, array $campaign): void
+    {
+        Campaign::updateOrCreate(
+            ['user_id' => $user->id, 'name' => $campaign['name']],
+            [
+                'description' => $campaign['description'] ?? null,
+                'status' => 'active',
+                'instructions' => VoucherInstructionsData::from($campaign['instructions']),
+            ]
+        );
+    }
+
+    /**
+     * Top up the wallet to $balance through the /wallet/topup flow, settling each top-up immediately.
+     */
+    private function fund(User $user, float $balance): float
+    {
+        $max = (float) config('payment-gateway.top_up.max_amount', 50000);
+        $credited = 0.0;
+
+        while (($shortfall = round($balance - $user->balanceFloat, 2)) > 0) {
+            $amount = max(min($shortfall, $max), (float) config('payment-gateway.top_up.min_amount', 1));
+            $result = $user->initiateTopUp($amount, 'netbank');
+
+            $topUp = $user->getTopUpByReference($result->reference_no);
+            $topUp->markAsPaid('TENANT-'.$result->reference_no);
+            $user->creditWalletFromTopUp($topUp);
+            $user->refresh();
+
+            $credited += $amount;
+        }
+
+        return $credited;
+    }
+}
@@ -0,0 +1,139 @@
+<?php
+
+namespace App\Console\Commands;
+
+use App\Models\PaymentRequest;
+use Illuminate\Console\Command;
+use Illuminate\Support\Str;
+use LBHurtado\Voucher\Models\Voucher;
+
+class SeedPaymentRequests extends Command
+{
+    /**
+     * The name and signature of the console command.
+     *
+     * @var string
+     */
+    protected $signature = 'webhook:seed-payment-requests
+                            {vouchers?* : Codes of PAYABLE or SETTLEMENT vouchers to pay}
+                            {--count=10 : Pending payment requests per voucher}
+                            {--amount=100 : Amount of the first request in PHP; each next request is ₱1 more}
+                            {--amounts= : Comma-separated distinct PHP amounts, one request each (replaces --count and --amount)}
+                            {--plan= : JSON file of {"CODE": [PHP amounts, ...]} to seed instead of the arguments (scripts/loan_simulator.py)}
+                            {--output=storage/app/payment-requests.json : Where to write the payment requests file}';
+
+    /**
+     * The console command description.
+     *
+     * @var string
+     */
+    protected $description = 'Create pending payment requests for replaying voucher-payment deposits (scripts/webhook_replay.py)';
+
+    /**
+     * Execute the console command.
+     */
+    public function handle(): int
+    {
+        if (app()->environment('production')) {
+            $this->error('Refusing to seed test payment requests in production.');
+
+            return self::FAILURE;
+        }
+
+        if ($path = $this->option('plan')) {
+            if (! is_readable($path)) {
+                $this->error("Plan file not found: {$path}");
+
+                return self::FAILURE;
+            }
+            $plan = array_map(fn ($amounts) => array_map('intval', (array) $amounts), (array) json_decode(file_get_contents($path), true));
+        } elseif ($this->option('amounts') !== null) {
+            if (count($this->argument('vouchers')) !== 1) {
+                $this->error('--amounts takes a single voucher.');
+
+                return self::FAILURE;
+            }
+            $plan = [$this->argument('vouchers')[0] => array_map('intval', explode(',', $this->option('amounts')))];
+        } else {
+            $count = (int) $this->option('count');
+            $amount = (int) $this->option('amount');
+
+            if ($count < 1 || $amount < 1) {
+                $this->error('Count and amount must be at least 1.');
+
+                return self::FAILURE;
+            }
+            $plan = [];
+            foreach ($this->argument('vouchers') as $n => $code) {
+                $plan[$code] = range($amount + $n * $count, $amount + ($n + 1) * $count - 1);
+            }
+        }
+
+        $amounts = array_merge([], ...array_values($plan));
+        if (! $amounts) {
+            $this->error('Give voucher codes or a --plan.');
+
+            return self::FAILURE;
+        }
+        if (min($amounts) < 1 || count(array_unique($amounts)) !== count($amounts)) {
+            $this->error('Amounts must be distinct and at least 1.');
+
+            return self::FAILURE;
+        }
+
+        $vouchers = [];
+        foreach (array_keys($plan) as $code) {
+            $voucher = Voucher::where('code', strtoupper((string) $code))->first();
+
+            if (! $voucher?->canAcceptPayment()) {
+                $this->error("Voucher {$code} does not exist or cannot accept payments.");
+
+                return self::FAILURE;
+            }
+            if (! $voucher->owner?->account_number) {
+                $this->error("The owner of voucher {$voucher->code} has no mobile to receive deposits.");
+
+                return self::FAILURE;
+            }
+
+            $vouchers[$code] = $voucher;
+        }
+
+        $this->info('🧾 Seeding '.count($amounts).' payment request(s) for '.count($vouchers).' voucher(s)...');
+
+        // Deposits reach ConfirmDepositController without merchant_details.payment_request_reference
+        // (it is not a validated field), so they are classified by amount: every request gets its own
+        $requests = [];
+        foreach ($vouchers as $code => $voucher) {
+            foreach ($plan[$code] as $amount) {
+                $paymentRequest = PaymentRequest::create([
+                    'reference_id' => 'REPLAY-'.strtoupper(Str::random(12)),
+                    'voucher_id' => $voucher->id,
+                    'amount' => $amount * 100,
+                    'currency' => 'PHP',
+                    'status' => 'pending',
+                    'payer_info' => ['name' => 'REPLAY PAYER'],
+                ]);
+
+                $requests[] = [
+                    'id' => $paymentRequest->id,
+                    'reference_id' => $paymentRequest->reference_id,
+                    'voucher_code' => $voucher->code,
+                    'amount' => $amount,
+                    'mobile' => $voucher->owner->account_number,
+                ];
+            }
+
+            if (count($vouchers) <= 20) {
+                $this->line("   {$voucher->code}: ".count($plan[$code]).' request(s), owner '.$voucher->owner->account_number);
+            }
+        }
+
+        $output = $this->option('output');
+        file_put_contents($output, json_encode(['payment_requests' => $requests], JSON_PRETTY_PRINT)."\n");
+
+        $this->info("💾 {$output} (amount matching only looks back 10 minutes)");
+
+        return self::SUCCESS;
+    }
+}
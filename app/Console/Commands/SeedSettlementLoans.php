@@ -0,0 +1,136 @@
+<?php
+
+namespace App\Console\Commands;
+
+use App\Actions\Billing\CalculateCharge;
+use App\Actions\Voucher\ProcessRedemption;
+use App\Models\User;
+use Illuminate\Console\Command;
+use LBHurtado\Voucher\Actions\GenerateVouchers;
+use LBHurtado\Voucher\Data\VoucherInstructionsData;
+use Propaganistas\LaravelPhone\PhoneNumber;
+
+class SeedSettlementLoans extends Command
+{
+    /**
+     * The name and signature of the console command.
+     *
+     * @var string
+     */
+    protected $signature = 'settlement:seed-loans
+                            {count : Settlement vouchers to generate and disburse}
+                            {--tenants=storage/app/billing-tenants.json : billing:provision-tenants output (with --mobile-prefix); its users own the loans}
+                            {--principal=5000-50000 : Loan amount in PHP, or a LOW-HIGH range to draw from}
+                            {--interest=10 : Percent of the principal added to the amount to repay}
+                            {--borrower=09467438575 : GCash mobile the loans are disbursed to}
+                            {--output=storage/app/settlement-loans.json : Where to write the loans file}';
+
+    /**
+     * The console command description.
+     *
+     * @var string
+     */
+    protected $description = 'Generate and disburse settlement vouchers for the loan lifecycle simulator (scripts/loan_simulator.py)';
+
+    /**
+     * Execute the console command.
+     */
+    public function handle(): int
+    {
+        if (app()->environment('production')) {
+            $this->error('Refusing to seed test loans in production.');
+
+            return self::FAILURE;
+        }
+
+        // Redemption would send every principal to the borrower's GCash account
+        if (collect(config('voucher-pipeline.post-redemption'))->contains(fn ($class) => str_contains($class, 'DisburseCash'))) {
+            $this->error('Disbursement is enabled. Set DISBURSE_DISABLE=true before seeding loans.');
+
+            return self::FAILURE;
+        }
+
+        $count = (int) $this->argument('count');
+        $interest = (float) $this->option('interest');
+        $range = explode('-', $this->option('principal'));
+        $low = (int) $range[0];
+        $high = (int) ($range[1] ?? $range[0]);
+
+        if ($count < 1 || $low < 1 || $high < $low || $interest < 0) {
+            $this->error('Count and principal must be at least 1, and interest at least 0.');
+
+            return self::FAILURE;
+        }
+
+        $path = $this->option('tenants');
+        if (! is_readable($path)) {
+            $this->error("Tenants file not found: {$path}");
+
+            return self::FAILURE;
+        }
+
+        $owners = User::whereIn('email', array_column(json_decode(file_get_contents($path), true)['tenants'] ?? [], 'email'))->get()
+            ->filter(fn (User $user) => $user->account_number)
+            ->values();
+        if ($owners->isEmpty()) {
+            $this->error("No tenant in {$path} has a mobile to receive repayments (billing:provision-tenants --mobile-prefix).");
+
+            return self::FAILURE;
+        }
+
+        $borrower = new PhoneNumber($this->option('borrower'), 'PH');
+        $bankAccount = ['bank_code' => 'GXCHPHM2XXX', 'account_number' => $this->option('borrower')];
+
+        $this->info("🏦 Seeding {$count} loan(s) of ₱".number_format($low).($high > $low ? '-₱'.number_format($high) : '')
+            ." across {$owners->count()} owner(s)...");
+
+        $loans = [];
+        foreach (range(1, $count) as $n) {
+            $owner = $owners[($n - 1) % $owners->count()];
+            $principal = random_int($low, $high);
+            $target = (int) round($principal * (1 + $interest / 100));
+
+            $instructions = VoucherInstructionsData::generateFromScratch()->toArray();
+            $instructions['cash']['amount'] = $principal;
+            $instructions['count'] = 1;
+            $instructions['prefix'] = 'LOAN';
+            $instructions['voucher_type'] = 'settlement';
+            $instructions['target_amount'] = $target;
+            $instructions = VoucherInstructionsData::from($instructions);
+
+            $needed = $principal + app(CalculateCharge::class)->handle($owner, $instructions)->total / 100;
+            if ($owner->fresh()->balanceFloat < $needed) {
+                $this->error("{$owner->email} cannot fund loan {$n} (₱".number_format($needed, 2).' with fees). Provision tenants with a larger --balance.');
+
+                return self::FAILURE;
+            }
+
+            auth()->login($owner);
+            $voucher = GenerateVouchers::run($instructions)->first();
+            auth()->logout();
+
+            try {
+                ProcessRedemption::run($voucher->fresh(), $borrower, [], $bankAccount);
+            } catch (\Throwable $e) {
+                $this->error("Could not disburse {$voucher->code}: {$e->getMessage()}");
+
+                return self::FAILURE;
+            }
+
+            $loans[] = [
+                'code' => $voucher->code,
+                'owner' => $owner->email,
+                'mobile' => $owner->account_number,
+                'principal' => $principal,
+                'target' => $target,
+            ];
+        }
+
+        $output = $this->option('output');
+        file_put_contents($output, json_encode(['borrower' => $this->option('borrower'), 'loans' => $loans], JSON_PRETTY_PRINT)."\n");
+
+        $this->info("💾 {$output}");
+
+        return self::SUCCESS;
+    }
+}
@@ -0,0 +1,223 @@
+<?php
+
+namespace App\Console\Commands;
+
+use App\Models\PaymentRequest;
+use App\Models\User;
+use Illuminate\Console\Command;
+use Illuminate\Database\Eloquent\Model;
+use Illuminate\Support\Facades\DB;
+use Illuminate\Support\Facades\URL;
+use LBHurtado\SettlementEnvelope\Models\Envelope;
+use LBHurtado\Voucher\Models\Voucher;
+use LBHurtado\Wallet\Services\SystemUserResolverService;
+use Symfony\Component\Console\Output\OutputInterface;
+
+class StateProbe extends Command
+{
+    /**
+     * The name and signature of the console command.
+     *
+     * @var string
+     */
+    protected $signature = 'state:probe
+                            {--input=php://stdin : Where to read query batches from, one JSON line each}';
+
+    /**
+     * The console command description.
+     *
+     * @var string
+     */
+    protected $description = 'Answer batched wallet and voucher state queries over stdin/stdout (scripts/state_probe.py)';
+
+    /**
+     * Execute the console command.
+     *
+     * Each input line is {"id": ..., "queries": [{"type": "voucher", "code": "..."}, ...]}
+     * and gets one output line {"id": ..., "results": [...]}, in query order.
+     */
+    public function handle(): int
+    {
+        if (app()->environment('production')) {
+            $this->error('Refusing to run the state probe in production.');
+
+            return self::FAILURE;
+        }
+
+        $input = fopen($this->option('input'), 'r');
+        if (! $input) {
+            $this->error('Cannot read '.$this->option('input'));
+
+            return self::FAILURE;
+        }
+
+        $this->reply(['ready' => true, 'pid' => getmypid()]);
+
+        while (($line = fgets($input)) !== false) {
+            if (trim($line) === '') {
+                continue;
+            }
+
+            $batch = json_decode($line, true);
+            if (! is_array($batch)) {
+                $this->reply(['id' => null, 'error' => 'Invalid JSON']);
+
+                continue;
+            }
+
+            $this->reply([
+                'id' => $batch['id'] ?? null,
+                'results' => array_map(fn ($query) => $this->answer((array) $query), $batch['queries'] ?? []),
+            ]);
+        }
+
+        fclose($input);
+
+        return self::SUCCESS;
+    }
+
+    private function reply(array $data): void
+    {
+        // Raw, so values that look like <tags> are not treated as console styles
+        $this->output->writeln(json_encode($data), OutputInterface::OUTPUT_RAW);
+    }
+
+    /**
+     * One query's result; failures become {"error": ...} so the rest of the batch is still answered.
+     */
+    private function answer(array $query): array
+    {
+        try {
+            return match ($query['type'] ?? null) {
+                'voucher' => $this->voucher($query['code'] ?? ''),
+                'system' => ['system_wallet' => $this->balance(app(SystemUserResolverService::class)->resolve())],
+                'user' => $this->user($query['user'] ?? ''),
+                'payment_request' => $this->paymentRequest($query),
+                'notification' => $this->notification($query),
+                'envelope' => $this->envelope((int) ($query['id'] ?? 0)),
+                default => ['error' => 'Unknown query type: '.json_encode($query['type'] ?? null)],
+            };
+        } catch (\Throwable $e) {
+            return ['error' => $e->getMessage()];
+        }
+    }
+
+    /**
+     * Confirmed balance straight from the wallets table.
+     *
+     * balanceFloat goes through the wallet package's balance cache, which
+     * would go stale in a process that outlives the requests changing it.
+     */
+    private function balance(?Model $holder): float
+    {
+        $wallet = $holder?->wallet()->first();
+        if (! $wallet) {
+            return 0.0;
+        }
+
+        return (float) $wallet->getRawOriginal('balance', 0) / (10 ** (int) ($wallet->decimal_places ?? 2));
+    }
+
+    private function voucher(string $code): array
+    {
+        $voucher = Voucher::where('code', strtoupper($code))->with('owner')->first();
+        if (! $voucher) {
+            return ['error' => "Voucher not found: {$code}"];
+        }
+
+        return [
+            'id' => $voucher->id,
+            'code' => $voucher->code,
+            'type' => $voucher->voucher_type?->value,
+            'state' => $voucher->state?->value,
+            'owner_email' => $voucher->owner?->email,
+            'owner_mobile' => $voucher->owner?->account_number,
+            'owner_wallet' => $this->balance($voucher->owner),
+            'voucher_cash' => $this->balance($voucher->cash),
+            'target_amount' => $voucher->target_amount ?? 0,
+            'paid_total' => $voucher->getPaidTotal(),
+            'redeemed_total' => $voucher->getRedeemedTotal(),
+            'remaining' => $voucher->getRemaining(),
+            'redeemed_at' => $voucher->redeemed_at?->toIso8601String(),
+        ];
+    }
+
+    private function user(string $identifier): array
+    {
+        $user = User::where('email', $identifier)->first() ?? User::findByMobile($identifier);
+        if (! $user) {
+            return ['error' => "User not found: {$identifier}"];
+        }
+
+        return [
+            'email' => $user->email,
+            'mobile' => $user->account_number,
+            'wallet' => $this->balance($user),
+        ];
+    }
+
+    private function paymentRequest(array $query): array
+    {
+        $paymentRequest = isset($query['reference_id'])
+            ? PaymentRequest::where('reference_id', $query['reference_id'])->first()
+            : PaymentRequest::find($query['id'] ?? 0);
+        if (! $paymentRequest) {
+            return ['error' => 'Payment request not found'];
+        }
+
+        $uuid = $paymentRequest->meta['transaction_uuid'] ?? null;
+        $transaction = $uuid ? DB::table('transactions')->where('uuid', $uuid)->first() : null;
+
+        return [
+            'id' => $paymentRequest->id,
+            'reference_id' => $paymentRequest->reference_id,
+            'voucher_code' => $paymentRequest->voucher?->code,
+            'status' => $paymentRequest->status,
+            'amount' => $paymentRequest->getAmountInMajorUnits(),
+            'transaction' => $transaction ? ['uuid' => $transaction->uuid, 'confirmed' => (bool) $transaction->confirmed] : null,
+            'confirm_url' => URL::signedRoute('pay.confirm', ['paymentRequest' => $paymentRequest->reference_id], now()->addHour()),
+        ];
+    }
+
+    private function notification(array $query): array
+    {
+        $notification = DB::table('notifications')
+            ->where('type', 'LIKE', '%'.($query['kind'] ?? '').'%')
+            ->where('notifiable_id', $query['notifiable_id'] ?? 0)
+            ->orderBy('created_at', 'desc')
+            ->first();
+
+        if (! $notification) {
+            return ['found' => false];
+        }
+
+        return [
+            'found' => true,
+            'type' => $notification->type,
+            'created_at' => $notification->created_at,
+            'data' => json_decode($notification->data, true),
+        ];
+    }
+
+    private function envelope(int $id): array
+    {
+        $envelope = Envelope::find($id);
+        if (! $envelope) {
+            return ['error' => "Envelope not found: {$id}"];
+        }
+
+        return [
+            'id' => $envelope->id,
+            'reference_code' => $envelope->reference_code,
+            'status' => $envelope->status->value,
+            'payload_version' => $envelope->payload_version,
+            'payload' => $envelope->payload,
+            'checklist' => $envelope->checklistItems->map(fn ($item) => [
+                'key' => $item->key,
+                'status' => $item->status->value,
+                'required' => $item->required,
+            ]),
+            'signals' => $envelope->signals->map(fn ($signal) => ['key' => $signal->key, 'value' => $signal->value]),
+        ];
+    }
+}
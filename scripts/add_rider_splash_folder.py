@@ -2,10 +2,11 @@
 """
 Add new Postman folder: 08 - Rider - Splash (₱100 + ₱2.20)
 Tests rider splash screen functionality with base64-encoded image.
+
+Superseded: generate_all_folders.py builds this folder from folder_bodies.py.
 """
 
 import json
-import sys
 from pathlib import Path
 
 COLLECTION_PATH = Path(__file__).parent.parent / "docs/postman/redeem-x-e2e-generation-billing.postman_collection.json"
@@ -0,0 +1,897 @@
+#!/usr/bin/env python3
+"""
+In-memory stand-in for the redeem-x /api/v1 endpoints the billing collection uses.
+
+Routing comes from api.json (openapi_routes.py): every documented path
+resolves, undocumented ones get Laravel's 404, and documented operations the
+stub does not implement answer 501 with their operationId. Error bodies
+follow the documented response shapes. Implemented:
+
+    GET  /api/v1/system/balances      system.balances
+    GET  /api/v1/wallet/balance       wallet.balance
+    GET  /api/v1/wallet/transactions  wallet.transactions
+    GET  /api/v1/transactions         transactions.index  (always empty: the stub never redeems)
+    POST /api/v1/vouchers             generateVouchers
+    GET  /api/v1/vouchers/{voucher}   vouchers.show
+    POST /api/v1/vouchers/bulk-create vouchers.bulk-create  (--campaigns)
+    GET  /api/v1/campaigns            listCampaigns
+    POST /api/confirm-deposit         the NetBank deposit webhook (payment-gateway package, not in api.json)
+
+Money moves through a double-entry ledger in centavos: every posting debits
+one account and credits another, so all balances always sum to zero. Each
+voucher escrows its (fee-adjusted) amount into its own cash account and pays
+every charge from fee_oracle.charges() into the product wallet, once per
+voucher, as the ChargeInstructions pipeline does.
+
+Every bearer token is its own user, created with --balance on first use, so
+a billing:provision-tenants file works unchanged. Every user, the
+--system-token user included, pays the cash.amount transaction fee:
+InstructionItem::getAmountProduct waives it by env('SYSTEM_USER_ID'), which is
+null once the config is cached. billing:export-cost-golden asks the same
+method, so a cached deployment's golden file says "exempt": false too.
+
+Deposits credit the tenant whose mobile is in recipientAccountNumber
+(--tenants, billing:provision-tenants --mobile-prefix) and answer 204 even
+when nobody has that mobile, as ConfirmDepositController does. A deposit
+whose amount matches a --payment-requests entry is also paid from the system
+wallet into that voucher's cash (DepositClassificationService amount
+matching). /__stub/deposits counts them by classification.
+
+Usage:
+    python3 scripts/api_stub.py --port 8000
+    python3 scripts/collection_runner.py --var base_url=http://127.0.0.1:8000 --var access_token=dev -c 1
+    curl -s http://127.0.0.1:8000/__stub/ledger
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import string
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fee_oracle import INSTAPAY_LIMIT, RAIL_FEES, charges, pricelist
+from openapi_routes import API_PREFIX, SPEC_PATH, Router, error_body
+from tenants import load_tenants
+
+MANILA = timezone(timedelta(hours=8))
+SYSTEM_EMAIL = 'admin@disburse.cash'  # config/account.php system_user.identifier default
+
+INPUT_FIELDS = ('email', 'mobile', 'name', 'address', 'birth_date', 'gross_monthly_income', 'location',
+                'reference_code', 'signature', 'selfie', 'otp', 'kyc')
+DEFAULT_TTL_DAYS = 30
+MASK_ASTERISKS = (4, 8)  # config/voucher.php mask.min_asterisks / max_asterisks
+CODE_ALPHABET = string.ascii_uppercase + string.digits
+
+CONFIRM_DEPOSIT_PATH = '/api/confirm-deposit'  # payment-gateway routes, PAYMENT_GATEWAY_ROUTE_PREFIX=api
+DEPOSIT_ALIAS = '91500'  # config/disbursement.php client.alias
+# ConfirmDepositController::__invoke() rules: every field is required
+DEPOSIT_FIELDS = {
+    'alias': str, 'amount': int, 'channel': str, 'commandId': int, 'externalTransferStatus': str,
+    'operationId': int, 'productBranchCode': str, 'recipientAccountNumber': str,
+    'recipientAccountNumberBankFormat': str, 'referenceCode': str, 'referenceNumber': str,
+    'registrationTime': str, 'remarks': str, 'sender': dict, 'transferType': str,
+}
+SENDER_FIELDS = ('accountNumber', 'institutionCode', 'name')
+
+STATUS_REASONS = {200: 'OK', 201: 'Created', 204: 'No Content', 401: 'Unauthorized', 403: 'Forbidden', 404: 'Not Found',
+                  405: 'Method Not Allowed', 414: 'URI Too Long', 422: 'Unprocessable Content',
+                  431: 'Request Header Fields Too Large', 501: 'Not Implemented'}
+
+
+def now():
+    return datetime.now(MANILA).replace(microsecond=0)
+
+
+def iso(moment):
+    return moment.isoformat() if moment else None
+
+
+def pesos(centavos):
+    return centavos / 100
+
+
+class Ledger:
+    """Double-entry postings between named accounts, in centavos."""
+
+    def __init__(self):
+        self.entries = []
+        self.balances = {}
+
+    def post(self, debit, credit, centavos, memo=''):
+        """Move centavos from the debit account to the credit account."""
+        if centavos < 0:
+            raise ValueError(f"Negative posting {centavos} ({memo})")
+        self.entries.append((debit, credit, centavos, memo, now()))
+        self.balances[debit] = self.balances.get(debit, 0) - centavos
+        self.balances[credit] = self.balances.get(credit, 0) + centavos
+
+    def balance(self, account):
+        return self.balances.get(account, 0)
+
+    def accounts(self, prefix):
+        return {account: balance for account, balance in self.balances.items() if account.startswith(prefix)}
+
+    def summary(self):
+        return {
+            'entries': len(self.entries),
+            'balanced': sum(self.balances.values()) == 0,
+            'balances': {account: pesos(balance) for account, balance in sorted(self.balances.items())},
+        }
+
+
+class User:
+    def __init__(self, id, email, token):
+        self.id = id
+        self.email = email
+        self.name = email.split('@')[0]
+        self.token = token
+
+    @property
+    def account(self):
+        return f"user:{self.email}"
+
+
+class ValidationError(Exception):
+    def __init__(self, errors):
+        super().__init__('validation failed')
+        self.errors = errors
+
+    @property
+    def message(self):
+        messages = [m for field in self.errors.values() for m in field]
+        extra = len(messages) - 1
+        if extra:
+            return f"{messages[0]} (and {extra} more error{'s' if extra > 1 else ''})"
+        return messages[0]
+
+
+def _is_int(value):
+    return (isinstance(value, int) and not isinstance(value, bool)) or \
+        (isinstance(value, str) and value.strip().lstrip('-').isdigit()) or \
+        (isinstance(value, float) and value.is_integer())
+
+
+def _is_number(value):
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, (int, float)):
+        return True
+    try:
+        float(value)
+        return isinstance(value, str)
+    except (TypeError, ValueError):
+        return False
+
+
+def _is_mobile(value):
+    digits = str(value).replace(' ', '').replace('-', '')
+    return (digits.startswith('+639') and len(digits) == 13 and digits[1:].isdigit()) or \
+        (digits.startswith('09') and len(digits) == 11 and digits.isdigit())
+
+
+def national_mobile(value):
+    """09xxxxxxxxx for a PH mobile given as 09..., +639... or 639..."""
+    digits = str(value).replace(' ', '').replace('-', '').lstrip('+')
+    if digits.startswith('639') and len(digits) == 12:
+        return '0' + digits[2:]
+    return digits
+
+
+def _is_url(value):
+    parts = urlsplit(str(value))
+    return parts.scheme in ('http', 'https') and bool(parts.netloc)
+
+
+def validate_generate(body):
+    """The subset of GenerateVouchers::rules() that decides billing; raises ValidationError."""
+    errors = {}
+
+    def fail(field, message):
+        errors.setdefault(field, []).append(message)
+
+    def present(field):
+        return body.get(field) not in (None, '')
+
+    if not present('amount'):
+        fail('amount', 'Voucher amount is required.')
+    elif not _is_number(body['amount']):
+        fail('amount', 'The amount field must be a number.')
+    elif float(body['amount']) < 0:
+        fail('amount', 'Voucher amount must be at least 0.')
+
+    if not present('count'):
+        fail('count', 'Voucher count is required.')
+    elif not _is_int(body['count']):
+        fail('count', 'The count field must be an integer.')
+    elif int(float(body['count'])) < 1:
+        fail('count', 'You must generate at least 1 voucher.')
+    elif int(float(body['count'])) > 1000:
+        fail('count', 'You cannot generate more than 1000 vouchers at once.')
+
+    if present('prefix') and not (isinstance(body['prefix'], str) and 1 <= len(body['prefix']) <= 10):
+        fail('prefix', 'The prefix field must be between 1 and 10 characters.')
+    if present('mask'):
+        mask = str(body['mask'])
+        if set(mask) - {'*', '-'}:
+            fail('mask', 'The mask may only contain asterisks (*) and hyphens (-).')
+        if mask.count('*') < MASK_ASTERISKS[0]:
+            fail('mask', f"The mask must contain at least {MASK_ASTERISKS[0]} asterisks (*).")
+        if mask.count('*') > MASK_ASTERISKS[1]:
+            fail('mask', f"The mask must contain at most {MASK_ASTERISKS[1]} asterisks (*).")
+    if present('ttl_days') and not (_is_int(body['ttl_days']) and int(float(body['ttl_days'])) >= 1):
+        fail('ttl_days', 'The ttl days field must be at least 1.')
+
+    fields = body.get('input_fields')
+    if isinstance(fields, str):
+        try:
+            fields = json.loads(fields)
+        except ValueError:
+            pass
+    if fields is not None:
+        if not isinstance(fields, list):
+            fail('input_fields', 'The input fields field must be an array.')
+        else:
+            for i, field in enumerate(fields):
+                if field is not None and field not in INPUT_FIELDS:
+                    fail(f'input_fields.{i}', f'The selected input_fields.{i} is invalid.')
+
+    for field in ('validation_mobile', 'feedback_mobile'):
+        if present(field) and not _is_mobile(body[field]):
+            fail(field, f"The {field.replace('_', ' ')} field must be a valid number.")
+    if present('feedback_email') and '@' not in str(body['feedback_email']):
+        fail('feedback_email', 'The feedback email field must be a valid email address.')
+    for field in ('feedback_webhook', 'rider_url'):
+        if present(field) and not _is_url(body[field]):
+            fail(field, f"The {field.replace('_', ' ')} field must be a valid URL.")
+
+    choices = {
+        'settlement_rail': ('INSTAPAY', 'PESONET'),
+        'fee_strategy': ('absorb', 'include', 'add'),
+        'slice_mode': ('fixed', 'open'),
+        'voucher_type': ('redeemable', 'payable', 'settlement'),
+        'rider_og_source': ('message', 'url', 'splash'),
+        'preview_scope': ('full', 'requirements_only', 'none'),
+    }
+    for field, allowed in choices.items():
+        if present(field) and body[field] not in allowed:
+            fail(field, f"The selected {field.replace('_', ' ')} is invalid.")
+    if body.get('voucher_type') in ('payable', 'settlement') and not present('target_amount'):
+        fail('target_amount', f"The target amount field is required when voucher type is {body['voucher_type']}.")
+    if body.get('slice_mode') == 'fixed' and not present('slices'):
+        fail('slices', 'The slices field is required when slice mode is fixed.')
+
+    location = body.get('validation_location')
+    if location is not None:
+        if not isinstance(location, dict):
+            fail('validation_location', 'The validation location field must be an array.')
+        else:
+            for key in ('target_lat', 'target_lng', 'radius_meters', 'on_failure'):
+                if location.get(key) is None:
+                    fail(f'validation_location.{key}',
+                         f"The validation location.{key} field is required when validation location is present.")
+    time_rule = body.get('validation_time')
+    if time_rule is not None and not isinstance(time_rule, dict):
+        fail('validation_time', 'The validation time field must be an array.')
+
+    if errors:
+        raise ValidationError(errors)
+
+
+def validate_deposit(body):
+    """ConfirmDepositController::__invoke() rules; raises ValidationError."""
+    errors = {}
+
+    def fail(field, message):
+        errors.setdefault(field, []).append(message)
+
+    def label(field):
+        # Laravel's displayable attribute: Str::snake() with spaces
+        return re.sub(r'(?<=[a-z])(?=[A-Z])', ' ', field).lower()
+
+    for field, kind in DEPOSIT_FIELDS.items():
+        value = body.get(field)
+        if value is None or value == '':
+            fail(field, f"The {label(field)} field is required.")
+        elif kind is int and not _is_int(value):
+            fail(field, f"The {label(field)} field must be an integer.")
+        elif kind is str and not isinstance(value, str):
+            fail(field, f"The {label(field)} field must be a string.")
+        elif kind is dict and not isinstance(value, dict):
+            fail(field, f"The {label(field)} field must be an array.")
+    if 'amount' not in errors and int(body['amount']) < 1:
+        fail('amount', 'The amount field must be at least 1.')
+    if isinstance(body.get('sender'), dict):
+        for key in SENDER_FIELDS:
+            if not isinstance(body['sender'].get(key), str) or not body['sender'][key]:
+                fail(f'sender.{key}', f"The {label('sender.' + key)} field is required.")
+
+    if errors:
+        raise ValidationError(errors)
+
+
+def to_instructions(body, user=None, base_url=''):
+    """
+    GenerateVouchers::toInstructions() for a validated body.
+
+    Without a user there is no issuer, so metadata is null, as it is in a
+    campaign template.
+    """
+    fields = body.get('input_fields') or []
+    if isinstance(fields, str):
+        fields = json.loads(fields) or []
+    location, time_rule = body.get('validation_location'), body.get('validation_time')
+    validation = None
+    if location is not None or time_rule is not None:
+        validation = {
+            'location': None if location is None else {
+                'required': location['required'] if location.get('required') is not None else True,
+                'target_lat': location['target_lat'],
+                'target_lng': location['target_lng'],
+                'radius_meters': location['radius_meters'],
+                'on_failure': location['on_failure'],
+            },
+            'time': None if time_rule is None else {
+                'window': time_rule.get('window'),
+                'limit_minutes': time_rule.get('limit_minutes'),
+                'track_duration': time_rule['track_duration'] if time_rule.get('track_duration') is not None else True,
+            },
+        }
+    ttl_days = int(float(body['ttl_days'])) if body.get('ttl_days') else None
+    issued = iso(now())
+    return {
+        'cash': {
+            'amount': float(body['amount']),
+            'currency': 'PHP',
+            'validation': {
+                'secret': body.get('validation_secret'),
+                'mobile': body.get('validation_mobile'),
+                'payable': body.get('validation_payable'),
+                'country': 'PH',
+                'location': None,
+                'radius': None,
+            },
+            'settlement_rail': body.get('settlement_rail'),
+            'fee_strategy': body.get('fee_strategy') or 'absorb',
+            'slice_mode': body.get('slice_mode'),
+            'slices': body.get('slices'),
+            'max_slices': body.get('max_slices'),
+            'min_withdrawal': body.get('min_withdrawal'),
+        },
+        'voucher_type': body.get('voucher_type'),
+        'target_amount': body.get('target_amount'),
+        'rules': body.get('rules'),
+        'inputs': {'fields': fields},
+        'feedback': {
+            'email': body.get('feedback_email'),
+            'mobile': body.get('feedback_mobile'),
+            'webhook': body.get('feedback_webhook'),
+        },
+        'rider': {
+            'message': body.get('rider_message'),
+            'url': body.get('rider_url'),
+            'redirect_timeout': body.get('rider_redirect_timeout'),
+            'splash': body.get('rider_splash'),
+            'splash_timeout': body.get('rider_splash_timeout'),
+            'og_source': body.get('rider_og_source'),
+        },
+        'validation': validation,
+        'count': int(float(body['count'])),
+        'prefix': body.get('prefix') or '',
+        'mask': body.get('mask') or '',
+        'ttl': f"P{ttl_days}D" if ttl_days else None,
+        'metadata': None if user is None else {
+            'version': '1.0.0',
+            'system_name': 'Redeem-X',
+            'copyright': None,
+            'licenses': [],
+            'issuer_id': str(user.id),
+            'issuer_name': user.name,
+            'issuer_email': user.email,
+            'redemption_urls': {'web': f"{base_url}/disburse"},
+            'primary_url': f"{base_url}/disburse",
+            'created_at': issued,
+            'issued_at': issued,
+            'public_key': None,
+            'preview_enabled': body['preview_enabled'] if 'preview_enabled' in body else True,
+            'preview_scope': body.get('preview_scope') or 'full',
+            'preview_message': body.get('preview_message'),
+        },
+    }
+
+
+def fee_calculation(instructions):
+    """FeeCalculator::calculateAdjustedAmount()"""
+    amount = instructions['cash']['amount']
+    strategy = instructions['cash']['fee_strategy'] or 'absorb'
+    rail = instructions['cash']['settlement_rail'] or ('INSTAPAY' if amount < INSTAPAY_LIMIT else 'PESONET')
+    fee = RAIL_FEES[rail]
+    adjusted = max(0, amount - fee / 100) if strategy == 'include' else amount
+    total_cost = (amount + fee / 100) * 100 if strategy == 'add' else amount * 100
+    return {
+        'original_amount': amount,
+        'adjusted_amount': adjusted,
+        'fee_amount': fee,
+        'total_cost': total_cost,
+        'strategy': strategy,
+        'rail': rail,
+    }
+
+
+class StubApi:
+    """The stub's state and its operation handlers, keyed by api.json operationId."""
+
+    def __init__(self, router, balance=100000.0, system_token=None, system_balance=0.0, campaigns=(),
+                 tenants=(), payment_requests=()):
+        self.router = router
+        # Every user owns every campaign (bulk_vouchers.py export)
+        self.campaigns = {n: {'id': n, 'name': c['name'], 'slug': c['name'], 'instructions': c['instructions']}
+                          for n, c in enumerate(campaigns, start=1)}
+        self.ledger = Ledger()
+        self.opening_balance = round(balance * 100)
+        self.users = {}
+        self.vouchers = {}
+        self.idempotency = {}
+        self.items = pricelist()
+        self.system = User(1, SYSTEM_EMAIL, system_token)
+        self.ledger.post('external', self.system.account, round(system_balance * 100), 'opening balance')
+        if system_token:
+            self.users[system_token] = self.system
+        # Deposit recipients by national mobile, and the pending payment requests deposits can match
+        self.mobiles = {national_mobile(t.mobile): t.token for t in tenants if t.mobile}
+        self.payment_requests = list(payment_requests)
+        self.deposits = {'topup': 0, 'payment': 0, 'unresolved': 0}
+        self.handlers = {
+            'system.balances': self.system_balances,
+            'wallet.balance': self.wallet_balance,
+            'wallet.transactions': self.wallet_transactions,
+            'transactions.index': self.list_transactions,
+            'generateVouchers': self.generate_vouchers,
+            'vouchers.show': self.show_voucher,
+            'listCampaigns': self.list_campaigns,
+            'vouchers.bulk-create': self.bulk_create,
+        }
+
+    def user(self, token):
+        user = self.users.get(token)
+        if user is None:
+            user = User(len(self.users) + 2, f"stub-{len(self.users) + 1}@example.com", token)
+            self.users[token] = user
+            self.ledger.post('external', user.account, self.opening_balance, 'opening balance')
+        return user
+
+    @staticmethod
+    def success(data, status=200):
+        return status, {'data': data, 'meta': {'timestamp': iso(now()), 'version': 'v1'}}
+
+    def system_balances(self, request):
+        escrow = self.ledger.accounts('cash:')
+        products = []
+        if escrow:
+            products.append({'index': 'cash.amount', 'name': 'Amount', 'balance': pesos(sum(escrow.values())),
+                             'currency': 'PHP', 'wallet_id': 1})
+        for n, (index, item) in enumerate(self.items.items(), start=2):
+            account = f"product:{index}"
+            if account in self.ledger.balances:
+                products.append({'index': index, 'name': item.label, 'balance': pesos(self.ledger.balance(account)),
+                                 'currency': 'PHP', 'wallet_id': n})
+        system = pesos(self.ledger.balance(self.system.account))
+        total = sum(p['balance'] for p in products)
+        return self.success({
+            'system': {'email': self.system.email, 'balance': system, 'currency': 'PHP'},
+            'products': products,
+            'totals': {'system': system, 'products': total, 'combined': system + total},
+        })
+
+    def wallet_balance(self, request):
+        centavos = self.ledger.balance(request['user'].account)
+        return 200, {
+            'data': {'balance': f"{centavos / 100:.2f}", 'currency': 'PHP', 'balance_cents': centavos},
+            'meta': {'timestamp': iso(now()), 'version': 'v1'},
+        }
+
+    @staticmethod
+    def page(request, items):
+        """One page of items and its pagination block, as ListWalletTransactions builds them."""
+        try:
+            per_page = min(max(int(request['query'].get('per_page', 20)), 1), 100)
+            page = max(int(request['query'].get('page', 1)), 1)
+        except ValueError:
+            per_page, page = 20, 1
+        offset = (page - 1) * per_page
+        rows = items[offset:offset + per_page]
+        return rows, {
+            'current_page': page, 'per_page': per_page, 'total': len(items),
+            'last_page': max(1, -(-len(items) // per_page)),
+            'from': offset + 1 if rows else None, 'to': offset + len(rows) if rows else None,
+        }
+
+    def wallet_transactions(self, request):
+        """The user's postings, newest first, as confirmed wallet transactions."""
+        user = request['user']
+        postings = [(n, entry) for n, entry in enumerate(self.ledger.entries, start=1) if user.account in entry[:2]]
+        rows, pagination = self.page(request, postings[::-1])
+        data = []
+        for n, (debit, credit, centavos, memo, moment) in rows:
+            withdraw = debit == user.account
+            other = credit if withdraw else debit
+            data.append({
+                'id': n, 'uuid': f"stub-{n:08d}", 'type': 'withdraw' if withdraw else 'deposit',
+                'amount': pesos(centavos), 'currency': 'PHP', 'confirmed': True, 'wallet_id': user.id,
+                'sender_name': None if withdraw else memo, 'sender_identifier': None,
+                'payment_method': 'netbank' if other == 'external' else None,
+                'deposit_type': 'manual_topup' if other == 'external' else None,
+                'voucher_code': memo.split()[-1] if other.startswith(('cash:', 'product:')) else None,
+                'disbursement': None, 'created_at': iso(moment), 'updated_at': iso(moment),
+            })
+        return self.success({'data': data, 'pagination': pagination})
+
+    def list_transactions(self, request):
+        rows, pagination = self.page(request, [])
+        return self.success({'data': rows, 'pagination': pagination})
+
+    def _code(self, prefix, mask):
+        while True:
+            code = ''.join(random.choice(CODE_ALPHABET) if c == '*' else c for c in mask or '****')
+            code = f"{prefix}-{code}" if prefix else code
+            if code not in self.vouchers:
+                return code
+
+    def generate_vouchers(self, request):
+        body = request['json'] if isinstance(request['json'], dict) else {}
+        user = request['user']
+        key = request['headers'].get('idempotency-key')
+        if key and (user.email, key) in self.idempotency:
+            return self.idempotency[(user.email, key)]
+
+        try:
+            validate_generate(body)
+        except ValidationError as e:
+            return 422, error_body(request['route'], 422, e.message, e.errors)
+
+        instructions = to_instructions(body, user, request['base_url'])
+        count = instructions['count']
+        if not self.affordable(user, instructions, count):
+            return 403, error_body(request['route'], 403, 'Insufficient wallet balance to generate vouchers.',
+                                   errors='', meta=[])
+        vouchers = self.issue(user, instructions, count)
+
+        response = self.success({
+            'count': count,
+            'vouchers': vouchers,
+            'total_amount': instructions['cash']['amount'] * count,
+            'currency': 'PHP',
+        }, status=201)
+        if key:
+            self.idempotency[(user.email, key)] = response
+        return response
+
+    def price(self, instructions):
+        """(escrow, [(index, unit price)]) for one voucher, in centavos."""
+        calculation = fee_calculation(instructions)
+        per_voucher = [(c.index, c.unit_price) for c in charges(instructions)
+                       for _ in range(c.pay_count)]
+        return round(calculation['adjusted_amount'] * 100), per_voucher
+
+    def affordable(self, user, instructions, count):
+        """VoucherGenerationGate: face value and fees of `count` vouchers."""
+        escrow, per_voucher = self.price(instructions)
+        return self.ledger.balance(user.account) >= count * (escrow + sum(price for _, price in per_voucher))
+
+    def issue(self, user, instructions, count):
+        """Create vouchers, escrow their cash and pay their charges; returns their VoucherData."""
+        calculation = fee_calculation(instructions)
+        escrow, per_voucher = self.price(instructions)
+        created = now()
+        ttl = int(instructions['ttl'][1:-1]) if instructions['ttl'] else DEFAULT_TTL_DAYS
+        vouchers = []
+        for _ in range(count):
+            code = self._code(instructions['prefix'], instructions['mask'])
+            self.ledger.post(user.account, f"cash:{code}", escrow, f"escrow {code}")
+            for index, price in per_voucher:
+                self.ledger.post(user.account, f"product:{index}", price, f"{index} {code}")
+            voucher = {'code': code, 'owner': user, 'instructions': instructions, 'calculation': calculation,
+                       'created_at': created, 'expires_at': created + timedelta(days=ttl)}
+            self.vouchers[code] = voucher
+            vouchers.append(self.voucher_data(voucher))
+        return vouchers
+
+    def list_campaigns(self, request):
+        return 200, [{'id': c['id'], 'name': c['name'], 'slug': c['slug'], 'instructions': c['instructions']}
+                     for c in self.campaigns.values()]
+
+    def bulk_create(self, request):
+        """BulkCreateVouchers: one count=1 generation per entry, from the campaign's instructions."""
+        body = request['json'] if isinstance(request['json'], dict) else {}
+        user = request['user']
+        key = request['headers'].get('idempotency-key')
+        if key and (user.email, key) in self.idempotency:
+            return self.idempotency[(user.email, key)]
+
+        errors = {}
+        campaign = self.campaigns.get(body.get('campaign_id')) if _is_int(body.get('campaign_id')) else None
+        if body.get('campaign_id') in (None, ''):
+            errors['campaign_id'] = ['Campaign ID is required.']
+        elif campaign is None:
+            errors['campaign_id'] = ['The specified campaign does not exist.']
+        entries = body.get('vouchers')
+        if not entries:
+            errors['vouchers'] = ['Vouchers array is required.']
+        elif not isinstance(entries, list):
+            errors['vouchers'] = ['The vouchers field must be an array.']
+        elif len(entries) > 100:
+            errors['vouchers'] = ['You cannot create more than 100 vouchers at once.']
+        else:
+            for i, entry in enumerate(entries):
+                mobile = (entry or {}).get('mobile') if isinstance(entry, dict) else None
+                if mobile and not _is_mobile(mobile):
+                    errors[f'vouchers.{i}.mobile'] = ['Invalid Philippine mobile number.']
+        if errors:
+            e = ValidationError(errors)
+            return 422, error_body(request['route'], 422, e.message, e.errors)
+
+        if not self.affordable(user, dict(campaign['instructions'], count=len(entries)), len(entries)):
+            return 403, error_body(request['route'], 403, 'Insufficient wallet balance to generate vouchers.',
+                                   errors='', meta=[])
+        vouchers = []
+        for entry in entries:
+            instructions = json.loads(json.dumps(campaign['instructions']))
+            instructions['count'] = 1
+            if isinstance(entry, dict) and entry.get('mobile'):
+                instructions['cash']['validation']['mobile'] = entry['mobile']
+            vouchers += self.issue(user, instructions, 1)
+
+        response = self.success({
+            'count': len(vouchers),
+            'vouchers': vouchers,
+            'total_amount': len(vouchers) * campaign['instructions']['cash']['amount'],
+            'currency': 'PHP',
+        }, status=201)
+        if key:
+            self.idempotency[(user.email, key)] = response
+        return response
+
+    def voucher_data(self, voucher):
+        owner = voucher['owner']
+        instructions = voucher['instructions']
+        calculation = voucher['calculation']
+        return {
+            'code': voucher['code'],
+            'owner': {'id': owner.id, 'name': owner.name, 'email': owner.email, 'mobile': None},
+            'created_at': iso(voucher['created_at']),
+            'starts_at': None,
+            'expires_at': iso(voucher['expires_at']),
+            'redeemed_at': None,
+            'processed_on': iso(voucher['created_at']),
+            'processed': True,
+            'instructions': instructions,
+            'inputs': [],
+            'cash': {
+                'amount': calculation['adjusted_amount'],
+                'currency': 'PHP',
+                'meta': {'notes': 'Cash entity with fee calculation',
+                         'original_amount': calculation['original_amount'], 'fee_calculation': calculation},
+            },
+            'contact': None,
+            'disbursement': None,
+            'status': 'active',
+            'amount': instructions['cash']['amount'],
+            'currency': 'PHP',
+            'is_expired': False,
+            'is_redeemed': False,
+            'can_redeem': True,
+            'external_metadata': None,
+            'target_amount': instructions['target_amount'],
+            'voucher_type': instructions['voucher_type'] or 'redeemable',
+            'slice_mode': instructions['cash']['slice_mode'],
+            'max_slices': instructions['cash']['max_slices'],
+            'slice_amount': None,
+            'min_withdrawal': instructions['cash']['min_withdrawal'],
+            'consumed_slices': 0,
+            'remaining_slices': 0,
+            'remaining_balance': 0.0,
+            'can_withdraw': False,
+            'disbursements': [],
+        }
+
+    def show_voucher(self, request):
+        voucher = self.vouchers.get(request['params']['voucher'])
+        if voucher is None:
+            return 404, error_body(request['route'], 404, 'No query results for model [LBHurtado\\Voucher\\Models\\Voucher].')
+        if voucher['owner'] is not request['user']:
+            return 403, error_body(request['route'], 403, 'You do not have permission to view this voucher.',
+                                   errors='', meta=[])
+        return self.success({
+            'voucher': self.voucher_data(voucher),
+            'redemption_count': 0,
+            'external_metadata': None,
+            'timing': None,
+            'validation_results': None,
+        })
+
+    def confirm_deposit(self, body):
+        """CanConfirmDeposit::confirmDeposit() plus CustomNetbankPaymentGateway's classification."""
+        try:
+            validate_deposit(body if isinstance(body, dict) else {})
+        except ValidationError as e:
+            return 422, {'message': e.message, 'errors': e.errors}
+
+        account = body['recipientAccountNumber']
+        token = self.mobiles.get(national_mobile(account[len(DEPOSIT_ALIAS):])) \
+            if account.startswith(DEPOSIT_ALIAS) else None
+        if token is None:
+            # confirmDeposit() logs and returns false; the controller still answers 204
+            self.deposits['unresolved'] += 1
+            return 204, None
+
+        centavos = int(body['amount']) * 100
+        self.ledger.post('external', self.user(token).account, centavos, f"deposit {body['referenceNumber']}")
+        # matchByAmountAndTime(): the newest pending request for the amount; it stays pending until confirmed
+        matches = [pr for pr in self.payment_requests if pr['amount'] * 100 == centavos]
+        if matches:
+            request = matches[-1]
+            self.ledger.post(self.system.account, f"cash:{request['voucher_code']}", centavos,
+                             f"payment {request['reference_id']}")
+            self.deposits['payment'] += 1
+        else:
+            self.deposits['topup'] += 1
+        return 204, None
+
+    def dispatch(self, method, target, headers, body):
+        """(status, payload) for one request; a None payload is sent without a body."""
+        path = urlsplit(target).path
+        if path == '/__stub/ledger':
+            return 200, self.ledger.summary()
+        if path == '/__stub/deposits':
+            return 200, dict(self.deposits)
+        if path == CONFIRM_DEPOSIT_PATH:
+            if method != 'POST':
+                return 405, {'message': f"The {method} method is not supported for route {path.lstrip('/')}. "
+                                        f"Supported methods: POST."}
+            try:
+                return self.confirm_deposit(json.loads(body) if body else None)
+            except ValueError:
+                return self.confirm_deposit(None)
+
+        route, params = self.router.match(method, path)
+        if route is None:
+            if params:
+                return 405, {'message': f"The {method} method is not supported for route {path.lstrip('/')}. "
+                                        f"Supported methods: {', '.join(params)}."}
+            return 404, {'message': f"The route {path.lstrip('/')} could not be found."}
+
+        auth = headers.get('authorization', '')
+        token = auth[7:].strip() if auth.lower().startswith('bearer ') else ''
+        if route.requires_auth and not token:
+            return 401, error_body(route, 401, 'Unauthenticated.')
+
+        handler = self.handlers.get(route.operation_id)
+        if handler is None:
+            return 501, {'message': f"{route.operation_id} is not implemented by api_stub.py"}
+
+        try:
+            payload = json.loads(body) if body else None
+        except ValueError:
+            payload = None
+        request = {
+            'route': route, 'params': params, 'headers': headers, 'json': payload,
+            'query': {key: values[-1] for key, values in parse_qs(urlsplit(target).query).items()},
+            'user': self.user(token) if token else None,
+            'base_url': f"http://{headers.get('host', 'localhost')}",
+        }
+        return handler(request)
+
+
+class StubServer:
+    """HTTP/1.1 keep-alive front end for a StubApi (single-threaded, so no locking)."""
+
+    def __init__(self, api, verbose=False):
+        self.api = api
+        self.verbose = verbose
+        self.requests = 0
+
+    @staticmethod
+    async def respond(writer, status, payload, keep_alive):
+        data = b'' if payload is None else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        head = (f"HTTP/1.1 {status} {STATUS_REASONS.get(status, '')}\r\n"
+                + (f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                   if payload is not None else '')
+                + f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + data)
+        await writer.drain()
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                # A line past the stream limit (64 KiB) raises ValueError; answer
+                # like the app's web server would, then close since the rest of
+                # the request cannot be framed
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    await self.respond(writer, 414, {'message': 'URI Too Long'}, keep_alive=False)
+                    break
+                if not line.strip():
+                    break
+                method, target, version = line.decode('latin-1').split(' ', 2)
+                headers = {}
+                try:
+                    while True:
+                        header = await reader.readline()
+                        if header in (b'\r\n', b'\n', b''):
+                            break
+                        name, _, value = header.decode('latin-1').partition(':')
+                        headers[name.strip().lower()] = value.strip()
+                except ValueError:
+                    await self.respond(writer, 431, {'message': 'Request Header Fields Too Large'}, keep_alive=False)
+                    break
+                body = await reader.readexactly(int(headers.get('content-length') or 0))
+
+                status, payload = self.api.dispatch(method.upper(), target, headers, body)
+                self.requests += 1
+                if self.verbose:
+                    print(f"  {status} {method} {target}")
+
+                keep_alive = version.strip() == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                await self.respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve an in-memory stand-in for the redeem-x billing endpoints.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--spec', type=Path, default=SPEC_PATH, help='OpenAPI document (default: api.json)')
+    parser.add_argument('--balance', type=float, default=100000.0, help='Opening wallet balance for each new token')
+    parser.add_argument('--system-token', help='Bearer token of the system user')
+    parser.add_argument('--system-balance', type=float, default=0.0)
+    parser.add_argument('--campaigns', type=Path, help='bulk_vouchers.py export file: campaigns every user owns')
+    parser.add_argument('--tenants', type=Path,
+                        help='billing:provision-tenants file: tenants with a mobile receive deposits')
+    parser.add_argument('--payment-requests', type=Path,
+                        help='webhook:seed-payment-requests file: deposits of these amounts are payments')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Log every request')
+    args = parser.parse_args()
+
+    router = Router.from_spec(args.spec)
+    campaigns = []
+    if args.campaigns:
+        with open(args.campaigns, 'r', encoding='utf-8') as f:
+            campaigns = json.load(f)['campaigns']
+    tenants = load_tenants(args.tenants) if args.tenants else ()
+    payment_requests = []
+    if args.payment_requests:
+        with open(args.payment_requests, 'r', encoding='utf-8') as f:
+            payment_requests = json.load(f)['payment_requests']
+    api = StubApi(router, args.balance, args.system_token, args.system_balance, campaigns,
+                  tenants, payment_requests)
+    paths = len({route.template for route in router.routes})
+    implemented = sum(1 for route in router.routes if route.operation_id in api.handlers)
+    print(f"🧪 {args.spec.name}: {paths} paths, {len(router.routes)} operations ({implemented} implemented)")
+    print(f"🚀 http://{args.host}:{args.port}{API_PREFIX}  (ledger: /__stub/ledger)")
+    if api.mobiles:
+        print(f"🏦 {CONFIRM_DEPOSIT_PATH}: {len(api.mobiles)} recipients, {len(payment_requests)} payment requests")
+    try:
+        asyncio.run(StubServer(api, args.verbose).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
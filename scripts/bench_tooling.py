@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Benchmark the collection tooling at 1×, 10× and 100× the billing collection.
+
+Synthesizes collections of 29, 290 and 2,900 folders by repeating the real
+folders, then times and memory-profiles each stage of the pipeline:
+
+    load    json.load of the synthesized file (collection_passes.load_collection)
+    clone   building folders from the baseline with the generate_postman_folders
+            builders (FOLDER_SPECS, cycled up to the scale)
+    patch   every registered fix_* pass (rebuild_billing_collection.py)
+    dump    save_collection (indent=2)
+    stream  the same passes through collection_stream.stream_passes
+
+Times are the best of --repeat runs. Peak memory is a separate tracemalloc
+run, so tracing does not slow down the timed runs. Every run is appended to
+a JSONL history. --check compares each stage with the median of the last
+--window runs on the same machine and Python version, and exits 1 when a stage
+is more than --threshold slower.
+
+Usage:
+    python3 scripts/bench_tooling.py
+    python3 scripts/bench_tooling.py --scales 29 290 --stages load patch dump
+    python3 scripts/bench_tooling.py --check --threshold 0.25
+    python3 scripts/bench_tooling.py --show
+"""
+
+import argparse
+import copy
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from collection_passes import COLLECTION_PATH, load_collection, resolve_order, run_passes, save_collection
+from collection_stream import stream_passes
+from generate_all_folders import FOLDER_SPECS
+import rebuild_billing_collection  # noqa: F401  (registers the fix passes)
+
+HISTORY_PATH = Path(__file__).parent / '.cache' / 'bench_history.jsonl'
+SCALES = (29, 290, 2900)
+STAGES = ('load', 'clone', 'patch', 'dump', 'stream')
+
+
+def synthesize(collection, folders):
+    """A copy of collection with its folders repeated (and renamed) up to `folders` folders."""
+    source = collection['item']
+    synthetic = {key: value for key, value in collection.items() if key != 'item'}
+    synthetic['item'] = []
+    for n in range(folders):
+        folder = copy.deepcopy(source[n % len(source)])
+        copy_number = n // len(source)
+        if copy_number:
+            folder['name'] = f"{folder['name']} [{copy_number}]"
+        synthetic['item'].append(folder)
+    return synthetic
+
+
+class Bench:
+    """The stages for one scale, sharing a synthesized collection on disk."""
+
+    def __init__(self, collection, folders, workdir):
+        self.folders = folders
+        self.collection = synthesize(collection, folders)
+        self.baseline = collection['item'][0]
+        self.passes = resolve_order()
+        self.path = Path(workdir) / f"bench-{folders}.postman_collection.json"
+        save_collection(self.collection, self.path)
+        self.out = Path(workdir) / f"bench-{folders}.out.json"
+
+    def load(self):
+        load_collection(self.path)
+
+    def clone(self):
+        for n in range(self.folders):
+            FOLDER_SPECS[n % len(FOLDER_SPECS)][2].build(self.baseline)
+
+    def dump(self):
+        save_collection(self.collection, self.out)
+
+    def stream(self):
+        stream_passes(self.path, self.out, [p for p in self.passes if p.scope == 'folder'])
+
+    def measure(self, stage, repeat):
+        """(best seconds, peak traced bytes) for a stage."""
+        if stage == 'patch':
+            # Each run patches a fresh copy, so every run does the same work; the copy is not timed
+            def setup():
+                collection = copy.deepcopy(self.collection)
+                return lambda: run_passes(collection, self.passes)
+        else:
+            def setup():
+                return getattr(self, stage)
+
+        best = float('inf')
+        for _ in range(repeat):
+            run = setup()
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+        run = setup()
+        tracemalloc.start()
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return best, peak
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=Path(__file__).parent, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment():
+    return {'machine': platform.node(), 'python': platform.python_version(), 'cpus': os.cpu_count()}
+
+
+def load_history(path):
+    if not path.exists():
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def append_history(path, record):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def baseline(history, env, window):
+    """{(scale, stage): median seconds} over the last `window` comparable runs."""
+    comparable = [r for r in history if r.get('environment', {}).get('machine') == env['machine']
+                  and r.get('environment', {}).get('python') == env['python']][-window:]
+    samples = {}
+    for record in comparable:
+        for scale, stages in record['results'].items():
+            for stage, result in stages.items():
+                samples.setdefault((scale, stage), []).append(result['seconds'])
+    return {key: statistics.median(values) for key, values in samples.items()}
+
+
+def regressions(results, reference, threshold, noise=0.005):
+    """
+    [(scale, stage, seconds, reference seconds)] for stages slower than
+    reference × (1 + threshold) and by more than `noise` seconds.
+    """
+    slower = []
+    for scale, stages in results.items():
+        for stage, result in stages.items():
+            before = reference.get((scale, stage))
+            if before and result['seconds'] > max(before * (1 + threshold), before + noise):
+                slower.append((scale, stage, result['seconds'], before))
+    return slower
+
+
+def print_results(results, reference=None):
+    print(f"\n📊 {'folders':>7}  {'stage':7}  {'time':>10}  {'per folder':>11}  {'peak mem':>10}  {'vs median':>9}")
+    for scale, stages in results.items():
+        for stage, result in stages.items():
+            before = (reference or {}).get((scale, stage))
+            change = f"{result['seconds'] / before - 1:+9.1%}" if before else f"{'':9}"
+            print(f"   {scale:>7}  {stage:7}  {result['seconds'] * 1000:8.1f}ms  "
+                  f"{result['seconds'] / int(scale) * 1e6:9.0f}µs  {result['peak_bytes'] / 2**20:8.1f}MB  {change}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the collection tooling at growing scales.')
+    parser.add_argument('collection', nargs='?', type=Path, default=COLLECTION_PATH)
+    parser.add_argument('--scales', nargs='+', type=int, default=list(SCALES), metavar='FOLDERS')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES))
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per stage (best is kept)')
+    parser.add_argument('--history', type=Path, default=HISTORY_PATH, help=f'JSONL history (default: {HISTORY_PATH})')
+    parser.add_argument('--no-record', action='store_true', help='Do not append this run to the history')
+    parser.add_argument('--check', action='store_true', help='Exit 1 if a stage regressed against the history')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed slowdown for --check (0.25 = 25%%)')
+    parser.add_argument('--window', type=int, default=5, help='History runs the median is taken over')
+    parser.add_argument('--show', action='store_true', help='Print the history and exit')
+    args = parser.parse_args()
+
+    history = load_history(args.history)
+    if args.show:
+        for record in history:
+            totals = {scale: sum(s['seconds'] for s in stages.values()) for scale, stages in record['results'].items()}
+            print(f"  {record['timestamp']}  {record.get('commit') or '-':9}  "
+                  + '  '.join(f"{scale}: {seconds * 1000:.0f}ms" for scale, seconds in totals.items()))
+        return
+
+    collection = load_collection(args.collection)
+    env = environment()
+    print(f"🏋️  {args.collection.name}: {len(collection['item'])} folders → scales {args.scales}, "
+          f"stages {', '.join(args.stages)}, best of {args.repeat}")
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='bench-tooling-') as workdir:
+        for scale in args.scales:
+            bench = Bench(collection, scale, workdir)
+            results[str(scale)] = {}
+            for stage in args.stages:
+                seconds, peak = bench.measure(stage, args.repeat)
+                results[str(scale)][stage] = {'seconds': round(seconds, 6), 'peak_bytes': peak}
+                print(f"  ✓ {scale:>5} folders  {stage:7} {seconds * 1000:9.1f}ms")
+
+    reference = baseline(history, env, args.window)
+    print_results(results, reference)
+
+    if not args.no_record:
+        append_history(args.history, {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'environment': env,
+            'repeat': args.repeat,
+            'results': results,
+        })
+        print(f"\n💾 {args.history}")
+
+    if args.check:
+        slower = regressions(results, reference, args.threshold)
+        if not reference:
+            print('⚠️  No comparable history yet, nothing to check against')
+        for scale, stage, seconds, before in slower:
+            print(f"❌ {stage} at {scale} folders: {seconds * 1000:.1f}ms vs median {before * 1000:.1f}ms")
+        if slower:
+            sys.exit(1)
+        if reference:
+            print(f"✅ No stage more than {args.threshold:.0%} slower than the last {args.window} runs")
+
+
+if __name__ == '__main__':
+    main()
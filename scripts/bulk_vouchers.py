@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Batch voucher creation through POST /api/v1/vouchers/bulk-create.
+
+bulk-create generates vouchers from a campaign the caller owns (up to 100
+per request). It takes no instructions of its own, so every distinct
+Generate Voucher body in the collection becomes a campaign, named by a hash
+of the body without its count:
+
+    python3 scripts/bulk_vouchers.py export -o storage/app/billing-campaigns.json
+    php artisan billing:provision-tenants 8 --campaigns=storage/app/billing-campaigns.json
+
+With --bulk N, collection_runner.py and load_generator.py send their
+Generate Voucher requests as bulk-create batches of up to N vouchers.
+CampaignDirectory finds the campaign for the body (GET /api/v1/campaigns,
+once per token), and BulkCoalescer batches the requests. A folder with
+count=10 becomes one batch. In the load generator, requests from different
+virtual users on the same token and campaign that arrive within --bulk-wait
+seconds share a batch. Each caller gets back its own slice of the
+vouchers, so the per-folder fee checks still hold: bulk-create charges each
+voucher as a count=1 generation.
+
+Usage:
+    python3 scripts/bulk_vouchers.py export -o storage/app/billing-campaigns.json
+    python3 scripts/bulk_vouchers.py list
+    python3 scripts/collection_runner.py -c 1 --tenants storage/app/billing-tenants.json --bulk 100
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from api_stub import ValidationError, to_instructions, validate_generate
+from collection_passes import COLLECTION_PATH, load_collection
+from http_pool import HttpResponse
+from response_validator import NOT_JSON
+
+MAX_BATCH = 100  # BulkCreateVouchers::rules() vouchers max
+CAMPAIGN_PREFIX = 'billing'
+_IGNORED_KEYS = ('count',)
+
+
+class BulkError(Exception):
+    """A Generate Voucher request that cannot go through bulk-create."""
+
+
+class BulkResponse(HttpResponse):
+    """
+    A POST /vouchers response rebuilt from bulk-create batches. It was never
+    sent by the server, so it carries the schema violations of the real
+    bulk-create responses behind it instead of being validated itself.
+    """
+
+    def __init__(self, *args, violations=()):
+        super().__init__(*args)
+        self.violations = list(violations)
+
+
+def campaign_name(body):
+    """Campaign name for a Generate Voucher body: the same for bodies that differ only in count."""
+    template = {key: value for key, value in body.items() if key not in _IGNORED_KEYS}
+    digest = hashlib.sha256(json.dumps(template, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+    return f"{CAMPAIGN_PREFIX}-{digest[:12]}"
+
+
+def campaign_instructions(body):
+    """The campaign template for a body: toInstructions() with count 1 and no issuer."""
+    return dict(to_instructions(dict(body, count=1)), count=1)
+
+
+def collection_campaigns(collection):
+    """
+    ({name: (folder name, body)}, {folder name: error}) for the collection's
+    Generate Voucher requests. Bodies the API would reject with a 422 cannot
+    become campaigns.
+    """
+    campaigns, rejected = {}, {}
+    for folder in collection.get('item', []):
+        for item in folder.get('item', []):
+            request = item.get('request') or {}
+            url = request.get('url', '')
+            raw = url.get('raw', '') if isinstance(url, dict) else url
+            if request.get('method') != 'POST' or not raw.split('?')[0].rstrip('/').endswith('/api/v1/vouchers'):
+                continue
+            try:
+                body = json.loads((request.get('body') or {}).get('raw') or '{}')
+            except ValueError:
+                continue
+            try:
+                validate_generate(body)
+            except ValidationError as e:
+                rejected[folder['name']] = e.message
+                continue
+            campaigns.setdefault(campaign_name(body), (folder['name'], body))
+    return campaigns, rejected
+
+
+def bulk_url(url):
+    """POST /api/v1/vouchers → POST /api/v1/vouchers/bulk-create"""
+    return url.split('?')[0].rstrip('/') + '/bulk-create'
+
+
+def campaigns_url(url):
+    return url.split('?')[0].rstrip('/').rsplit('/vouchers', 1)[0] + '/campaigns'
+
+
+class CampaignDirectory:
+    """Campaign ids by name, fetched once per bearer token."""
+
+    def __init__(self, pool, timeout=30.0):
+        self.pool = pool
+        self.timeout = timeout
+        self.campaigns = {}
+
+    async def _fetch(self, url, headers):
+        response = await self.pool.request('GET', url, {k: v for k, v in headers.items()
+                                                        if k.lower() in ('authorization', 'accept')},
+                                           timeout=self.timeout)
+        if response.status != 200:
+            raise BulkError(f"GET {url}: status {response.status}")
+        try:
+            campaigns = response.json() or []
+        except ValueError:
+            raise BulkError(f"GET {url}: response is not JSON") from None
+        if isinstance(campaigns, dict) and isinstance(campaigns.get('data'), list):
+            campaigns = campaigns['data']
+        if not isinstance(campaigns, list) or not all(isinstance(c, dict) and 'name' in c and 'id' in c
+                                                      for c in campaigns):
+            raise BulkError(f"GET {url}: expected a list of campaigns with name and id, "
+                            f"got {json.dumps(campaigns)[:120]}")
+        return {c['name']: c['id'] for c in campaigns}
+
+    async def campaign_id(self, generate_url, headers, name):
+        token = headers.get('Authorization')
+        if token not in self.campaigns:
+            # Concurrent callers on one token share a single listCampaigns request
+            self.campaigns[token] = asyncio.ensure_future(self._fetch(campaigns_url(generate_url), headers))
+        try:
+            ids = await self.campaigns[token]
+        except BulkError:
+            del self.campaigns[token]
+            raise
+        if name not in ids:
+            raise BulkError(f"no campaign {name} for this user "
+                            f"(bulk_vouchers.py export, then billing:provision-tenants --campaigns)")
+        return ids[name]
+
+
+class _Batch:
+    def __init__(self, headers):
+        self.headers = headers
+        self.waiters = []
+        self.timer = None
+
+    @property
+    def count(self):
+        return sum(count for count, _, _ in self.waiters)
+
+
+class BulkCoalescer:
+    """
+    Turn Generate Voucher requests into bulk-create batches.
+
+    Requests for the same token and campaign are queued. The queue is sent
+    once it holds batch_size vouchers, or after `wait` seconds (right away
+    when wait is 0). Requests larger than a batch are split. Each caller gets
+    a BulkResponse in the POST /vouchers shape holding only its own
+    vouchers. Its elapsed time runs from when it was queued. With validators
+    (response_validator.py), every real bulk-create response is checked
+    against its own schema and the violations ride on the BulkResponses.
+    """
+
+    def __init__(self, pool, batch_size=MAX_BATCH, wait=0.0, timeout=30.0, validators=None):
+        if not 1 <= batch_size <= MAX_BATCH:
+            raise ValueError(f"Batch size must be between 1 and {MAX_BATCH}")
+        self.pool = pool
+        self.batch_size = batch_size
+        self.wait = wait
+        self.timeout = timeout
+        self.validators = validators
+        self.pending = {}
+        self.tasks = set()
+        self.requests = 0
+        self.vouchers = 0
+
+    async def generate(self, url, headers, campaign_id, count):
+        loop = asyncio.get_running_loop()
+        key = (bulk_url(url), headers.get('Authorization'), campaign_id)
+        batch = self.pending.get(key)
+        if batch is None:
+            batch = self.pending[key] = _Batch(headers)
+            if self.wait:
+                batch.timer = loop.call_later(self.wait, self._flush, key)
+        future = loop.create_future()
+        batch.waiters.append((count, future, time.perf_counter()))
+        if not self.wait or batch.count >= self.batch_size:
+            self._flush(key)
+        return await future
+
+    def _flush(self, key):
+        batch = self.pending.pop(key, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        task = asyncio.ensure_future(self._send(key, batch))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _send(self, key, batch):
+        url, _, campaign_id = key
+        vouchers, first, failure, violations = [], None, None, []
+        remaining = batch.count
+        try:
+            while remaining > 0:
+                size = min(self.batch_size, remaining)
+                headers = dict(batch.headers)
+                headers['Idempotency-Key'] = str(uuid.uuid4())
+                body = json.dumps({'campaign_id': campaign_id, 'vouchers': [{} for _ in range(size)]})
+                response = await self.pool.request('POST', url, headers, body, timeout=self.timeout)
+                self.requests += 1
+                first = first or response
+                try:
+                    data = response.json()
+                except ValueError:
+                    data = NOT_JSON
+                if self.validators:
+                    violations += self.validators.check('POST', url, response.status, data)
+                if response.status != 201:
+                    failure = response
+                    break
+                made = ((data if isinstance(data, dict) else {}).get('data') or {}).get('vouchers') or []
+                vouchers += made
+                self.vouchers += len(made)
+                remaining -= size
+        except BaseException as e:
+            for _, future, _ in batch.waiters:
+                if not future.done():
+                    future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+            return
+
+        for count, future, queued in batch.waiters:
+            if future.done():
+                continue
+            if failure is not None:
+                body = failure.body
+                status, reason = failure.status, failure.reason
+            else:
+                mine, vouchers = vouchers[:count], vouchers[count:]
+                body = json.dumps({'data': {'count': len(mine), 'vouchers': mine}}).encode('utf-8')
+                status, reason = 201, 'Created'
+            future.set_result(BulkResponse(status, reason, first.headers, body, first.connect, first.ttfb,
+                                           time.perf_counter() - queued, first.reused, violations=violations))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Campaign templates for running Generate Voucher through bulk-create.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    export = commands.add_parser('export', help='Write the campaigns file for billing:provision-tenants --campaigns')
+    export.add_argument('collection', nargs='?', type=Path, default=COLLECTION_PATH)
+    export.add_argument('-o', '--output', type=Path, required=True)
+    listing = commands.add_parser('list', help='Show which folders share a campaign')
+    listing.add_argument('collection', nargs='?', type=Path, default=COLLECTION_PATH)
+    args = parser.parse_args()
+
+    campaigns, rejected = collection_campaigns(load_collection(args.collection))
+    for folder, message in rejected.items():
+        print(f"⚠️  {folder}: not a valid body ({message})")
+    if args.command == 'list':
+        for name, (folder, _) in campaigns.items():
+            print(f"  {name}  {folder}")
+        print(f"\n📋 {len(campaigns)} campaigns")
+        return
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'campaigns': [{'name': name, 'description': folder, 'instructions': campaign_instructions(body)}
+                                 for name, (folder, body) in campaigns.items()]}, f, indent=2, ensure_ascii=False)
+    print(f"💾 {args.output}: {len(campaigns)} campaigns")
+
+
+if __name__ == '__main__':
+    main()
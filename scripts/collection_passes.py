@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Pass-based transform engine for the generation-billing Postman collection.
+
+Each fix_*.py script registers its per-folder transform as a named pass with
+the @collection_pass decorator. The engine loads the collection once, runs the
+selected passes in dependency order over the in-memory collection, writes it
+once and reports how long each pass took.
+
+Passes must be idempotent: running them over their own output changes
+nothing. rerun_changes() checks that.
+
+Usage (see rebuild_billing_collection.py):
+    passes = resolve_order(['cash_entity'])   # pulls in 'include_strategy'
+    reports = run_passes(collection, passes)
+    assert not rerun_changes(collection, passes)
+"""
+
+import json
+import time
+from pathlib import Path
+
+COLLECTION_PATH = Path(__file__).parent.parent / 'docs' / 'api' / 'postman' / 'redeem-x-e2e-generation-billing.postman_collection.json'
+
+# Registered passes, in registration order (used as the tie-breaker when sorting)
+_REGISTRY = {}
+
+
+class CollectionPass:
+    """A named transform over the collection.
+
+    scope='folder' passes are called once per top-level folder and return True
+    when they changed it. scope='collection' passes get the whole collection
+    and return the number of folders they changed.
+    """
+
+    def __init__(self, name, func, requires=(), scope='folder', description=''):
+        if scope not in ('folder', 'collection'):
+            raise ValueError(f"Unknown pass scope '{scope}' for pass '{name}'")
+        self.name = name
+        self.func = func
+        self.requires = tuple(requires)
+        self.scope = scope
+        self.description = description or (func.__doc__ or '').strip().split('\n')[0]
+        self.order = len(_REGISTRY)
+
+    def apply(self, collection):
+        """Run the pass and return the number of folders changed."""
+        if self.scope == 'collection':
+            return int(self.func(collection) or 0)
+        return sum(1 for folder in collection.get('item', []) if self.func(folder))
+
+    def __repr__(self):
+        return f"CollectionPass({self.name!r}, requires={self.requires!r})"
+
+
+class PassReport:
+    """Cost of a single pass run."""
+
+    def __init__(self, name, folders_changed, seconds):
+        self.name = name
+        self.folders_changed = folders_changed
+        self.seconds = seconds
+
+    def __repr__(self):
+        return f"PassReport({self.name!r}, folders_changed={self.folders_changed}, seconds={self.seconds:.4f})"
+
+
+def collection_pass(name, requires=(), scope='folder', description=''):
+    """Register the decorated function as a collection pass."""
+    def decorator(func):
+        if name in _REGISTRY:
+            raise ValueError(f"Pass '{name}' is already registered")
+        _REGISTRY[name] = CollectionPass(name, func, requires, scope, description)
+        return func
+    return decorator
+
+
+def registered_passes():
+    """Return all registered passes in registration order."""
+    return list(_REGISTRY.values())
+
+
+def get_pass(name):
+    try:
+        return _REGISTRY[name]
+    except KeyError:
+        raise KeyError(f"Unknown pass '{name}'. Registered: {', '.join(_REGISTRY) or 'none'}") from None
+
+
+def resolve_order(names=None, skip=()):
+    """
+    Return the passes to run, dependencies first.
+
+    Args:
+        names: Pass names to run (default: every registered pass). Their
+            dependencies are pulled in automatically.
+        skip: Pass names to leave out even if something depends on them.
+    """
+    wanted = list(_REGISTRY) if names is None else list(names)
+    skip = set(skip)
+
+    # Close over dependencies
+    selected = {}
+    stack = [get_pass(n) for n in wanted]
+    while stack:
+        p = stack.pop()
+        if p.name in selected or p.name in skip:
+            continue
+        selected[p.name] = p
+        stack.extend(get_pass(dep) for dep in p.requires)
+
+    # Kahn's algorithm, ties broken by registration order so runs are stable
+    ordered = []
+    done = set()
+    pending = sorted(selected.values(), key=lambda p: p.order)
+    while pending:
+        ready = [p for p in pending if all(d in done or d not in selected for d in p.requires)]
+        if not ready:
+            cycle = ', '.join(p.name for p in pending)
+            raise ValueError(f"Dependency cycle between passes: {cycle}")
+        nxt = ready[0]
+        ordered.append(nxt)
+        done.add(nxt.name)
+        pending.remove(nxt)
+    return ordered
+
+
+def run_passes(collection, passes):
+    """Run passes in the given order over an in-memory collection."""
+    reports = []
+    for p in passes:
+        start = time.perf_counter()
+        changed = p.apply(collection)
+        reports.append(PassReport(p.name, changed, time.perf_counter() - start))
+    return reports
+
+
+def rerun_changes(collection, passes):
+    """
+    Run the passes again over a copy of their own output.
+
+    Returns [(pass name, folders changed)] for every pass that still changes
+    something; a rebuild is only safe to repeat when this is empty.
+    """
+    collection = json.loads(json.dumps(collection))
+    changes = []
+    for p in passes:
+        before = [json.dumps(folder, sort_keys=True) for folder in collection.get('item', [])]
+        p.apply(collection)
+        after = [json.dumps(folder, sort_keys=True) for folder in collection.get('item', [])]
+        if len(before) != len(after):
+            changed = len(after)
+        else:
+            changed = sum(1 for a, b in zip(before, after) if a != b)
+        if changed:
+            changes.append((p.name, changed))
+    return changes
+
+
+def load_collection(filepath=COLLECTION_PATH):
+    """Load Postman collection from JSON file."""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_collection(collection, filepath=COLLECTION_PATH):
+    """Save Postman collection in the same layout the fix scripts write."""
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(collection, f, indent=2, ensure_ascii=False)
+
+
+def format_reports(reports):
+    """Render pass reports as an aligned table."""
+    width = max([len(r.name) for r in reports] + [4])
+    lines = [f"  {'pass'.ljust(width)}  folders      time"]
+    for r in reports:
+        lines.append(f"  {r.name.ljust(width)}  {r.folders_changed:7d}  {r.seconds * 1000:7.1f}ms")
+    total = sum(r.seconds for r in reports)
+    lines.append(f"  {'total'.ljust(width)}  {'':7s}  {total * 1000:7.1f}ms")
+    return '\n'.join(lines)
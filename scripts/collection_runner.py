@@ -0,0 +1,526 @@
+#!/usr/bin/env python3
+"""
+Run the generation-billing collection natively with asyncio instead of Newman.
+
+Requests go straight to {{base_url}} over pooled keep-alive connections
+(http_pool.py), and up to --concurrency folders run at the same time. Within
+a folder, requests run in order and share that folder's variables, so
+{{voucher_code}} captured from Generate Voucher feeds Get Voucher Details
+(under the variable names its test script sets, so {{s2_voucher_code}} in a
+shard_collection.py shard works too).
+
+The JavaScript test scripts are not executed. The runner checks what the
+billing folders are about, read from each script:
+
+    - the expected status: pm.response.to.have.status(201)
+    - the expected fee:    pm.expect(feeAmount).to.be.closeTo(2.2, 0.5)
+      (wallet balance before - after - amount × count)
+
+With more than one folder in flight, every folder spends from the same
+wallet, so fee checks are skipped and only statuses are checked, unless
+--tenants gives each folder its own user and wallet (tenants.py).
+
+Folders open and close with balance snapshots, so when folders run back to
+back on one wallet, the "After" snapshot of one folder is the "Before"
+snapshot of the next. Such a repeated GET is answered from the last response
+unless a write went out in between (SnapshotCache). Wallet snapshots are
+reused within a tenant lane (or at -c 1). System balances are reused only at
+-c 1, because with more folders in flight other wallets write too.
+--no-reuse always re-requests.
+
+--bulk N sends Generate Voucher through POST /api/v1/vouchers/bulk-create in
+batches of up to N, using the campaigns provisioned for the body
+(bulk_vouchers.py).
+
+--validate checks every response body against its api.json schema
+(response_validator.py); a mismatch fails the request like a wrong status.
+
+Usage:
+    python3 scripts/collection_runner.py --var access_token=$TOKEN
+    python3 scripts/collection_runner.py -e docs/api/postman/redeem-x.postman_environment.json -c 8
+    python3 scripts/collection_runner.py --folder "03 - Input Fields" --report /tmp/run.json
+    python3 scripts/collection_runner.py -c 8 --tenants storage/app/billing-tenants.json
+    python3 scripts/collection_runner.py -c 8 --timings-out /tmp/timings.json
+    python3 scripts/shard_collection.py -n 4 --timings /tmp/timings.json --plan
+    python3 scripts/collection_runner.py -c 8 --histograms /tmp/run.hdr.json
+    python3 scripts/collection_runner.py -c 1 --tenants storage/app/billing-tenants.json --bulk 100
+    python3 scripts/collection_runner.py -c 8 --validate
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+import uuid
+from pathlib import Path
+from urllib.parse import urlsplit
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bulk_vouchers import BulkCoalescer, BulkError, BulkResponse, CampaignDirectory, campaign_name
+from collection_passes import COLLECTION_PATH
+from http_pool import ConnectionPool, HttpError
+from latency_histogram import for_runs
+from response_validator import NOT_JSON, ResponseValidators, print_validation
+from script_library import load_unpacked
+from tenants import assign, load_tenants
+
+_TEMPLATE = re.compile(r'\{\{\s*(\$?\w+)\s*\}\}')
+_STATUS = re.compile(r'pm\.response\.to\.have\.status\((\d{3})\)')
+_FEE = re.compile(r'pm\.expect\(feeAmount\)\.to\.(?:equal\((-?[\d.]+)\)|be\.closeTo\((-?[\d.]+),\s*([\d.]+)\))')
+# pm.collectionVariables.set('voucher_code', code), under whatever name the script uses
+_SET_CODE = re.compile(
+    r"""pm\.(?:collectionVariables|environment|variables|globals)\.set\(\s*(['"])(\w+)\1\s*,\s*"""
+    r"""(?:code|[\w.\[\]]*\.code)\s*\)"""
+)
+_VOUCHERS_PATH = re.compile(r'/api/v1/vouchers/?$')
+_BALANCE_PATH = re.compile(r'/api/v1/wallet/balance/?$')
+_SYSTEM_BALANCES_PATH = re.compile(r'/api/v1/system/balances/?$')
+_READ_METHODS = ('GET', 'HEAD')
+
+DYNAMIC_VARIABLES = {
+    '$randomUUID': lambda: str(uuid.uuid4()),
+    '$guid': lambda: str(uuid.uuid4()),
+    '$timestamp': lambda: str(int(time.time())),
+    '$randomInt': lambda: str(random.randint(0, 1000)),
+}
+
+
+def resolve(text, variables):
+    """Substitute {{name}} and Postman dynamic variables; unknown names are left as they are."""
+    def substitute(match):
+        name = match.group(1)
+        if name in DYNAMIC_VARIABLES:
+            return DYNAMIC_VARIABLES[name]()
+        value = variables.get(name)
+        return match.group(0) if value is None else str(value)
+    return _TEMPLATE.sub(substitute, text)
+
+
+def load_variables(collection, environment=None, overrides=()):
+    """Collection variables, then environment values, then KEY=VALUE overrides."""
+    variables = {v['key']: v.get('value', '') for v in collection.get('variable', []) if not v.get('disabled')}
+    if environment:
+        with open(environment, 'r', encoding='utf-8') as f:
+            for value in json.load(f).get('values', []):
+                if value.get('enabled', True) and value.get('value') not in (None, ''):
+                    variables[value['key']] = value['value']
+    for override in overrides:
+        key, _, value = override.partition('=')
+        variables[key] = value
+    return variables
+
+
+def _script(item, listen):
+    return '\n'.join(line for event in item.get('event', []) if event.get('listen') == listen
+                     for line in event.get('script', {}).get('exec', []))
+
+
+class RequestSpec:
+    """One collection request, with the checks read from its test script."""
+
+    def __init__(self, item, collection_auth=None):
+        request = item['request']
+        self.name = item['name']
+        self.method = request.get('method', 'GET').upper()
+        url = request.get('url', '')
+        self.url = url.get('raw', '') if isinstance(url, dict) else url
+        self.headers = [(h['key'], h['value']) for h in request.get('header', []) if not h.get('disabled')]
+        self.body = self._body(request.get('body') or {})
+        self.auth = request.get('auth') or collection_auth
+
+        tests = _script(item, 'test')
+        status = _STATUS.search(tests)
+        self.expected_status = int(status.group(1)) if status else None
+        fee = _FEE.search(tests)
+        if fee:
+            self.expected_fee = (float(fee.group(1) or fee.group(2)), float(fee.group(3) or 0.005))
+        else:
+            self.expected_fee = None
+        # Where the script stores the generated voucher code: voucher_code, or
+        # s2_voucher_code in a collection split by shard_collection.py
+        self.code_variables = list(dict.fromkeys(m.group(2) for m in _SET_CODE.finditer(tests))) or ['voucher_code']
+
+    @staticmethod
+    def _body(body):
+        if body.get('mode') == 'raw':
+            return body.get('raw', '')
+        if body.get('mode') == 'urlencoded':
+            return '&'.join(f"{p['key']}={p.get('value', '')}" for p in body.get('urlencoded', [])
+                            if not p.get('disabled'))
+        return ''
+
+    def build(self, variables):
+        """(url, headers, body) with variables substituted and auth applied."""
+        headers = {resolve(k, variables): resolve(v, variables) for k, v in self.headers}
+        if self.auth and self.auth.get('type') == 'bearer':
+            token = next((p['value'] for p in self.auth.get('bearer', []) if p.get('key') == 'token'), '')
+            token = resolve(token, variables)
+            if token and not token.startswith('{{'):
+                headers.setdefault('Authorization', f"Bearer {token}")
+        return resolve(self.url, variables), headers, resolve(self.body, variables)
+
+
+class RequestResult:
+    """What happened to one request: status, timings (seconds) and failed checks."""
+
+    def __init__(self, folder, name, method, url):
+        self.folder = folder
+        self.name = name
+        self.method = method
+        self.url = url
+        self.status = None
+        self.connect = self.ttfb = self.elapsed = 0.0
+        self.reused = False
+        self.cached = False
+        self.failures = []
+        self.skipped = []
+
+    @property
+    def ok(self):
+        return not self.failures
+
+    def as_dict(self):
+        return {
+            'folder': self.folder, 'name': self.name, 'method': self.method, 'url': self.url,
+            'status': self.status, 'ok': self.ok, 'failures': self.failures, 'skipped': self.skipped,
+            'connect_ms': round(self.connect * 1000, 3), 'ttfb_ms': round(self.ttfb * 1000, 3),
+            'elapsed_ms': round(self.elapsed * 1000, 3), 'reused': self.reused, 'cached': self.cached,
+        }
+
+
+class FolderRun:
+    """Variables and balance snapshots of one folder while it runs."""
+
+    def __init__(self, folder, variables):
+        self.folder = folder
+        self.name = folder['name']
+        self.variables = dict(variables)
+        self.balances = []
+        self.voucher_total = None
+        self.results = []
+        self.seconds = 0.0
+
+    @property
+    def ok(self):
+        return all(r.ok for r in self.results)
+
+    def capture(self, spec, body, data):
+        """Pick up the values later requests and checks depend on."""
+        path = spec.url.split('?')[0]
+        if spec.method == 'POST' and _VOUCHERS_PATH.search(path):
+            try:
+                request = json.loads(body) if body else {}
+                self.voucher_total = float(request.get('amount', 0)) * int(request.get('count', 1))
+            except ValueError:
+                pass
+            vouchers = ((data or {}).get('data') or {}).get('vouchers') or []
+            if vouchers:
+                for name in spec.code_variables:
+                    self.variables[name] = vouchers[0].get('code', '')
+        elif spec.method == 'GET' and _BALANCE_PATH.search(path):
+            balance = ((data or {}).get('data') or {}).get('balance')
+            if balance is not None:
+                self.balances.append(float(balance))
+
+    def fee(self):
+        """Fees paid between the first and the latest balance snapshot, in pesos."""
+        if len(self.balances) < 2 or self.voucher_total is None:
+            return None
+        return round(self.balances[0] - self.balances[-1] - self.voucher_total, 2)
+
+
+class SnapshotCache:
+    """
+    Balance snapshots that answer a repeated GET until the next write.
+
+    Wallet balances are keyed by bearer token and dropped when that token
+    writes. System balances are dropped on any write. Keep system=False
+    when folders of other wallets can write in the meantime.
+    """
+
+    def __init__(self, system=True):
+        self.system = system
+        self.entries = {}
+        self.hits = 0
+
+    def scope(self, url):
+        path = urlsplit(url).path
+        if _BALANCE_PATH.search(path):
+            return 'wallet'
+        if self.system and _SYSTEM_BALANCES_PATH.search(path):
+            return 'system'
+        return None
+
+    def lookup(self, method, url, headers):
+        """The cached response for a read, or None; a write invalidates what it may change."""
+        token = headers.get('Authorization')
+        if method not in _READ_METHODS:
+            self.entries = {key: response for key, response in self.entries.items()
+                            if key[0] == 'wallet' and key[2] != token}
+            return None
+        scope = self.scope(url)
+        response = self.entries.get((scope, url, token)) if scope else None
+        if response is not None:
+            self.hits += 1
+        return response
+
+    def store(self, method, url, headers, response):
+        scope = self.scope(url)
+        if method in _READ_METHODS and scope and 200 <= response.status < 300:
+            self.entries[(scope, url, headers.get('Authorization'))] = response
+
+
+class CollectionRunner:
+    """Run collection folders concurrently over one connection pool.
+
+    With tenants, folders are spread over the tenants round-robin; folders of
+    the same tenant run in sequence, so every wallet has one folder in flight.
+    """
+
+    def __init__(self, collection, variables, concurrency=4, connections=None, timeout=30.0, tenants=None,
+                 reuse_snapshots=False, bulk_size=0, bulk_wait=0.0, validators=None):
+        self.collection = collection
+        self.variables = variables
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.tenants = tenants
+        self.pool = ConnectionPool(limit=connections or concurrency)
+        # Folders on the same wallet run one at a time when every lane has its own tenant
+        self.check_fees = concurrency == 1 or bool(tenants)
+        # Same condition: a wallet snapshot stays valid only while its lane is the only writer
+        self.snapshots = SnapshotCache(system=concurrency == 1) if reuse_snapshots and self.check_fees else None
+        self.campaigns = CampaignDirectory(self.pool, timeout) if bulk_size else None
+        self.validators = validators
+        self.bulk = BulkCoalescer(self.pool, bulk_size, bulk_wait, timeout, validators) if bulk_size else None
+        auth = collection.get('auth')
+        self.specs = {
+            id(folder): [RequestSpec(item, auth) for item in folder.get('item', []) if 'request' in item]
+            for folder in collection.get('item', [])
+        }
+
+    async def run_request(self, run, spec):
+        url, headers, body = spec.build(run.variables)
+        result = RequestResult(run.name, spec.name, spec.method, url)
+        response = self.snapshots.lookup(spec.method, url, headers) if self.snapshots else None
+        if response is not None:
+            result.cached = True
+        else:
+            try:
+                if self.bulk and spec.method == 'POST' and _VOUCHERS_PATH.search(urlsplit(url).path):
+                    response = await self.bulk_generate(url, headers, body, result)
+                else:
+                    response = await self.pool.request(spec.method, url, headers, body, timeout=self.timeout)
+            except BulkError as e:
+                result.failures.append(f"bulk-create: {e}")
+                return result
+            except asyncio.TimeoutError:
+                result.failures.append(f"timed out after {self.timeout:g}s")
+                return result
+            except (OSError, ValueError, HttpError, asyncio.IncompleteReadError) as e:
+                result.failures.append(f"{type(e).__name__}: {e}")
+                return result
+            if self.snapshots:
+                self.snapshots.store(spec.method, url, headers, response)
+            result.connect, result.ttfb, result.elapsed = response.connect, response.ttfb, response.elapsed
+            result.reused = response.reused
+
+        result.status = response.status
+        if spec.expected_status is not None and response.status != spec.expected_status:
+            result.failures.append(f"status {response.status}, expected {spec.expected_status}")
+
+        try:
+            data = response.json()
+        except ValueError:
+            data = NOT_JSON
+        # A reused snapshot was checked when it was first received, and a
+        # response rebuilt from bulk-create batches by the batches behind it
+        if self.validators and not result.cached:
+            if isinstance(response, BulkResponse):
+                violations = response.violations
+            else:
+                violations = self.validators.check(spec.method, url, response.status, data)
+            result.failures += [f"schema: {violation}" for violation in violations[:3]]
+            if len(violations) > 3:
+                result.failures.append(f"schema: ... {len(violations) - 3} more")
+        run.capture(spec, body, data if isinstance(data, dict) else None)
+
+        if spec.expected_fee is not None:
+            if not self.check_fees:
+                result.skipped.append('fee (shared wallet)')
+            else:
+                expected, tolerance = spec.expected_fee
+                actual = run.fee()
+                if actual is None:
+                    result.failures.append('fee: no balance snapshots')
+                elif abs(actual - expected) > tolerance:
+                    result.failures.append(f"fee ₱{actual:.2f}, expected ₱{expected:.2f} ± {tolerance:g}")
+        return result
+
+    async def bulk_generate(self, url, headers, body, result):
+        """Generate Voucher through bulk-create; a short batch is recorded as a failure."""
+        try:
+            request = json.loads(body) if body else {}
+            count = int(request.get('count') or 1)
+        except (ValueError, TypeError):
+            raise BulkError('body is not a Generate Voucher request')
+        campaign_id = await self.campaigns.campaign_id(url, headers, campaign_name(request))
+        response = await self.bulk.generate(url, headers, campaign_id, count)
+        if response.status == 201:
+            made = ((response.json() or {}).get('data') or {}).get('count', 0)
+            if made < count:
+                result.failures.append(f"bulk-create made {made} of {count} vouchers")
+        return response
+
+    async def run_folder(self, folder, variables):
+        run = FolderRun(folder, variables)
+        start = time.perf_counter()
+        for spec in self.specs[id(folder)]:
+            run.results.append(await self.run_request(run, spec))
+        run.seconds = time.perf_counter() - start
+        return run
+
+    async def run_lane(self, folders, variables, slots, on_folder):
+        """Run folders that share a wallet one after another."""
+        async with slots:
+            runs = []
+            for folder in folders:
+                run = await self.run_folder(folder, variables)
+                if on_folder:
+                    on_folder(run)
+                runs.append(run)
+            return runs
+
+    def lanes(self, folders):
+        """[(variables, folders)]: without tenants every folder is its own lane on the shared wallet."""
+        if not self.tenants:
+            return [(self.variables, [folder]) for folder in folders]
+        return [(dict(self.variables, access_token=tenant.token), lane)
+                for tenant, lane in assign(folders, self.tenants)]
+
+    async def run(self, folders=None, on_folder=None):
+        """Run the folders (default: all) and return their FolderRuns in collection order."""
+        folders = self.collection.get('item', []) if folders is None else folders
+        slots = asyncio.Semaphore(self.concurrency)
+        try:
+            lanes = await asyncio.gather(*(self.run_lane(lane, variables, slots, on_folder)
+                                           for variables, lane in self.lanes(folders)))
+        finally:
+            await self.pool.close()
+        position = {id(folder): i for i, folder in enumerate(folders)}
+        runs = [run for lane in lanes for run in lane]
+        return sorted(runs, key=lambda run: position[id(run.folder)])
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))]
+
+
+def print_summary(runs, seconds, pool, snapshots=None, bulk=None):
+    results = [r for run in runs for r in run.results]
+    by_name = {}
+    for result in results:
+        if result.status is not None and not result.cached:
+            by_name.setdefault(result.name, []).append(result.elapsed * 1000)
+
+    width = max([len(name) for name in by_name] + [7])
+    print(f"\n⏱️  {'Request':{width}}  {'n':>4}  {'mean':>7}  {'p50':>7}  {'p95':>7}  {'max':>7}  (ms)")
+    for name, times in by_name.items():
+        print(f"    {name:{width}}  {len(times):4d}  {sum(times) / len(times):7.1f}  "
+              f"{percentile(times, 50):7.1f}  {percentile(times, 95):7.1f}  {max(times):7.1f}")
+
+    passed = sum(1 for r in results if r.ok)
+    skipped = sum(len(r.skipped) for r in results)
+    icon = '✅' if passed == len(results) else '❌'
+    print(f"\n{icon} {passed}/{len(results)} requests passed in {seconds:.2f}s "
+          f"({sum(1 for r in results if not r.cached) / seconds if seconds else 0:.0f} req/s sent, "
+          f"{pool.opened} connections opened)")
+    if bulk and bulk.requests:
+        print(f"📦 {bulk.vouchers} vouchers in {bulk.requests} bulk-create request(s)")
+    if snapshots and snapshots.hits:
+        print(f"♻️  {snapshots.hits} balance snapshot(s) reused instead of re-requested")
+    if skipped:
+        print(f"⚠️  {skipped} fee check(s) skipped: folders share one wallet when run concurrently")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the billing collection with asyncio and pooled connections.')
+    parser.add_argument('collection', nargs='?', type=Path, default=COLLECTION_PATH)
+    parser.add_argument('-e', '--environment', type=Path, help='Postman environment file')
+    parser.add_argument('--var', action='append', default=[], metavar='KEY=VALUE', help='Override a variable')
+    parser.add_argument('-c', '--concurrency', type=int, default=4, help='Folders run at the same time')
+    parser.add_argument('--connections', type=int, help='Pooled connections (default: concurrency)')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout in seconds')
+    parser.add_argument('--tenants', type=Path, help='billing:provision-tenants file: one wallet per folder lane')
+    parser.add_argument('--no-reuse', action='store_true',
+                        help='Re-request every balance snapshot, even if no write happened since the last one')
+    parser.add_argument('--bulk', type=int, default=0, metavar='N',
+                        help='Create vouchers through /vouchers/bulk-create in batches of up to N (max 100)')
+    parser.add_argument('--folder', action='append', default=[], help='Only folders whose name contains this')
+    parser.add_argument('--report', type=Path, help='Write per-request results and timings as JSON')
+    parser.add_argument('--timings-out', type=Path, help='Write {folder: seconds} for shard_collection.py --timings')
+    parser.add_argument('--histograms', type=Path, help='Write per-operation latency histograms (latency_histogram.py)')
+    parser.add_argument('--validate', action='store_true', help='Check every response against its api.json schema')
+    args = parser.parse_args()
+
+    if args.concurrency < 1:
+        parser.error('--concurrency must be at least 1')
+    if not 0 <= args.bulk <= 100:
+        parser.error('--bulk must be between 0 (off) and 100')
+
+    # Packed collections keep their tests in lib_* variables; the checks are read from the scripts
+    collection = load_unpacked(args.collection)
+    variables = load_variables(collection, args.environment, args.var)
+    folders = [f for f in collection['item'] if not args.folder or any(s in f['name'] for s in args.folder)]
+    if not folders:
+        parser.error('No folders match --folder')
+
+    tenants = load_tenants(args.tenants) if args.tenants else None
+    runner = CollectionRunner(collection, variables, args.concurrency, args.connections, args.timeout, tenants,
+                              reuse_snapshots=not args.no_reuse, bulk_size=args.bulk,
+                              validators=ResponseValidators.from_spec() if args.validate else None)
+    requests = sum(len(runner.specs[id(f)]) for f in folders)
+    isolation = f", {min(len(tenants), len(folders))} tenants" if tenants else ''
+    print(f"🏃 {len(folders)} folders, {requests} requests → {variables.get('base_url')} "
+          f"(concurrency {args.concurrency}{isolation})\n")
+
+    def on_folder(run):
+        print(f"  {'✅' if run.ok else '❌'} {run.name:60} {len(run.results):3d} requests  {run.seconds:6.2f}s")
+        for result in run.results:
+            for failure in result.failures:
+                print(f"       ↳ {result.name}: {failure}")
+
+    start = time.perf_counter()
+    runs = asyncio.run(runner.run(folders, on_folder))
+    seconds = time.perf_counter() - start
+    print_summary(runs, seconds, runner.pool, runner.snapshots, runner.bulk)
+    if runner.validators:
+        print_validation(runner.validators)
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'seconds': round(seconds, 3), 'concurrency': args.concurrency,
+                       'requests': [r.as_dict() for run in runs for r in run.results],
+                       'schema': runner.validators.summary() if runner.validators else None}, f, indent=2)
+        print(f"💾 {args.report}")
+    if args.timings_out:
+        with open(args.timings_out, 'w', encoding='utf-8') as f:
+            json.dump({run.name: round(run.seconds, 3) for run in runs}, f, indent=2, ensure_ascii=False)
+        print(f"💾 {args.timings_out}")
+    if args.histograms:
+        recorder = for_runs({'runner': 'collection_runner', 'base_url': variables.get('base_url'),
+                             'concurrency': args.concurrency})
+        recorder.record_results(r for run in runs for r in run.results)
+        recorder.save(args.histograms)
+        print(f"💾 {args.histograms}")
+
+    sys.exit(0 if all(run.ok for run in runs) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Streaming reader/writer for Postman collections, one top-level folder at a time.
+
+CollectionReader parses the collection incrementally: the keys before "item"
+(info, auth, variable) are available as reader.head straight away, folders
+are decoded one by one as folders() is iterated, and any keys after "item"
+land in reader.tail once iteration finishes. CollectionWriter writes the same
+layout as json.dump(collection, indent=2, ensure_ascii=False), appending each
+folder as it arrives. Peak memory is about one folder plus the read buffer,
+whatever the size of the collection.
+
+    reader = CollectionReader(src)
+    with CollectionWriter(dst, reader.head) as writer:
+        for folder in reader.folders():
+            writer.write(transform(folder))
+        writer.tail = reader.tail
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+
+from collection_passes import PassReport
+from folder_cache import FOLDER_INDENT, folder_fragment
+
+CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = ' \t\n\r'
+_ITEMS = '\x00items\x00'
+
+
+class CollectionReader:
+    """Incremental parser for a collection's top-level folders."""
+
+    def __init__(self, path, chunk_size=CHUNK_SIZE):
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self.head = {}
+        self.tail = {}
+        self._file = open(self.path, 'r', encoding='utf-8')
+        self._decoder = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        self._has_items = self._read_head()
+
+    def folders(self):
+        """Yield the top-level folders in order, then read the trailing keys."""
+        try:
+            if self._has_items:
+                self._expect('[')
+                if self._peek() == ']':
+                    self._pos += 1
+                else:
+                    while True:
+                        yield self._decode()
+                        if self._next_delimiter(',]') == ']':
+                            break
+                if self._next_delimiter(',}') == ',':
+                    self._read_members(self.tail)
+            self._has_items = False
+        finally:
+            self.close()
+
+    def close(self):
+        self._file.close()
+
+    def _read_head(self):
+        """Read keys up to "item"; return False if the collection has no items."""
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+            return False
+        while True:
+            key = self._decode()
+            self._expect(':')
+            if key == 'item':
+                return True
+            self.head[key] = self._decode()
+            if self._next_delimiter(',}') == '}':
+                return False
+
+    def _read_members(self, target):
+        while True:
+            key = self._decode()
+            self._expect(':')
+            target[key] = self._decode()
+            if self._next_delimiter(',}') == '}':
+                return
+
+    def _fill(self, at_least=0):
+        """Drop consumed text and read at least one more chunk."""
+        if self._pos:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        chunk = self._file.read(max(self.chunk_size, at_least))
+        if not chunk:
+            self._eof = True
+        self._buf += chunk
+
+    def _peek(self):
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if self._eof:
+                raise ValueError(f"Unexpected end of collection: {self.path}")
+            self._fill()
+
+    def _expect(self, char):
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Expected '{char}' but found '{found}' in {self.path}")
+        self._pos += 1
+
+    def _next_delimiter(self, chars):
+        found = self._peek()
+        if found not in chars:
+            raise ValueError(f"Expected one of {chars!r} but found '{found}' in {self.path}")
+        self._pos += 1
+        return found
+
+    def _decode(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+                # Grow geometrically so a large folder is not re-parsed chunk by chunk
+                self._fill(len(self._buf) - self._pos)
+                continue
+            if end == len(self._buf) and not self._eof:
+                # A number may continue past the buffer; decode again with more text
+                self._fill()
+                continue
+            self._pos = end
+            return value
+
+
+class CollectionWriter:
+    """Write a collection folder by folder in json.dump(indent=2) layout."""
+
+    def __init__(self, path, head):
+        self.path = Path(path)
+        self.head = dict(head)
+        self.tail = {}
+        self.count = 0
+        self._tmp = self.path.with_name(self.path.name + '.tmp')
+        self._file = open(self._tmp, 'w', encoding='utf-8')
+        prefix, _ = self._shell()
+        self._file.write(prefix)
+
+    def _shell(self):
+        shell = dict(self.head)
+        shell['item'] = _ITEMS
+        shell.update(self.tail)
+        text = json.dumps(shell, indent=2, ensure_ascii=False)
+        marker = json.dumps(_ITEMS)
+        i = text.index(marker)
+        return text[:i], text[i + len(marker):]
+
+    def write(self, folder):
+        self.write_fragment(folder_fragment(folder))
+
+    def write_fragment(self, text):
+        """Append a folder already serialized by folder_cache.folder_fragment()."""
+        self._file.write(('[\n' if self.count == 0 else ',\n') + FOLDER_INDENT + text)
+        self.count += 1
+
+    def close(self):
+        _, suffix = self._shell()
+        self._file.write(('[]' if self.count == 0 else '\n  ]') + suffix)
+        self._file.close()
+        os.replace(self._tmp, self.path)
+
+    def abort(self):
+        self._file.close()
+        self._tmp.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+def stream_passes(src, dst, passes):
+    """
+    Apply folder-scope passes to each folder as it streams from src to dst.
+
+    Returns one PassReport per pass, like collection_passes.run_passes().
+    src and dst may be the same file; dst=None runs the passes without
+    writing anything.
+    """
+    whole = [p.name for p in passes if p.scope != 'folder']
+    if whole:
+        raise ValueError(f"Pass(es) need the whole collection and cannot stream: {', '.join(whole)}")
+
+    changed = {p.name: 0 for p in passes}
+    seconds = {p.name: 0.0 for p in passes}
+    reader = CollectionReader(src)
+    writer = CollectionWriter(dst, reader.head) if dst is not None else None
+    try:
+        for folder in reader.folders():
+            for p in passes:
+                start = time.perf_counter()
+                if p.func(folder):
+                    changed[p.name] += 1
+                seconds[p.name] += time.perf_counter() - start
+            if writer is not None:
+                writer.write(folder)
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+    if writer is not None:
+        writer.tail = reader.tail
+        writer.close()
+    return [PassReport(p.name, changed[p.name], seconds[p.name]) for p in passes]
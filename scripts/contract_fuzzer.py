@@ -0,0 +1,613 @@
+#!/usr/bin/env python3
+"""
+Schema-driven fuzzing of the api.json operations against a local instance.
+
+Each operation's path parameters, query parameters and JSON body schema are
+compiled once into value generators. $refs are resolved and allOf merged at
+compile time, and components shared between operations share one generator.
+Generating a case is then a walk over plain closures, with no schema lookups.
+
+Most values are well-formed: examples and defaults half the time, otherwise
+in-range numbers and short strings. Required properties are always sent and
+optional ones a quarter of the time. With probability --hostile each value is
+replaced by a pathological one instead, chosen to be slow or awkward to
+validate:
+
+    strings   empty, one past maxLength, 64 KiB, multi-byte, NUL, format and SQL text
+    numbers   just outside minimum/maximum, 2^63, 1e308, numbers sent as strings
+    objects   a required key missing, unknown keys, 256-deep nesting, wrong type
+    arrays    10,000 items, 256-deep nesting, wrong type
+
+Cases are sent concurrently over one connection pool (--concurrency). A case
+is a finding when the server answers 5xx, drops the connection or times out,
+or is slow. Slow means the response took longer than --slow-ms and more than
+--outlier × the operation's median. Each finding is shrunk by replaying
+smaller variants of its case and keeping every variant that still fails. The
+shrinking drops keys, halves strings and arrays and moves numbers toward zero.
+The report keeps the original and shrunk case, and a curl line to reproduce.
+
+Every case has its own seed (--seed, operation, case number), so a case can be
+generated again from the report. Only GET operations run unless --writes is
+given, because every write moves wallet money. The API throttles per user at
+60 requests a minute. Give --tenants (billing:provision-tenants) to spread
+cases across many users; 429s are counted, not reported.
+
+Usage:
+    python3 scripts/contract_fuzzer.py --base-url http://redeem-x.test --token $TOKEN --cases 50
+    python3 scripts/contract_fuzzer.py --base-url http://redeem-x.test --tenants storage/app/billing-tenants.json \\
+        --writes --operation 'calculate-charges|redeem\\.validate' --hostile 0.5 --report /tmp/fuzz.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+from urllib.parse import quote, urlencode
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from http_pool import ConnectionPool, HttpError
+from latency_histogram import for_runs
+from openapi_routes import API_PREFIX, SPEC_PATH, compile_routes, load_spec, resolve_ref
+from tenants import load_tenants
+
+HUGE = 64 * 1024  # characters in the longest hostile string
+DEEP = 256  # nesting of hostile objects and arrays
+MANY = 10_000  # items in the longest hostile array
+MAX_DEPTH = 6  # levels of well-formed nesting before objects and arrays come back empty
+HOSTILE_STRINGS = ('', ' ', '\x00', 'ñ😀' * 512, '%s%n%x', "' OR 1=1 --", '../../etc/passwd', '{{7*7}}',
+                   '1e309', 'null', '<script>', '‮')
+HOSTILE_NUMBERS = (0, -1, 2 ** 63, -2 ** 63, 10 ** 30, 1e308, -1e308, 0.000001, '1', 'NaN', '')
+ALPHABET = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+WRITES = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+def _types(schema):
+    kind = schema.get('type')
+    if isinstance(kind, list):
+        return [t for t in kind if t != 'null'], 'null' in kind
+    if kind is None:
+        if 'properties' in schema:
+            return ['object'], False
+        if 'items' in schema:
+            return ['array'], False
+        return [], False
+    return [kind], False
+
+
+def _nested(leaf, depth, as_list):
+    value = leaf
+    for _ in range(depth):
+        value = [value] if as_list else {'a': value}
+    return value
+
+
+class Generators:
+    """Schema → generator compiler; one generator per distinct schema node."""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.cache = {}
+        self.compiled = 0
+
+    def __call__(self, schema):
+        """gen(rng, hostile, depth=0) producing values for the schema."""
+        schema = resolve_ref(self.spec, schema or {})
+        key = id(schema)
+        if key not in self.cache:
+            # Refer to the slot before compiling, so a recursive $ref compiles once.
+            # The schema is kept alongside so its id cannot be reused by another node.
+            slot = []
+            self.cache[key] = (schema, lambda rng, hostile, depth=0: slot[0](rng, hostile, depth))
+            slot.append(self._compile(schema))
+            self.cache[key] = (schema, slot[0])
+            self.compiled += 1
+        return self.cache[key][1]
+
+    def _merge(self, schema):
+        """A copy of the schema with its allOf parts folded in."""
+        merged = {k: v for k, v in schema.items() if k != 'allOf'}
+        for part in schema.get('allOf', []):
+            part = self._merge(resolve_ref(self.spec, part))
+            merged.setdefault('type', part.get('type'))
+            merged['properties'] = {**part.get('properties', {}), **merged.get('properties', {})}
+            merged['required'] = sorted(set(merged.get('required', [])) | set(part.get('required', [])))
+        return merged
+
+    def _compile(self, schema):
+        if 'allOf' in schema:
+            schema = self._merge(schema)
+        types, nullable = _types(schema)
+        example = schema.get('example', schema.get('default'))
+        if types == ['object'] and 'properties' not in schema and example is not None and not isinstance(example, dict):
+            # Scramble types untyped request fields (e.g. amount) as "object" with a scalar example
+            types = [{bool: 'boolean', int: 'integer', float: 'number', str: 'string'}.get(type(example), 'string')]
+        builders = [getattr(self, f"_{kind}", self._any)(schema) for kind in types] or [self._any(schema)]
+
+        def generate(rng, hostile, depth=0):
+            if nullable and rng.random() < 0.1:
+                return None
+            if example is not None and rng.random() < 0.5:
+                return example
+            return rng.choice(builders)(rng, hostile, depth)
+
+        return generate
+
+    def _string(self, schema):
+        low = schema.get('minLength', 0)
+        high = max(low, min(schema.get('maxLength', 24), 24))
+        limit = schema.get('maxLength')
+
+        def generate(rng, hostile, depth):
+            if rng.random() < hostile:
+                choice = rng.randrange(4)
+                if choice == 0 and limit is not None:
+                    return 'x' * (limit + 1)
+                if choice == 1:
+                    return rng.choice(ALPHABET) * HUGE
+                if choice == 2:
+                    return rng.choice(HOSTILE_NUMBERS)
+                return rng.choice(HOSTILE_STRINGS)
+            return ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(low, high)))
+
+        return generate
+
+    def _number(self, schema, integer=False):
+        low = schema.get('minimum', 0 if integer else 0.0)
+        high = schema.get('maximum', low + 1000)
+        edges = [low - 1] + ([high + 1] if 'maximum' in schema else [])
+
+        def generate(rng, hostile, depth):
+            if rng.random() < hostile:
+                return rng.choice(edges + list(HOSTILE_NUMBERS))
+            return rng.randint(int(low), int(high)) if integer else round(rng.uniform(low, high), 2)
+
+        return generate
+
+    def _integer(self, schema):
+        return self._number(schema, integer=True)
+
+    def _boolean(self, schema):
+        def generate(rng, hostile, depth):
+            if rng.random() < hostile:
+                return rng.choice(('true', 1, 'yes', ''))
+            return rng.random() < 0.5
+
+        return generate
+
+    def _array(self, schema):
+        item = self(schema.get('items', {}))
+
+        def generate(rng, hostile, depth):
+            if rng.random() < hostile:
+                choice = rng.randrange(3)
+                if choice == 0:
+                    leaf = item(rng, 0.0, MAX_DEPTH)
+                    return [leaf] * MANY
+                if choice == 1:
+                    return _nested(item(rng, 0.0, MAX_DEPTH), DEEP, as_list=True)
+                return rng.choice(HOSTILE_STRINGS)
+            if depth >= MAX_DEPTH:
+                return []
+            return [item(rng, hostile, depth + 1) for _ in range(rng.randint(0, 3))]
+
+        return generate
+
+    def _object(self, schema):
+        properties = [(name, self(node)) for name, node in schema.get('properties', {}).items()]
+        # Scramble only exports `required` for some rules; the rest say so in their description
+        required = set(schema.get('required', [])) | {
+            name for name, node in schema.get('properties', {}).items()
+            if str(resolve_ref(self.spec, node).get('description', '')).startswith('**REQUIRED**')}
+
+        def generate(rng, hostile, depth):
+            if rng.random() < hostile:
+                choice = rng.randrange(4)
+                if choice == 3:
+                    return _nested({}, DEEP, as_list=False)
+                if choice == 2:
+                    return rng.choice(HOSTILE_STRINGS)
+            else:
+                choice = None
+            if depth >= MAX_DEPTH:
+                return {}
+            value = {}
+            for name, generate_property in properties:
+                if name in required or rng.random() < 0.25:
+                    value[name] = generate_property(rng, hostile, depth + 1)
+            if choice == 0 and required:
+                value.pop(rng.choice(sorted(required)), None)
+            elif choice == 1:
+                value[''.join(rng.choice(ALPHABET) for _ in range(8))] = rng.choice(HOSTILE_STRINGS)
+            return value
+
+        return generate
+
+    def _any(self, schema):
+        strings, numbers = self._string({}), self._number({})
+
+        def generate(rng, hostile, depth):
+            return rng.choice((strings, numbers))(rng, hostile, depth)
+
+        return generate
+
+
+def _query_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return str(value)
+
+
+class Case:
+    """One generated request: path parameters, query parameters and body."""
+
+    def __init__(self, path, query, body):
+        self.path = path
+        self.query = query
+        self.body = body
+
+    def url(self, base_url, target):
+        path = target.route.template
+        for name, value in self.path.items():
+            path = path.replace(f"{{{name}}}", quote(_query_value(value), safe='') or '%20')
+        query = urlencode({name: _query_value(value) for name, value in self.query.items()})
+        return f"{base_url}{API_PREFIX}{path}" + (f"?{query}" if query else '')
+
+    def payload(self):
+        return b'' if self.body is None else json.dumps(self.body).encode()
+
+    def to_dict(self):
+        return {'path': self.path, 'query': self.query, 'body': self.body}
+
+    def size(self):
+        return len(json.dumps(self.to_dict()))
+
+    def replace(self, part, value):
+        parts = {'path': self.path, 'query': self.query, 'body': self.body}
+        parts[part] = value
+        return Case(**parts)
+
+
+class Target:
+    """An operation with its parameter and body generators."""
+
+    def __init__(self, route, generators):
+        self.route = route
+        self.key = f"{route.method} {API_PREFIX}{route.template}"
+        parameters = [resolve_ref(route.spec, p) for p in route.operation.get('parameters', [])]
+        self.path = [(p['name'], generators(p.get('schema', {'type': 'string'}))) for p in parameters
+                     if p.get('in') == 'path']
+        # Parameters the template uses but the operation does not declare
+        declared = {name for name, _ in self.path}
+        self.path += [(name, generators({'type': 'string'})) for name in route.params if name not in declared]
+        self.query = [(p['name'], generators(p.get('schema', {})), p.get('required', False)) for p in parameters
+                      if p.get('in') == 'query']
+        body = route.operation.get('requestBody')
+        body = resolve_ref(route.spec, body) if body else None
+        schema = (body or {}).get('content', {}).get('application/json', {}).get('schema')
+        self.body = generators(schema) if schema is not None else None
+
+    def case(self, rng, hostile):
+        path = {}
+        for name, generate in self.path:
+            value = generate(rng, hostile)
+            path[name] = value if value not in (None, '') else ''.join(rng.choice(ALPHABET) for _ in range(8))
+        query = {name: generate(rng, hostile) for name, generate, required in self.query
+                 if required or rng.random() < 0.5}
+        body = self.body(rng, hostile) if self.body is not None else None
+        return Case(path, query, body)
+
+
+def shrinks(value):
+    """Smaller variants of a value, most aggressive first."""
+    if isinstance(value, dict):
+        for key in value:
+            yield {k: v for k, v in value.items() if k != key}
+        for key, item in value.items():
+            for smaller in shrinks(item):
+                yield {**value, key: smaller}
+    elif isinstance(value, list):
+        if value:
+            yield []
+        if len(value) > 1:
+            yield value[:len(value) // 2]
+        for n in range(min(len(value), 8)):
+            yield value[:n] + value[n + 1:]
+        for n, item in enumerate(value[:8]):
+            for smaller in shrinks(item):
+                yield value[:n] + [smaller] + value[n + 1:]
+    elif isinstance(value, str):
+        if value:
+            yield ''
+        if len(value) > 1:
+            yield value[:len(value) // 2]
+    elif isinstance(value, bool) or value is None:
+        return
+    elif isinstance(value, (int, float)) and value != 0:
+        yield 0
+        half = value // 2 if isinstance(value, int) else round(value / 2, 6)
+        if half not in (0, value):
+            yield half
+
+
+def case_shrinks(case):
+    for smaller in shrinks(case.body):
+        yield case.replace('body', smaller)
+    for smaller in shrinks(case.query):
+        yield case.replace('query', smaller)
+    for name, value in case.path.items():
+        text = _query_value(value)
+        if len(text) > 1:
+            yield case.replace('path', {**case.path, name: text[:len(text) // 2]})
+
+
+class Outcome:
+    """What the server did with one case."""
+
+    def __init__(self, status=None, seconds=0.0, error=None):
+        self.status = status
+        self.seconds = seconds
+        self.error = error
+
+    @property
+    def kind(self):
+        if self.status is None:
+            return 'error'
+        if self.status >= 500:
+            return '5xx'
+        return None
+
+
+class Fuzzer:
+    """Send cases concurrently and shrink the ones that fail."""
+
+    def __init__(self, base_url, tokens, concurrency=16, timeout=10.0, shrink_steps=200):
+        self.base_url = base_url.rstrip('/')
+        self.tokens = tokens
+        self.pool = ConnectionPool(limit=concurrency)
+        self.slots = asyncio.Semaphore(concurrency)
+        self.timeout = timeout
+        self.shrink_steps = shrink_steps
+        self.sent = 0
+        self.recorder = None
+
+    async def send(self, target, case, n=0):
+        url = case.url(self.base_url, target)
+        headers = {'Accept': 'application/json', 'Authorization': f"Bearer {self.tokens[n % len(self.tokens)]}"}
+        body = case.payload()
+        if target.body is not None:
+            headers['Content-Type'] = 'application/json'
+        async with self.slots:
+            self.sent += 1
+            started = time.perf_counter()
+            try:
+                response = await self.pool.request(target.route.method, url, headers, body, timeout=self.timeout)
+            except (HttpError, OSError, asyncio.TimeoutError) as e:
+                return Outcome(None, time.perf_counter() - started, str(e) or type(e).__name__)
+        if self.recorder is not None:
+            self.recorder.record(target.route.method, url, response.elapsed)
+        return Outcome(response.status, response.elapsed)
+
+    async def shrink(self, target, case, fails):
+        """The smallest case found that still fails, and the replays it took."""
+        steps = 0
+        improved = True
+        while improved and steps < self.shrink_steps:
+            improved = False
+            for candidate in case_shrinks(case):
+                if steps >= self.shrink_steps:
+                    break
+                steps += 1
+                if fails(await self.send(target, candidate, steps)):
+                    case, improved = candidate, True
+                    break
+        return case, steps
+
+    async def close(self):
+        await self.pool.close()
+
+
+def curl(base_url, target, case, token='$TOKEN'):
+    parts = [f"curl -s -X {target.route.method} '{case.url(base_url, target)}'",
+             "-H 'Accept: application/json'", f"-H 'Authorization: Bearer {token}'"]
+    if case.body is not None:
+        parts += ["-H 'Content-Type: application/json'", "--data-binary @case.json"]
+    return ' '.join(parts)
+
+
+async def fuzz(fuzzer, targets, cases, seed, hostile, slow, outlier, per_group):
+    """(results by operation, findings)."""
+    generated = []
+    for target in targets:
+        for n in range(cases):
+            rng = random.Random(f"{seed}:{target.route.operation_id}:{n}")
+            generated.append((target, n, target.case(rng, hostile)))
+
+    outcomes = await asyncio.gather(*(fuzzer.send(target, case, n) for target, n, case in generated))
+
+    results = {}
+    for (target, n, case), outcome in zip(generated, outcomes):
+        results.setdefault(target, []).append((n, case, outcome))
+
+    groups = {}
+    for target, runs in results.items():
+        answered = [outcome.seconds for _, _, outcome in runs if outcome.status is not None]
+        limit = max(slow, outlier * statistics.median(answered)) if answered else slow
+        for n, case, outcome in runs:
+            kind = outcome.kind or ('slow' if outcome.seconds > limit else None)
+            if kind is not None:
+                groups.setdefault((target, kind, outcome.status), []).append((target, n, case, outcome, kind, limit))
+
+    async def shrink(target, n, case, outcome, kind, limit):
+        if kind == 'slow':
+            fails = lambda o: o.status is not None and o.seconds > limit  # noqa: E731
+            # A case that was only slow behind a busy server is noise, not a finding
+            if not fails(await fuzzer.send(target, case, n)):
+                return None
+        else:
+            fails = lambda o: o.kind == kind and o.status == outcome.status  # noqa: E731
+        shrunk, steps = await fuzzer.shrink(target, case, fails)
+        return {
+            'operation': target.route.operation_id,
+            'endpoint': target.key,
+            'kind': kind,
+            'status': outcome.status,
+            'seconds': round(outcome.seconds, 4),
+            'limit': round(limit, 4) if kind == 'slow' else None,
+            'error': outcome.error,
+            'case_seed': f"{seed}:{target.route.operation_id}:{n}",
+            'case': case.to_dict() if case.size() <= 4096 else f"{case.size():,} bytes (regenerate from case_seed)",
+            'shrunk': shrunk.to_dict(),
+            'shrink_steps': steps,
+            'curl': curl(fuzzer.base_url, target, shrunk) if shrunk.size() <= 4096 else None,
+        }
+
+    # Failures shrink together. Latency outliers are confirmed and shrunk one at a
+    # time, so their replays are timed on an otherwise idle server.
+    failing = [suspect for (_, kind, _), suspects in groups.items() if kind != 'slow' for suspect in suspects[:per_group]]
+    findings = list(await asyncio.gather(*(shrink(*suspect) for suspect in failing)))
+    for (_, kind, _), suspects in groups.items():
+        if kind != 'slow':
+            continue
+        confirmed = 0
+        for suspect in suspects:
+            finding = await shrink(*suspect)
+            if finding is not None:
+                findings.append(finding)
+                confirmed += 1
+                if confirmed == per_group:
+                    break
+    return results, findings
+
+
+def select_targets(spec, pattern=None, writes=False):
+    generators = Generators(spec)
+    routes = [route for route in compile_routes(spec)
+              if (writes or route.method not in WRITES)
+              and (pattern is None or pattern.search(route.operation_id) or pattern.search(route.template))]
+    return [Target(route, generators) for route in routes], generators
+
+
+def status_counts(runs):
+    counts = {}
+    for _, _, outcome in runs:
+        label = str(outcome.status or 'error')
+        counts[label] = counts.get(label, 0) + 1
+    return counts
+
+
+def print_summary(results, findings):
+    width = max([len(target.key) for target in results] + [9])
+    print(f"   {'Operation':{width}}  {'n':>5}  {'p50':>7}  {'max':>7}  statuses (ms)")
+    for target in sorted(results, key=lambda t: t.key):
+        runs = results[target]
+        seconds = [o.seconds * 1000 for _, _, o in runs if o.status is not None]
+        statuses = status_counts(runs)
+        counts = ' '.join(f"{status}×{count}" for status, count in sorted(statuses.items()))
+        p50 = f"{statistics.median(seconds):7.1f}" if seconds else f"{'-':>7}"
+        peak = f"{max(seconds):7.1f}" if seconds else f"{'-':>7}"
+        print(f"   {target.key:{width}}  {len(runs):5d}  {p50}  {peak}  {counts}")
+    for finding in findings:
+        what = f"{finding['status']}" if finding['kind'] == '5xx' else (
+            finding['error'] if finding['kind'] == 'error' else f"{finding['seconds'] * 1000:.0f} ms")
+        print(f"   ❌ {finding['kind']:5} {finding['endpoint']} ({what}), shrunk in {finding['shrink_steps']} "
+              f"replays to {json.dumps(finding['shrunk'], ensure_ascii=False)[:160]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Schema-driven contract fuzzer for the api.json operations.')
+    parser.add_argument('--base-url', required=True, help='e.g. http://redeem-x.test (a local instance)')
+    parser.add_argument('--token', help='Bearer token for every case')
+    parser.add_argument('--tenants', type=Path, help='billing:provision-tenants file: spread cases across its tokens')
+    parser.add_argument('--spec', type=Path, default=SPEC_PATH, help='OpenAPI document (default: api.json)')
+    parser.add_argument('--operation', help='Regex over operationId or path template (default: all)')
+    parser.add_argument('--writes', action='store_true', help='Also fuzz POST/PUT/PATCH/DELETE operations')
+    parser.add_argument('--cases', type=int, default=20, help='Cases per operation')
+    parser.add_argument('--hostile', type=float, default=0.3, help='Chance each value is pathological (0-1)')
+    parser.add_argument('--seed', default='0', help='Seed for generating cases')
+    parser.add_argument('--concurrency', type=int, default=16, help='Requests in flight')
+    parser.add_argument('--timeout', type=float, default=10.0, help='Per-request timeout in seconds')
+    parser.add_argument('--slow-ms', type=float, default=1000.0, help='Responses slower than this may be outliers')
+    parser.add_argument('--outlier', type=float, default=5.0, help='... if also this many times the median')
+    parser.add_argument('--per-group', type=int, default=3, help='Findings shrunk per operation, kind and status')
+    parser.add_argument('--shrink-steps', type=int, default=200, help='Replays allowed per finding')
+    parser.add_argument('--histograms', type=Path, help='Write per-operation latency histograms (latency_histogram.py)')
+    parser.add_argument('--report', type=Path, help='Write findings and per-operation results as JSON')
+    args = parser.parse_args()
+
+    if not args.token and not args.tenants:
+        parser.error('Give --token or --tenants')
+    if args.cases < 1 or args.concurrency < 1 or not 0 <= args.hostile <= 1:
+        parser.error('--cases and --concurrency must be at least 1, and --hostile between 0 and 1')
+    try:
+        tokens = [t.token for t in load_tenants(args.tenants)] if args.tenants else [args.token]
+        pattern = re.compile(args.operation) if args.operation else None
+        spec = load_spec(args.spec)
+    except (OSError, ValueError, KeyError, re.error) as e:
+        parser.error(str(e))
+
+    started = time.perf_counter()
+    targets, generators = select_targets(spec, pattern, args.writes)
+    if not targets:
+        parser.error('No operation matches')
+    compiled = time.perf_counter() - started
+    print(f"🎲 {len(targets)} operation(s) × {args.cases} case(s) at {args.base_url} "
+          f"({generators.compiled} schema node(s) compiled in {compiled * 1000:.1f} ms, seed {args.seed})")
+
+    async def run():
+        fuzzer = Fuzzer(args.base_url, tokens, args.concurrency, args.timeout, args.shrink_steps)
+        if args.histograms:
+            fuzzer.recorder = for_runs({'tool': 'contract_fuzzer', 'seed': args.seed})
+        try:
+            results, findings = await fuzz(fuzzer, targets, args.cases, args.seed, args.hostile,
+                                           args.slow_ms / 1000, args.outlier, args.per_group)
+            return fuzzer, results, findings
+        finally:
+            await fuzzer.close()
+
+    fuzzer, results, findings = asyncio.run(run())
+    seconds = time.perf_counter() - started
+    print(f"   {fuzzer.sent:,} request(s) in {seconds:.1f}s")
+    print_summary(results, findings)
+
+    if args.histograms:
+        fuzzer.recorder.save(args.histograms)
+        print(f"💾 {args.histograms}")
+    if args.report:
+        report = {
+            'base_url': args.base_url,
+            'seed': args.seed,
+            'hostile': args.hostile,
+            'requests': fuzzer.sent,
+            'seconds': round(seconds, 3),
+            'operations': {
+                target.key: {
+                    'operation': target.route.operation_id,
+                    'cases': len(runs),
+                    'statuses': status_counts(runs),
+                    'max_seconds': round(max(o.seconds for _, _, o in runs), 4),
+                } for target, runs in results.items()
+            },
+            'findings': findings,
+        }
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"💾 {args.report}")
+
+    if findings:
+        print(f"❌ {len(findings)} finding(s)")
+        sys.exit(1)
+    print('✅ No 5xx, dropped connections or latency outliers')
+
+
+if __name__ == '__main__':
+    main()
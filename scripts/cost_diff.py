@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Differential check of fee_oracle against InstructionCostEvaluator.
+
+1. Generate random VoucherInstructionsData-shaped payloads:
+
+       python3 scripts/cost_diff.py payloads -n 200000 -o storage/app/cost-payloads.jsonl
+
+2. Price them once on the PHP side (writes the golden file):
+
+       php artisan billing:export-cost-golden storage/app/cost-payloads.jsonl storage/app/cost-golden.jsonl
+
+3. Compare every golden result with the Python mirror:
+
+       python3 scripts/cost_diff.py check storage/app/cost-golden.jsonl
+
+A payload is a choice of one value per dimension (cash.amount, count, each
+input field, each cash.validation / feedback / rider string, the location and
+time validation objects, voucher_type, the slice settings). Every pricelist
+item is read from exactly one dimension, so the mirror is compiled once into
+per-dimension tables (value → charged-item bits and unit price) using
+fee_oracle.charges(). Checking a batch is then one column-wise map() per
+dimension over the value indexes instead of a per-payload evaluation
+(about 200k payloads/s).
+
+Divergences are grouped by which items differ, and each group is reported
+with its smallest golden payload (fewest non-default dimensions), which PHP
+has already confirmed, plus that payload reduced to the dimensions owning the
+diverging items.
+"""
+
+import argparse
+import hashlib
+import json
+import operator
+import random
+import sys
+import time
+from itertools import repeat
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fee_oracle import PriceItem, charges, quantity
+
+# Defaults every payload is merged onto (array_replace_recursive on the PHP side)
+SKELETON = {
+    'cash': {
+        'amount': 0.0,
+        'currency': 'PHP',
+        'validation': {'secret': None, 'mobile': None, 'payable': None,
+                       'country': 'PH', 'location': None, 'radius': None},
+    },
+    'inputs': {'fields': []},
+    'feedback': {'email': None, 'mobile': None, 'webhook': None},
+    'rider': {'message': None, 'url': None},
+    'count': 1,
+    'prefix': 'DIFF',
+    'mask': '****',
+    'ttl': None,
+}
+
+INPUT_FIELDS = ('email', 'mobile', 'reference_code', 'signature', 'kyc', 'name', 'address',
+                'birth_date', 'gross_monthly_income', 'location', 'otp', 'selfie')
+
+STRINGS = (None, '', '   ', 'A', '0')
+
+_ABSENT = object()
+
+LOCATION = {'target_lat': 14.5995, 'target_lng': 120.9842, 'radius_meters': 500, 'on_failure': 'block'}
+WINDOW = {'start_time': '09:00', 'end_time': '17:00', 'timezone': 'Asia/Manila'}
+
+
+class Dimension:
+    """One payload path and the values it is drawn from; values[0] is the default."""
+
+    def __init__(self, name, path, values):
+        self.name = name
+        self.path = path
+        self.values = tuple(values)
+
+    def assign(self, payload, value):
+        if value is _ABSENT:
+            return
+        if self.path == 'inputs.fields':
+            payload.setdefault('inputs', {}).setdefault('fields', []).append(value)
+            return
+        if self.path == 'cash.slice':
+            mode, slices, max_slices = value
+            payload.setdefault('cash', {}).update(slice_mode=mode, slices=slices, max_slices=max_slices)
+            return
+        *parents, leaf = self.path.split('.')
+        for key in parents:
+            payload = payload.setdefault(key, {})
+        payload[leaf] = value
+
+    def __repr__(self):
+        return f"Dimension({self.name!r}, {len(self.values)} values)"
+
+
+def dimensions():
+    dims = [
+        Dimension('cash.amount', 'cash.amount', (0.0, 100.0, 0.01, 50000.0)),
+        Dimension('count', 'count', (1, 2, 5, 1000, 0, None)),
+        *[Dimension(f'inputs.fields.{field}', 'inputs.fields', (_ABSENT, field)) for field in INPUT_FIELDS],
+        *[Dimension(f'cash.validation.{key}', f'cash.validation.{key}', STRINGS)
+          for key in ('secret', 'mobile', 'payable', 'location', 'radius')],
+        *[Dimension(f'feedback.{key}', f'feedback.{key}', STRINGS) for key in ('email', 'mobile', 'webhook')],
+        *[Dimension(f'rider.{key}', f'rider.{key}', STRINGS) for key in ('message', 'url', 'splash')],
+        Dimension('validation.location', 'validation.location', (
+            _ABSENT,
+            {'required': True, **LOCATION},
+            {'required': False, **LOCATION},
+        )),
+        Dimension('validation.time', 'validation.time', (
+            _ABSENT,
+            {'window': None, 'limit_minutes': None, 'track_duration': True},
+            {'window': WINDOW, 'limit_minutes': None, 'track_duration': True},
+            {'window': None, 'limit_minutes': 30, 'track_duration': False},
+            {'window': None, 'limit_minutes': 0, 'track_duration': True},
+        )),
+        Dimension('voucher_type', 'voucher_type', (_ABSENT, 'redeemable', 'payable', 'settlement')),
+        Dimension('cash.slice', 'cash.slice', (
+            (None, None, None),
+            ('fixed', 3, None),
+            ('fixed', 1, None),
+            ('open', None, 4),
+            ('open', None, None),
+        )),
+    ]
+    return dims
+
+
+def dimensions_digest(dims):
+    spec = [(d.name, d.path, ['<absent>' if v is _ABSENT else v for v in d.values]) for d in dims]
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def sparse_payload(dims, choice):
+    """The non-default part of a payload, as written to the payloads file."""
+    payload = {}
+    for dim, i in zip(dims, choice):
+        if i:
+            dim.assign(payload, dim.values[i])
+    return payload
+
+
+def merge(base, patch):
+    """array_replace_recursive(base, patch) for JSON values."""
+    if not isinstance(base, dict) or not isinstance(patch, dict):
+        return patch
+    result = dict(base)
+    for key, value in patch.items():
+        result[key] = merge(base[key], value) if key in base else value
+    return result
+
+
+def random_choices(dims, count, seed):
+    """count rows of value indexes; each dimension keeps its default half the time."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield [0 if rng.random() < 0.5 else rng.randrange(1, len(d.values)) for d in dims]
+
+
+class Mirror:
+    """InstructionCostEvaluator compiled into per-dimension lookup tables."""
+
+    def __init__(self, dims, items, exempt=False):
+        self.dims = dims
+        self.items = items
+        self.exempt = exempt
+        self.indexes = list(items) + (['cash.slice_fee'] if 'cash.slice_fee' not in items else [])
+        self.bit = {index: 1 << n for n, index in enumerate(self.indexes)}
+
+        base_mask, _ = self._evaluate(SKELETON)
+        tables = []
+        owners = {}
+        for dim in dims:
+            table = []
+            for value in dim.values:
+                patch = {}
+                dim.assign(patch, value)
+                mask, extra = self._evaluate(merge(SKELETON, patch))
+                table.append((mask, extra))
+            varying = 0
+            for mask, _ in table:
+                varying |= mask ^ table[0][0]
+            for index in self.indexes:
+                if varying & self.bit[index]:
+                    if index in owners:
+                        raise ValueError(f"{index} depends on both {owners[index]} and {dim.name}")
+                    owners[index] = dim.name
+            tables.append(table)
+
+        # Each item belongs to one dimension, so the per-dimension bit sets are
+        # disjoint and adding them equals OR-ing them. Packing the unit price
+        # above the bits lets one add per dimension accumulate both at once.
+        self.owners = owners
+        self.shift = len(self.indexes)
+        owned = sum(self.bit[i] for i in owners)
+        fixed = base_mask & ~owned
+        self.fixed = (self._unit_price(fixed) << self.shift) | fixed
+        self.packed = []
+        for dim, table in zip(dims, tables):
+            mine = sum(self.bit[i] for i, owner in owners.items() if owner == dim.name)
+            packed = [((self._unit_price(mask & mine) + extra) << self.shift) | (mask & mine)
+                      for mask, extra in table]
+            # Dimensions that never change a charge need no pass at all
+            self.packed.append(packed if len(set(packed)) > 1 else None)
+        self.never_charged = [i for i in items if i not in owners and not fixed & self.bit[i] and items[i].price > 0]
+
+    def _evaluate(self, instructions):
+        """(charged bits, per-voucher centavos outside the bits' unit prices)."""
+        mask = extra = 0
+        for charge in charges(instructions, exempt=self.exempt, items=self.items):
+            mask |= self.bit[charge.index]
+            if charge.pay_count != 1:
+                extra += charge.unit_price * (charge.pay_count - 1)
+        return mask, extra
+
+    def _unit_price(self, mask):
+        """Centavos per voucher for one payment of every item in mask."""
+        total = 0
+        for index in self.indexes:
+            if mask & self.bit[index]:
+                total += 0 if self.exempt and index == 'cash.amount' else self.items[index].price
+        return total
+
+    def run(self, columns):
+        """Charged bits and total centavos per row, given one column of value indexes per dimension."""
+        rows = len(columns[0]) if columns else 0
+        packed = [self.fixed] * rows
+        for table, column in zip(self.packed, columns):
+            if table is not None:
+                packed = list(map(operator.add, packed, map(table.__getitem__, column)))
+        count_dim = next(i for i, d in enumerate(self.dims) if d.name == 'count')
+        counts = [quantity({'count': v}) for v in self.dims[count_dim].values]
+        masks = list(map(operator.and_, packed, repeat((1 << self.shift) - 1)))
+        units = map(operator.rshift, packed, repeat(self.shift))
+        return masks, list(map(operator.mul, units, map(counts.__getitem__, columns[count_dim])))
+
+
+def golden_result(bit, charged):
+    """(bits, total centavos, unknown indexes) of one golden row."""
+    mask = total = 0
+    unknown = []
+    for index, unit_price, qty, pay_count in charged:
+        if index in bit:
+            mask |= bit[index]
+        else:
+            unknown.append(index)
+        total += unit_price * qty * pay_count
+    return mask, total, unknown
+
+
+def reduce_choice(mirror, choice, indexes, total_only):
+    """
+    Reset every dimension that does not feed the diverging items to its default.
+
+    The evaluator reads each item from a single path, so this keeps the
+    divergence unless PHP couples fields the mirror treats as independent.
+    """
+    keep = {mirror.owners.get(index) for index in indexes}
+    if total_only:
+        keep.add('count')
+    return [i if dim.name in keep else 0 for dim, i in zip(mirror.dims, choice)]
+
+
+def names(mirror, mask):
+    return [i for i in mirror.indexes if mask & mirror.bit[i]]
+
+
+def write_payloads(args):
+    dims = dimensions()
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'seed': args.seed, 'count': args.count,
+                            'dimensions': dimensions_digest(dims), 'skeleton': SKELETON}) + '\n')
+        for n, choice in enumerate(random_choices(dims, args.count, args.seed)):
+            f.write(json.dumps({'id': n, 'dims': choice, 'instructions': sparse_payload(dims, choice)},
+                               separators=(',', ':')) + '\n')
+    print(f"🎲 {args.count} payloads over {len(dims)} dimensions → {args.output} "
+          f"({time.perf_counter() - start:.1f}s)")
+
+
+def check(args):
+    dims = dimensions()
+    with open(args.golden, 'r', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        rows = [json.loads(line) for line in f]
+    if header.get('dimensions') != dimensions_digest(dims):
+        print("❌ Golden file was generated from different dimensions; regenerate the payloads")
+        sys.exit(1)
+
+    items = {index: PriceItem(index, price) for index, price in header['items'].items()}
+    mirror = Mirror(dims, items, exempt=header.get('exempt', False))
+    print(f"📖 {len(rows)} golden results for {header.get('customer')} "
+          f"({len(items)} priced items{', exempt' if mirror.exempt else ''})")
+    if mirror.never_charged:
+        print(f"⚠️  Never charged by any payload: {', '.join(mirror.never_charged)}")
+
+    errors = {}
+    compared = []
+    for row in rows:
+        if 'error' in row:
+            errors.setdefault(row['error'], []).append(row)
+        else:
+            compared.append(row)
+
+    start = time.perf_counter()
+    columns = [list(c) for c in zip(*(row['dims'] for row in compared))] or [[] for _ in dims]
+    masks, totals = mirror.run(columns)
+    elapsed = time.perf_counter() - start
+    rate = len(compared) / elapsed if elapsed else float('inf')
+    print(f"⚡ Mirror: {len(compared)} payloads in {elapsed:.3f}s ({rate:,.0f}/s)")
+
+    groups = {}
+    for row, mask, total in zip(compared, masks, totals):
+        golden_mask, golden_total, unknown = golden_result(mirror.bit, row['charges'])
+        if mask == golden_mask and total == golden_total and not unknown:
+            continue
+        key = (tuple(names(mirror, mask & ~golden_mask)), tuple(names(mirror, golden_mask & ~mask)),
+               tuple(unknown), mask == golden_mask and total != golden_total)
+        groups.setdefault(key, []).append((row, total, golden_total))
+
+    for message, failed in sorted(errors.items(), key=lambda e: -len(e[1])):
+        smallest = min(failed, key=lambda r: sum(1 for i in r['dims'] if i))
+        print(f"\n⚠️  PHP rejected {len(failed)} payload(s): {message}")
+        print(f"   e.g. {json.dumps(sparse_payload(dims, smallest['dims']), ensure_ascii=False)}")
+
+    if not groups:
+        print(f"\n✅ No divergence across {len(compared)} payloads")
+        return
+
+    print(f"\n❌ {sum(len(g) for g in groups.values())} divergent payload(s) in {len(groups)} group(s)")
+    for (mirror_only, golden_only, unknown, total_only), found in sorted(groups.items(), key=lambda g: -len(g[1])):
+        row, total, golden_total = min(found, key=lambda f: sum(1 for i in f[0]['dims'] if i))
+        print(f"\n  {len(found)} payload(s):")
+        if mirror_only:
+            print(f"    charged by the mirror only: {', '.join(mirror_only)}")
+        if golden_only:
+            print(f"    charged by PHP only: {', '.join(golden_only)}")
+        if unknown:
+            print(f"    PHP charged unknown item(s): {', '.join(unknown)}")
+        if total_only:
+            print(f"    same items, total ₱{total / 100:.2f} (mirror) vs ₱{golden_total / 100:.2f} (PHP)")
+        print(f"    smallest payload (#{row['id']}): {json.dumps(sparse_payload(dims, row['dims']), ensure_ascii=False)}")
+        reduced = reduce_choice(mirror, row['dims'], mirror_only + golden_only, total_only)
+        if reduced != row['dims']:
+            print(f"    reduced to the diverging dimensions (re-export to confirm): "
+                  f"{json.dumps(sparse_payload(dims, reduced), ensure_ascii=False)}")
+    sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Differential check of fee_oracle against the PHP evaluator.')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    gen = sub.add_parser('payloads', help='Write random instruction payloads for the artisan export')
+    gen.add_argument('-n', '--count', type=int, default=100000)
+    gen.add_argument('--seed', type=int, default=0)
+    gen.add_argument('-o', '--output', type=Path, required=True)
+
+    chk = sub.add_parser('check', help='Compare the mirror with an exported golden file')
+    chk.add_argument('golden', type=Path)
+
+    args = parser.parse_args()
+    if args.command == 'payloads':
+        write_payloads(args)
+    else:
+        check(args)
+
+
+if __name__ == '__main__':
+    main()
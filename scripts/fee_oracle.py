@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Expected voucher-generation charges, computed from config/redeem.php.
+
+The 'pricelist' array in config/redeem.php is what InstructionItemSeeder loads
+into instruction_items, so it is the one source of truth for prices. This
+module parses it once (re-parsed only when the file changes) and mirrors
+InstructionCostEvaluator to price any Generate Voucher request body:
+
+    instruction_fee({'amount': 100, 'count': 1, 'input_fields': ['email']})   # 0.5
+    total_charge(body)    # every charge incl. the ₱15 transaction fee, × count
+    charges(body)         # [Charge('cash.amount', 1500, 1), ...] in centavos
+    included_rail_fee(body)   # what fee_strategy 'include' takes out of each escrow
+    wallet_fee(body)      # what the wallet pays beyond the vouchers' face value
+
+Bodies are first mapped to voucher instructions the way
+GenerateVouchers::toInstructions does, then each pricelist item is checked
+with the evaluator's rules. Per-voucher totals are memoized by the set of
+charged items, so pricing thousands of scenarios costs one lookup each.
+
+Folder names embed prices ("03 - Input Fields - Email (₱100 + ₱0.50)"), so
+fixers match folders by folder_key(name), which drops that suffix.
+
+Usage:
+    python3 scripts/fee_oracle.py                      # print the price list
+    python3 scripts/fee_oracle.py '{"amount": 100, "count": 5, "input_fields": ["email"]}'
+"""
+
+import argparse
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+
+PRICELIST_PATH = Path(__file__).parent.parent / 'config' / 'redeem.php'
+
+# InstructionCostEvaluator::$excludedFields
+EXCLUDED_INDEXES = frozenset({'count', 'mask', 'ttl', 'starts_at', 'expires_at', 'cash.slice_fee'})
+
+# Charged on every voucher with a face value, unless InstructionItem::getAmountProduct
+# waives it for the customer (the cost_diff golden header records whether it does)
+TRANSACTION_FEE_INDEX = 'cash.amount'
+
+# FeeCalculator rail fees in centavos (payment-gateway config/omnipay.php);
+# INSTAPAY is the default rail below INSTAPAY_LIMIT pesos
+RAIL_FEES = {'INSTAPAY': 1000, 'PESONET': 2500}
+INSTAPAY_LIMIT = 50000
+
+# Pricelist items a Generate Voucher body can switch on; voucher_type.* are
+# never charged because voucher_type is a plain string in the instructions
+INSTRUCTION_PREFIXES = ('inputs.fields.', 'feedback.', 'cash.validation.', 'validation.', 'rider.')
+
+_PHP_COMMENT = re.compile(r"""('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")|/\*.*?\*/|//[^\n]*""", re.S)
+_ENTRY = re.compile(r"'([\w.]+)'\s*=>\s*\[(.*?)\]", re.S)
+_FIELD = re.compile(r"'(\w+)'\s*=>\s*('(?:[^'\\]|\\.)*'|-?\d+|true|false|null)")
+_PRICE_SUFFIX = re.compile(r'\s*\(₱[^)]*\)$')
+# bench_tooling.py numbers repeated folders "<name> [n]"
+_COPY_MARKER = re.compile(r'\s*\[\d+\]$')
+
+
+class PriceItem:
+    """One pricelist entry; price is in centavos."""
+
+    def __init__(self, index, price, label='', category='', deprecated=False):
+        self.index = index
+        self.price = price
+        self.label = label
+        self.category = category
+        self.deprecated = deprecated
+
+    def __repr__(self):
+        return f"PriceItem({self.index!r}, {self.price})"
+
+
+class Charge:
+    """A line of the evaluator's result: unit_price centavos × quantity."""
+
+    def __init__(self, index, unit_price, quantity, pay_count=1):
+        self.index = index
+        self.unit_price = unit_price
+        self.quantity = quantity
+        self.pay_count = pay_count
+
+    @property
+    def price(self):
+        return self.unit_price * self.pay_count * self.quantity
+
+    def __repr__(self):
+        return f"Charge({self.index!r}, {self.unit_price}, {self.quantity})"
+
+
+def _php_literal(token):
+    if token.startswith("'"):
+        return re.sub(r"\\(['\\])", r'\1', token[1:-1])
+    if token in ('true', 'false'):
+        return token == 'true'
+    if token == 'null':
+        return None
+    return int(token)
+
+
+def _pricelist_block(source):
+    """The text between "'pricelist' => [" and its closing bracket."""
+    start = source.index("'pricelist'")
+    start = source.index('[', start) + 1
+    depth = 1
+    for pos in range(start, len(source)):
+        if source[pos] == '[':
+            depth += 1
+        elif source[pos] == ']':
+            depth -= 1
+            if depth == 0:
+                return source[start:pos]
+    raise ValueError("Unterminated 'pricelist' array")
+
+
+@lru_cache(maxsize=4)
+def _parse_pricelist(path, mtime_ns):
+    source = Path(path).read_text(encoding='utf-8')
+    source = _PHP_COMMENT.sub(lambda m: m.group(1) or '', source)
+    items = {}
+    for index, body in _ENTRY.findall(_pricelist_block(source)):
+        fields = {key: _php_literal(value) for key, value in _FIELD.findall(body)}
+        if 'price' not in fields:
+            raise ValueError(f"Pricelist entry '{index}' has no price")
+        items[index] = PriceItem(index, fields['price'], fields.get('label', ''),
+                                 fields.get('category', ''), fields.get('deprecated', False))
+    if not items:
+        raise ValueError(f"No pricelist entries found in {path}")
+    return items
+
+
+def pricelist(path=PRICELIST_PATH):
+    """{index: PriceItem} in config order, re-read only when the file changes."""
+    path = Path(path).resolve()
+    return _parse_pricelist(str(path), path.stat().st_mtime_ns)
+
+
+def instructions_from_body(body):
+    """The fee-relevant part of GenerateVouchers::toInstructions()."""
+    fields = body.get('input_fields') or []
+    if isinstance(fields, str):
+        fields = json.loads(fields) or []
+
+    validation = None
+    location, time = body.get('validation_location'), body.get('validation_time')
+    if location is not None or time is not None:
+        # Anything but an object is passed through as is: the evaluator reads
+        # it as an empty array, so it is neither enabled nor charged
+        validation = {'location': location, 'time': time}
+        if isinstance(location, dict):
+            validation['location'] = {
+                'required': location['required'] if location.get('required') is not None else True,
+                'target_lat': location.get('target_lat'),
+                'target_lng': location.get('target_lng'),
+                'radius_meters': location.get('radius_meters'),
+                'on_failure': location.get('on_failure'),
+            }
+        if isinstance(time, dict):
+            validation['time'] = {
+                'window': time.get('window'),
+                'limit_minutes': time.get('limit_minutes'),
+                'track_duration': time['track_duration'] if time.get('track_duration') is not None else True,
+            }
+
+    return {
+        'cash': {
+            'amount': body.get('amount', 0),
+            'validation': {
+                'secret': body.get('validation_secret'),
+                'mobile': body.get('validation_mobile'),
+                'payable': body.get('validation_payable'),
+                'country': 'PH',
+                'location': None,
+                'radius': None,
+            },
+            'settlement_rail': body.get('settlement_rail'),
+            'fee_strategy': body.get('fee_strategy') or 'absorb',
+            'slice_mode': body.get('slice_mode'),
+            'slices': body.get('slices'),
+            'max_slices': body.get('max_slices'),
+        },
+        'voucher_type': body.get('voucher_type'),
+        'inputs': {'fields': fields},
+        'feedback': {
+            'email': body.get('feedback_email'),
+            'mobile': body.get('feedback_mobile'),
+            'webhook': body.get('feedback_webhook'),
+        },
+        'rider': {
+            'message': body.get('rider_message'),
+            'url': body.get('rider_url'),
+            'redirect_timeout': body.get('rider_redirect_timeout'),
+            'splash': body.get('rider_splash'),
+            'splash_timeout': body.get('rider_splash_timeout'),
+            'og_source': body.get('rider_og_source'),
+        },
+        'validation': validation,
+        'count': body.get('count', 1),
+    }
+
+
+def _data_get(data, index):
+    for key in index.split('.'):
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+def _php_empty(value):
+    return value in (None, False, 0, 0.0, '', '0') or value == [] or value == {}
+
+
+def _is_truthy(value):
+    """The evaluator's $isTruthy* checks (bool before int: True is an int in Python)."""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        return value.strip(' \t\n\r\0\x0b') != ''
+    if isinstance(value, (int, float)):
+        return value > 0
+    if isinstance(value, (list, dict)):
+        return len(value) > 0
+    return False
+
+
+def _selected_fields(instructions):
+    fields = []
+    for field in _data_get(instructions, 'inputs.fields') or []:
+        if isinstance(field, dict):
+            field = next(iter(field.values()), None)
+        if not _php_empty(field):
+            fields.append(str(field).upper())
+    return fields
+
+
+def is_charged(item, instructions):
+    """Whether InstructionCostEvaluator charges `item` for these instructions."""
+    if item.index in EXCLUDED_INDEXES or item.price <= 0:
+        return False
+
+    if item.index.startswith('inputs.fields.'):
+        field = item.index[len('inputs.fields.'):]
+        value = field if field.upper() in _selected_fields(instructions) else None
+    elif item.index.startswith('cash.validation.'):
+        value = (_data_get(instructions, 'cash.validation') or {}).get(item.index[len('cash.validation.'):])
+    else:
+        value = _data_get(instructions, item.index)
+
+    if not item.index.startswith('validation.'):
+        return _is_truthy(value)
+
+    value = value if isinstance(value, dict) else {}
+    if value.get('required') is not None:
+        return value['required'] is True
+    if value.get('window') is not None or value.get('limit_minutes') is not None:
+        return not _php_empty(value.get('window')) or not _php_empty(value.get('limit_minutes'))
+    return False
+
+
+@lru_cache(maxsize=4096)
+def _unit_total(indexes, items_key):
+    items = _parse_pricelist(*items_key)
+    return sum(items[index].price for index in indexes)
+
+
+def quantity(instructions):
+    """$source->count ?? 1"""
+    count = instructions.get('count')
+    return 1 if count is None else count
+
+
+def charges(body, exempt=False, path=PRICELIST_PATH, items=None):
+    """
+    Every Charge for a Generate Voucher body (or an instructions dict).
+
+    exempt=True prices cash.amount at zero, as getAmountProduct does for a
+    waived customer.
+    items overrides the pricelist ({index: PriceItem}, e.g. prices exported
+    from a database).
+    """
+    instructions = body if 'cash' in body else instructions_from_body(body)
+    count = quantity(instructions)
+    items = pricelist(path) if items is None else items
+    result = []
+    for item in items.values():
+        if is_charged(item, instructions):
+            unit = 0 if exempt and item.index == TRANSACTION_FEE_INDEX else item.price
+            result.append(Charge(item.index, unit, count))
+
+    cash = instructions.get('cash') or {}
+    extra_slices = {'fixed': (cash.get('slices') or 1) - 1,
+                    'open': (cash.get('max_slices') or 1) - 1}.get(cash.get('slice_mode'), 0)
+    slice_fee = items.get('cash.slice_fee')
+    if extra_slices > 0 and slice_fee is not None and slice_fee.price > 0:
+        result.append(Charge(slice_fee.index, slice_fee.price, count, pay_count=extra_slices))
+    return result
+
+
+def charged_indexes(body, path=PRICELIST_PATH):
+    """Pricelist indexes charged for a body, in pricelist order."""
+    return [c.index for c in charges(body, path=path)]
+
+
+def _centavos_per_voucher(indexes, path):
+    path = Path(path).resolve()
+    return _unit_total(frozenset(indexes), (str(path), path.stat().st_mtime_ns))
+
+
+def instruction_fee(body, path=PRICELIST_PATH):
+    """Per-voucher instruction fee in pesos, excluding the transaction fee (what FEES sums to)."""
+    indexes = [i for i in charged_indexes(body, path) if i != TRANSACTION_FEE_INDEX and i != 'cash.slice_fee']
+    return _centavos_per_voucher(indexes, path) / 100
+
+
+def total_charge(body, exempt=False, path=PRICELIST_PATH):
+    """Everything the owner's wallet pays in fees for the whole request, in pesos."""
+    return sum(c.price for c in charges(body, exempt=exempt, path=path)) / 100
+
+
+def instruction_fees(path=PRICELIST_PATH):
+    """{index: pesos} for every priced instruction a request body can switch on."""
+    return {
+        index: item.price / 100
+        for index, item in pricelist(path).items()
+        if index.startswith(INSTRUCTION_PREFIXES) and item.price > 0 and not item.deprecated
+    }
+
+
+def included_rail_fee(body):
+    """
+    Pesos the 'include' fee strategy takes out of each voucher's escrow
+    (FeeCalculator::calculateAdjustedAmount); 0 for 'absorb' and 'add'.
+    """
+    instructions = body if 'cash' in body else instructions_from_body(body)
+    cash = instructions.get('cash') or {}
+    if cash.get('fee_strategy') != 'include':
+        return 0
+    amount = float(cash.get('amount') or 0)
+    rail = cash.get('settlement_rail') or ('INSTAPAY' if amount < INSTAPAY_LIMIT else 'PESONET')
+    return min(amount, RAIL_FEES[rail] / 100)
+
+
+def wallet_fee(body, path=PRICELIST_PATH):
+    """
+    What the owner's wallet pays beyond the vouchers' face value for the whole
+    request, in pesos: total_charge() less the rail fee 'include' takes out of
+    the escrow. This is the feeAmount the collection's balance tests assert.
+    """
+    count = quantity(body if 'cash' in body else instructions_from_body(body))
+    return round(total_charge(body, path=path) - included_rail_fee(body) * count, 2)
+
+
+def folder_key(name):
+    """Folder name without its price suffix (or copy marker), e.g. '06 - Cash Validation - Secret'."""
+    return _PRICE_SUFFIX.sub('', _COPY_MARKER.sub('', name))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Price Generate Voucher requests from config/redeem.php.')
+    parser.add_argument('body', nargs='?', help='Generate Voucher request body (JSON)')
+    parser.add_argument('--exempt', action='store_true', help='Waive the transaction fee (system user)')
+    parser.add_argument('--pricelist', type=Path, default=PRICELIST_PATH)
+    args = parser.parse_args()
+
+    items = pricelist(args.pricelist)
+    if not args.body:
+        for item in items.values():
+            note = ' (deprecated)' if item.deprecated else ''
+            print(f"  {item.index:36} ₱{item.price / 100:8.2f}  {item.label}{note}")
+        print(f"\n📋 {len(items)} pricelist items from {args.pricelist}")
+        return
+
+    body = json.loads(args.body)
+    for charge in charges(body, exempt=args.exempt, path=args.pricelist):
+        print(f"  {charge.index:36} ₱{charge.unit_price / 100:8.2f} × {charge.quantity * charge.pay_count}")
+    print(f"\n💰 Instruction fee per voucher: ₱{instruction_fee(body, args.pricelist):.2f}")
+    print(f"💰 Total charge: ₱{total_charge(body, args.exempt, args.pricelist):.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,98 +2,164 @@
 """
 Fix Postman test assertions to be accumulation-tolerant (v3 - clean version).
 
-This completely rewrites the test section to avoid duplicates and ensure
-all tests work with accumulated data.
+Rebuilds the System Balances (After) tests by name: tests from earlier
+versions of this fix and duplicates are removed, and the accumulation-tolerant
+tests, their shared variables and the balance summary are put back, so all
+tests work with accumulated data.
 """
 
 import json
 from pathlib import Path
 
+from collection_passes import collection_pass
+from script_model import TestScript, event_script
+
+FOLDER_PREFIXES = tuple(f'{n:02d} ' for n in range(1, 28))
+
+STATUS_TEST = 'Status is 200'
+
+# Shared variables and debug logging, between the status test and the first assertion
+PREAMBLE = [
+    '',
+    'const jsonData = pm.response.json();',
+    'const systemBefore = parseFloat(pm.collectionVariables.get(\'system_balance_before\'));',
+    'const productsBefore = parseFloat(pm.collectionVariables.get(\'products_balance_before\'));',
+    'const systemAfter = parseFloat(jsonData.data.system.balance);',
+    'const productsAfter = parseFloat(jsonData.data.totals.products);',
+    'const actualFee = parseFloat(pm.collectionVariables.get(\'actual_fee\'));',
+    '',
+    'const systemIncrease = systemAfter - systemBefore;',
+    'const productsIncrease = productsAfter - productsBefore;',
+    '',
+    '// Additional variables for tests',
+    'const voucherAmount = parseFloat(pm.collectionVariables.get(\'voucher_amount\'));',
+    'const voucherCount = parseInt(pm.collectionVariables.get(\'voucher_count\'));',
+    'const voucherTotal = voucherAmount * voucherCount;',
+    'const afterProducts = jsonData.data.products;',
+    '',
+    '// Comprehensive debugging',
+    'console.log(\'🔍 DEBUGGING Get System Balances (After):\');',
+    'console.log(\'  productsBefore:\', productsBefore);',
+    'console.log(\'  productsAfter:\', productsAfter);',
+    'console.log(\'  productsIncrease:\', productsIncrease);',
+    'console.log(\'  voucherTotal:\', voucherTotal);',
+    'console.log(\'  actualFee (from variable):\', actualFee);',
+    ''
+]
+
+# The accumulation-tolerant assertions, by test name
+ACCUMULATION_TESTS = {
+    'System wallet unchanged (closed system)': [
+        'pm.test("System wallet unchanged (closed system)", function () {',
+        '    pm.expect(systemIncrease).to.be.closeTo(0, 0.01);',
+        '});'
+    ],
+    'cash.amount product exists and has balance': [
+        'pm.test("cash.amount product exists and has balance", function() {',
+        '    const cashProduct = afterProducts.find(p => p.index === \'cash.amount\');',
+        '    pm.expect(cashProduct, \'cash.amount product should exist\').to.exist;',
+        '    pm.expect(cashProduct.balance, \'cash.amount balance should be positive\').to.be.above(0);',
+        '});'
+    ],
+    'Products balance increased by escrow + fees': [
+        'pm.test("Products balance increased by escrow + fees", function() {',
+        '    const expectedIncrease = voucherTotal + actualFee;',
+        '    pm.expect(productsIncrease, \'Products should increase by escrow + fees\').to.be.closeTo(expectedIncrease, 0.5);',
+        '});'
+    ],
+    'No negative product balances': [
+        'pm.test("No negative product balances", function () {',
+        '    jsonData.data.products.forEach(product => {',
+        '        pm.expect(product.balance).to.be.at.least(0);',
+        '    });',
+        '});'
+    ],
+    'Totals recalculated correctly': [
+        'pm.test("Totals recalculated correctly", function () {',
+        '    const productsSum = jsonData.data.products.reduce((sum, p) => sum + p.balance, 0);',
+        '    pm.expect(jsonData.data.totals.products).to.equal(productsSum);',
+        '});'
+    ],
+}
+
+# Stored values and the balance summary, after the last assertion
+SUMMARY = [
+    '',
+    '// Store final values',
+    'pm.collectionVariables.set(\'system_balance_after\', systemAfter);',
+    'pm.environment.set(\'system_balance_after\', systemAfter);',
+    'pm.collectionVariables.set(\'products_balance_after\', productsAfter);',
+    'pm.environment.set(\'products_balance_after\', productsAfter);',
+    '',
+    'console.log(\'🏛️ System Balances (After):\');',
+    'console.log(\'  System:\');',
+    'console.log(\'    Before: ₱\' + systemBefore.toFixed(2));',
+    'console.log(\'    After: ₱\' + systemAfter.toFixed(2));',
+    'console.log(\'    Change: ₱\' + systemIncrease.toFixed(2) + \' ✓\');',
+    'console.log(\'  Products:\');',
+    'console.log(\'    Before: ₱\' + productsBefore.toFixed(2));',
+    'console.log(\'    After: ₱\' + productsAfter.toFixed(2));',
+    'console.log(\'    Change: +₱\' + productsIncrease.toFixed(2) + \' ✓\');',
+    'console.log(\'  ---\');',
+    'console.log(\'  🔄 Money Flow:\');',
+    'console.log(\'    User → Products (escrow + fees): ₱\' + (voucherTotal + actualFee).toFixed(2));',
+    'console.log(\'    System unchanged: ₱\' + systemIncrease.toFixed(2));',
+    'console.log(\'  ✅ Balances verified\');'
+]
+
 def rebuild_system_balances_after_tests(folder):
-    """Completely rebuild the test script with clean, accumulation-tolerant tests."""
-    
-    for request in folder.get('item', []):
-        if request['name'] == 'Get System Balances (After)':
-            for event in request.get('event', []):
-                if event.get('listen') == 'test':
-                    # Completely replace with new test script
-                    event['script']['exec'] = [
-                        'pm.test("Status is 200", function () {',
-                        '    pm.response.to.have.status(200);',
-                        '});',
-                        '',
-                        'const jsonData = pm.response.json();',
-                        'const systemBefore = parseFloat(pm.collectionVariables.get(\'system_balance_before\'));',
-                        'const productsBefore = parseFloat(pm.collectionVariables.get(\'products_balance_before\'));',
-                        'const systemAfter = parseFloat(jsonData.data.system.balance);',
-                        'const productsAfter = parseFloat(jsonData.data.totals.products);',
-                        'const actualFee = parseFloat(pm.collectionVariables.get(\'actual_fee\'));',
-                        '',
-                        'const systemIncrease = systemAfter - systemBefore;',
-                        'const productsIncrease = productsAfter - productsBefore;',
-                        '',
-                        '// Additional variables for tests',
-                        'const voucherAmount = parseFloat(pm.collectionVariables.get(\'voucher_amount\'));',
-                        'const voucherCount = parseInt(pm.collectionVariables.get(\'voucher_count\'));',
-                        'const voucherTotal = voucherAmount * voucherCount;',
-                        'const afterProducts = jsonData.data.products;',
-                        '',
-                        '// Comprehensive debugging',
-                        'console.log(\'🔍 DEBUGGING Get System Balances (After):\');',
-                        'console.log(\'  productsBefore:\', productsBefore);',
-                        'console.log(\'  productsAfter:\', productsAfter);',
-                        'console.log(\'  productsIncrease:\', productsIncrease);',
-                        'console.log(\'  voucherTotal:\', voucherTotal);',
-                        'console.log(\'  actualFee (from variable):\', actualFee);',
-                        '',
-                        'pm.test("System wallet unchanged (closed system)", function () {',
-                        '    pm.expect(systemIncrease).to.be.closeTo(0, 0.01);',
-                        '});',
-                        '',
-                        'pm.test("cash.amount product exists and has balance", function() {',
-                        '    const cashProduct = afterProducts.find(p => p.index === \'cash.amount\');',
-                        '    pm.expect(cashProduct, \'cash.amount product should exist\').to.exist;',
-                        '    pm.expect(cashProduct.balance, \'cash.amount balance should be positive\').to.be.above(0);',
-                        '});',
-                        '',
-                        'pm.test("Products balance increased by escrow + fees", function() {',
-                        '    const expectedIncrease = voucherTotal + actualFee;',
-                        '    pm.expect(productsIncrease, \'Products should increase by escrow + fees\').to.be.closeTo(expectedIncrease, 0.5);',
-                        '});',
-                        '',
-                        'pm.test("No negative product balances", function () {',
-                        '    jsonData.data.products.forEach(product => {',
-                        '        pm.expect(product.balance).to.be.at.least(0);',
-                        '    });',
-                        '});',
-                        '',
-                        'pm.test("Totals recalculated correctly", function () {',
-                        '    const productsSum = jsonData.data.products.reduce((sum, p) => sum + p.balance, 0);',
-                        '    pm.expect(jsonData.data.totals.products).to.equal(productsSum);',
-                        '});',
-                        '',
-                        '// Store final values',
-                        'pm.collectionVariables.set(\'system_balance_after\', systemAfter);',
-                        'pm.environment.set(\'system_balance_after\', systemAfter);',
-                        'pm.collectionVariables.set(\'products_balance_after\', productsAfter);',
-                        'pm.environment.set(\'products_balance_after\', productsAfter);',
-                        '',
-                        'console.log(\'🏛️ System Balances (After):\');',
-                        'console.log(\'  System:\');',
-                        'console.log(\'    Before: ₱\' + systemBefore.toFixed(2));',
-                        'console.log(\'    After: ₱\' + systemAfter.toFixed(2));',
-                        'console.log(\'    Change: ₱\' + systemIncrease.toFixed(2) + \' ✓\');',
-                        'console.log(\'  Products:\');',
-                        'console.log(\'    Before: ₱\' + productsBefore.toFixed(2));',
-                        'console.log(\'    After: ₱\' + productsAfter.toFixed(2));',
-                        'console.log(\'    Change: +₱\' + productsIncrease.toFixed(2) + \' ✓\');',
-                        'console.log(\'  ---\');',
-                        'console.log(\'  🔄 Money Flow:\');',
-                        'console.log(\'    User → Products (escrow + fees): ₱\' + (voucherTotal + actualFee).toFixed(2));',
-                        'console.log(\'    System unchanged: ₱\' + systemIncrease.toFixed(2));',
-                        'console.log(\'  ✅ Balances verified\');'
-                    ]
-                    break
+    """
+    Rebuild the System Balances (After) tests as clean, accumulation-tolerant
+    ones. Tests from earlier versions of this fix (or duplicates of ours) are
+    removed, ours are replaced by name, and the statements around them are
+    reset. Returns True when the script changed.
+    """
+    request = next((r for r in folder.get('item', []) if r['name'] == 'Get System Balances (After)'), None)
+    event = event_script(request) if request else None
+    if event is None:
+        return False
+    before = event['script']['exec']
+    script = TestScript.parse(before)
+    status = script.get(STATUS_TEST)
+    if status is None:
+        return False
+
+    seen = set()
+    for block in list(script):
+        if block.is_test and block is not status:
+            if block.name not in ACCUMULATION_TESTS or block.name in seen:
+                blank = block.next
+                script.remove(block)
+                # Drop the blank line that separated it from the next test
+                if blank is not None and not blank.is_test and not ''.join(blank.lines).strip():
+                    script.remove(blank)
+            seen.add(block.name)
+
+    if status.next is not None and not status.next.is_test:
+        script.replace(status.next, PREAMBLE)
+    else:
+        script.insert_after(status, PREAMBLE)
+    if script.tail.is_test or script.tail is status.next:
+        script.append(SUMMARY)
+    else:
+        script.replace(script.tail, SUMMARY)
+    summary = script.tail
+
+    for name, lines in ACCUMULATION_TESTS.items():
+        if name in script:
+            script.replace(name, lines)
+        else:
+            script.insert_before(summary, [''] + lines)
+
+    event['script']['exec'] = script.to_exec()
+    return event['script']['exec'] != before
+
+@collection_pass('accumulation')
+def rebuild_folder(folder):
+    """Rebuild the System Balances (After) tests of a numbered billing folder."""
+    if not folder.get('name', '').startswith(FOLDER_PREFIXES):
+        return False
+    return rebuild_system_balances_after_tests(folder)
 
 def main():
     collection_path = Path(__file__).parent.parent / 'docs' / 'postman' / 'redeem-x-e2e-generation-billing.postman_collection.json'
@@ -105,12 +171,8 @@ def main():
     folders_updated = 0
     for folder in collection.get('item', []):
         folder_name = folder.get('name', '')
-        if folder_name.startswith(('01 ', '02 ', '03 ', '04 ', '05 ', '06 ', '07 ', 
-                                    '08 ', '09 ', '10 ', '11 ', '12 ', '13 ', '14 ',
-                                    '15 ', '16 ', '17 ', '18 ', '19 ', '20 ', '21 ',
-                                    '22 ', '23 ', '24 ', '25 ', '26 ', '27 ')):
+        if rebuild_folder(folder):
             print(f"  ✏️  Rebuilding: {folder_name}")
-            rebuild_system_balances_after_tests(folder)
             folders_updated += 1
     
     print(f"💾 Writing updated collection...")
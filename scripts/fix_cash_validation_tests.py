@@ -8,36 +8,40 @@ Each folder should test for its specific cash validation rules.
 import json
 from pathlib import Path
 
+from collection_passes import collection_pass
+from fee_oracle import folder_key
+from script_model import TestScript
+
 # Define expected cash validation per folder
 FOLDER_CASH_VALIDATION = {
-    "01 - Simplest Voucher (₱100)": {"secret": None, "mobile": None},
-    "02 - Basic Settings - Bulk (₱1000 for 10 vouchers)": {"secret": None, "mobile": None},
-    "03 - Input Fields - Email (₱100 + ₱2.20)": {"secret": None, "mobile": None},
-    "03 - Input Fields - Mobile (₱100 + ₱2.30)": {"secret": None, "mobile": None},
-    "03 - Input Fields - Name (₱100 + ₱2.40)": {"secret": None, "mobile": None},
-    "03 - Input Fields - Location (₱100 + ₱3.00)": {"secret": None, "mobile": None},
-    "03 - Input Fields - Signature (₱100 + ₱2.80)": {"secret": None, "mobile": None},
-    "03 - Input Fields - Selfie (₱100 + ₱4.00)": {"secret": None, "mobile": None},
-    "04 - Input Fields - Basic KYC (₱100 + ₱6.90)": {"secret": None, "mobile": None},
-    "04 - Input Fields - Identity Verification (₱100 + ₱7.50)": {"secret": None, "mobile": None},
-    "04 - Input Fields - Digital Signature (₱100 + ₱7.30)": {"secret": None, "mobile": None},
-    "04 - Input Fields - Full Profile (₱100 + ₱12.20)": {"secret": None, "mobile": None},
-    "05 - Feedback - Email (₱100 + ₱1.00)": {"secret": None, "mobile": None},
-    "05 - Feedback - Mobile (₱100 + ₱1.80)": {"secret": None, "mobile": None},
-    "05 - Feedback - Webhook (₱100 + ₱1.90)": {"secret": None, "mobile": None},
-    "05 - Feedback - Email + Mobile + Webhook (₱100 + ₱4.70)": {"secret": None, "mobile": None},
-    "06 - Cash Validation - Secret (₱100 + ₱1.20)": {"secret": "SECRET123", "mobile": None},
-    "06 - Cash Validation - Mobile (₱100 + ₱1.30)": {"secret": None, "mobile": "+639171234567"},
-    "06 - Cash Validation - Both (₱100 + ₱2.50)": {"secret": "SECRET123", "mobile": "+639171234567"},
+    "01 - Simplest Voucher": {"secret": None, "mobile": None},
+    "02 - Basic Settings - Bulk": {"secret": None, "mobile": None},
+    "03 - Input Fields - Email": {"secret": None, "mobile": None},
+    "03 - Input Fields - Mobile": {"secret": None, "mobile": None},
+    "03 - Input Fields - Name": {"secret": None, "mobile": None},
+    "03 - Input Fields - Location": {"secret": None, "mobile": None},
+    "03 - Input Fields - Signature": {"secret": None, "mobile": None},
+    "03 - Input Fields - Selfie": {"secret": None, "mobile": None},
+    "04 - Input Fields - Basic KYC": {"secret": None, "mobile": None},
+    "04 - Input Fields - Identity Verification": {"secret": None, "mobile": None},
+    "04 - Input Fields - Digital Signature": {"secret": None, "mobile": None},
+    "04 - Input Fields - Full Profile": {"secret": None, "mobile": None},
+    "05 - Feedback - Email": {"secret": None, "mobile": None},
+    "05 - Feedback - Mobile": {"secret": None, "mobile": None},
+    "05 - Feedback - Webhook": {"secret": None, "mobile": None},
+    "05 - Feedback - Email + Mobile + Webhook": {"secret": None, "mobile": None},
+    "06 - Cash Validation - Secret": {"secret": "SECRET123", "mobile": None},
+    "06 - Cash Validation - Mobile": {"secret": None, "mobile": "+639171234567"},
+    "06 - Cash Validation - Both": {"secret": "SECRET123", "mobile": "+639171234567"},
     "07 - Settlement Rail - INSTAPAY / Absorb": {"secret": None, "mobile": None},
     "07 - Settlement Rail - INSTAPAY / Include": {"secret": None, "mobile": None},
     "07 - Settlement Rail - PESONET / Absorb": {"secret": None, "mobile": None},
-    "08 - Rider - Message (₱100 + ₱2.00)": {"secret": None, "mobile": None},
-    "08 - Rider - Url (₱100 + ₱2.10)": {"secret": None, "mobile": None},
-    "08 - Rider - Full (₱100 + ₱4.10)": {"secret": None, "mobile": None},
-    "09 - Validation - Location (₱100 + ₱3.00)": {"secret": None, "mobile": None},
-    "09 - Validation - Time (₱100 + ₱2.50)": {"secret": None, "mobile": None},
-    "11 - Complex Scenario (₱572.50 total)": {"secret": "COMPLEX123", "mobile": None},
+    "08 - Rider - Message": {"secret": None, "mobile": None},
+    "08 - Rider - Url": {"secret": None, "mobile": None},
+    "08 - Rider - Full": {"secret": None, "mobile": None},
+    "09 - Validation - Location": {"secret": None, "mobile": None},
+    "09 - Validation - Time": {"secret": None, "mobile": None},
+    "11 - Complex Scenario": {"secret": "COMPLEX123", "mobile": None},
 }
 
 def generate_cash_validation_test(validation):
@@ -101,11 +105,12 @@ def generate_cash_validation_test(validation):
         
         return tests
 
+@collection_pass('cash_validation')
 def fix_voucher_details_cash_validation_tests(folder):
     """Fix the cash validation tests in Get Voucher Details request."""
     
     folder_name = folder.get('name', '')
-    expected_validation = FOLDER_CASH_VALIDATION.get(folder_name)
+    expected_validation = FOLDER_CASH_VALIDATION.get(folder_key(folder_name))
     
     if expected_validation is None:
         return False
@@ -114,30 +119,21 @@ def fix_voucher_details_cash_validation_tests(folder):
         if request['name'] == 'Get Voucher Details':
             for event in request.get('event', []):
                 if event.get('listen') == 'test':
-                    script_lines = event['script']['exec']
-                    
-                    new_lines = []
-                    skip_validation_section = False
-                    validation_section_found = False
+                    script = TestScript.parse(event['script']['exec'])
                     
-                    for i, line in enumerate(script_lines):
-                        # Find "Cash validation empty" test
-                        if 'pm.test("Cash validation empty' in line:
-                            validation_section_found = True
-                            skip_validation_section = True
-                            new_lines.extend(generate_cash_validation_test(expected_validation))
-                            continue
-                        
-                        # Skip until closing brace
-                        if skip_validation_section:
-                            if line.strip() == '});':
-                                skip_validation_section = False
-                            continue
-                        
-                        new_lines.append(line)
+                    # Find "Cash validation empty" test
+                    block = script.find('Cash validation empty')
+                    if block is None:
+                        return False
                     
-                    event['script']['exec'] = new_lines
-                    return validation_section_found
+                    lines = generate_cash_validation_test(expected_validation)
+                    # The blank line after the test is already there on a rerun
+                    if block.next is not None and block.next.lines[:1] == ['']:
+                        lines = lines[:-1]
+                    before = event['script']['exec']
+                    script.replace(block, lines)
+                    event['script']['exec'] = script.to_exec()
+                    return event['script']['exec'] != before
     return False
 
 def main():
@@ -150,9 +146,9 @@ def main():
     folders_updated = 0
     for folder in collection.get('item', []):
         folder_name = folder.get('name', '')
-        if folder_name in FOLDER_CASH_VALIDATION:
+        if folder_key(folder_name) in FOLDER_CASH_VALIDATION:
             if fix_voucher_details_cash_validation_tests(folder):
-                validation = FOLDER_CASH_VALIDATION[folder_name]
+                validation = FOLDER_CASH_VALIDATION[folder_key(folder_name)]
                 validations = []
                 if validation["secret"]: validations.append(f"secret={validation['secret']}")
                 if validation["mobile"]: validations.append(f"mobile={validation['mobile']}")
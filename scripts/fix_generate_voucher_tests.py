@@ -7,6 +7,40 @@ This helps debug API error responses.
 import json
 from pathlib import Path
 
+from collection_passes import collection_pass
+from script_model import TestScript, event_script
+
+ERROR_HANDLING_LINES = [
+    '// Debug: Log response structure',
+    'if (!jsonData || !jsonData.data) {',
+    '    console.error("API Error Response:", JSON.stringify(jsonData, null, 2));',
+    '    pm.expect.fail("API returned error response instead of success");',
+    '}',
+    ''
+]
+
+# The first test that reads jsonData.data; the guard goes right before it
+FIRST_DATA_TEST = 'Response structure valid'
+
+@collection_pass('generate_voucher_errors')
+def add_error_handling(folder):
+    """Insert the API error guard before the first test that reads the response data."""
+    gen_request = next((r for r in folder.get('item', []) if r['name'] == 'Generate Voucher'), None)
+    test_event = event_script(gen_request) if gen_request else None
+    if test_event is None:
+        return False
+    
+    # The guard may sit anywhere after an earlier run, so look for its marker
+    if any(ERROR_HANDLING_LINES[0] in line for line in test_event['script']['exec']):
+        return False
+
+    script = TestScript.parse(test_event['script']['exec'])
+    if FIRST_DATA_TEST not in script:
+        return False
+    script.insert_before(FIRST_DATA_TEST, ERROR_HANDLING_LINES)
+    test_event['script']['exec'] = script.to_exec()
+    return True
+
 def main():
     collection_path = Path('docs/postman/redeem-x-e2e-generation-billing.postman_collection.json')
     
@@ -14,33 +48,10 @@ def main():
     
     # Add error handling to all Generate Voucher requests
     for folder in collection['item']:
-        gen_request = folder['item'][2]  # Generate Voucher is always index 2
-        test_event = [e for e in gen_request['event'] if e['listen'] == 'test'][0]
-        script = test_event['script']['exec']
-        
-        # Find where we parse JSON response
-        for i, line in enumerate(script):
-            if line == 'const jsonData = pm.response.json();':
-                # Check if safety check already exists
-                if i+1 < len(script) and 'Debug: Log response' in script[i+1]:
-                    print(f'  → {folder["name"]}: Already has error handling')
-                    break
-                
-                # Insert safety check after jsonData declaration
-                new_lines = [
-                    '',
-                    '// Debug: Log response structure',
-                    'if (!jsonData || !jsonData.data) {',
-                    '    console.error("API Error Response:", JSON.stringify(jsonData, null, 2));',
-                    '    pm.expect.fail("API returned error response instead of success");',
-                    '}'
-                ]
-                
-                for idx, new_line in enumerate(new_lines):
-                    script.insert(i + 1 + idx, new_line)
-                
-                print(f'  ✓ {folder["name"]}: Added error handling')
-                break
+        if add_error_handling(folder):
+            print(f'  ✓ {folder["name"]}: Added error handling')
+        else:
+            print(f'  → {folder["name"]}: Already has error handling')
     
     # Save
     with open(collection_path, 'w') as f:
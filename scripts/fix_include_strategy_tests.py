@@ -2,20 +2,35 @@
 """
 Fix tests for "include" fee strategy folder.
 
-Include strategy: Fee is deducted from voucher value, user pays less.
-Example: ₱100 voucher with ₱10 fee → user pays ₱90, redeemer gets ₱100
+Include strategy: the rail fee is taken out of each voucher's escrow, so the
+wallet pays less than face value plus fees.
+Example: ₱100 INSTAPAY voucher, ₱10 rail fee → ₱90 escrowed, plus the ₱15
+transaction fee: the wallet pays ₱105, ₱5 over face value
+(fee_oracle.wallet_fee).
 """
 
 import json
 from pathlib import Path
 
+from collection_passes import collection_pass
+from fee_oracle import included_rail_fee, total_charge, wallet_fee
+from folder_bodies import folder_body
+from script_model import TestScript
+
+@collection_pass('include_strategy')
 def fix_include_strategy_folder(folder):
     """Fix all tests in the include strategy folder."""
     
     folder_name = folder.get('name', '')
-    if 'INSTAPAY / Include' not in folder_name:
+    body = folder_body(folder_name)
+    if 'INSTAPAY / Include' not in folder_name or body is None:
         return False
     
+    count = body['count']
+    rail = body.get('settlement_rail', 'INSTAPAY')
+    included = round(included_rail_fee(body) * count, 2)
+    fees = round(total_charge(body), 2)
+    expected = wallet_fee(body)
     updated = False
     
     for request in folder.get('item', []):
@@ -23,6 +38,7 @@ def fix_include_strategy_folder(folder):
         if request['name'] == 'Get Balance (After)':
             for event in request.get('event', []):
                 if event.get('listen') == 'test':
+                    before = event['script']['exec']
                     event['script']['exec'] = [
                         'pm.test("Status is 200", function () {',
                         '    pm.response.to.have.status(200);',
@@ -40,8 +56,10 @@ def fix_include_strategy_folder(folder):
                         '',
                         'const deducted = balanceBefore - balanceAfter;',
                         'const voucherTotal = voucherAmount * voucherCount;',
-                        '// For "include" strategy: fee is deducted from voucher, so deducted < voucherTotal',
-                        'const feeAmount = voucherTotal - deducted; // Positive fee value',
+                        '// For "include" strategy the rail fee comes out of the escrow, so the',
+                        '// wallet pays voucherTotal - includedFee + fees',
+                        f'const includedFee = {included}; // {rail} fee × {count}',
+                        'const feeAmount = deducted - voucherTotal;',
                         '',
                         '// Debug calculations',
                         'console.log(\'🔍 DEBUGGING Get Balance (After):\');',
@@ -51,17 +69,12 @@ def fix_include_strategy_folder(folder):
                         'console.log(\'  balanceBefore:\', balanceBefore);',
                         'console.log(\'  balanceAfter:\', balanceAfter);',
                         'console.log(\'  deducted (before - after):\', deducted);',
-                        'console.log(\'  feeAmount (voucherTotal - deducted):\', feeAmount);',
-                        'console.log(\'  → Fee INCLUDED in voucher value (user pays less)\');',
-                        '',
-                        'pm.test("Deduction less than voucher amount (include strategy)", function () {',
-                        '    // Include strategy: user pays less because fee is deducted from voucher',
-                        '    pm.expect(deducted).to.be.below(voucherTotal + 0.01);',
-                        '});',
+                        'console.log(\'  feeAmount (deducted - voucherTotal):\', feeAmount);',
+                        'console.log(\'  → Rail fee INCLUDED in voucher value (escrow is reduced)\');',
                         '',
-                        'pm.test("Fee included (₱10 INSTAPAY fee)", function () {',
-                        '    // INSTAPAY fee is ₱10',
-                        '    pm.expect(feeAmount).to.be.closeTo(10.0, 0.5);',
+                        f'pm.test("Fees less the included {rail} fee", function () {{',
+                        f'    // ₱{fees:.2f} fees (transaction fee included) - ₱{included:.2f} {rail} fee taken out of the escrow',
+                        f'    pm.expect(feeAmount).to.be.closeTo({expected}, 0.5);',
                         '});',
                         '',
                         'pm.test("Balance remains positive", function () {',
@@ -72,12 +85,12 @@ def fix_include_strategy_folder(folder):
                         '    pm.expect(jsonData.data.balance_cents).to.equal(Math.round(balanceAfter * 100));',
                         '});',
                         '',
-                        '// Store values (store negative feeAmount to indicate "include")',
+                        '// Store values (actual_fee is below the fees by the included rail fee)',
                         'pm.collectionVariables.set(\'balance_after\', balanceAfter);',
                         'pm.environment.set(\'balance_after\', balanceAfter);',
-                        'pm.collectionVariables.set(\'actual_fee\', -feeAmount); // Negative for "include"',
-                        'pm.environment.set(\'actual_fee\', -feeAmount);',
-                        'console.log(\'📝 Stored actual_fee:\', -feeAmount, \'(negative = included in voucher)\');',
+                        'pm.collectionVariables.set(\'actual_fee\', feeAmount);',
+                        'pm.environment.set(\'actual_fee\', feeAmount);',
+                        'console.log(\'📝 Stored actual_fee:\', feeAmount);',
                         '',
                         'console.log(\'💸 User Wallet (After):\');',
                         'console.log(\'  Balance before: ₱\' + balanceBefore.toFixed(2));',
@@ -85,54 +98,44 @@ def fix_include_strategy_folder(folder):
                         'console.log(\'  ---\');',
                         'console.log(\'  Total deducted: ₱\' + deducted.toFixed(2));',
                         'console.log(\'    - Voucher amount: ₱\' + voucherTotal.toFixed(2));',
-                        'console.log(\'    - Fee (included): -₱\' + feeAmount.toFixed(2));',
-                        'console.log(\'    = User pays: ₱\' + deducted.toFixed(2) + \' (₱100 - ₱10 fee)\');',
+                        'console.log(\'    - Fee (included): -₱\' + includedFee.toFixed(2));',
+                        'console.log(\'    - Fees: ₱\' + (feeAmount + includedFee).toFixed(2));',
+                        'console.log(\'    = User pays: ₱\' + deducted.toFixed(2));',
                         'console.log(\'  ✓ Wallet charged correctly (include strategy)\');'
                     ]
-                    updated = True
+                    updated |= event['script']['exec'] != before
         
         # Fix Get Voucher Details - Cash entity test
         elif request['name'] == 'Get Voucher Details':
             for event in request.get('event', []):
                 if event.get('listen') == 'test':
-                    script_lines = event['script']['exec']
-                    new_lines = []
-                    skip_until_closing = False
+                    script = TestScript.parse(event['script']['exec'])
                     
-                    for i, line in enumerate(script_lines):
-                        if skip_until_closing:
-                            if line.strip() == '});':
-                                skip_until_closing = False
-                            continue
-                        
-                        # Replace cash entity test
-                        if 'pm.test("Cash entity exists with fee calculation"' in line:
-                            skip_until_closing = True
-                            new_lines.extend([
-                                'pm.test("Cash entity with include strategy", function () {',
-                                '    pm.expect(voucher.cash).to.exist;',
-                                '    pm.expect(voucher.cash.meta.fee_calculation).to.exist;',
-                                '    pm.expect(voucher.cash.meta.fee_calculation.strategy).to.equal(\'include\');',
-                                '    pm.expect(voucher.cash.meta.fee_calculation.rail).to.equal(\'INSTAPAY\');',
-                                '    ',
-                                '    // Include strategy: adjusted_amount is LESS than original_amount',
-                                '    pm.expect(voucher.cash.meta.fee_calculation.adjusted_amount).to.be.below(voucher.cash.meta.original_amount);',
-                                '    ',
-                                '    console.log(\'💰 Fee Calculation (Include Strategy):\');',
-                                '    console.log(\'  Original: ₱\' + voucher.cash.meta.original_amount);',
-                                '    console.log(\'  Adjusted: ₱\' + voucher.cash.meta.fee_calculation.adjusted_amount + \' (fee deducted)\');',
-                                '    console.log(\'  Fee: ₱\' + (voucher.cash.meta.fee_calculation.fee_amount / 100));',
-                                '    console.log(\'  User Paid: ₱\' + (voucher.cash.meta.fee_calculation.adjusted_amount) + \' (less than original)\');',
-                                '    console.log(\'  Strategy: include (fee deducted from voucher value)\');',
-                                '    console.log(\'  Rail: INSTAPAY\');',
-                                '});'
-                            ])
-                            continue
-                        
-                        new_lines.append(line)
+                    # Replace cash entity test
+                    if 'Cash entity exists with fee calculation' in script:
+                        script.replace('Cash entity exists with fee calculation', [
+                            'pm.test("Cash entity with include strategy", function () {',
+                            '    pm.expect(voucher.cash).to.exist;',
+                            '    pm.expect(voucher.cash.meta.fee_calculation).to.exist;',
+                            '    pm.expect(voucher.cash.meta.fee_calculation.strategy).to.equal(\'include\');',
+                            '    pm.expect(voucher.cash.meta.fee_calculation.rail).to.equal(\'INSTAPAY\');',
+                            '    ',
+                            '    // Include strategy: adjusted_amount is LESS than original_amount',
+                            '    pm.expect(voucher.cash.meta.fee_calculation.adjusted_amount).to.be.below(voucher.cash.meta.original_amount);',
+                            '    ',
+                            '    console.log(\'💰 Fee Calculation (Include Strategy):\');',
+                            '    console.log(\'  Original: ₱\' + voucher.cash.meta.original_amount);',
+                            '    console.log(\'  Adjusted: ₱\' + voucher.cash.meta.fee_calculation.adjusted_amount + \' (fee deducted)\');',
+                            '    console.log(\'  Fee: ₱\' + (voucher.cash.meta.fee_calculation.fee_amount / 100));',
+                            '    console.log(\'  User Paid: ₱\' + (voucher.cash.meta.fee_calculation.adjusted_amount) + \' (less than original)\');',
+                            '    console.log(\'  Strategy: include (fee deducted from voucher value)\');',
+                            '    console.log(\'  Rail: INSTAPAY\');',
+                            '});'
+                        ])
                     
-                    event['script']['exec'] = new_lines
-                    updated = True
+                    before = event['script']['exec']
+                    event['script']['exec'] = script.to_exec()
+                    updated |= event['script']['exec'] != before
     
     return updated
 
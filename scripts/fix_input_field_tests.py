@@ -8,36 +8,40 @@ Each folder should test for its specific input fields, not "no input fields".
 import json
 from pathlib import Path
 
+from collection_passes import collection_pass
+from fee_oracle import folder_key
+from script_model import TestScript
+
 # Define expected input fields per folder
 FOLDER_INPUT_FIELDS = {
-    "01 - Simplest Voucher (₱100)": [],
-    "02 - Basic Settings - Bulk (₱1000 for 10 vouchers)": [],
-    "03 - Input Fields - Email (₱100 + ₱2.20)": ["email"],
-    "03 - Input Fields - Mobile (₱100 + ₱2.30)": ["mobile"],
-    "03 - Input Fields - Name (₱100 + ₱2.40)": ["name"],
-    "03 - Input Fields - Location (₱100 + ₱3.00)": ["location"],
-    "03 - Input Fields - Signature (₱100 + ₱2.80)": ["signature"],
-    "03 - Input Fields - Selfie (₱100 + ₱4.00)": ["selfie"],
-    "04 - Input Fields - Basic KYC (₱100 + ₱6.90)": ["email", "mobile", "name"],
-    "04 - Input Fields - Identity Verification (₱100 + ₱7.50)": ["email", "mobile", "selfie"],
-    "04 - Input Fields - Digital Signature (₱100 + ₱7.30)": ["email", "name", "signature"],
-    "04 - Input Fields - Full Profile (₱100 + ₱12.20)": ["email", "mobile", "name", "address", "birth_date"],
-    "05 - Feedback - Email (₱100 + ₱1.00)": [],
-    "05 - Feedback - Mobile (₱100 + ₱1.80)": [],
-    "05 - Feedback - Webhook (₱100 + ₱1.90)": [],
-    "05 - Feedback - Email + Mobile + Webhook (₱100 + ₱4.70)": [],
-    "06 - Cash Validation - Secret (₱100 + ₱1.20)": [],
-    "06 - Cash Validation - Mobile (₱100 + ₱1.30)": [],
-    "06 - Cash Validation - Both (₱100 + ₱2.50)": [],
+    "01 - Simplest Voucher": [],
+    "02 - Basic Settings - Bulk": [],
+    "03 - Input Fields - Email": ["email"],
+    "03 - Input Fields - Mobile": ["mobile"],
+    "03 - Input Fields - Name": ["name"],
+    "03 - Input Fields - Location": ["location"],
+    "03 - Input Fields - Signature": ["signature"],
+    "03 - Input Fields - Selfie": ["selfie"],
+    "04 - Input Fields - Basic KYC": ["email", "mobile", "name"],
+    "04 - Input Fields - Identity Verification": ["email", "mobile", "selfie"],
+    "04 - Input Fields - Digital Signature": ["email", "name", "signature"],
+    "04 - Input Fields - Full Profile": ["email", "mobile", "name", "address", "birth_date"],
+    "05 - Feedback - Email": [],
+    "05 - Feedback - Mobile": [],
+    "05 - Feedback - Webhook": [],
+    "05 - Feedback - Email + Mobile + Webhook": [],
+    "06 - Cash Validation - Secret": [],
+    "06 - Cash Validation - Mobile": [],
+    "06 - Cash Validation - Both": [],
     "07 - Settlement Rail - INSTAPAY / Absorb": [],
     "07 - Settlement Rail - INSTAPAY / Include": [],
     "07 - Settlement Rail - PESONET / Absorb": [],
-    "08 - Rider - Message (₱100 + ₱2.00)": [],
-    "08 - Rider - Url (₱100 + ₱2.10)": [],
-    "08 - Rider - Full (₱100 + ₱4.10)": [],
-    "09 - Validation - Location (₱100 + ₱3.00)": [],
-    "09 - Validation - Time (₱100 + ₱2.50)": [],
-    "11 - Complex Scenario (₱572.50 total)": ["email", "mobile", "name", "location", "signature"],
+    "08 - Rider - Message": [],
+    "08 - Rider - Url": [],
+    "08 - Rider - Full": [],
+    "09 - Validation - Location": [],
+    "09 - Validation - Time": [],
+    "11 - Complex Scenario": ["email", "mobile", "name", "location", "signature"],
 }
 
 def generate_input_field_test(fields):
@@ -65,11 +69,12 @@ def generate_input_field_test(fields):
             '});'
         ]
 
+@collection_pass('input_fields')
 def fix_voucher_details_test(folder):
     """Fix the input field test in Get Voucher Details request."""
     
     folder_name = folder.get('name', '')
-    expected_fields = FOLDER_INPUT_FIELDS.get(folder_name)
+    expected_fields = FOLDER_INPUT_FIELDS.get(folder_key(folder_name))
     
     if expected_fields is None:
         return False
@@ -78,32 +83,16 @@ def fix_voucher_details_test(folder):
         if request['name'] == 'Get Voucher Details':
             for event in request.get('event', []):
                 if event.get('listen') == 'test':
-                    script_lines = event['script']['exec']
+                    before = event['script']['exec']
+                    script = TestScript.parse(before)
                     
                     # Find and replace the "No input fields (simplest)" test
-                    new_lines = []
-                    skip_until_closing = False
-                    replaced = False
-                    
-                    for i, line in enumerate(script_lines):
-                        if skip_until_closing:
-                            if line.strip() == '});':
-                                skip_until_closing = False
-                                # Insert new test
-                                if not replaced:
-                                    new_lines.extend(generate_input_field_test(expected_fields))
-                                    replaced = True
-                            continue
-                        
-                        # Find the test to replace
-                        if 'pm.test("No input fields (simplest)"' in line or 'pm.test("Input fields:' in line:
-                            skip_until_closing = True
-                            continue
-                        
-                        new_lines.append(line)
+                    block = script.get('No input fields (simplest)') or script.find('Input fields:')
+                    if block is not None:
+                        script.replace(block, generate_input_field_test(expected_fields))
                     
-                    event['script']['exec'] = new_lines
-                    return True
+                    event['script']['exec'] = script.to_exec()
+                    return event['script']['exec'] != before
     return False
 
 def main():
@@ -116,9 +105,9 @@ def main():
     folders_updated = 0
     for folder in collection.get('item', []):
         folder_name = folder.get('name', '')
-        if folder_name in FOLDER_INPUT_FIELDS:
+        if folder_key(folder_name) in FOLDER_INPUT_FIELDS:
             if fix_voucher_details_test(folder):
-                fields = FOLDER_INPUT_FIELDS[folder_name]
+                fields = FOLDER_INPUT_FIELDS[folder_key(folder_name)]
                 fields_str = ', '.join(fields) if fields else 'none'
                 print(f"  ✏️  {folder_name}: [{fields_str}]")
                 folders_updated += 1
@@ -6,142 +6,96 @@ Fix rider validation tests in Get Voucher Details requests.
 import json
 from pathlib import Path
 
+from collection_passes import collection_pass
+from fee_oracle import folder_key
+from script_model import TestScript, event_script
+
 # Define expected rider per folder
 FOLDER_RIDER = {
-    "01 - Simplest Voucher (₱100)": {"message": None, "url": None, "splash": None},
-    "02 - Basic Settings - Bulk (₱1000 for 10 vouchers)": {"message": None, "url": None, "splash": None},
-    "03 - Input Fields - Email (₱100 + ₱2.20)": {"message": None, "url": None, "splash": None},
-    "03 - Input Fields - Mobile (₱100 + ₱2.30)": {"message": None, "url": None, "splash": None},
-    "03 - Input Fields - Name (₱100 + ₱2.40)": {"message": None, "url": None, "splash": None},
-    "03 - Input Fields - Location (₱100 + ₱3.00)": {"message": None, "url": None, "splash": None},
-    "03 - Input Fields - Signature (₱100 + ₱2.80)": {"message": None, "url": None, "splash": None},
-    "03 - Input Fields - Selfie (₱100 + ₱4.00)": {"message": None, "url": None, "splash": None},
-    "04 - Input Fields - Basic KYC (₱100 + ₱6.90)": {"message": None, "url": None, "splash": None},
-    "04 - Input Fields - Identity Verification (₱100 + ₱7.50)": {"message": None, "url": None, "splash": None},
-    "04 - Input Fields - Digital Signature (₱100 + ₱7.30)": {"message": None, "url": None, "splash": None},
-    "04 - Input Fields - Full Profile (₱100 + ₱12.20)": {"message": None, "url": None, "splash": None},
-    "05 - Feedback - Email (₱100 + ₱1.00)": {"message": None, "url": None, "splash": None},
-    "05 - Feedback - Mobile (₱100 + ₱1.80)": {"message": None, "url": None, "splash": None},
-    "05 - Feedback - Webhook (₱100 + ₱1.90)": {"message": None, "url": None, "splash": None},
-    "05 - Feedback - Email + Mobile + Webhook (₱100 + ₱4.70)": {"message": None, "url": None, "splash": None},
-    "06 - Cash Validation - Secret (₱100 + ₱1.20)": {"message": None, "url": None, "splash": None},
-    "06 - Cash Validation - Mobile (₱100 + ₱1.30)": {"message": None, "url": None, "splash": None},
-    "06 - Cash Validation - Both (₱100 + ₱2.50)": {"message": None, "url": None, "splash": None},
+    "01 - Simplest Voucher": {"message": None, "url": None, "splash": None},
+    "02 - Basic Settings - Bulk": {"message": None, "url": None, "splash": None},
+    "03 - Input Fields - Email": {"message": None, "url": None, "splash": None},
+    "03 - Input Fields - Mobile": {"message": None, "url": None, "splash": None},
+    "03 - Input Fields - Name": {"message": None, "url": None, "splash": None},
+    "03 - Input Fields - Location": {"message": None, "url": None, "splash": None},
+    "03 - Input Fields - Signature": {"message": None, "url": None, "splash": None},
+    "03 - Input Fields - Selfie": {"message": None, "url": None, "splash": None},
+    "04 - Input Fields - Basic KYC": {"message": None, "url": None, "splash": None},
+    "04 - Input Fields - Identity Verification": {"message": None, "url": None, "splash": None},
+    "04 - Input Fields - Digital Signature": {"message": None, "url": None, "splash": None},
+    "04 - Input Fields - Full Profile": {"message": None, "url": None, "splash": None},
+    "05 - Feedback - Email": {"message": None, "url": None, "splash": None},
+    "05 - Feedback - Mobile": {"message": None, "url": None, "splash": None},
+    "05 - Feedback - Webhook": {"message": None, "url": None, "splash": None},
+    "05 - Feedback - Email + Mobile + Webhook": {"message": None, "url": None, "splash": None},
+    "06 - Cash Validation - Secret": {"message": None, "url": None, "splash": None},
+    "06 - Cash Validation - Mobile": {"message": None, "url": None, "splash": None},
+    "06 - Cash Validation - Both": {"message": None, "url": None, "splash": None},
     "07 - Settlement Rail - INSTAPAY / Absorb": {"message": None, "url": None, "splash": None},
     "07 - Settlement Rail - INSTAPAY / Include": {"message": None, "url": None, "splash": None},
     "07 - Settlement Rail - PESONET / Absorb": {"message": None, "url": None, "splash": None},
-    "08 - Rider - Message (₱100 + ₱2.00)": {"message": "Thank you for redeeming!", "url": None, "splash": None},
-    "08 - Rider - Url (₱100 + ₱2.10)": {"message": None, "url": "https://example.com/thankyou", "splash": None},
-    "08 - Rider - Splash (₱100 + ₱2.20)": {"message": None, "url": None, "splash": "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8DwHwAFBQIAX8jx0gAAAABJRU5ErkJggg=="},
-    "08 - Rider - Full (₱100 + ₱4.10)": {"message": "Thank you!", "url": "https://example.com/thankyou", "splash": None},
-    "09 - Validation - Location (₱100 + ₱3.00)": {"message": None, "url": None, "splash": None},
-    "09 - Validation - Time (₱100 + ₱2.50)": {"message": None, "url": None, "splash": None},
-    "11 - Complex Scenario (₱572.50 total)": {"message": "Complex scenario test", "url": None, "splash": None},
+    "08 - Rider - Message": {"message": "Thank you for redeeming!", "url": None, "splash": None},
+    "08 - Rider - Url": {"message": None, "url": "https://example.com/thankyou", "splash": None},
+    "08 - Rider - Splash": {"message": None, "url": None, "splash": "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8DwHwAFBQIAX8jx0gAAAABJRU5ErkJggg=="},
+    "08 - Rider - Full": {"message": "Thank you!", "url": "https://example.com/thankyou", "splash": None},
+    "09 - Validation - Location": {"message": None, "url": None, "splash": None},
+    "09 - Validation - Time": {"message": None, "url": None, "splash": None},
+    "11 - Complex Scenario": {"message": "Complex scenario test", "url": None, "splash": None},
 }
 
-def generate_rider_test(rider):
-    """Generate test code for rider validation."""
-    tests = []
-    
-    # Message test
-    if rider["message"] is None:
-        tests.extend([
-            'pm.test("No rider message", function () {',
-            '    pm.expect(voucher.instructions.rider.message).to.be.null;',
-            '});',
-            ''
-        ])
-    else:
-        tests.extend([
-            'pm.test("Rider message configured", function () {',
-            f'    pm.expect(voucher.instructions.rider.message).to.equal("{rider["message"]}");',
-            '});',
-            ''
-        ])
-    
-    # URL test
-    if rider["url"] is None:
-        tests.extend([
-            'pm.test("No rider URL", function () {',
-            '    pm.expect(voucher.instructions.rider.url).to.be.null;',
-            '});',
-            ''
-        ])
-    else:
-        tests.extend([
-            'pm.test("Rider URL configured", function () {',
-            f'    pm.expect(voucher.instructions.rider.url).to.equal("{rider["url"]}");',
-            '});',
-            ''
-        ])
-    
-    # Splash test
-    if rider["splash"] is None:
-        tests.extend([
-            'pm.test("No rider splash", function () {',
-            '    pm.expect(voucher.instructions.rider.splash).to.be.null;',
-            '    pm.expect(voucher.instructions.rider.splash_timeout).to.be.null;',
-            '});',
-            ''
-        ])
+# Each rider field's test is named for whether the folder sets it; the
+# redirect timeout is null in every folder and keeps the baseline's test
+RIDER_TESTS = {
+    "message": ("No rider message", "Rider message configured"),
+    "url": ("No rider URL", "Rider URL configured"),
+    "splash": ("No rider splash", "Rider splash configured"),
+}
+
+def generate_rider_test(field, value):
+    """Generate the test for one rider field."""
+    unset, configured = RIDER_TESTS[field]
+    if value is None:
+        lines = [
+            f'pm.test("{unset}", function () {{',
+            f'    pm.expect(voucher.instructions.rider.{field}).to.be.null;',
+        ]
+        if field == "splash":
+            lines.append('    pm.expect(voucher.instructions.rider.splash_timeout).to.be.null;')
     else:
-        tests.extend([
-            'pm.test("Rider splash configured", function () {',
-            f'    pm.expect(voucher.instructions.rider.splash).to.equal("{rider["splash"]}");',
-            '    pm.expect(voucher.instructions.rider.splash_timeout).to.be.a("number");',
-            '});',
-            ''
-        ])
-    
-    # Redirect timeout (always null for our tests)
-    tests.extend([
-        'pm.test("Rider redirect timeout", function () {',
-        '    pm.expect(voucher.instructions.rider.redirect_timeout).to.be.null;',
-        '});'
-    ])
-    
-    return tests
+        lines = [
+            f'pm.test("{configured}", function () {{',
+            f'    pm.expect(voucher.instructions.rider.{field}).to.equal("{value}");',
+        ]
+        if field == "splash":
+            lines.append('    pm.expect(voucher.instructions.rider.splash_timeout).to.be.a("number");')
+    return lines + ['});']
 
+@collection_pass('rider')
 def fix_voucher_details_rider_tests(folder):
     """Fix the rider tests in Get Voucher Details request."""
     
     folder_name = folder.get('name', '')
-    expected_rider = FOLDER_RIDER.get(folder_name)
+    expected_rider = FOLDER_RIDER.get(folder_key(folder_name))
     
     if expected_rider is None:
         return False
     
     for request in folder.get('item', []):
         if request['name'] == 'Get Voucher Details':
-            for event in request.get('event', []):
-                if event.get('listen') == 'test':
-                    script_lines = event['script']['exec']
-                    
-                    new_lines = []
-                    skip_rider_section = False
-                    rider_section_found = False
-                    
-                    for i, line in enumerate(script_lines):
-                        # Find the start of rider section
-                        if '// Rider' in line:
-                            rider_section_found = True
-                            skip_rider_section = True
-                            new_lines.append(line)
-                            new_lines.extend(generate_rider_test(expected_rider))
-                            new_lines.append('')
-                            continue
-                        
-                        # Skip until we find the next section (// Instruction count)
-                        if skip_rider_section:
-                            if '// Instruction count' in line or '// Metadata' in line:
-                                skip_rider_section = False
-                                new_lines.append(line)
-                            continue
-                        
-                        new_lines.append(line)
-                    
-                    event['script']['exec'] = new_lines
-                    return rider_section_found
+            event = event_script(request)
+            if event is None:
+                return False
+            before = event['script']['exec']
+            script = TestScript.parse(before)
+            
+            # Replace each field's test, whichever way an earlier run named it
+            for field, names in RIDER_TESTS.items():
+                block = script.get(names[0]) or script.get(names[1])
+                if block is not None:
+                    script.replace(block, generate_rider_test(field, expected_rider[field]))
+            
+            event['script']['exec'] = script.to_exec()
+            return event['script']['exec'] != before
     return False
 
 def main():
@@ -154,9 +108,9 @@ def main():
     folders_updated = 0
     for folder in collection.get('item', []):
         folder_name = folder.get('name', '')
-        if folder_name in FOLDER_RIDER:
+        if folder_key(folder_name) in FOLDER_RIDER:
             if fix_voucher_details_rider_tests(folder):
-                rider = FOLDER_RIDER[folder_name]
+                rider = FOLDER_RIDER[folder_key(folder_name)]
                 fields = []
                 if rider["message"]: fields.append(f"message")
                 if rider["url"]: fields.append(f"url")
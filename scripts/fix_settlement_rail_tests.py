@@ -6,19 +6,24 @@ Fix settlement rail and fee strategy tests in Get Voucher Details requests.
 import json
 from pathlib import Path
 
+from collection_passes import collection_pass
+from fee_oracle import folder_key
+from script_model import TestScript
+
 # Define expected settlement rail per folder (most are null/absorb defaults)
 FOLDER_SETTLEMENT = {
     "07 - Settlement Rail - INSTAPAY / Absorb": {"rail": "INSTAPAY", "strategy": "absorb"},
     "07 - Settlement Rail - INSTAPAY / Include": {"rail": "INSTAPAY", "strategy": "include"},
     "07 - Settlement Rail - PESONET / Absorb": {"rail": "PESONET", "strategy": "absorb"},
-    "11 - Complex Scenario (₱572.50 total)": {"rail": "INSTAPAY", "strategy": "absorb"},
+    "11 - Complex Scenario": {"rail": "INSTAPAY", "strategy": "absorb"},
 }
 
+@collection_pass('settlement_rail')
 def fix_voucher_details_settlement_tests(folder):
     """Fix the settlement rail tests in Get Voucher Details request."""
     
     folder_name = folder.get('name', '')
-    expected_settlement = FOLDER_SETTLEMENT.get(folder_name)
+    expected_settlement = FOLDER_SETTLEMENT.get(folder_key(folder_name))
     
     # Only update folders that have specific settlement rail configs
     if expected_settlement is None:
@@ -28,43 +33,27 @@ def fix_voucher_details_settlement_tests(folder):
         if request['name'] == 'Get Voucher Details':
             for event in request.get('event', []):
                 if event.get('listen') == 'test':
-                    script_lines = event['script']['exec']
+                    before = event['script']['exec']
+                    script = TestScript.parse(before)
                     
-                    new_lines = []
+                    # Replace "Settlement rail default" test
+                    if 'Settlement rail default' in script:
+                        script.replace('Settlement rail default', [
+                            f'pm.test("Settlement rail: {expected_settlement["rail"]}", function () {{',
+                            f'    pm.expect(voucher.instructions.cash.settlement_rail).to.equal("{expected_settlement["rail"]}");',
+                            '});'
+                        ])
                     
-                    for i, line in enumerate(script_lines):
-                        # Replace "Settlement rail default" test
-                        if 'pm.test("Settlement rail default"' in line:
-                            new_lines.extend([
-                                f'pm.test("Settlement rail: {expected_settlement["rail"]}", function () {{',
-                                f'    pm.expect(voucher.instructions.cash.settlement_rail).to.equal("{expected_settlement["rail"]}");',
-                                '});'
-                            ])
-                            # Skip the next 2 lines (the old test body and closing)
-                            continue
-                        elif i > 0 and 'pm.test("Settlement rail default"' in script_lines[i-1]:
-                            continue
-                        elif i > 1 and 'pm.test("Settlement rail default"' in script_lines[i-2]:
-                            continue
-                        
-                        # Replace "Fee strategy is absorb" test
-                        elif 'pm.test("Fee strategy is absorb"' in line:
-                            new_lines.extend([
-                                f'pm.test("Fee strategy is {expected_settlement["strategy"]}", function () {{',
-                                f'    pm.expect(voucher.instructions.cash.fee_strategy).to.equal("{expected_settlement["strategy"]}");',
-                                '});'
-                            ])
-                            # Skip the next 2 lines
-                            continue
-                        elif i > 0 and 'pm.test("Fee strategy is absorb"' in script_lines[i-1]:
-                            continue
-                        elif i > 1 and 'pm.test("Fee strategy is absorb"' in script_lines[i-2]:
-                            continue
-                        else:
-                            new_lines.append(line)
+                    # Replace "Fee strategy is absorb" test
+                    if 'Fee strategy is absorb' in script:
+                        script.replace('Fee strategy is absorb', [
+                            f'pm.test("Fee strategy is {expected_settlement["strategy"]}", function () {{',
+                            f'    pm.expect(voucher.instructions.cash.fee_strategy).to.equal("{expected_settlement["strategy"]}");',
+                            '});'
+                        ])
                     
-                    event['script']['exec'] = new_lines
-                    return True
+                    event['script']['exec'] = script.to_exec()
+                    return event['script']['exec'] != before
     return False
 
 def main():
@@ -77,9 +66,9 @@ def main():
     folders_updated = 0
     for folder in collection.get('item', []):
         folder_name = folder.get('name', '')
-        if folder_name in FOLDER_SETTLEMENT:
+        if folder_key(folder_name) in FOLDER_SETTLEMENT:
             if fix_voucher_details_settlement_tests(folder):
-                settlement = FOLDER_SETTLEMENT[folder_name]
+                settlement = FOLDER_SETTLEMENT[folder_key(folder_name)]
                 print(f"  ✏️  {folder_name}: {settlement['rail']} / {settlement['strategy']}")
                 folders_updated += 1
     
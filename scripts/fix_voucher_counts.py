@@ -6,46 +6,24 @@ Each folder should explicitly set its own values, not rely on collection default
 """
 
 import json
-import re
 from pathlib import Path
 
-# Folder-specific configurations
+from collection_passes import collection_pass
+from fee_oracle import folder_key
+from folder_bodies import FOLDER_BODIES
+
+# Folder-specific amount and count, from each folder's request body
 FOLDER_CONFIGS = {
-    "01 - Simplest Voucher (₱100)": {"amount": 100, "count": 1},
-    "02 - Basic Settings - Bulk (₱1000 for 10 vouchers)": {"amount": 100, "count": 10},
-    "03 - Input Fields - Email (₱100 + ₱2.20)": {"amount": 100, "count": 1},
-    "03 - Input Fields - Mobile (₱100 + ₱2.30)": {"amount": 100, "count": 1},
-    "03 - Input Fields - Name (₱100 + ₱2.40)": {"amount": 100, "count": 1},
-    "03 - Input Fields - Location (₱100 + ₱3.00)": {"amount": 100, "count": 1},
-    "03 - Input Fields - Signature (₱100 + ₱2.80)": {"amount": 100, "count": 1},
-    "03 - Input Fields - Selfie (₱100 + ₱4.00)": {"amount": 100, "count": 1},
-    "04 - Input Fields - Basic KYC (₱100 + ₱6.90)": {"amount": 100, "count": 1},
-    "04 - Input Fields - Identity Verification (₱100 + ₱7.50)": {"amount": 100, "count": 1},
-    "04 - Input Fields - Digital Signature (₱100 + ₱7.30)": {"amount": 100, "count": 1},
-    "04 - Input Fields - Full Profile (₱100 + ₱12.20)": {"amount": 100, "count": 1},
-    "05 - Feedback - Email (₱100 + ₱1.00)": {"amount": 100, "count": 1},
-    "05 - Feedback - Mobile (₱100 + ₱1.80)": {"amount": 100, "count": 1},
-    "05 - Feedback - Webhook (₱100 + ₱1.90)": {"amount": 100, "count": 1},
-    "05 - Feedback - Email + Mobile + Webhook (₱100 + ₱4.70)": {"amount": 100, "count": 1},
-    "06 - Cash Validation - Secret (₱100 + ₱1.20)": {"amount": 100, "count": 1},
-    "06 - Cash Validation - Mobile (₱100 + ₱1.30)": {"amount": 100, "count": 1},
-    "06 - Cash Validation - Both (₱100 + ₱2.50)": {"amount": 100, "count": 1},
-    "07 - Settlement Rail - INSTAPAY / Absorb": {"amount": 100, "count": 1},
-    "07 - Settlement Rail - INSTAPAY / Include": {"amount": 100, "count": 1},
-    "07 - Settlement Rail - PESONET / Absorb": {"amount": 100, "count": 1},
-    "08 - Rider - Message (₱100 + ₱2.00)": {"amount": 100, "count": 1},
-    "08 - Rider - Url (₱100 + ₱2.10)": {"amount": 100, "count": 1},
-    "08 - Rider - Full (₱100 + ₱4.10)": {"amount": 100, "count": 1},
-    "09 - Validation - Location (₱100 + ₱3.00)": {"amount": 100, "count": 1},
-    "09 - Validation - Time (₱100 + ₱2.50)": {"amount": 100, "count": 1},
-    "11 - Complex Scenario (₱572.50 total)": {"amount": 572.50, "count": 1},
+    name: {"amount": body["amount"], "count": body["count"]}
+    for name, body in FOLDER_BODIES.items()
 }
 
+@collection_pass('voucher_counts')
 def fix_generate_voucher_prerequest(folder):
     """Update the Generate Voucher pre-request script with explicit values."""
     
     folder_name = folder.get('name', '')
-    config = FOLDER_CONFIGS.get(folder_name)
+    config = FOLDER_CONFIGS.get(folder_key(folder_name))
     
     if not config:
         return False
@@ -55,13 +33,14 @@ def fix_generate_voucher_prerequest(folder):
             for event in request.get('event', []):
                 if event.get('listen') == 'prerequest':
                     # Replace with explicit values
+                    before = event['script']['exec']
                     event['script']['exec'] = [
                         '// Set voucher parameters explicitly for this folder',
                         f'pm.collectionVariables.set(\'voucher_amount\', {config["amount"]});',
                         f'pm.collectionVariables.set(\'voucher_count\', {config["count"]});',
                         f'console.log(\'🔧 Request params:\', {{ amount: {config["amount"]}, count: {config["count"]} }});'
                     ]
-                    return True
+                    return event['script']['exec'] != before
     return False
 
 def main():
@@ -74,9 +53,9 @@ def main():
     folders_updated = 0
     for folder in collection.get('item', []):
         folder_name = folder.get('name', '')
-        if folder_name in FOLDER_CONFIGS:
+        if folder_key(folder_name) in FOLDER_CONFIGS:
             if fix_generate_voucher_prerequest(folder):
-                config = FOLDER_CONFIGS[folder_name]
+                config = FOLDER_CONFIGS[folder_key(folder_name)]
                 print(f"  ✏️  {folder_name}: amount={config['amount']}, count={config['count']}")
                 folders_updated += 1
     
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Generate Voucher request body of every billing folder.
+
+generate_postman_folders.py builds each folder from its body here, and
+fix_request_bodies.py resets the bodies of an existing collection to it, so
+a folder sends the same request whichever script wrote it. Expected fees are
+not kept here: they are priced from these bodies by fee_oracle.py.
+"""
+
+import copy
+
+from fee_oracle import folder_key
+
+# Request body per folder, keyed by folder name without its price suffix
+FOLDER_BODIES = {
+    "01 - Simplest Voucher": {
+        "amount": 100,
+        "count": 1
+    },
+    "02 - Basic Settings - Bulk": {
+        "amount": 100,
+        "count": 10,
+        "prefix": "PROMO",
+        "mask": "***-***"
+    },
+    "03 - Input Fields - Email": {
+        "amount": 100,
+        "count": 1,
+        "input_fields": ["email"]
+    },
+    "03 - Input Fields - Mobile": {
+        "amount": 100,
+        "count": 1,
+        "input_fields": ["mobile"]
+    },
+    "03 - Input Fields - Name": {
+        "amount": 100,
+        "count": 1,
+        "input_fields": ["name"]
+    },
+    "03 - Input Fields - Location": {
+        "amount": 100,
+        "count": 1,
+        "input_fields": ["location"]
+    },
+    "03 - Input Fields - Signature": {
+        "amount": 100,
+        "count": 1,
+        "input_fields": ["signature"]
+    },
+    "03 - Input Fields - Selfie": {
+        "amount": 100,
+        "count": 1,
+        "input_fields": ["selfie"]
+    },
+    "04 - Input Fields - Basic KYC": {
+        "amount": 100,
+        "count": 1,
+        "input_fields": ["email", "mobile", "name"]
+    },
+    "04 - Input Fields - Identity Verification": {
+        "amount": 100,
+        "count": 1,
+        "input_fields": ["email", "mobile", "selfie"]
+    },
+    "04 - Input Fields - Digital Signature": {
+        "amount": 100,
+        "count": 1,
+        "input_fields": ["email", "name", "signature"]
+    },
+    "04 - Input Fields - Full Profile": {
+        "amount": 100,
+        "count": 1,
+        "input_fields": ["email", "mobile", "name", "address", "birth_date"]
+    },
+    "05 - Feedback - Email": {
+        "amount": 100,
+        "count": 1,
+        "feedback_email": "feedback@example.com"
+    },
+    "05 - Feedback - Mobile": {
+        "amount": 100,
+        "count": 1,
+        "feedback_mobile": "+639171234567"
+    },
+    "05 - Feedback - Webhook": {
+        "amount": 100,
+        "count": 1,
+        "feedback_webhook": "https://webhook.site/test"
+    },
+    "05 - Feedback - Email + Mobile + Webhook": {
+        "amount": 100,
+        "count": 1,
+        "feedback_email": "feedback@example.com",
+        "feedback_mobile": "+639171234567",
+        "feedback_webhook": "https://webhook.site/test"
+    },
+    "06 - Cash Validation - Secret": {
+        "amount": 100,
+        "count": 1,
+        "validation_secret": "SECRET123"
+    },
+    "06 - Cash Validation - Mobile": {
+        "amount": 100,
+        "count": 1,
+        "validation_mobile": "+639171234567"
+    },
+    "06 - Cash Validation - Both": {
+        "amount": 100,
+        "count": 1,
+        "validation_secret": "SECRET123",
+        "validation_mobile": "+639171234567"
+    },
+    "07 - Settlement Rail - INSTAPAY / Absorb": {
+        "amount": 100,
+        "count": 1,
+        "settlement_rail": "INSTAPAY",
+        "fee_strategy": "absorb"
+    },
+    "07 - Settlement Rail - INSTAPAY / Include": {
+        "amount": 100,
+        "count": 1,
+        "settlement_rail": "INSTAPAY",
+        "fee_strategy": "include"
+    },
+    "07 - Settlement Rail - PESONET / Absorb": {
+        "amount": 100,
+        "count": 1,
+        "settlement_rail": "PESONET",
+        "fee_strategy": "absorb"
+    },
+    "08 - Rider - Message": {
+        "amount": 100,
+        "count": 1,
+        "rider_message": "Thank you for redeeming!"
+    },
+    "08 - Rider - Url": {
+        "amount": 100,
+        "count": 1,
+        "rider_url": "https://example.com/thankyou"
+    },
+    "08 - Rider - Splash": {
+        "amount": 100,
+        "count": 1,
+        "rider_splash": "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8DwHwAFBQIAX8jx0gAAAABJRU5ErkJggg==",
+        "rider_splash_timeout": 5
+    },
+    "08 - Rider - Full": {
+        "amount": 100,
+        "count": 1,
+        "rider_message": "Thank you!",
+        "rider_url": "https://example.com/thankyou"
+    },
+    "09 - Validation - Location": {
+        "amount": 100,
+        "count": 1,
+        "validation_location": {
+            "required": True,
+            "target_lat": 14.5995,
+            "target_lng": 120.9842,
+            "radius_meters": 100,
+            "on_failure": "block"
+        }
+    },
+    "09 - Validation - Time": {
+        "amount": 100,
+        "count": 1,
+        "validation_time": {
+            "window": {"start_time": "09:00", "end_time": "17:00", "timezone": "Asia/Manila"},
+            "limit_minutes": 30
+        }
+    },
+    "11 - Complex Scenario": {
+        "amount": 100,
+        "count": 5,
+        "input_fields": ["email", "mobile", "name", "location", "signature"],
+        "feedback_email": "feedback@example.com",
+        "feedback_mobile": "+639171234567",
+        "validation_secret": "COMPLEX123",
+        "settlement_rail": "INSTAPAY",
+        "rider_message": "Complex scenario test"
+    }
+}
+
+
+def folder_body(name):
+    """A copy of the body for a folder name (price suffix ignored), or None."""
+    body = FOLDER_BODIES.get(folder_key(name))
+    return copy.deepcopy(body) if body is not None else None
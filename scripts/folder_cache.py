@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Content-hashed build cache for generated Postman folders.
+
+Every generated folder is keyed by a SHA-256 of everything that feeds it:
+the baseline folder, the FEES entries it prices, the builder (name + source
+of generate_postman_folders.py) and the builder arguments. The cache stores
+each folder as the exact JSON text it occupies inside the collection, so a
+hit is spliced into the output byte-for-byte without rebuilding or even
+parsing the folder.
+
+generate_all_folders.py and scenario_matrix.py share one cache file. Entries
+a run does not use are kept, and the least recently used are dropped once the
+cache holds more than MAX_ENTRIES, so neither tool evicts the other's folders.
+"""
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+CACHE_PATH = Path(__file__).parent / '.cache' / 'billing_folders.json'
+CACHE_VERSION = 1
+MAX_ENTRIES = 2048
+
+# Each folder sits at collection['item'][n], i.e. two levels deep at indent=2
+FOLDER_INDENT = ' ' * 4
+
+# json.dumps('\x00folder:N\x00') as it appears in the serialized shell
+_PLACEHOLDER = re.compile(r'"\\u0000folder:(\d+)\\u0000"')
+
+
+class FolderSpec:
+    """Declarative description of one generated folder."""
+
+    def __init__(self, builder, args=(), fee_keys=()):
+        self.builder = builder
+        self.args = tuple(args)
+        self.fee_keys = tuple(fee_keys)
+
+    def build(self, baseline):
+        return self.builder(baseline, *self.args)
+
+    def __repr__(self):
+        return f"FolderSpec({self.builder.__name__}, args={self.args!r})"
+
+
+def _digest(*parts):
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode('utf-8'))
+        h.update(b'\x00')
+    return h.hexdigest()
+
+
+def source_digest(*paths):
+    """Hash of the builder modules' source, so editing a builder invalidates its folders."""
+    return _digest(*(Path(path).read_text(encoding='utf-8') for path in paths))
+
+
+def baseline_digest(baseline):
+    return _digest(json.dumps(baseline, sort_keys=True, ensure_ascii=False))
+
+
+def spec_key(spec, baseline_hash, fees, builder_hash):
+    """Cache key for a folder spec."""
+    fee_entries = {k: fees[k] for k in spec.fee_keys}
+    return _digest(
+        str(CACHE_VERSION),
+        baseline_hash,
+        builder_hash,
+        spec.builder.__name__,
+        json.dumps(spec.args, sort_keys=True, ensure_ascii=False),
+        json.dumps(fee_entries, sort_keys=True),
+    )
+
+
+def folder_fragment(folder):
+    """Serialize a folder exactly as json.dump(collection, indent=2) would lay it out."""
+    text = json.dumps(folder, indent=2, ensure_ascii=False)
+    return text.replace('\n', '\n' + FOLDER_INDENT)
+
+
+class FolderCache:
+    """On-disk map of spec key → serialized folder fragment."""
+
+    def __init__(self, path=CACHE_PATH, max_entries=MAX_ENTRIES):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        # Oldest first: the file keeps entries in least-recently-used order
+        self.entries = {}
+        self.used = {}
+        self.hits = 0
+        self.misses = 0
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == CACHE_VERSION:
+                    self.entries = data.get('entries', {})
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def fragment(self, key, build):
+        """Return the cached fragment for key, calling build() on a miss."""
+        self.used[key] = None
+        if key in self.entries:
+            self.hits += 1
+            return self.entries[key]
+        self.misses += 1
+        text = folder_fragment(build())
+        self.entries[key] = text
+        return text
+
+    def save(self):
+        """Persist the cache, most recently used last, dropping the oldest beyond max_entries."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Re-read first, so entries another tool saved since this one loaded survive
+        entries = {k: v for k, v in FolderCache(self.path, self.max_entries).entries.items() if k not in self.used}
+        entries.update((k, self.entries[k]) for k in self.used)
+        for key in list(entries)[:max(0, len(entries) - self.max_entries)]:
+            del entries[key]
+        tmp = self.path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_VERSION, 'entries': entries}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+def write_collection(collection, fragments, filepath):
+    """
+    Write the collection with its folders taken from pre-serialized fragments.
+
+    The output is byte-identical to json.dump(collection, indent=2,
+    ensure_ascii=False) with collection['item'] set to the parsed fragments.
+    """
+    shell = dict(collection)
+    shell['item'] = [f'\x00folder:{i}\x00' for i in range(len(fragments))]
+    text = json.dumps(shell, indent=2, ensure_ascii=False)
+    text = _PLACEHOLDER.sub(lambda m: fragments[int(m.group(1))], text)
+    with open(filepath, 'w', encoding='utf-8') as f:
+        f.write(text)
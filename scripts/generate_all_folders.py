@@ -1,131 +1,206 @@
 #!/usr/bin/env python3
 """
 Generate ALL Postman test folders for voucher generation billing tests.
-This creates all 27 folders (excluding baseline) in one run.
+This creates all 28 folders (excluding baseline) in one run.
+
+Request bodies come from folder_bodies.py and expected fees from pricing
+them against the config/redeem.php pricelist (fee_oracle.py). Folders are
+cached by a hash of their inputs (baseline folder, the prices their body is
+charged, builder and arguments; see folder_cache.py), so only folders whose inputs
+changed are rebuilt. Unchanged folders are copied from the cache verbatim.
+
+Generated folders replace the folders of the same name (price suffix
+ignored) from scratch, so edits the fix passes made to them are gone: run
+rebuild_billing_collection.py afterwards. Folders no spec generates (added
+by hand, say) are kept as they are, after the folder that preceded them.
 """
 
+import argparse
+import json
 import sys
 sys.path.insert(0, 'scripts')
 from generate_postman_folders import *
+from fee_oracle import charged_indexes, folder_key, instruction_fee, pricelist
+from folder_bodies import folder_body
+from folder_cache import (
+    CACHE_PATH,
+    FolderCache,
+    FolderSpec,
+    baseline_digest,
+    folder_fragment,
+    source_digest,
+    spec_key,
+    write_collection,
+)
+from script_library import load_unpacked
+
+
+def folder_spec(key, label, builder, *args):
+    """(label with the folder's per-voucher fee, FolderSpec) for the folder whose body is FOLDER_BODIES[key]."""
+    body = folder_body(key)
+    return f"{label} (₱{instruction_fee(body):.2f})", FolderSpec(builder, args, charged_indexes(body))
+
+
+# Folder specs, in output order: (batch, display label, spec). Bodies come
+# from folder_bodies.py; each spec's fee_keys are the pricelist items its
+# body is charged, so a price change only rebuilds the folders it affects.
+FOLDER_SPECS = [
+    # BATCH 1: Basic Settings (1 folder)
+    ('Basic Settings', *folder_spec('02 - Basic Settings - Bulk', 'Bulk Generation', create_basic_settings_folder)),
+
+    # BATCH 2: Single Input Fields (6 folders)
+    *[
+        ('Single Input Fields',
+         *folder_spec(f'03 - Input Fields - {label}', label, create_input_field_single_folder, field, label))
+        for field, label in [
+            ('email', 'Email'),
+            ('mobile', 'Mobile'),
+            ('name', 'Name'),
+            ('location', 'Location'),
+            ('signature', 'Signature'),
+            ('selfie', 'Selfie'),
+        ]
+    ],
+
+    # BATCH 3: Input Field Combinations (4 folders)
+    *[
+        ('Input Field Combinations', *folder_spec(f'04 - Input Fields - {name}', name, create_input_fields_combo_folder, name))
+        for name in ['Basic KYC', 'Identity Verification', 'Digital Signature', 'Full Profile']
+    ],
+
+    # BATCH 4: Feedback Channels (4 folders)
+    *[
+        ('Feedback Channels', *folder_spec(f"05 - Feedback - {' + '.join(c.replace('feedback_', '').title() for c in channels)}",
+                                    '+'.join(c.replace('feedback_', '').title() for c in channels),
+                                    create_feedback_folder, channels))
+        for channels in [
+            ['feedback_email'],
+            ['feedback_mobile'],
+            ['feedback_webhook'],
+            ['feedback_email', 'feedback_mobile', 'feedback_webhook'],
+        ]
+    ],
+
+    # BATCH 5: Cash Validation (3 folders)
+    *[
+        ('Cash Validation', *folder_spec(f'06 - Cash Validation - {val_type.title()}', val_type.title(),
+                                  create_cash_validation_folder, val_type))
+        for val_type in ['secret', 'mobile', 'both']
+    ],
+
+    # BATCH 6: Settlement Rail & Fee Strategy (3 folders)
+    *[
+        ('Settlement Rail & Fee Strategy', *folder_spec(f'07 - Settlement Rail - {rail} / {strategy.title()}',
+                                                 f'{rail} / {strategy}', create_settlement_rail_folder, rail, strategy))
+        for rail, strategy in [
+            ('INSTAPAY', 'absorb'),
+            ('INSTAPAY', 'include'),
+            ('PESONET', 'absorb'),
+        ]
+    ],
+
+    # BATCH 7: Rider Information (4 folders)
+    *[
+        ('Rider Information', *folder_spec(f'08 - Rider - {rider_type.title()}', rider_type.title(),
+                                    create_rider_folder, rider_type))
+        for rider_type in ['message', 'url', 'splash', 'full']
+    ],
+
+    # BATCH 8: Location & Time Validation (2 folders)
+    *[
+        ('Location & Time Validation', *folder_spec(f'09 - Validation - {val_type.title()}', val_type.title(),
+                                             create_validation_folder, val_type))
+        for val_type in ['location', 'time']
+    ],
+
+    # BATCH 9: Complex Scenario (1 folder)
+    ('Complex Scenario', *folder_spec('11 - Complex Scenario', 'Complex', create_complex_scenario_folder)),
+]
+
+def fragment_name(fragment):
+    """The folder name at the top of a serialized folder, read without parsing the rest."""
+    start = fragment.index('"name": ') + len('"name": ')
+    return json.JSONDecoder().raw_decode(fragment, start)[0]
+
+
+def keep_unmanaged(folders, fragments):
+    """
+    Fragments with every folder the specs do not generate put back in.
+
+    Each kept folder goes right after the folder it followed in the input,
+    or straight after the baseline when that folder is gone.
+    """
+    generated = {folder_key(fragment_name(fragment)): n for n, fragment in enumerate(fragments)}
+    result = list(fragments)
+    kept = 0
+    anchor = 0
+    for folder in folders[1:]:
+        key = folder_key(folder.get('name', ''))
+        if key in generated:
+            anchor = result.index(fragments[generated[key]])
+            continue
+        anchor += 1
+        result.insert(anchor, folder_fragment(folder))
+        kept += 1
+    return result, kept
+
 
 def main():
-    collection_path = Path('docs/postman/redeem-x-e2e-generation-billing.postman_collection.json')
+    parser = argparse.ArgumentParser(description='Generate all generation-billing folders from the baseline.')
+    parser.add_argument('collection', nargs='?', type=Path,
+                        default=Path('docs/api/postman/redeem-x-e2e-generation-billing.postman_collection.json'))
+    parser.add_argument('-o', '--output', type=Path, help='Write here instead of overwriting the input')
+    parser.add_argument('--no-cache', action='store_true', help='Rebuild every folder and leave the cache untouched')
+    parser.add_argument('--cache', type=Path, default=CACHE_PATH, help=f'Cache file (default: {CACHE_PATH})')
+    args = parser.parse_args()
+    collection_path = args.collection
     
     if not collection_path.exists():
         print(f"❌ Collection not found: {collection_path}")
         sys.exit(1)
     
-    collection = load_collection(collection_path)
+    collection = load_unpacked(collection_path)
     print(f"✓ Loaded collection: {collection['info']['name']}")
     print(f"  Current folders: {len(collection['item'])}\n")
     
-    baseline = clone_baseline(collection)
-    
-    folders_created = []
-    
-    # BATCH 1: Basic Settings (1 folder)
-    print("📦 Batch 1: Basic Settings...")
-    folder = create_basic_settings_folder(baseline)
-    collection['item'].append(folder)
-    folders_created.append(folder['name'])
-    print(f"  ✓ Bulk Generation")
-    
-    # BATCH 2: Single Input Fields (6 folders)
-    print("\n📦 Batch 2: Single Input Fields...")
-    single_fields = [
-        ('email', 'Email', 2.20),
-        ('mobile', 'Mobile', 2.30),
-        ('name', 'Name', 2.40),
-        ('location', 'Location', 3.00),
-        ('signature', 'Signature', 2.80),
-        ('selfie', 'Selfie', 4.00),
-    ]
-    for field, label, fee in single_fields:
-        folder = create_input_field_single_folder(baseline, field, label)
-        collection['item'].append(folder)
-        folders_created.append(folder['name'])
-        print(f"  ✓ {label} (₱{fee:.2f})")
-    
-    # BATCH 3: Input Field Combinations (4 folders)
-    print("\n📦 Batch 3: Input Field Combinations...")
-    combos = [
-        ('Basic KYC', ['email', 'mobile', 'name'], 6.90),
-        ('Identity Verification', ['name', 'address', 'birth_date'], 7.50),
-        ('Digital Signature', ['email', 'mobile', 'signature'], 7.30),
-        ('Full Profile', ['email', 'mobile', 'name', 'address', 'birth_date'], 12.20),
-    ]
-    for name, fields, fee in combos:
-        folder = create_input_fields_combo_folder(baseline, name, fields, fee)
-        collection['item'].append(folder)
-        folders_created.append(folder['name'])
-        print(f"  ✓ {name} (₱{fee:.2f})")
-    
-    # BATCH 4: Feedback Channels (4 folders)
-    print("\n📦 Batch 4: Feedback Channels...")
-    feedback_tests = [
-        (['feedback_email'], 1.00),
-        (['feedback_mobile'], 1.80),
-        (['feedback_webhook'], 1.90),
-        (['feedback_email', 'feedback_mobile', 'feedback_webhook'], 4.70),
-    ]
-    for channels, fee in feedback_tests:
-        folder = create_feedback_folder(baseline, channels, fee)
-        collection['item'].append(folder)
-        folders_created.append(folder['name'])
-        names = [c.replace('feedback_', '').title() for c in channels]
-        print(f"  ✓ {'+'.join(names)} (₱{fee:.2f})")
-    
-    # BATCH 5: Cash Validation (3 folders)
-    print("\n📦 Batch 5: Cash Validation...")
-    validation_types = [('secret', 1.20), ('mobile', 1.30), ('both', 2.50)]
-    for val_type, fee in validation_types:
-        folder = create_cash_validation_folder(baseline, val_type)
-        collection['item'].append(folder)
-        folders_created.append(folder['name'])
-        print(f"  ✓ {val_type.title()} (₱{fee:.2f})")
-    
-    # BATCH 6: Settlement Rail & Fee Strategy (3 folders)
-    print("\n📦 Batch 6: Settlement Rail & Fee Strategy...")
-    rail_tests = [
-        ('INSTAPAY', 'absorb'),
-        ('INSTAPAY', 'include'),
-        ('PESONET', 'absorb'),
-    ]
-    for rail, strategy in rail_tests:
-        folder = create_settlement_rail_folder(baseline, rail, strategy)
-        collection['item'].append(folder)
-        folders_created.append(folder['name'])
-        print(f"  ✓ {rail} / {strategy}")
+    # The baseline stays first; every other folder is regenerated from it,
+    # so re-running the script rebuilds the folders instead of appending copies.
+    baseline = collection['item'][0]
+    baseline_hash = baseline_digest(baseline)
+    builder_hash = source_digest(Path(__file__).parent / 'generate_postman_folders.py',
+                                 Path(__file__).parent / 'fee_oracle.py',
+                                 Path(__file__).parent / 'folder_bodies.py')
+    prices = {index: item.price for index, item in pricelist().items()}
+    cache = FolderCache(args.cache) if not args.no_cache else None
     
-    # BATCH 7: Rider Information (3 folders)
-    print("\n📦 Batch 7: Rider Information...")
-    rider_types = [('message', 2.00), ('url', 2.10), ('full', 4.10)]
-    for rider_type, fee in rider_types:
-        folder = create_rider_folder(baseline, rider_type)
-        collection['item'].append(folder)
-        folders_created.append(folder['name'])
-        print(f"  ✓ {rider_type.title()} (₱{fee:.2f})")
-    
-    # BATCH 8: Location & Time Validation (2 folders)
-    print("\n📦 Batch 8: Location & Time Validation...")
-    validation_tests = [('location', 3.00), ('time', 2.50)]
-    for val_type, fee in validation_tests:
-        folder = create_validation_folder(baseline, val_type)
-        collection['item'].append(folder)
-        folders_created.append(folder['name'])
-        print(f"  ✓ {val_type.title()} (₱{fee:.2f})")
-    
-    # BATCH 9: Complex Scenario (1 folder)
-    print("\n📦 Batch 9: Complex Scenario...")
-    folder = create_complex_scenario_folder(baseline)
-    collection['item'].append(folder)
-    folders_created.append(folder['name'])
-    print(f"  ✓ Complex (₱572.50 total)")
+    fragments = [folder_fragment(baseline)]
+    batch = None
+    for batch_name, label, spec in FOLDER_SPECS:
+        if batch_name != batch:
+            batch = batch_name
+            print(f"\n📦 {batch_name}...")
+        if cache is None:
+            fragments.append(folder_fragment(spec.build(baseline)))
+            print(f"  ✓ {label}")
+            continue
+        key = spec_key(spec, baseline_hash, prices, builder_hash)
+        before = cache.hits
+        fragments.append(cache.fragment(key, lambda: spec.build(baseline)))
+        print(f"  {'↺' if cache.hits > before else '✓'} {label}")
     
+    fragments, kept = keep_unmanaged(collection['item'], fragments)
+    if kept:
+        print(f"\n📌 Kept {kept} folder(s) no spec generates")
+
     # Save
-    save_collection(collection, collection_path)
-    print(f"\n✅ Success! Created {len(folders_created)} new folders")
-    print(f"   Total folders: {len(collection['item'])} (including baseline)")
+    write_collection(collection, fragments, args.output or collection_path)
+    print(f"\n✓ Saved collection to {args.output or collection_path}")
+    if cache is not None:
+        cache.save()
+        print(f"  Cache: {cache.hits} reused (↺), {cache.misses} rebuilt (✓)")
+    print(f"\n✅ Success! Generated {len(FOLDER_SPECS)} folders")
+    print(f"   Total folders: {len(fragments)} (including baseline)")
+    print("   Run rebuild_billing_collection.py next: regenerated folders lost their fix-pass edits")
     print("\n📋 Summary:")
     print(f"   01: Baseline (₱100)")
     print(f"   02: Basic Settings (1 folder)")
@@ -134,7 +209,7 @@ def main():
     print(f"   05: Feedback Channels (4 folders)")
     print(f"   06: Cash Validation (3 folders)")
     print(f"   07: Settlement Rail (3 folders)")
-    print(f"   08: Rider (3 folders)")
+    print(f"   08: Rider (4 folders)")
     print(f"   09: Location/Time Validation (2 folders)")
     print(f"   11: Complex Scenario (1 folder)")
 
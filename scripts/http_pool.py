@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Minimal asyncio HTTP/1.1 client with keep-alive connection pooling.
+
+Only what the collection runner needs: one request at a time per connection,
+Content-Length and chunked bodies, http and https. Idle connections are kept
+per (scheme, host, port) and reused by the next request, so a run pays the
+TCP (and TLS) handshake once per connection instead of once per request.
+A request that fails on a reused connection is retried once on a fresh one,
+but only for idempotent methods: a POST may already have been applied.
+
+    pool = ConnectionPool(limit=8)
+    response = await pool.request('GET', 'http://redeem-x.test/api/v1/wallet/balance',
+                                  headers={'Accept': 'application/json'})
+    response.status, response.json(), response.elapsed
+    await pool.close()
+"""
+
+import asyncio
+import json
+import ssl
+import time
+from urllib.parse import urlsplit
+
+_NO_BODY_STATUSES = frozenset({204, 304})
+# Safe to send twice (RFC 9110 §9.2.2)
+_IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'TRACE', 'PUT', 'DELETE'})
+
+
+class HttpError(Exception):
+    """The server closed the connection or sent something that is not HTTP/1.1."""
+
+
+class HttpResponse:
+    """A fully read response plus where its time went (seconds)."""
+
+    def __init__(self, status, reason, headers, body, connect, ttfb, elapsed, reused):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+        self.connect = connect
+        self.ttfb = ttfb
+        self.elapsed = elapsed
+        self.reused = reused
+
+    def json(self):
+        return json.loads(self.body.decode('utf-8')) if self.body else None
+
+    def __repr__(self):
+        return f"HttpResponse({self.status}, {len(self.body)} bytes, {self.elapsed * 1000:.1f}ms)"
+
+
+class _Connection:
+    def __init__(self, key, reader, writer):
+        self.key = key
+        self.reader = reader
+        self.writer = writer
+        self.requests = 0
+
+    def close(self):
+        self.writer.close()
+
+
+def _split(url):
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https'):
+        raise ValueError(f"Unsupported URL scheme: {url}")
+    port = parts.port or (443 if parts.scheme == 'https' else 80)
+    target = parts.path or '/'
+    if parts.query:
+        target += '?' + parts.query
+    return (parts.scheme, parts.hostname, port), parts.netloc, target
+
+
+async def _read_body(reader, headers, status, method):
+    if method == 'HEAD' or status in _NO_BODY_STATUSES or 100 <= status < 200:
+        return b'', True
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b';')[0].strip(), 16)
+            if size == 0:
+                # Trailers end with an empty line
+                while (await reader.readline()).strip():
+                    pass
+                return b''.join(chunks), True
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+    if 'content-length' in headers:
+        return await reader.readexactly(int(headers['content-length'])), True
+    # No framing: the body runs to the end of the connection
+    return await reader.read(), False
+
+
+class ConnectionPool:
+    """Keep-alive connections shared by every request of a run.
+
+    limit caps the number of open connections; a request waits for a free one
+    rather than opening more.
+    """
+
+    def __init__(self, limit=8, ssl_context=None):
+        self.limit = limit
+        self.ssl_context = ssl_context
+        self.opened = 0
+        self._idle = {}
+        self._slots = asyncio.Semaphore(limit)
+
+    async def _connect(self, key):
+        scheme, host, port = key
+        context = None
+        if scheme == 'https':
+            context = self.ssl_context or ssl.create_default_context()
+        reader, writer = await asyncio.open_connection(host, port, ssl=context)
+        self.opened += 1
+        return _Connection(key, reader, writer)
+
+    async def _exchange(self, conn, method, target, headers, body):
+        conn.writer.write(self._head(method, target, headers, body) + body)
+        await conn.writer.drain()
+
+        status_line = await conn.reader.readline()
+        if not status_line:
+            raise HttpError('Connection closed before the response')
+        ttfb = time.perf_counter()
+        version, status, reason = (status_line.decode('latin-1').rstrip('\r\n').split(' ', 2) + [''])[:3]
+        if not version.startswith('HTTP/1.'):
+            raise HttpError(f"Unexpected status line: {status_line!r}")
+        status = int(status)
+
+        response_headers = {}
+        while True:
+            line = await conn.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+
+        payload, framed = await _read_body(conn.reader, response_headers, status, method)
+        keep_alive = framed and response_headers.get('connection', '').lower() != 'close' \
+            and version != 'HTTP/1.0'
+        return status, reason, response_headers, payload, ttfb, keep_alive
+
+    @staticmethod
+    def _head(method, target, headers, body):
+        lines = [f"{method} {target} HTTP/1.1"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        if body or method in ('POST', 'PUT', 'PATCH'):
+            lines.append(f"Content-Length: {len(body)}")
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+    async def request(self, method, url, headers=None, body=b'', timeout=30.0):
+        """Send one request and read the whole response."""
+        key, netloc, target = _split(url)
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        send_headers = {'Host': netloc, 'Connection': 'keep-alive'}
+        send_headers.update(headers or {})
+
+        async with self._slots:
+            start = time.perf_counter()
+            idle = self._idle.get(key, [])
+            conn = idle.pop() if idle else None
+            # Skip connections the server already closed while they sat idle
+            while conn is not None and (conn.reader.at_eof() or conn.writer.is_closing()):
+                conn.close()
+                conn = idle.pop() if idle else None
+            reused = conn is not None
+            for attempt in (1, 2):
+                if conn is None:
+                    conn = await asyncio.wait_for(self._connect(key), timeout)
+                connected = time.perf_counter()
+                try:
+                    status, reason, response_headers, payload, ttfb, keep_alive = await asyncio.wait_for(
+                        self._exchange(conn, method.upper(), target, send_headers, body), timeout)
+                    break
+                except (HttpError, ConnectionError, asyncio.IncompleteReadError):
+                    conn.close()
+                    # A reused connection may have been closed by the server while idle,
+                    # but a non-idempotent request may have been applied before it dropped
+                    if not reused or attempt == 2 or method.upper() not in _IDEMPOTENT_METHODS:
+                        raise
+                    conn, reused = None, False
+                    start = time.perf_counter()
+                except BaseException:
+                    conn.close()
+                    raise
+
+            end = time.perf_counter()
+            conn.requests += 1
+            if keep_alive:
+                self._idle.setdefault(key, []).append(conn)
+            else:
+                conn.close()
+
+        return HttpResponse(status, reason, response_headers, payload,
+                            connect=connected - start, ttfb=ttfb - start, elapsed=end - start, reused=reused)
+
+    async def close(self):
+        for conns in self._idle.values():
+            for conn in conns:
+                conn.close()
+        self._idle.clear()
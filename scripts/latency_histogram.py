@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+HDR latency histograms per API operation, with mergeable snapshots.
+
+Latencies are recorded in microseconds into log-linear buckets (the
+HdrHistogram layout). Values below 2 × 10^figures are exact. Above that, each
+power of two is split into sub-buckets, so every bucket is within
+10^-figures of the values it holds. Memory and file size depend on the range
+of latencies, not on the number of samples.
+
+Samples are keyed by the api.json operation they hit, as
+"METHOD /api/v1/path/{template}" (openapi_routes.py). Every voucher code
+therefore lands in one "GET /api/v1/vouchers/{voucher}" histogram.
+
+A snapshot is JSON with sparse, delta-encoded bucket counts:
+
+    {"format": "redeem-x-hdr/1", "unit": "us", "significant_figures": 3,
+     "meta": {...}, "histograms": {"POST /api/v1/vouchers":
+         {"total": 290, "min": 812, "max": 40211, "counts": [index delta, count, ...]}}}
+
+Snapshots with the same precision merge by adding counts. Merging is exact,
+so shards and separate processes combine into the same histogram one process
+would have recorded.
+
+Usage:
+    python3 scripts/collection_runner.py -c 8 --histograms /tmp/shard1.hdr.json
+    python3 scripts/load_generator.py --rate 20 --histograms /tmp/load.hdr.json
+    python3 scripts/latency_histogram.py merge /tmp/shard*.hdr.json -o /tmp/run.hdr.json
+    python3 scripts/latency_histogram.py show /tmp/run.hdr.json
+    python3 scripts/latency_histogram.py compare release-1.hdr.json release-2.hdr.json --key "POST /api/v1/vouchers"
+"""
+
+import argparse
+import json
+import math
+import sys
+from pathlib import Path
+from urllib.parse import urlsplit
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from openapi_routes import API_PREFIX, Router
+
+FORMAT = 'redeem-x-hdr/1'
+DEFAULT_FIGURES = 3
+PERCENTILES = (50, 90, 95, 99, 99.9)
+
+
+class Histogram:
+    """Log-linear histogram of non-negative integer values."""
+
+    def __init__(self, significant_figures=DEFAULT_FIGURES):
+        if not 1 <= significant_figures <= 5:
+            raise ValueError('significant_figures must be between 1 and 5')
+        self.significant_figures = significant_figures
+        self.sub_bits = math.ceil(math.log2(2 * 10 ** significant_figures))
+        self.sub_count = 1 << self.sub_bits
+        self.half = self.sub_count >> 1
+        self.counts = {}
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def index(self, value):
+        if value < self.sub_count:
+            return value
+        shift = value.bit_length() - self.sub_bits
+        return self.sub_count + (shift - 1) * self.half + (value >> shift) - self.half
+
+    def bounds(self, index):
+        """(lowest, highest) value that falls in a bucket."""
+        if index < self.sub_count:
+            return index, index
+        shift, offset = divmod(index - self.sub_count, self.half)
+        shift += 1
+        mantissa = offset + self.half
+        return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+    def record(self, value, count=1):
+        value = max(0, int(round(value)))
+        i = self.index(value)
+        self.counts[i] = self.counts.get(i, 0) + count
+        self.total += count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        if other.significant_figures != self.significant_figures:
+            raise ValueError(f"Cannot merge {other.significant_figures}- into "
+                             f"{self.significant_figures}-significant-figure histograms")
+        for i, count in other.counts.items():
+            self.counts[i] = self.counts.get(i, 0) + count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+        return self
+
+    def percentile(self, pct):
+        """The highest value equivalent to the pct-th percentile sample (HdrHistogram convention)."""
+        if not self.total:
+            return None
+        rank = max(1, math.ceil(pct / 100 * self.total))
+        seen = 0
+        for i in sorted(self.counts):
+            seen += self.counts[i]
+            if seen >= rank:
+                return min(self.bounds(i)[1], self.max)
+        return self.max
+
+    def mean(self):
+        if not self.total:
+            return None
+        return sum((sum(self.bounds(i)) / 2) * count for i, count in self.counts.items()) / self.total
+
+    def to_dict(self):
+        encoded, previous = [], 0
+        for i in sorted(self.counts):
+            encoded += [i - previous, self.counts[i]]
+            previous = i
+        return {'total': self.total, 'min': self.min, 'max': self.max, 'counts': encoded}
+
+    @classmethod
+    def from_dict(cls, data, significant_figures=DEFAULT_FIGURES):
+        histogram = cls(significant_figures)
+        index = 0
+        counts = data.get('counts', [])
+        for delta, count in zip(counts[::2], counts[1::2]):
+            index += delta
+            histogram.counts[index] = histogram.counts.get(index, 0) + count
+        histogram.total = data.get('total', sum(histogram.counts.values()))
+        histogram.min, histogram.max = data.get('min'), data.get('max')
+        return histogram
+
+
+class LatencyRecorder:
+    """One Histogram per api.json operation, recorded in microseconds."""
+
+    def __init__(self, router=None, significant_figures=DEFAULT_FIGURES, meta=None):
+        self.router = router
+        self.significant_figures = significant_figures
+        self.meta = dict(meta or {})
+        self.histograms = {}
+
+    def key(self, method, url):
+        """'METHOD /api/v1/template' for documented routes, else the method and raw path."""
+        path = urlsplit(url).path or '/'
+        if self.router is not None:
+            route, _ = self.router.match(method, path)
+            if route is not None:
+                return f"{route.method} {API_PREFIX}{route.template}"
+        return f"{method.upper()} {path}"
+
+    def histogram(self, key):
+        if key not in self.histograms:
+            self.histograms[key] = Histogram(self.significant_figures)
+        return self.histograms[key]
+
+    def record(self, method, url, seconds):
+        self.histogram(self.key(method, url)).record(seconds * 1_000_000)
+
+    def record_results(self, results):
+        """Record collection_runner RequestResults that went to the server and got a response."""
+        for result in results:
+            if result.status is not None and not result.cached:
+                self.record(result.method, result.url, result.elapsed)
+
+    def merge(self, other):
+        for key, histogram in other.histograms.items():
+            self.histogram(key).merge(histogram)
+        return self
+
+    def to_dict(self):
+        return {
+            'format': FORMAT,
+            'unit': 'us',
+            'significant_figures': self.significant_figures,
+            'meta': self.meta,
+            'histograms': {key: self.histograms[key].to_dict() for key in sorted(self.histograms)},
+        }
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('format') != FORMAT:
+            raise ValueError(f"{path} is not a {FORMAT} snapshot")
+        figures = data['significant_figures']
+        recorder = cls(significant_figures=figures, meta=data.get('meta'))
+        recorder.histograms = {key: Histogram.from_dict(h, figures) for key, h in data['histograms'].items()}
+        return recorder
+
+
+def for_runs(meta=None):
+    """A recorder keyed by the api.json routes, for the runners' --histograms option."""
+    return LatencyRecorder(Router.from_spec(), meta=meta)
+
+
+def print_table(recorder):
+    keys = sorted(recorder.histograms)
+    width = max([len(key) for key in keys] + [9])
+    labels = ''.join(f"{'p' + format(p, 'g'):>9}" for p in PERCENTILES)
+    print(f"⏱️  {'Operation':{width}}  {'n':>7}{labels}{'max':>9}  (ms)")
+    for key in keys:
+        h = recorder.histograms[key]
+        values = ''.join(f"{h.percentile(p) / 1000:9.1f}" for p in PERCENTILES)
+        print(f"    {key:{width}}  {h.total:7d}{values}{h.max / 1000:9.1f}")
+
+
+def compare(base, head, keys=None):
+    keys = keys or sorted(set(base.histograms) & set(head.histograms))
+    width = max([len(key) for key in keys] + [9])
+    print(f"⚖️  {'Operation':{width}}  {'pct':>6}  {'base':>9}  {'head':>9}  {'change':>8}  (ms)")
+    for key in keys:
+        if key not in base.histograms or key not in head.histograms:
+            print(f"    {key:{width}}  missing from {'base' if key not in base.histograms else 'head'}")
+            continue
+        for p in PERCENTILES:
+            before = base.histograms[key].percentile(p) / 1000
+            after = head.histograms[key].percentile(p) / 1000
+            change = f"{(after - before) / before:+8.1%}" if before else f"{'n/a':>8}"
+            print(f"    {key if p == PERCENTILES[0] else '':{width}}  {'p' + format(p, 'g'):>6}  "
+                  f"{before:9.1f}  {after:9.1f}  {change}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Merge, show and compare latency histogram snapshots.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    merge = commands.add_parser('merge', help='Combine snapshots (e.g. from shards)')
+    merge.add_argument('snapshots', nargs='+', type=Path)
+    merge.add_argument('-o', '--output', type=Path, required=True)
+    show = commands.add_parser('show', help='Percentiles per operation')
+    show.add_argument('snapshots', nargs='+', type=Path, help='Merged before showing')
+    diff = commands.add_parser('compare', help='Tail latency of one snapshot against another')
+    diff.add_argument('base', type=Path)
+    diff.add_argument('head', type=Path)
+    diff.add_argument('--key', action='append', help='Operation, e.g. "POST /api/v1/vouchers"')
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'compare':
+            compare(LatencyRecorder.load(args.base), LatencyRecorder.load(args.head), args.key)
+            return
+        recorder = LatencyRecorder.load(args.snapshots[0])
+        for path in args.snapshots[1:]:
+            recorder.merge(LatencyRecorder.load(path))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.command == 'merge':
+        recorder.meta = {'merged': [str(p) for p in args.snapshots]}
+        recorder.save(args.output)
+        print(f"💾 {args.output}: {len(recorder.histograms)} operations, "
+              f"{sum(h.total for h in recorder.histograms.values())} samples")
+    else:
+        print_table(recorder)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Closed-system ledger check over the whole transaction history, streamed page
+by page and resumable from a checkpoint.
+
+The billing collection checks "System wallet unchanged (closed system)" and
+"Products balance increased by escrow + fees" around one generation. This
+checks the same money across everything the tenants' wallets have done.
+Every wallet transfer moves money between two wallets, so it cannot change
+system + products + user wallets. Only a bank top-up brings money in and
+only a disbursement to a bank takes it out. Between two checks:
+
+    wallet     each tenant's balance moved by exactly its transactions since
+               the last check: Σ deposits − Σ withdrawals on /wallet/transactions
+    closed     Δ system + Δ products + Σ Δ tenant wallets + Σ disbursed − Σ top-ups == 0
+               (disbursed: redemptions on /transactions with disbursement data;
+               top-ups: manual_topup deposits on /wallet/transactions)
+
+The products delta is also split into generation charges (tenant
+withdrawals for a voucher) and everything else, for the "escrow + fees"
+reading.
+
+Pages are streamed newest first and folded into running sums, so memory
+grows with the number of tenants, never with the number of transactions.
+The checkpoint (--checkpoint) records per tenant the newest transaction id
+and the balance it reconciled to, and the newest redemption. It also records
+the system and products totals. A nightly run reads only what is newer and
+stops paging at the first transaction it has already seen. The first run has
+no baseline for "closed": it reconciles every wallet from zero and records
+one.
+
+Wallets are read between two balance reads and rescanned if those differ.
+If the system totals move while the tenants are scanned, the closed check is
+retried (--attempts) and then skipped. The checkpoint is then left as it was.
+Every wallet with activity must be in --tenants for "closed" to hold.
+
+Usage:
+    python3 scripts/ledger_check.py --base-url http://redeem-x.test --tenants storage/app/billing-tenants.json
+    python3 scripts/ledger_check.py --base-url http://redeem-x.test --tenants storage/app/billing-tenants.json \\
+        --checkpoint storage/app/ledger-checkpoint.json --report /tmp/ledger.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlencode
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from http_pool import ConnectionPool, HttpError
+from tenants import load_tenants
+from webhook_replay import BALANCE_PATH
+
+WALLET_TRANSACTIONS_PATH = '/api/v1/wallet/transactions'
+TRANSACTIONS_PATH = '/api/v1/transactions'
+SYSTEM_BALANCES_PATH = '/api/v1/system/balances'
+PER_PAGE = 100  # ListWalletTransactions / ListTransactions per_page max
+CHECKPOINT_VERSION = 1
+DISBURSED_STATUSES = ('success', 'completed', 'pending', 'processing')
+
+
+class LedgerError(Exception):
+    """An endpoint answered something the check cannot use."""
+
+
+def _cents(amount):
+    return round(float(str(amount or 0).replace(',', '')) * 100)
+
+
+class Client:
+    """GETs against the API over one pool, retrying 429s after their Retry-After."""
+
+    def __init__(self, base_url, connections=8, timeout=30.0, retries=5):
+        self.base_url = base_url.rstrip('/')
+        self.pool = ConnectionPool(limit=connections)
+        self.timeout = timeout
+        self.retries = retries
+        self.requests = 0
+
+    async def get(self, path, token, params=None):
+        """The response's `data`."""
+        url = self.base_url + path + (f"?{urlencode(params)}" if params else '')
+        headers = {'Accept': 'application/json', 'Authorization': f"Bearer {token}"}
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self.pool.request('GET', url, headers, timeout=self.timeout)
+            except (HttpError, OSError, asyncio.TimeoutError) as e:
+                raise LedgerError(f"GET {path}: {e or type(e).__name__}") from e
+            self.requests += 1
+            if response.status == 429 and attempt < self.retries:
+                await asyncio.sleep(float(response.headers.get('retry-after') or 2 ** attempt))
+                continue
+            if response.status != 200:
+                raise LedgerError(f"GET {path} answered {response.status}")
+            try:
+                return (response.json() or {}).get('data')
+            except ValueError as e:
+                raise LedgerError(f"GET {path} did not answer JSON") from e
+        raise LedgerError(f"GET {path} still throttled after {self.retries} retries")
+
+    async def pages(self, path, token, params=None):
+        """Items of every page, one page in memory at a time; the consumer stops paging by breaking."""
+        page = 1
+        while True:
+            data = await self.get(path, token, dict(params or {}, per_page=PER_PAGE, page=page))
+            items = (data or {}).get('data') or []
+            for item in items:
+                yield item
+            pagination = (data or {}).get('pagination') or {}
+            if not items or page >= int(pagination.get('last_page') or page):
+                return
+            page += 1
+
+    async def balance(self, token):
+        data = await self.get(BALANCE_PATH, token) or {}
+        return int(data['balance_cents']) if 'balance_cents' in data else _cents(data.get('balance'))
+
+    async def system(self, token):
+        """(system, products) in centavos."""
+        data = await self.get(SYSTEM_BALANCES_PATH, token) or {}
+        totals = data.get('totals') or {}
+        return _cents(totals.get('system')), _cents(totals.get('products'))
+
+    async def close(self):
+        await self.pool.close()
+
+
+class WalletScan:
+    """Running sums over one tenant's transactions newer than the checkpoint."""
+
+    def __init__(self, since=0):
+        self.since = since
+        self.newest = since
+        self.floor = None
+        self.count = 0
+        self.deposits = 0
+        self.withdrawals = 0
+        self.charges = 0
+        self.topups = 0
+
+    def add(self, item):
+        """False once the stream reaches transactions the checkpoint already covers."""
+        id = int(item['id'])
+        if id <= self.since:
+            return False
+        # A page boundary shifted by a new transaction repeats rows already counted
+        if self.floor is not None and id >= self.floor:
+            return True
+        self.floor = id
+        self.newest = max(self.newest, id)
+        self.count += 1
+        centavos = _cents(item['amount'])
+        if item['type'] == 'deposit':
+            self.deposits += centavos
+            if item.get('deposit_type') == 'manual_topup':
+                self.topups += centavos
+        else:
+            self.withdrawals += centavos
+            if item.get('voucher_code'):
+                self.charges += centavos
+        return True
+
+    @property
+    def net(self):
+        return self.deposits - self.withdrawals
+
+
+class RedemptionScan:
+    """Disbursed cash over one tenant's redemptions newer than the checkpoint."""
+
+    def __init__(self, through=None, codes=()):
+        self.through = through
+        self.codes = set(codes)
+        self.newest = through
+        self.newest_codes = set(codes)
+        self.count = 0
+        self.disbursed = 0
+
+    def add(self, item):
+        redeemed_at, code = item.get('redeemed_at'), item.get('code')
+        if not redeemed_at:
+            return True
+        if self.through and (redeemed_at < self.through or (redeemed_at == self.through and code in self.codes)):
+            return False
+        if self.newest is None or redeemed_at > self.newest:
+            self.newest, self.newest_codes = redeemed_at, {code}
+        elif redeemed_at == self.newest:
+            self.newest_codes.add(code)
+        self.count += 1
+        disbursement = item.get('disbursement') or (item.get('metadata') or {}).get('disbursement') or {}
+        if str(disbursement.get('status', '')).lower() in DISBURSED_STATUSES:
+            self.disbursed += _cents(disbursement.get('amount', item.get('amount')))
+        return True
+
+
+class LedgerCheck:
+    """One pass over every tenant, against the checkpoint's baseline."""
+
+    def __init__(self, client, tenants, checkpoint=None, system_token=None, concurrency=8, attempts=3):
+        self.client = client
+        self.tenants = tenants
+        self.checkpoint = checkpoint or {}
+        self.system_token = system_token or tenants[0].token
+        self.slots = asyncio.Semaphore(concurrency)
+        self.attempts = attempts
+        self.results = {}
+
+    async def scan_wallet(self, tenant):
+        previous = self.checkpoint.get('wallets', {}).get(tenant.email, {})
+        for _ in range(self.attempts):
+            before = await self.client.balance(tenant.token)
+            scan = WalletScan(previous.get('last_id', 0))
+            async for item in self.client.pages(WALLET_TRANSACTIONS_PATH, tenant.token):
+                if not scan.add(item):
+                    break
+            after = await self.client.balance(tenant.token)
+            if before == after:
+                return scan, after, True
+        return scan, after, False
+
+    async def scan_redemptions(self, tenant):
+        previous = self.checkpoint.get('redemptions', {}).get(tenant.email, {})
+        scan = RedemptionScan(previous.get('through'), previous.get('codes', ()))
+        async for item in self.client.pages(TRANSACTIONS_PATH, tenant.token):
+            if not scan.add(item):
+                break
+        return scan
+
+    async def scan(self, tenant):
+        async with self.slots:
+            wallet, balance, quiet = await self.scan_wallet(tenant)
+            redemptions = await self.scan_redemptions(tenant)
+        previous = self.checkpoint.get('wallets', {}).get(tenant.email, {})
+        opening = previous.get('balance', 0)
+        self.results[tenant.email] = {
+            'wallet': wallet, 'redemptions': redemptions, 'opening': opening, 'balance': balance,
+            'quiet': quiet, 'drift': balance - opening - wallet.net,
+        }
+
+    async def run(self):
+        """(system, products, closed_measured): totals from around a scan in which they did not move."""
+        for attempt in range(self.attempts):
+            self.results = {}
+            start = await self.client.system(self.system_token)
+            await asyncio.gather(*(self.scan(tenant) for tenant in self.tenants))
+            end = await self.client.system(self.system_token)
+            if start == end:
+                return end[0], end[1], True
+            print(f"   ↻ system totals moved during the scan (attempt {attempt + 1}/{self.attempts})")
+        return end[0], end[1], False
+
+
+def evaluate(check, system, products, measured):
+    """(summary, failures)."""
+    failures = []
+    results = check.results
+    for email, result in results.items():
+        if not result['quiet']:
+            failures.append(f"wallet     {email}: balance kept moving during the scan")
+        elif result['drift']:
+            failures.append(f"wallet     {email}: balance {result['balance'] / 100:,.2f} but opening "
+                            f"{result['opening'] / 100:,.2f} + transactions {result['wallet'].net / 100:+,.2f} "
+                            f"= {(result['opening'] + result['wallet'].net) / 100:,.2f} "
+                            f"(drift {result['drift'] / 100:+,.2f})")
+
+    previous = check.checkpoint
+    tenants_delta = sum(r['balance'] - r['opening'] for r in results.values())
+    disbursed = sum(r['redemptions'].disbursed for r in results.values())
+    charges = sum(r['wallet'].charges for r in results.values())
+    topups = sum(r['wallet'].topups for r in results.values())
+    closed = None
+    if measured and 'system' in previous:
+        system_delta, products_delta = system - previous['system'], products - previous['products']
+        drift = system_delta + products_delta + tenants_delta + disbursed - topups
+        closed = {
+            'system_delta': system_delta / 100, 'products_delta': products_delta / 100,
+            'tenants_delta': tenants_delta / 100, 'disbursed': disbursed / 100, 'topups': topups / 100,
+            'drift': drift / 100,
+            'generation_charges': charges / 100, 'products_other': (products_delta - charges + disbursed) / 100,
+        }
+        if drift:
+            failures.append(f"closed     ₱{abs(drift) / 100:,.2f} {'created' if drift > 0 else 'lost'}: "
+                            f"system {system_delta / 100:+,.2f}, products {products_delta / 100:+,.2f}, "
+                            f"tenants {tenants_delta / 100:+,.2f}, disbursed {disbursed / 100:,.2f}, "
+                            f"top-ups {topups / 100:,.2f}")
+
+    return {
+        'tenants': len(results),
+        'transactions': sum(r['wallet'].count for r in results.values()),
+        'redemptions': sum(r['redemptions'].count for r in results.values()),
+        'system': system / 100,
+        'products': products / 100,
+        'closed': closed,
+        'closed_measured': measured,
+    }, failures
+
+
+def next_checkpoint(check, system, products, base_url):
+    wallets, redemptions = dict(check.checkpoint.get('wallets', {})), dict(check.checkpoint.get('redemptions', {}))
+    for email, result in check.results.items():
+        wallets[email] = {'last_id': result['wallet'].newest, 'balance': result['balance']}
+        scan = result['redemptions']
+        if scan.newest:
+            redemptions[email] = {'through': scan.newest, 'codes': sorted(scan.newest_codes)}
+    return {
+        'version': CHECKPOINT_VERSION,
+        'base_url': base_url,
+        'taken_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'system': system,
+        'products': products,
+        'wallets': wallets,
+        'redemptions': redemptions,
+    }
+
+
+def load_checkpoint(path, base_url):
+    if not path or not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        checkpoint = json.load(f)
+    if checkpoint.get('version') != CHECKPOINT_VERSION:
+        raise ValueError(f"{path} is a version {checkpoint.get('version')} checkpoint; expected {CHECKPOINT_VERSION}")
+    if checkpoint.get('base_url') != base_url:
+        raise ValueError(f"{path} was taken against {checkpoint.get('base_url')}, not {base_url}")
+    return checkpoint
+
+
+def save_checkpoint(path, checkpoint):
+    """Write through a temporary file, so an interrupted run leaves the old checkpoint intact."""
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Streaming closed-system ledger check with a resumable checkpoint.')
+    parser.add_argument('--base-url', required=True, help='e.g. http://redeem-x.test')
+    parser.add_argument('--tenants', type=Path, required=True, help='billing:provision-tenants file: the wallets to check')
+    parser.add_argument('--system-token', help='Token for /system/balances (default: the first tenant)')
+    parser.add_argument('--checkpoint', type=Path, help='Read the baseline from and write the new one to this file')
+    parser.add_argument('--concurrency', type=int, default=8, help='Tenants scanned at once')
+    parser.add_argument('--attempts', type=int, default=3, help='Scans before a moving wallet or system total is reported')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout in seconds')
+    parser.add_argument('--report', type=Path, help='Write the summary as JSON')
+    args = parser.parse_args()
+
+    if args.concurrency < 1 or args.attempts < 1:
+        parser.error('--concurrency and --attempts must be at least 1')
+    base_url = args.base_url.rstrip('/')
+    try:
+        tenants = load_tenants(args.tenants)
+        checkpoint = load_checkpoint(args.checkpoint, base_url)
+    except (OSError, ValueError, KeyError) as e:
+        parser.error(str(e))
+
+    since = checkpoint.get('taken_at')
+    print(f"📒 {len(tenants)} wallet(s) at {base_url}, " + (f"since {since}" if since else 'full history'))
+
+    async def run():
+        client = Client(base_url, args.concurrency, args.timeout)
+        check = LedgerCheck(client, tenants, checkpoint, args.system_token, args.concurrency, args.attempts)
+        try:
+            return check, await check.run(), client.requests
+        finally:
+            await client.close()
+
+    started = time.perf_counter()
+    try:
+        check, (system, products, measured), requests = asyncio.run(run())
+    except LedgerError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    seconds = time.perf_counter() - started
+
+    summary, failures = evaluate(check, system, products, measured)
+    summary.update(seconds=round(seconds, 3), requests=requests, since=since, failures=failures)
+
+    print(f"   {summary['transactions']:,} transaction(s) and {summary['redemptions']:,} redemption(s) "
+          f"in {requests:,} requests, {seconds:.1f}s")
+    print(f"   system ₱{summary['system']:,.2f}, products ₱{summary['products']:,.2f}")
+    closed = summary['closed']
+    if closed:
+        print(f"   Δ system {closed['system_delta']:+,.2f}, products {closed['products_delta']:+,.2f} "
+              f"(charges {closed['generation_charges']:+,.2f}, other {closed['products_other']:+,.2f}), "
+              f"tenants {closed['tenants_delta']:+,.2f}, disbursed {closed['disbursed']:,.2f}, "
+              f"top-ups {closed['topups']:,.2f} → drift {closed['drift']:+,.2f}")
+    elif not measured:
+        print('   ⚠️  System totals never held still; closed check skipped')
+    else:
+        print('   No baseline yet: wallets reconciled from zero; closed check starts next run')
+
+    for failure in failures[:20]:
+        print(f"   ❌ {failure}")
+    if len(failures) > 20:
+        print(f"   ... and {len(failures) - 20} more")
+
+    if args.checkpoint and measured and not failures:
+        save_checkpoint(args.checkpoint, next_checkpoint(check, system, products, base_url))
+        print(f"💾 {args.checkpoint}")
+    elif args.checkpoint:
+        print(f"   Checkpoint {args.checkpoint} left unchanged")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        print(f"💾 {args.report}")
+
+    if failures:
+        sys.exit(1)
+    print('✅ Ledger reconciles' + (', closed system holds' if closed else ''))
+
+
+if __name__ == '__main__':
+    main()
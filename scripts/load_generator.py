@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Open-model load against the voucher and wallet endpoints, using the billing
+folders as weighted virtual-user scenarios.
+
+Virtual users arrive at --rate per second (Poisson arrivals) for --duration
+seconds, whether or not earlier ones have finished. Each one picks a folder
+by weight and runs that folder's requests in order with its own variables,
+as collection_runner.py does. Arrivals that find --users virtual users
+already in flight are dropped and counted rather than queued. A growing drop
+count means the server can no longer keep up with the offered rate.
+
+By default only the campaign-day traffic is sent: POST /api/v1/vouchers and
+/api/v1/wallet/*. --all-requests also sends the folders' voucher-detail and
+system-balance requests. Statuses are checked; fee checks are not, because
+many virtual users share each wallet.
+
+The API throttles at 60 requests per minute per user. For anything beyond a
+trickle, give the virtual users their own tokens with --tenants
+(billing:provision-tenants).
+
+--bulk N sends Generate Voucher through /vouchers/bulk-create. Requests from
+virtual users on the same token and campaign that arrive within --bulk-wait
+seconds are coalesced into batches of up to N (bulk_vouchers.py).
+
+--validate checks every response body against its api.json schema
+(response_validator.py) and counts a mismatch as an error.
+
+Weights default to 1 per folder and match folder names by substring:
+
+    python3 scripts/load_generator.py --rate 20 --duration 60 --users 200 \\
+        --weight "02 - Basic Settings=10" --weight "03 - Input Fields=3" \\
+        --tenants storage/app/billing-tenants.json --report /tmp/load.json
+
+Usage:
+    python3 scripts/load_generator.py --var access_token=$TOKEN --rate 5 --duration 30
+    python3 scripts/load_generator.py -e docs/api/postman/redeem-x.postman_environment.json --rate 50 --users 500 --all-requests
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from collection_passes import COLLECTION_PATH
+from collection_runner import CollectionRunner, FolderRun, load_variables, percentile
+from latency_histogram import for_runs
+from response_validator import ResponseValidators, print_validation
+from script_library import load_unpacked
+from tenants import load_tenants
+
+_LOAD_REQUEST = re.compile(r'/api/v1/(?:vouchers/?$|wallet/)')
+
+
+def parse_weights(pairs):
+    """[(substring, weight)] from NAME=WEIGHT arguments."""
+    weights = []
+    for pair in pairs:
+        name, _, weight = pair.rpartition('=')
+        if not name or float(weight) < 0:
+            raise ValueError(f"Invalid weight {pair!r} (expected NAME=WEIGHT)")
+        weights.append((name, float(weight)))
+    return weights
+
+
+def folder_weight(name, weights, default=1.0):
+    """The last matching weight wins, so specific names can follow broad ones."""
+    weight = default
+    for substring, value in weights:
+        if substring in name:
+            weight = value
+    return weight
+
+
+class Scenario:
+    """A billing folder driven as a virtual-user script."""
+
+    def __init__(self, folder, specs, weight):
+        self.folder = folder
+        self.name = folder['name']
+        self.specs = specs
+        self.weight = weight
+
+
+class LoadGenerator:
+    """Poisson arrivals of weighted scenarios over one CollectionRunner's connection pool."""
+
+    def __init__(self, runner, scenarios, rate, duration, users, tenants=None, seed=None):
+        self.runner = runner
+        self.scenarios = [s for s in scenarios if s.weight > 0]
+        self.rate = rate
+        self.duration = duration
+        self.users = users
+        self.tenants = tenants
+        self.random = random.Random(seed)
+        self.results = []
+        self.arrivals = self.dropped = self.completed = 0
+        self.in_flight = 0
+        self.scenario_times = {}
+
+    def variables(self, n):
+        if not self.tenants:
+            return self.runner.variables
+        return dict(self.runner.variables, access_token=self.tenants[n % len(self.tenants)].token)
+
+    async def virtual_user(self, n, scenario, scheduled):
+        run = FolderRun(scenario.folder, self.variables(n))
+        try:
+            for spec in scenario.specs:
+                result = await self.runner.run_request(run, spec)
+                self.results.append(result)
+        finally:
+            self.in_flight -= 1
+        self.completed += 1
+        # Measured from the scheduled arrival, so a slow event loop cannot hide queueing
+        self.scenario_times.setdefault(scenario.name, []).append(time.perf_counter() - scheduled)
+
+    async def run(self):
+        loop_start = time.perf_counter()
+        weights = [s.weight for s in self.scenarios]
+        tasks = []
+        next_arrival = loop_start
+        try:
+            while True:
+                next_arrival += self.random.expovariate(self.rate)
+                if next_arrival - loop_start >= self.duration:
+                    break
+                delay = next_arrival - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self.arrivals += 1
+                if self.in_flight >= self.users:
+                    self.dropped += 1
+                    continue
+                scenario = self.random.choices(self.scenarios, weights)[0]
+                self.in_flight += 1
+                tasks.append(asyncio.ensure_future(self.virtual_user(self.arrivals, scenario, next_arrival)))
+            await asyncio.gather(*tasks)
+        finally:
+            await self.runner.pool.close()
+        return time.perf_counter() - loop_start
+
+
+def summarize(generator, seconds):
+    """{'requests': {name: stats}, 'scenarios': {...}, ...} with times in milliseconds."""
+    by_name = {}
+    for result in generator.results:
+        by_name.setdefault(result.name, []).append(result)
+
+    requests = {}
+    for name, results in by_name.items():
+        times = [r.elapsed * 1000 for r in results if r.status is not None]
+        requests[name] = {
+            'count': len(results),
+            'errors': sum(1 for r in results if not r.ok),
+            'throughput': round(len(results) / seconds, 2) if seconds else 0,
+            'p50': round(percentile(times, 50), 2) if times else None,
+            'p95': round(percentile(times, 95), 2) if times else None,
+            'p99': round(percentile(times, 99), 2) if times else None,
+            'max': round(max(times), 2) if times else None,
+        }
+    scenarios = {
+        name: {'count': len(times), 'p50': round(percentile(times, 50) * 1000, 2),
+               'p95': round(percentile(times, 95) * 1000, 2), 'p99': round(percentile(times, 99) * 1000, 2)}
+        for name, times in generator.scenario_times.items()
+    }
+    bulk = generator.runner.bulk
+    return {
+        'seconds': round(seconds, 3),
+        'offered_rate': generator.rate,
+        'arrivals': generator.arrivals,
+        'dropped': generator.dropped,
+        'completed': generator.completed,
+        'requests': requests,
+        'scenarios': scenarios,
+        'bulk': {'requests': bulk.requests, 'vouchers': bulk.vouchers} if bulk else None,
+        'schema': generator.runner.validators.summary() if generator.runner.validators else None,
+    }
+
+
+def print_summary(summary, connections):
+    requests = summary['requests']
+    width = max([len(name) for name in requests] + [7])
+    print(f"\n⏱️  {'Request':{width}}  {'n':>6}  {'err':>5}  {'req/s':>7}  {'p50':>7}  {'p95':>7}  {'p99':>7}  (ms)")
+    for name, stats in requests.items():
+        if stats['p50'] is None:
+            print(f"    {name:{width}}  {stats['count']:6d}  {stats['errors']:5d}  {stats['throughput']:7.1f}  "
+                  f"{'-':>7}  {'-':>7}  {'-':>7}")
+            continue
+        print(f"    {name:{width}}  {stats['count']:6d}  {stats['errors']:5d}  {stats['throughput']:7.1f}  "
+              f"{stats['p50']:7.1f}  {stats['p95']:7.1f}  {stats['p99']:7.1f}")
+
+    total = sum(s['count'] for s in requests.values())
+    errors = sum(s['errors'] for s in requests.values())
+    seconds = summary['seconds']
+    icon = '✅' if not errors and not summary['dropped'] else '❌'
+    print(f"\n{icon} {summary['completed']}/{summary['arrivals']} virtual users completed, "
+          f"{summary['dropped']} dropped; {total} requests ({errors} errors) in {seconds:.2f}s "
+          f"= {total / seconds if seconds else 0:.0f} req/s over {connections} connections")
+    if summary['bulk']:
+        print(f"📦 {summary['bulk']['vouchers']} vouchers in {summary['bulk']['requests']} bulk-create request(s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Open-model load test using the billing folders as scenarios.')
+    parser.add_argument('collection', nargs='?', type=Path, default=COLLECTION_PATH)
+    parser.add_argument('-e', '--environment', type=Path, help='Postman environment file')
+    parser.add_argument('--var', action='append', default=[], metavar='KEY=VALUE', help='Override a variable')
+    parser.add_argument('--rate', type=float, required=True, help='Virtual-user arrivals per second')
+    parser.add_argument('--duration', type=float, default=60.0, help='Seconds of arrivals')
+    parser.add_argument('--users', type=int, default=100, help='Most virtual users in flight (later arrivals drop)')
+    parser.add_argument('--weight', action='append', default=[], metavar='NAME=WEIGHT',
+                        help='Scenario weight for folders whose name contains NAME (default 1)')
+    parser.add_argument('--folder', action='append', default=[], help='Only folders whose name contains this')
+    parser.add_argument('--all-requests', action='store_true',
+                        help='Also send voucher-detail and system-balance requests')
+    parser.add_argument('--connections', type=int, help='Pooled connections (default: --users)')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout in seconds')
+    parser.add_argument('--bulk', type=int, default=0, metavar='N',
+                        help='Coalesce Generate Voucher into /vouchers/bulk-create batches of up to N (max 100)')
+    parser.add_argument('--bulk-wait', type=float, default=0.05,
+                        help='Seconds a bulk batch waits for more vouchers before it is sent')
+    parser.add_argument('--tenants', type=Path, help='billing:provision-tenants file: virtual users rotate tokens')
+    parser.add_argument('--seed', type=int, help='Seed arrivals and scenario picks')
+    parser.add_argument('--report', type=Path, help='Write the summary as JSON')
+    parser.add_argument('--histograms', type=Path, help='Write per-operation latency histograms (latency_histogram.py)')
+    parser.add_argument('--validate', action='store_true', help='Check every response against its api.json schema')
+    args = parser.parse_args()
+
+    if args.rate <= 0 or args.users < 1:
+        parser.error('--rate must be positive and --users at least 1')
+    if not 0 <= args.bulk <= 100:
+        parser.error('--bulk must be between 0 (off) and 100')
+    try:
+        weights = parse_weights(args.weight)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # Packed collections keep their tests in lib_* variables; the checks are read from the scripts
+    collection = load_unpacked(args.collection)
+    variables = load_variables(collection, args.environment, args.var)
+    tenants = load_tenants(args.tenants) if args.tenants else None
+    runner = CollectionRunner(collection, variables, args.users, args.connections, args.timeout,
+                              bulk_size=args.bulk, bulk_wait=args.bulk_wait,
+                              validators=ResponseValidators.from_spec() if args.validate else None)
+    runner.check_fees = False
+
+    scenarios = []
+    for folder in collection['item']:
+        if args.folder and not any(s in folder['name'] for s in args.folder):
+            continue
+        specs = [spec for spec in runner.specs[id(folder)]
+                 if args.all_requests or _LOAD_REQUEST.search(spec.url.split('?')[0])]
+        weight = folder_weight(folder['name'], weights)
+        if specs and weight > 0:
+            scenarios.append(Scenario(folder, specs, weight))
+    if not scenarios:
+        parser.error('No scenarios: check --folder and --weight')
+
+    total_weight = sum(s.weight for s in scenarios)
+    print(f"🎯 {len(scenarios)} scenarios → {variables.get('base_url')}: {args.rate:g} users/s for "
+          f"{args.duration:g}s (≤ {args.users} in flight{f', {len(tenants)} tenants' if tenants else ''})")
+    for scenario in sorted(scenarios, key=lambda s: -s.weight)[:5]:
+        print(f"   {scenario.weight / total_weight:6.1%}  {scenario.name}")
+    if len(scenarios) > 5:
+        print(f"   ... {len(scenarios) - 5} more")
+
+    generator = LoadGenerator(runner, scenarios, args.rate, args.duration, args.users, tenants, args.seed)
+    seconds = asyncio.run(generator.run())
+    summary = summarize(generator, seconds)
+    print_summary(summary, runner.pool.opened)
+    if runner.validators:
+        print_validation(runner.validators)
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        print(f"💾 {args.report}")
+    if args.histograms:
+        recorder = for_runs({'runner': 'load_generator', 'base_url': variables.get('base_url'),
+                             'rate': args.rate, 'duration': args.duration})
+        recorder.record_results(generator.results)
+        recorder.save(args.histograms)
+        print(f"💾 {args.histograms}")
+
+    sys.exit(0 if not any(s['errors'] for s in summary['requests'].values()) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+"""
+Concurrent settlement-voucher loan lifecycles against a local stack, with a
+ledger check at the end.
+
+test-settlement-voucher-flow.sh takes one loan through disbursement and two
+repayments. This runs thousands of loans at once. Each one gets a random
+repayment schedule: 1 to --max-payments deposits of random amounts that add
+up to its target, sent after random think times. A share of them (--overlap)
+is sent while the loan's previous payment is still unconfirmed. Many deposits
+then land on the same voucher cash wallet at once, which is where lock
+contention and ordering bugs in the repayment path show up.
+
+    php artisan billing:provision-tenants 20 --balance=2000000 --mobile-prefix=0917300
+    DISBURSE_DISABLE=true php artisan settlement:seed-loans 2000
+    python3 scripts/loan_simulator.py --base-url http://redeem-x.test
+
+settlement:seed-loans generates and redeems the loans; it refuses to run
+unless disbursement is disabled. Each repayment is one deposit to
+/api/confirm-deposit followed by its signed /pay/confirm link, as the
+borrower's confirmation SMS would have it. A payment request is picked by
+amount alone, so the simulator plans amounts that are distinct across every
+payment of the run. It seeds all of them with one
+webhook:seed-payment-requests --plan call. Matching looks back 10 minutes,
+so size the run to finish within that. One state:probe worker
+(state_probe.py) watches every payment request with one batched query per
+--poll.
+
+The ledger is checked from state:probe snapshots taken before the first
+deposit and after the last confirmation:
+
+    repaid       every loan has remaining ₱0 and paid_total equal to its target
+    voucher      each voucher's cash grew by exactly its confirmed payments
+    owner        each owner's wallet grew by exactly the deposits sent to them
+    conserved    system + owners + vouchers add up to the same total before and after
+
+Only the simulator should be moving money on the stack while it runs. Exits
+non-zero on any failed payment or ledger mismatch.
+
+Usage:
+    python3 scripts/loan_simulator.py --base-url http://redeem-x.test
+    python3 scripts/loan_simulator.py --base-url http://redeem-x.test --max-payments 6 --overlap 0.5 --duplicates 0.1
+    python3 scripts/loan_simulator.py --base-url http://redeem-x.test --loans /tmp/loans.json --seed 7 --report /tmp/sim.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from api_stub import CONFIRM_DEPOSIT_PATH
+from collection_runner import percentile
+from http_pool import ConnectionPool, HttpError
+from state_probe import REPO_ROOT, ProbeError, StateProbe
+from webhook_replay import deposit_payload
+
+LOANS_PATH = REPO_ROOT / 'storage' / 'app' / 'settlement-loans.json'
+MATCH_WINDOW = 600  # DepositClassificationService::matchByAmountAndTime looks back 10 minutes
+PROBE_BATCH = 500
+
+
+class Loan:
+    """A disbursed settlement voucher and its repayment schedule."""
+
+    def __init__(self, code, owner, mobile, target):
+        self.code = code
+        self.owner = owner
+        self.mobile = mobile
+        self.target = target
+        self.payments = []
+
+
+class Payment:
+    """One repayment: a deposit and its confirmation (perf_counter seconds)."""
+
+    def __init__(self, loan, amount):
+        self.loan = loan
+        self.amount = amount
+        self.request = None
+        self.sent = None
+        self.accepted = False
+        self.classified = None
+        self.confirm_sent = None
+        self.confirmed = None
+        self.error = None
+
+    @property
+    def classify_latency(self):
+        return self.classified - self.sent if self.classified is not None else None
+
+    @property
+    def confirm_latency(self):
+        return self.confirmed - self.confirm_sent if self.confirmed is not None else None
+
+
+def load_loans(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return [Loan(loan['code'], loan['owner'], loan['mobile'], int(loan['target'])) for loan in data['loans']], \
+        data.get('borrower')
+
+
+def plan_repayments(loans, max_payments, rng, tries=200):
+    """
+    Give every loan 1 to max_payments repayments that add up to its target.
+    No two repayments of the run share an amount.
+    """
+    used = set()
+    for loan in loans:
+        for _ in range(tries):
+            parts = rng.randint(1, max(1, min(max_payments, loan.target // 2)))
+            cuts = sorted(rng.sample(range(1, loan.target), parts - 1))
+            amounts = [b - a for a, b in zip([0] + cuts, cuts + [loan.target])]
+            if len(set(amounts)) == parts and used.isdisjoint(amounts):
+                break
+        else:
+            raise ValueError(f"No repayment amounts left for {loan.code} (₱{loan.target:,}); "
+                             f"seed fewer or larger loans")
+        used.update(amounts)
+        loan.payments = [Payment(loan, amount) for amount in amounts]
+
+
+def seed_requests(loans, artisan):
+    """Create every planned payment request with one webhook:seed-payment-requests --plan."""
+    with tempfile.TemporaryDirectory() as tmp:
+        plan_path, output = Path(tmp) / 'plan.json', Path(tmp) / 'requests.json'
+        plan_path.write_text(json.dumps({loan.code: [p.amount for p in loan.payments] for loan in loans}))
+        result = subprocess.run(artisan + ['webhook:seed-payment-requests', f"--plan={plan_path}", f"--output={output}"],
+                                cwd=REPO_ROOT, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise ProbeError(f"webhook:seed-payment-requests failed: {(result.stdout + result.stderr).strip()[-500:]}")
+        requests = json.loads(output.read_text(encoding='utf-8'))['payment_requests']
+
+    by_key = {(r['voucher_code'], r['amount']): r for r in requests}
+    for loan in loans:
+        for payment in loan.payments:
+            payment.request = by_key[(loan.code, payment.amount)]
+
+
+def fetch(probe, queries):
+    """Results for any number of queries, PROBE_BATCH per round trip."""
+    results = []
+    for start in range(0, len(queries), PROBE_BATCH):
+        results += probe.query(*queries[start:start + PROBE_BATCH])
+    return results
+
+
+def classified(state):
+    return state.get('transaction') is not None
+
+
+def settled(state):
+    return state.get('status') != 'pending' and (state.get('transaction') or {}).get('confirmed')
+
+
+class Watcher:
+    """Resolves waits on payment request states from one batched probe query per poll."""
+
+    def __init__(self, probe, poll):
+        self.probe = probe
+        self.poll = poll
+        self.waits = {}
+        self.polls = 0
+
+    async def wait(self, request_id, predicate, timeout):
+        future = asyncio.get_running_loop().create_future()
+        self.waits.setdefault(request_id, []).append((predicate, future))
+        return await asyncio.wait_for(future, timeout)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self.waits = {id: [w for w in waits if not w[1].done()] for id, waits in self.waits.items()}
+            self.waits = {id: waits for id, waits in self.waits.items() if waits}
+            if self.waits:
+                ids = list(self.waits)
+                states = await loop.run_in_executor(
+                    None, fetch, self.probe, [{'type': 'payment_request', 'id': id} for id in ids])
+                self.polls += 1
+                for id, state in zip(ids, states):
+                    for predicate, future in self.waits.get(id, []):
+                        if not future.done() and 'error' not in state and predicate(state):
+                            future.set_result(state)
+            await asyncio.sleep(self.poll)
+
+
+def snapshot(probe, loans):
+    """{'system': cents, 'owners': {email: cents}, 'vouchers': {code: state}} from batched probe queries."""
+    results = fetch(probe, [{'type': 'voucher', 'code': loan.code} for loan in loans] + [{'type': 'system'}])
+    vouchers = {loan.code: state for loan, state in zip(loans, results)}
+    errors = [f"{code}: {state['error']}" for code, state in vouchers.items() if 'error' in state]
+    if errors:
+        raise ProbeError(f"{len(errors)} voucher(s) could not be read, e.g. {errors[0]}")
+    return {
+        'system': _cents(results[-1]['system_wallet']),
+        'owners': {loan.owner: _cents(vouchers[loan.code]['owner_wallet']) for loan in loans},
+        'vouchers': vouchers,
+    }
+
+
+def _cents(amount):
+    return round(float(amount or 0) * 100)
+
+
+class Simulator:
+    """Runs every loan's repayment schedule concurrently over one connection pool."""
+
+    def __init__(self, probe, base_url, loans, borrower, concurrency=50, connections=None, ramp=10.0, think=1.0,
+                 overlap=0.3, duplicates=0.0, timeout=60.0, poll=0.25, seed=None):
+        self.probe = probe
+        self.base_url = base_url.rstrip('/')
+        self.loans = loans
+        self.borrower = borrower
+        self.slots = asyncio.Semaphore(concurrency)
+        self.pool = ConnectionPool(limit=connections or concurrency)
+        self.ramp = ramp
+        self.think = think
+        self.overlap = overlap
+        self.duplicates = duplicates
+        self.timeout = timeout
+        self.watcher = Watcher(probe, poll)
+        self.random = random.Random(seed)
+        self.duplicate_confirms = 0
+
+    async def request(self, method, url, body=None):
+        headers = {'Accept': 'application/json'}
+        if body is not None:
+            headers['Content-Type'] = 'application/json'
+        async with self.slots:
+            return await self.pool.request(method, url, headers, json.dumps(body) if body is not None else b'',
+                                           timeout=self.timeout)
+
+    async def pay(self, payment):
+        loan = payment.loan
+        try:
+            payment.sent = time.perf_counter()
+            response = await self.request('POST', self.base_url + CONFIRM_DEPOSIT_PATH, deposit_payload(
+                loan.mobile, payment.amount, self.random, self.borrower, sender_name='BORROWER'))
+            if response.status != 204:
+                payment.error = f"deposit answered {response.status}"
+                return
+            payment.accepted = True
+
+            state = await self.watcher.wait(payment.request['id'], classified, self.timeout)
+            payment.classified = time.perf_counter()
+
+            payment.confirm_sent = time.perf_counter()
+            confirms = [self.request('GET', state['confirm_url'])]
+            if self.random.random() < self.duplicates:
+                confirms.append(self.request('GET', state['confirm_url']))
+                self.duplicate_confirms += 1
+            await asyncio.gather(*confirms)
+
+            await self.watcher.wait(payment.request['id'], settled, self.timeout)
+            payment.confirmed = time.perf_counter()
+        except asyncio.TimeoutError:
+            payment.error = 'never confirmed' if payment.classified else 'never classified'
+        except (HttpError, OSError) as e:
+            payment.error = str(e) or type(e).__name__
+
+    async def lifecycle(self, loan):
+        await asyncio.sleep(self.random.uniform(0, self.ramp))
+        tasks = []
+        for n, payment in enumerate(loan.payments):
+            if n and self.think:
+                await asyncio.sleep(self.random.expovariate(1 / self.think))
+            tasks.append(asyncio.ensure_future(self.pay(payment)))
+            if self.random.random() >= self.overlap:
+                await tasks[-1]
+        await asyncio.gather(*tasks)
+
+    async def run(self):
+        """Seconds from the first deposit to the last confirmation."""
+        watching = asyncio.ensure_future(self.watcher.run())
+        start = time.perf_counter()
+        try:
+            await asyncio.gather(*(self.lifecycle(loan) for loan in self.loans))
+            return time.perf_counter() - start
+        finally:
+            watching.cancel()
+            await self.pool.close()
+
+
+def verify(loans, before, after, requests):
+    """(checks, failures): the ledger invariants, with one line per failure."""
+    failures = []
+    owners_expected = {}
+    for loan in loans:
+        state, start = after['vouchers'][loan.code], before['vouchers'][loan.code]
+        if abs(float(state['remaining'])) >= 0.005 or _cents(state['paid_total']) != loan.target * 100:
+            failures.append(f"repaid     {loan.code}: paid ₱{state['paid_total']:,.2f} of ₱{loan.target:,}, "
+                            f"remaining ₱{state['remaining']:,.2f}")
+        confirmed = sum(p.amount for p in loan.payments if (requests.get(p.request['id'], {}).get('transaction') or {})
+                        .get('confirmed')) * 100
+        grew = _cents(state['voucher_cash']) - _cents(start['voucher_cash'])
+        if grew != confirmed:
+            failures.append(f"voucher    {loan.code}: cash grew ₱{grew / 100:,.2f}, "
+                            f"confirmed payments ₱{confirmed / 100:,.2f}")
+        owners_expected[loan.owner] = owners_expected.get(loan.owner, 0) + \
+            sum(p.amount for p in loan.payments if p.accepted) * 100
+
+    for owner, expected in owners_expected.items():
+        grew = after['owners'][owner] - before['owners'][owner]
+        if grew != expected:
+            failures.append(f"owner      {owner}: wallet grew ₱{grew / 100:,.2f}, deposits ₱{expected / 100:,.2f}")
+
+    def total(snap):
+        return snap['system'] + sum(snap['owners'].values()) + \
+            sum(_cents(state['voucher_cash']) for state in snap['vouchers'].values())
+    drift = total(after) - total(before)
+    if drift:
+        failures.append(f"conserved  ₱{abs(drift) / 100:,.2f} {'created' if drift > 0 else 'lost'} across system, "
+                        f"owner and voucher wallets")
+
+    checks = {
+        'loans': len(loans),
+        'repaid': sum(1 for loan in loans if abs(float(after['vouchers'][loan.code]['remaining'])) < 0.005),
+        'system_delta': (after['system'] - before['system']) / 100,
+        'owner_delta': (sum(after['owners'].values()) - sum(before['owners'].values())) / 100,
+        'voucher_delta': sum(_cents(after['vouchers'][c]['voucher_cash']) - _cents(before['vouchers'][c]['voucher_cash'])
+                             for c in after['vouchers']) / 100,
+        'drift': drift / 100,
+    }
+    return checks, failures
+
+
+def latency(values):
+    """Percentiles in milliseconds."""
+    if not values:
+        return {'count': 0}
+    values = [v * 1000 for v in values]
+    return {'count': len(values), 'p50': round(percentile(values, 50), 1), 'p95': round(percentile(values, 95), 1),
+            'p99': round(percentile(values, 99), 1), 'max': round(max(values), 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent settlement loan lifecycles with a ledger check.')
+    parser.add_argument('--base-url', required=True, help='e.g. http://redeem-x.test')
+    parser.add_argument('--loans', type=Path, default=LOANS_PATH, help='settlement:seed-loans output')
+    parser.add_argument('--max-payments', type=int, default=4, help='Most repayments per loan')
+    parser.add_argument('--concurrency', type=int, default=50, help='Most HTTP requests in flight')
+    parser.add_argument('--connections', type=int, help='Pooled connections (default: --concurrency)')
+    parser.add_argument('--ramp', type=float, default=10.0, help='Seconds over which the loans start repaying')
+    parser.add_argument('--think', type=float, default=1.0, help="Mean seconds between a loan's repayments")
+    parser.add_argument('--overlap', type=float, default=0.3,
+                        help='Share of repayments sent before the previous one is confirmed')
+    parser.add_argument('--duplicates', type=float, default=0.0,
+                        help='Share of confirmation links opened twice at once')
+    parser.add_argument('--timeout', type=float, default=60.0, help='Seconds to wait for each request and state change')
+    parser.add_argument('--poll', type=float, default=0.25, help='Seconds between payment request polls')
+    parser.add_argument('--artisan', default='php artisan', help='How to run artisan (default: php artisan)')
+    parser.add_argument('--seed', type=int, help='Seed schedules and payloads')
+    parser.add_argument('--report', type=Path, help='Write the summary as JSON')
+    args = parser.parse_args()
+
+    if args.max_payments < 1 or args.concurrency < 1 or args.poll <= 0:
+        parser.error('--max-payments and --concurrency must be at least 1, --poll positive')
+    if not (0 <= args.overlap <= 1 and 0 <= args.duplicates <= 1):
+        parser.error('--overlap and --duplicates must be between 0 and 1')
+
+    try:
+        loans, borrower = load_loans(args.loans)
+    except (OSError, ValueError, KeyError) as e:
+        parser.error(f"Cannot read loans from {args.loans}: {e}")
+    try:
+        plan_repayments(loans, args.max_payments, random.Random(args.seed))
+    except ValueError as e:
+        parser.error(str(e))
+    payments = [p for loan in loans for p in loan.payments]
+    print(f"🏦 {len(loans)} loans, {len(payments)} repayments of ₱{sum(p.amount for p in payments):,} planned")
+
+    artisan = shlex.split(args.artisan)
+    try:
+        with StateProbe(artisan + ['state:probe'], timeout=args.timeout) as probe:
+            started = time.perf_counter()
+            seed_requests(loans, artisan)
+            print(f"🧾 {len(payments)} payment requests seeded in {time.perf_counter() - started:.1f}s")
+            before = snapshot(probe, loans)
+
+            simulator = Simulator(probe, args.base_url, loans, borrower or '09467438575', args.concurrency,
+                                  args.connections, args.ramp, args.think, args.overlap, args.duplicates,
+                                  args.timeout, args.poll, args.seed)
+            print(f"🚀 Repaying at ≤ {args.concurrency} requests in flight, {args.overlap:.0%} overlapping...")
+            seconds = asyncio.run(simulator.run())
+
+            states = fetch(probe, [{'type': 'payment_request', 'id': p.request['id']} for p in payments])
+            requests = {p.request['id']: state for p, state in zip(payments, states)}
+            after = snapshot(probe, loans)
+    except ProbeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    checks, failures = verify(loans, before, after, requests)
+    failed = [p for p in payments if p.error]
+    errors = {}
+    for p in failed:
+        errors[p.error] = errors.get(p.error, 0) + 1
+    summary = {
+        'seconds': round(seconds, 3),
+        'loans': len(loans),
+        'payments': len(payments),
+        'confirmed': sum(1 for p in payments if p.confirmed is not None),
+        'errors': errors,
+        'duplicate_confirms': simulator.duplicate_confirms,
+        'probe_polls': simulator.watcher.polls,
+        'classify_ms': latency([p.classify_latency for p in payments if p.classified is not None]),
+        'confirm_ms': latency([p.confirm_latency for p in payments if p.confirmed is not None]),
+        'ledger': checks,
+        'failures': failures,
+    }
+
+    print(f"\n⏱️  {summary['confirmed']}/{len(payments)} repayments confirmed in {seconds:.1f}s "
+          f"({summary['confirmed'] / seconds if seconds else 0:.1f}/s), {simulator.watcher.polls} probe polls")
+    for label, key in (('deposit → classified', 'classify_ms'), ('link → confirmed', 'confirm_ms')):
+        stats = summary[key]
+        if stats['count']:
+            print(f"   {label:22} p50 {stats['p50']:8.1f}  p95 {stats['p95']:8.1f}  p99 {stats['p99']:8.1f}  "
+                  f"max {stats['max']:8.1f} ms")
+    for error, n in errors.items():
+        print(f"   ⚠️  {n} × {error}")
+    if seconds > MATCH_WINDOW:
+        print(f"   ⚠️  The run outlasted the {MATCH_WINDOW // 60}-minute amount-matching window")
+
+    print(f"\n📒 {checks['repaid']}/{checks['loans']} loans repaid; system {checks['system_delta']:+,.2f}, "
+          f"owners {checks['owner_delta']:+,.2f}, vouchers {checks['voucher_delta']:+,.2f} "
+          f"= {checks['drift']:+,.2f}")
+    for failure in failures[:20]:
+        print(f"   ❌ {failure}")
+    if len(failures) > 20:
+        print(f"   ... and {len(failures) - 20} more")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        print(f"💾 {args.report}")
+
+    if failures or failed:
+        sys.exit(1)
+    print('✅ Every loan repaid, no cash created or lost')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Routes and documented response shapes from api.json (the Scramble export).
+
+Scramble writes paths relative to scramble.api_path ('api/v1'), so
+'/vouchers/{voucher}' is served at /api/v1/vouchers/{voucher}. Routes are
+matched most-specific first: a literal segment beats a {parameter}, so
+/vouchers/query never resolves to vouchers.show.
+
+    router = Router.from_spec()
+    route, params = router.match('GET', '/api/v1/vouchers/ABCD')
+    route.operation_id, params          # 'vouchers.show', {'voucher': 'ABCD'}
+    error_body(route, 404, 'Voucher not found')
+"""
+
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+
+SPEC_PATH = Path(__file__).parent.parent / 'api.json'
+API_PREFIX = '/api/v1'
+
+_PARAMETER = re.compile(r'\{(\w+)\}')
+HTTP_METHODS = ('get', 'put', 'post', 'delete', 'options', 'head', 'patch', 'trace')
+
+
+@lru_cache(maxsize=None)
+def _read_spec(path, mtime_ns):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_spec(path=SPEC_PATH):
+    """The parsed OpenAPI document, re-read only when the file changes."""
+    path = Path(path)
+    return _read_spec(str(path), path.stat().st_mtime_ns)
+
+
+def resolve_ref(spec, node):
+    """Follow '#/components/...' references until a concrete node is reached."""
+    seen = set()
+    while isinstance(node, dict) and '$ref' in node:
+        ref = node['$ref']
+        if ref in seen or not ref.startswith('#/'):
+            raise ValueError(f"Cannot resolve $ref {ref}")
+        seen.add(ref)
+        node = spec
+        for part in ref[2:].split('/'):
+            node = node[part.replace('~1', '/').replace('~0', '~')]
+    return node
+
+
+class Route:
+    """One documented operation (method + path template)."""
+
+    def __init__(self, spec, method, template, operation, prefix=API_PREFIX):
+        self.spec = spec
+        self.method = method.upper()
+        self.template = template
+        self.operation = operation
+        self.operation_id = operation.get('operationId') or f"{method} {template}"
+        self.params = _PARAMETER.findall(template)
+        pattern = _PARAMETER.sub(r'(?P<\1>[^/]+)', re.escape(prefix + template).replace(r'\{', '{').replace(r'\}', '}'))
+        self.pattern = re.compile(f"^{pattern}/?$")
+        segments = [s for s in template.split('/') if s]
+        # Literal segments first, then fewer parameters
+        self.specificity = (sum(1 for s in segments if not s.startswith('{')), -len(self.params))
+
+    @property
+    def requires_auth(self):
+        return '401' in self.operation.get('responses', {})
+
+    def match(self, path):
+        found = self.pattern.match(path)
+        return found.groupdict() if found else None
+
+    def response(self, status):
+        """The documented response object for a status code (refs resolved), or None."""
+        response = self.operation.get('responses', {}).get(str(status))
+        return resolve_ref(self.spec, response) if response is not None else None
+
+    def response_schema(self, status, content_type='application/json'):
+        response = self.response(status) or {}
+        schema = response.get('content', {}).get(content_type, {}).get('schema')
+        return resolve_ref(self.spec, schema) if schema is not None else None
+
+    def __repr__(self):
+        return f"Route({self.method} {self.template} → {self.operation_id})"
+
+
+def compile_routes(spec, prefix=API_PREFIX):
+    routes = [Route(spec, method, template, operation, prefix)
+              for template, operations in spec.get('paths', {}).items()
+              for method, operation in operations.items() if method in HTTP_METHODS]
+    return sorted(routes, key=lambda route: route.specificity, reverse=True)
+
+
+class Router:
+    """Resolve (method, path) to a documented Route."""
+
+    def __init__(self, routes):
+        self.routes = routes
+
+    @classmethod
+    def from_spec(cls, path=SPEC_PATH, prefix=API_PREFIX):
+        return cls(compile_routes(load_spec(path), prefix))
+
+    def match(self, method, path):
+        """
+        (route, params) for the request.
+
+        (None, []) when no documented path matches, and (None, [methods]) when
+        the path exists but not for this method.
+        """
+        method = method.upper()
+        allowed = []
+        for route in self.routes:
+            params = route.match(path)
+            if params is None:
+                continue
+            if route.method == method:
+                return route, params
+            allowed.append(route.method)
+        return None, allowed
+
+    def operation(self, operation_id):
+        return next((route for route in self.routes if route.operation_id == operation_id), None)
+
+
+def error_body(route, status, message, errors=None, meta=None):
+    """
+    An error payload shaped like the route's documented response.
+
+    Only the properties the schema declares are included, so a 401 is
+    {"message": ...} while a 422 also carries "errors".
+    """
+    schema = route.response_schema(status) if route else None
+    properties = (schema or {}).get('properties', {'message': {}})
+    body = {'message': message}
+    if 'errors' in properties and errors is not None:
+        body['errors'] = errors
+    if 'meta' in properties and meta is not None:
+        body['meta'] = meta
+    return body
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Rebuild the generation-billing collection with every fix pass in one run.
+
+Replaces running the fix_*.py scripts one after another: the collection is
+parsed once, the registered passes run in dependency order over the in-memory
+collection, and the result is written once. Before writing, the passes are
+run again over their own output; if any of them still changes something, the
+rebuild stops without writing (--stream skips this check).
+
+Usage:
+    python3 scripts/rebuild_billing_collection.py
+    python3 scripts/rebuild_billing_collection.py --only cash_entity rider
+    python3 scripts/rebuild_billing_collection.py --skip accumulation --dry-run
+    python3 scripts/rebuild_billing_collection.py --list
+    python3 scripts/rebuild_billing_collection.py big.postman_collection.json --stream
+    python3 scripts/rebuild_billing_collection.py --pack /tmp/packed.postman_collection.json
+
+A packed collection (script_library.py) is unpacked before the passes run.
+--pack also writes a packed copy of the result; the collection itself is
+always written unpacked.
+"""
+
+import argparse
+import copy
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from collection_passes import (
+    COLLECTION_PATH,
+    format_reports,
+    registered_passes,
+    rerun_changes,
+    resolve_order,
+    run_passes,
+    save_collection,
+)
+from collection_stream import stream_passes
+from script_library import LIBRARY_PREFIX, load_unpacked, pack
+
+# Importing a fix module registers its pass. Superseded scripts
+# (fix_accumulation_tests v1/v2, fix_complex_scenario*) and the one-shot
+# add_rider_splash_folder.py are deliberately not part of the pipeline.
+import fix_request_bodies  # noqa: F401,E402
+import fix_voucher_counts  # noqa: F401,E402
+import fix_generate_voucher_tests  # noqa: F401,E402
+import fix_input_field_tests  # noqa: F401,E402
+import fix_cash_validation_tests  # noqa: F401,E402
+import fix_settlement_rail_tests  # noqa: F401,E402
+import fix_feedback_tests  # noqa: F401,E402
+import fix_rider_tests  # noqa: F401,E402
+import fix_include_strategy_tests  # noqa: F401,E402
+import fix_cash_entity_tests  # noqa: F401,E402
+import fix_accumulation_tests_v3  # noqa: F401,E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('collection', nargs='?', type=Path, default=COLLECTION_PATH)
+    parser.add_argument('-o', '--output', type=Path, help='Write here instead of overwriting the input')
+    parser.add_argument('--only', nargs='+', metavar='PASS', help='Run only these passes (plus their dependencies)')
+    parser.add_argument('--skip', nargs='+', metavar='PASS', default=[], help='Leave these passes out')
+    parser.add_argument('--dry-run', action='store_true', help='Run the passes but do not write the result')
+    parser.add_argument('--list', action='store_true', help='List registered passes and exit')
+    parser.add_argument('--stream', action='store_true',
+                        help='Process one folder at a time instead of loading the whole collection')
+    parser.add_argument('--pack', type=Path, metavar='PATH',
+                        help='Also write a copy with shared script code packed into lib_* variables (script_library.py)')
+    args = parser.parse_args()
+
+    if args.list:
+        for p in registered_passes():
+            deps = f"  (after: {', '.join(p.requires)})" if p.requires else ''
+            print(f"  {p.name:24s} {p.description}{deps}")
+        return
+
+    try:
+        passes = resolve_order(args.only, skip=args.skip)
+    except (KeyError, ValueError) as e:
+        print(f"❌ {e.args[0]}")
+        sys.exit(1)
+
+    if not args.collection.exists():
+        print(f"❌ Collection not found: {args.collection}")
+        sys.exit(1)
+
+    if args.stream and args.pack:
+        print("❌ --pack needs the whole collection in memory; drop --stream")
+        sys.exit(1)
+
+    if args.stream:
+        output = None if args.dry_run else (args.output or args.collection)
+        print(f"🌊 Streaming {args.collection.name}")
+        print(f"🔧 Pipeline: {' → '.join(p.name for p in passes)}\n")
+        start = time.perf_counter()
+        try:
+            reports = stream_passes(args.collection, output, passes)
+        except ValueError as e:
+            print(f"❌ {e.args[0]}")
+            sys.exit(1)
+        print(format_reports(reports))
+        if output is None:
+            print("\n🔍 Dry run, nothing written")
+        else:
+            print(f"\n💾 Wrote {output} in {(time.perf_counter() - start) * 1000:.1f}ms (read, passes and write)")
+        return
+
+    start = time.perf_counter()
+    collection = load_unpacked(args.collection)
+    load_seconds = time.perf_counter() - start
+    print(f"📖 Loaded {args.collection.name} ({len(collection['item'])} folders) in {load_seconds * 1000:.1f}ms")
+    print(f"🔧 Pipeline: {' → '.join(p.name for p in passes)}\n")
+
+    reports = run_passes(collection, passes)
+    print(format_reports(reports))
+
+    # A rebuild must be repeatable: the passes over their own output change nothing
+    changes = rerun_changes(collection, passes)
+    if changes:
+        for name, folders in changes:
+            print(f"❌ Pass '{name}' changes {folders} folder(s) again when rerun on its own output")
+        print('   Nothing written: make the pass idempotent first')
+        sys.exit(1)
+
+    if args.dry_run:
+        print("\n🔍 Dry run, nothing written")
+        return
+
+    output = args.output or args.collection
+    start = time.perf_counter()
+    save_collection(collection, output)
+    print(f"\n💾 Wrote {output} in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    if args.pack:
+        packed = copy.deepcopy(collection)
+        count = pack(packed)
+        save_collection(packed, args.pack)
+        libraries = sum(1 for v in packed['variable'] if v['key'].startswith(LIBRARY_PREFIX))
+        before, after = output.stat().st_size, args.pack.stat().st_size
+        print(f"📦 Packed {count} scripts into {libraries} shared blocks: {args.pack} "
+              f"({before / 1024:.0f} KB → {after / 1024:.0f} KB, {before / after:.1f}×)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+"""
+Response schema checks against api.json, compiled once and cached.
+
+Every schema node is compiled into a pair of closures: a fast `valid(value)`
+that only answers True or False and allocates nothing, and an `explain()`
+that walks the value again and collects readable violations. $refs are
+resolved while compiling, so components shared by many responses compile
+once (most operations share the ValidationException 422). The checks never
+look at api.json. Validators are cached by (operationId, status). Routes are
+cached by (method, path), so a response that matches its schema costs one
+dictionary lookup and one walk of the body. `explain()` runs only for
+responses that fail.
+
+Supported keywords are those the Scramble export uses: type (with null
+unions), enum, const, properties, required, additionalProperties, items,
+prefixItems, minItems, maxItems, additionalItems, anyOf, oneOf, allOf,
+minimum, maximum, minLength, maxLength, pattern and format: date-time.
+
+    validators = ResponseValidators.from_spec()
+    validators.check('GET', 'http://redeem-x.test/api/v1/wallet/balance', 200, response.json())
+    # ['$.data.balance: expected number, got string']
+
+A 2xx the operation does not document is checked against its documented
+success response, since Scramble documents most successes as 200 whatever
+the action actually returns. Other statuses an operation does not document
+(429 from the throttle, for one) are counted but not checked. collection_runner.py and load_generator.py take
+--validate to check every response they receive.
+
+Usage:
+    python3 scripts/response_validator.py GET /api/v1/wallet/balance 200 response.json
+    curl -s ... | python3 scripts/response_validator.py GET /api/v1/vouchers/ABCD 404 -
+    python3 scripts/collection_runner.py -c 8 --validate
+    python3 scripts/load_generator.py --rate 20 --duration 60 --validate
+"""
+
+import argparse
+import json
+import re
+import sys
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import urlsplit
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from openapi_routes import API_PREFIX, SPEC_PATH, Router, load_spec, resolve_ref
+
+NOT_JSON = object()  # stands in for a body that did not parse
+MAX_VIOLATIONS = 20  # per response; explain() stops collecting after this many
+_DATE_TIME = re.compile(r'^\d{4}-\d\d-\d\d[Tt ]\d\d:\d\d:\d\d(\.\d+)?([Zz]|[+-]\d\d:?\d\d)?$')
+
+
+def json_type(value):
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'boolean'
+    if isinstance(value, int):
+        return 'integer'
+    if isinstance(value, float):
+        return 'number'
+    if isinstance(value, str):
+        return 'string'
+    if isinstance(value, list):
+        return 'array'
+    if isinstance(value, dict):
+        return 'object'
+    return type(value).__name__
+
+
+TYPE_TESTS = {
+    'null': lambda v: v is None,
+    'boolean': lambda v: v is True or v is False,
+    'integer': lambda v: (isinstance(v, int) and not isinstance(v, bool)) or (isinstance(v, float) and v.is_integer()),
+    'number': lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    'string': lambda v: isinstance(v, str),
+    'array': lambda v: isinstance(v, list),
+    'object': lambda v: isinstance(v, dict),
+}
+
+
+def _always(value):
+    return True
+
+
+def _nothing(value, path, errors):
+    pass
+
+
+class Node:
+    """A compiled schema: valid(value) → bool, explain(value, path, errors)."""
+
+    __slots__ = ('valid', 'explain')
+
+    def __init__(self):
+        self.valid = _always
+        self.explain = _nothing
+
+
+class SchemaCompiler:
+    """Compile schema nodes once each; $refs resolve to the node of their target."""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.cache = {}
+        self.compiled = 0
+
+    def __call__(self, schema):
+        schema = resolve_ref(self.spec, schema if schema is not None else {})
+        key = id(schema)
+        if key not in self.cache:
+            node = Node()
+            # The schema is kept alongside so its id cannot be reused by another node
+            self.cache[key] = (schema, node)
+            self._compile(schema, node)
+            self.compiled += 1
+        return self.cache[key][1]
+
+    def _compile(self, schema, node):
+        if not isinstance(schema, dict):
+            return
+        checks = [check for check in (
+            self._type(schema), self._enum(schema), self._object(schema), self._array(schema),
+            self._bounds(schema), self._string(schema), self._combinators(schema),
+        ) if check is not None]
+        if not checks:
+            return
+        if len(checks) == 1:
+            node.valid, explain = checks[0]
+        else:
+            valids = tuple(valid for valid, _ in checks)
+
+            def valid(value):
+                for check in valids:
+                    if not check(value):
+                        return False
+                return True
+
+            node.valid = valid
+        explains = tuple(explain for _, explain in checks)
+
+        def explain(value, path, errors):
+            for check in explains:
+                if len(errors) >= MAX_VIOLATIONS:
+                    return
+                check(value, path, errors)
+
+        node.explain = explain
+
+    def _type(self, schema):
+        kind = schema.get('type')
+        if kind is None:
+            return None
+        kinds = tuple(kind) if isinstance(kind, list) else (kind,)
+        tests = tuple(TYPE_TESTS[k] for k in kinds if k in TYPE_TESTS)
+        if not tests:
+            return None
+        expected = ' or '.join(kinds)
+
+        if len(tests) == 1:
+            valid = tests[0]
+        else:
+            def valid(value):
+                for test in tests:
+                    if test(value):
+                        return True
+                return False
+
+        def explain(value, path, errors):
+            if not valid(value):
+                errors.append(f"{path}: expected {expected}, got {json_type(value)}")
+
+        return valid, explain
+
+    def _enum(self, schema):
+        if 'const' in schema:
+            options = [schema['const']]
+        elif 'enum' in schema:
+            options = list(schema['enum'])
+        else:
+            return None
+
+        def valid(value):
+            return value in options
+
+        def explain(value, path, errors):
+            if value not in options:
+                shown = ', '.join(json.dumps(o, ensure_ascii=False) for o in options[:5])
+                errors.append(f"{path}: {json.dumps(value, ensure_ascii=False)[:80]} is not one of {shown}"
+                              + (' ...' if len(options) > 5 else ''))
+
+        return valid, explain
+
+    def _object(self, schema):
+        properties = tuple((name, self(node)) for name, node in schema.get('properties', {}).items())
+        required = tuple(schema.get('required', ()))
+        extra = schema.get('additionalProperties', True)
+        if not properties and not required and extra in (True, {}):
+            return None
+        declared = frozenset(name for name, _ in properties)
+        extra_node = self(extra) if isinstance(extra, dict) and extra else None
+        closed = extra is False
+
+        def valid(value):
+            if not isinstance(value, dict):
+                return True
+            for name in required:
+                if name not in value:
+                    return False
+            for name, node in properties:
+                if name in value and not node.valid(value[name]):
+                    return False
+            if closed or extra_node is not None:
+                for name, item in value.items():
+                    if name not in declared and (closed or not extra_node.valid(item)):
+                        return False
+            return True
+
+        def explain(value, path, errors):
+            if not isinstance(value, dict):
+                return
+            for name in required:
+                if name not in value:
+                    errors.append(f"{path}: missing required property '{name}'")
+            for name, node in properties:
+                if name in value and not node.valid(value[name]):
+                    node.explain(value[name], f"{path}.{name}", errors)
+            for name, item in value.items():
+                if name in declared:
+                    continue
+                if closed:
+                    errors.append(f"{path}: unexpected property '{name}'")
+                elif extra_node is not None and not extra_node.valid(item):
+                    extra_node.explain(item, f"{path}.{name}", errors)
+
+        return valid, explain
+
+    def _array(self, schema):
+        items = schema.get('items')
+        prefix = tuple(self(node) for node in schema.get('prefixItems', ()))
+        if items is None and prefix:
+            items = schema.get('additionalItems', True)
+        low, high = schema.get('minItems', 0), schema.get('maxItems')
+        item_node = self(items) if isinstance(items, dict) and items else None
+        closed = items is False
+        if item_node is None and not prefix and not closed and not low and high is None:
+            return None
+
+        def valid(value):
+            if not isinstance(value, list):
+                return True
+            if len(value) < low or (high is not None and len(value) > high):
+                return False
+            for n, node in enumerate(prefix[:len(value)]):
+                if not node.valid(value[n]):
+                    return False
+            if closed and len(value) > len(prefix):
+                return False
+            if item_node is not None:
+                for n in range(len(prefix), len(value)):
+                    if not item_node.valid(value[n]):
+                        return False
+            return True
+
+        def explain(value, path, errors):
+            if not isinstance(value, list):
+                return
+            if len(value) < low or (high is not None and len(value) > high):
+                errors.append(f"{path}: {len(value)} item(s), expected "
+                              + (f"{low}-{high}" if high is not None else f"at least {low}"))
+            for n, node in enumerate(prefix[:len(value)]):
+                if not node.valid(value[n]):
+                    node.explain(value[n], f"{path}[{n}]", errors)
+            if closed and len(value) > len(prefix):
+                errors.append(f"{path}: {len(value) - len(prefix)} item(s) beyond the {len(prefix)} allowed")
+            if item_node is not None:
+                for n in range(len(prefix), len(value)):
+                    if len(errors) >= MAX_VIOLATIONS:
+                        return
+                    if not item_node.valid(value[n]):
+                        item_node.explain(value[n], f"{path}[{n}]", errors)
+
+        return valid, explain
+
+    def _bounds(self, schema):
+        low, high = schema.get('minimum'), schema.get('maximum')
+        if low is None and high is None:
+            return None
+
+        def valid(value):
+            if not TYPE_TESTS['number'](value):
+                return True
+            return (low is None or value >= low) and (high is None or value <= high)
+
+        def explain(value, path, errors):
+            if not valid(value):
+                errors.append(f"{path}: {value} is outside {low if low is not None else '-∞'}"
+                              f"..{high if high is not None else '∞'}")
+
+        return valid, explain
+
+    def _string(self, schema):
+        low, high = schema.get('minLength', 0), schema.get('maxLength')
+        pattern = re.compile(schema['pattern']) if 'pattern' in schema else None
+        date_time = schema.get('format') == 'date-time'
+        if not low and high is None and pattern is None and not date_time:
+            return None
+
+        def valid(value):
+            if not isinstance(value, str):
+                return True
+            if len(value) < low or (high is not None and len(value) > high):
+                return False
+            if pattern is not None and not pattern.search(value):
+                return False
+            return not date_time or bool(_DATE_TIME.match(value))
+
+        def explain(value, path, errors):
+            if not isinstance(value, str):
+                return
+            if len(value) < low or (high is not None and len(value) > high):
+                errors.append(f"{path}: length {len(value)} outside {low}..{high if high is not None else '∞'}")
+            if pattern is not None and not pattern.search(value):
+                errors.append(f"{path}: {value[:40]!r} does not match {pattern.pattern}")
+            if date_time and not _DATE_TIME.match(value):
+                errors.append(f"{path}: {value[:40]!r} is not a date-time")
+
+        return valid, explain
+
+    def _combinators(self, schema):
+        every = tuple(self(node) for node in schema.get('allOf', ()))
+        some = tuple(self(node) for node in schema.get('anyOf', ()))
+        one = tuple(self(node) for node in schema.get('oneOf', ()))
+        if not every and not some and not one:
+            return None
+
+        def valid(value):
+            for node in every:
+                if not node.valid(value):
+                    return False
+            if some and not any(node.valid(value) for node in some):
+                return False
+            return not one or sum(1 for node in one if node.valid(value)) == 1
+
+        def explain(value, path, errors):
+            for node in every:
+                if not node.valid(value):
+                    node.explain(value, path, errors)
+            if some and not any(node.valid(value) for node in some):
+                first = []
+                some[0].explain(value, path, first)
+                errors.append(f"{path}: matches none of {len(some)} anyOf schemas"
+                              + (f" (first: {first[0]})" if first else ''))
+            if one:
+                matches = sum(1 for node in one if node.valid(value))
+                if matches != 1:
+                    errors.append(f"{path}: matches {matches} of {len(one)} oneOf schemas, expected exactly 1")
+
+        return valid, explain
+
+
+class ResponseValidator:
+    """The compiled body schema of one documented response."""
+
+    def __init__(self, route, status, node):
+        self.route = route
+        self.status = status
+        self.node = node
+        self.key = f"{route.method} {API_PREFIX}{route.template} {status}"
+
+    def __call__(self, body):
+        """Violations of the schema; empty when the body matches."""
+        if body is NOT_JSON:
+            return ['$: body is not JSON']
+        if self.node.valid(body):
+            return []
+        if body is None:
+            return ['$: body is empty']
+        errors = []
+        self.node.explain(body, '$', errors)
+        return errors or ['$: does not match the schema']
+
+
+class ResponseValidators:
+    """Validators for every documented (operation, status), compiled on first use and kept."""
+
+    def __init__(self, spec, router=None):
+        self.spec = spec
+        self.router = router or Router.from_spec()
+        self.compiler = SchemaCompiler(spec)
+        self.validators = {}
+        self.route = lru_cache(maxsize=4096)(self._route)
+        self.checked = 0
+        self.failed = {}
+        self.undocumented = {}
+
+    @classmethod
+    def from_spec(cls, path=SPEC_PATH):
+        return cls(load_spec(path), Router.from_spec(path))
+
+    def _route(self, method, path):
+        return self.router.match(method, path)[0]
+
+    def validator(self, route, status):
+        """The ResponseValidator for a route's status, or None when the status is not documented."""
+        key = (route.operation_id, status)
+        if key not in self.validators:
+            responses = route.operation.get('responses', {})
+            keys = [str(status), f"{status // 100}XX", 'default']
+            if 200 <= status < 300:
+                # Fall back to the documented success status
+                keys += sorted(k for k in responses if k.startswith('2'))
+            response = next((responses[k] for k in keys if k in responses), None)
+            validator = None
+            if response is not None:
+                content = resolve_ref(self.spec, response).get('content', {})
+                schema = (content.get('application/json') or {}).get('schema')
+                if schema is not None:
+                    validator = ResponseValidator(route, status, self.compiler(schema))
+                else:
+                    # Documented, but with no JSON body to check
+                    validator = ResponseValidator(route, status, Node())
+            self.validators[key] = validator
+        return self.validators[key]
+
+    def check(self, method, url, status, body):
+        """
+        Violations of the documented response schema.
+
+        body is the parsed JSON (None for an empty body, NOT_JSON when it did
+        not parse). Undocumented routes and statuses count as unchecked.
+        """
+        route = self.route(method.upper(), urlsplit(url).path or '/')
+        if route is None:
+            return []
+        validator = self.validator(route, status)
+        if validator is None:
+            key = f"{route.method} {API_PREFIX}{route.template} {status}"
+            self.undocumented[key] = self.undocumented.get(key, 0) + 1
+            return []
+        self.checked += 1
+        violations = validator(body)
+        if violations:
+            self.failed[validator.key] = self.failed.get(validator.key, 0) + 1
+        return violations
+
+    def summary(self):
+        return {
+            'checked': self.checked,
+            'failed': dict(sorted(self.failed.items())),
+            'undocumented': dict(sorted(self.undocumented.items())),
+            'schemas_compiled': self.compiler.compiled,
+        }
+
+
+def print_validation(validators):
+    summary = validators.summary()
+    failed = sum(summary['failed'].values())
+    print(f"{'✅' if not failed else '❌'} {summary['checked']} response(s) schema-checked, {failed} failed")
+    for key, count in summary['failed'].items():
+        print(f"    {key}: {count}")
+    if summary['undocumented']:
+        print(f"⚠️  {sum(summary['undocumented'].values())} response(s) with an undocumented status: "
+              + ', '.join(f"{key} ×{count}" for key, count in summary['undocumented'].items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check a response body against its api.json schema.')
+    parser.add_argument('method')
+    parser.add_argument('path', help='Request path or URL, e.g. /api/v1/vouchers/ABCD')
+    parser.add_argument('status', type=int)
+    parser.add_argument('body', help='JSON file with the response body, or - for stdin')
+    parser.add_argument('--spec', type=Path, default=SPEC_PATH, help='OpenAPI document (default: api.json)')
+    args = parser.parse_args()
+
+    text = sys.stdin.read() if args.body == '-' else Path(args.body).read_text(encoding='utf-8')
+    try:
+        body = json.loads(text) if text.strip() else None
+    except ValueError:
+        body = NOT_JSON
+
+    validators = ResponseValidators.from_spec(args.spec)
+    route = validators.route(args.method.upper(), urlsplit(args.path).path)
+    if route is None:
+        print(f"❌ {args.method.upper()} {args.path} is not a documented operation")
+        sys.exit(2)
+    if validators.validator(route, args.status) is None:
+        print(f"⚠️  {route.operation_id} does not document status {args.status}")
+        sys.exit(2)
+    violations = validators.check(args.method, args.path, args.status, body)
+    for violation in violations:
+        print(f"   ❌ {violation}")
+    if violations:
+        sys.exit(1)
+    print(f"✅ Matches {route.operation_id} {args.status}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Generate billing test scenarios from the FEES price list.
+
+Every priced instruction (inputs.fields.*, feedback.*, cash.validation.*,
+validation.*, rider.*) is a factor that is either on or off. Scenarios are
+streamed lazily, either exhaustively (2^23 for the current list, so always
+slice them) or as a t-wise covering array: a small set of rows in which every
+combination of values of any t factors appears at least once.
+
+    pairwise = list(covering_array(instruction_factors(), strength=2))
+    for scenario in islice(exhaustive(instruction_factors()), 50): ...
+
+Each scenario maps to a Generate Voucher body, priced by fee_oracle, and is
+built into a folder by create_scenario_folder().
+
+Usage:
+    python3 scripts/scenario_matrix.py --strength 3 -o /tmp/matrix.postman_collection.json
+"""
+
+import argparse
+import itertools
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from generate_postman_folders import FEES, create_scenario_folder, load_collection
+from fee_oracle import charged_indexes, instruction_fee, pricelist
+from collection_stream import CollectionWriter
+from folder_cache import (
+    CACHE_PATH,
+    FolderCache,
+    FolderSpec,
+    baseline_digest,
+    source_digest,
+    spec_key,
+)
+
+COLLECTION_PATH = Path(__file__).parent.parent / 'docs' / 'api' / 'postman' / 'redeem-x-e2e-generation-billing.postman_collection.json'
+
+# Request body fragment per priced instruction
+INSTRUCTION_BODIES = {
+    'feedback.email': {'feedback_email': 'test@example.com'},
+    'feedback.mobile': {'feedback_mobile': '+639171234567'},
+    'feedback.webhook': {'feedback_webhook': 'https://webhook.site/test'},
+    'cash.validation.secret': {'validation_secret': 'TEST1234'},
+    'cash.validation.mobile': {'validation_mobile': '+639171234567'},
+    'cash.validation.payable': {'validation_payable': 'TESTSHOP'},
+    'validation.location': {'validation_location': {
+        'required': True,
+        'target_lat': 14.5995,
+        'target_lng': 120.9842,
+        'radius_meters': 500,
+        'on_failure': 'block',
+    }},
+    'validation.time': {'validation_time': {
+        'window': {'start_time': '09:00', 'end_time': '17:00', 'timezone': 'Asia/Manila'},
+        'limit_minutes': 30,
+    }},
+    'rider.message': {'rider_message': 'Thank you for redeeming!'},
+    'rider.url': {'rider_url': 'https://example.com/promo'},
+    'rider.splash': {'rider_splash': 'data:image/png;base64,iVBORw0KGgo='},
+}
+
+FACTOR_PREFIXES = ('inputs.fields.', 'feedback.', 'cash.validation.', 'validation.', 'rider.')
+
+
+class Factor:
+    """A scenario dimension and the values it can take."""
+
+    def __init__(self, name, levels=(False, True)):
+        if len(levels) < 2:
+            raise ValueError(f"Factor '{name}' needs at least two levels")
+        self.name = name
+        self.levels = tuple(levels)
+
+    def __repr__(self):
+        return f"Factor({self.name!r}, {self.levels!r})"
+
+
+def instruction_factors(fees=FEES, prefixes=FACTOR_PREFIXES):
+    """One on/off factor per priced instruction, in FEES order."""
+    return [Factor(key) for key in fees if key.startswith(prefixes)]
+
+
+def exhaustive(factors):
+    """Lazily yield every combination of factor values as {name: value}."""
+    names = [f.name for f in factors]
+    for values in itertools.product(*(f.levels for f in factors)):
+        yield dict(zip(names, values))
+
+
+def covering_array(factors, strength=2, seed=0):
+    """
+    Lazily yield rows of a t-wise covering array (greedy, AETG-style).
+
+    Each row starts from a still-uncovered t-tuple; the remaining factors are
+    then fixed one by one (in a seeded random order) to the value covering the
+    most uncovered tuples together with the factors already fixed. Rows are
+    yielded as soon as they are built, so callers can stop early.
+    """
+    n = len(factors)
+    if not 1 <= strength <= n:
+        raise ValueError(f"strength must be between 1 and {n}, got {strength}")
+    rng = random.Random(seed)
+    levels = [len(f.levels) for f in factors]
+
+    # A t-tuple is ((factor, level), ...) ordered by factor index
+    uncovered = set()
+    for combo in itertools.combinations(range(n), strength):
+        for values in itertools.product(*(range(levels[i]) for i in combo)):
+            uncovered.add(tuple(zip(combo, values)))
+
+    while uncovered:
+        row = dict(min(uncovered))
+        rest = [i for i in range(n) if i not in row]
+        rng.shuffle(rest)
+        for f in rest:
+            fixed = sorted(row)
+            best, best_gain = [], -1
+            for v in range(levels[f]):
+                gain = 0
+                for others in itertools.combinations(fixed, strength - 1):
+                    t = tuple(sorted([(o, row[o]) for o in others] + [(f, v)]))
+                    if t in uncovered:
+                        gain += 1
+                if gain > best_gain:
+                    best, best_gain = [v], gain
+                elif gain == best_gain:
+                    best.append(v)
+            row[f] = rng.choice(best)
+
+        for combo in itertools.combinations(range(n), strength):
+            uncovered.discard(tuple((i, row[i]) for i in combo))
+        yield {factors[i].name: factors[i].levels[row[i]] for i in range(n)}
+
+
+def selected(scenario):
+    """Instruction keys switched on in a scenario."""
+    return [name for name, value in scenario.items() if value is True]
+
+
+def scenario_body(scenario, amount=100, count=1):
+    """Generate Voucher request body for a scenario."""
+    body = {'amount': amount, 'count': count}
+    fields = [k[len('inputs.fields.'):] for k in selected(scenario) if k.startswith('inputs.fields.')]
+    if fields:
+        body['input_fields'] = fields
+    for key in selected(scenario):
+        body.update(INSTRUCTION_BODIES.get(key, {}))
+    return body
+
+
+def scenario_fee(scenario):
+    """Expected instruction fee per voucher."""
+    return instruction_fee(scenario_body(scenario))
+
+
+def scenario_label(scenario):
+    keys = [k.replace('inputs.fields.', '') for k in selected(scenario)]
+    return ' + '.join(keys) if keys else 'no instructions'
+
+
+def scenario_specs(scenarios, number=20, start=1):
+    """Turn scenarios into FolderSpecs for create_scenario_folder()."""
+    for i, scenario in enumerate(scenarios, start):
+        title = f"{number:02d} - Matrix #{i:03d} - {scenario_label(scenario)}"
+        body = scenario_body(scenario)
+        yield FolderSpec(create_scenario_folder, (title, body), charged_indexes(body))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate covering-array billing scenarios.')
+    parser.add_argument('collection', nargs='?', type=Path, default=COLLECTION_PATH,
+                        help='Collection whose first folder is the baseline')
+    parser.add_argument('-o', '--output', type=Path, required=True)
+    parser.add_argument('--strength', type=int, default=2, help='Interaction strength t (default: 2)')
+    parser.add_argument('--exhaustive', action='store_true', help='Enumerate all combinations instead')
+    parser.add_argument('--limit', type=int, help='Stop after this many scenarios')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-cache', action='store_true')
+    args = parser.parse_args()
+
+    collection = load_collection(args.collection)
+    baseline = collection['item'][0]
+    factors = instruction_factors()
+
+    if args.exhaustive:
+        scenarios = exhaustive(factors)
+    else:
+        scenarios = covering_array(factors, strength=args.strength, seed=args.seed)
+    scenarios = (s for s in scenarios if selected(s))  # the empty row is the baseline itself
+    if args.limit:
+        scenarios = itertools.islice(scenarios, args.limit)
+
+    # The cache keeps every fragment in memory, so exhaustive runs go without it
+    cache = None if args.no_cache or args.exhaustive else FolderCache(CACHE_PATH)
+    baseline_hash = baseline_digest(baseline)
+    builder_hash = source_digest(Path(__file__).parent / 'generate_postman_folders.py',
+                                 Path(__file__).parent / 'fee_oracle.py')
+    # Keyed on every charged item, cash.amount included, not just the factors
+    prices = {index: item.price for index, item in pricelist().items()}
+
+    # Folders are written as they are generated, so exhaustive runs stay flat in memory
+    head = {k: v for k, v in collection.items() if k != 'item'}
+    with CollectionWriter(args.output, head) as writer:
+        writer.write(baseline)
+        for spec in scenario_specs(scenarios):
+            if cache is None:
+                writer.write(spec.build(baseline))
+            else:
+                key = spec_key(spec, baseline_hash, prices, builder_hash)
+                writer.write_fragment(cache.fragment(key, lambda: spec.build(baseline)))
+
+    if cache is not None:
+        cache.save()
+    mode = 'exhaustive' if args.exhaustive else f'{args.strength}-wise'
+    print(f"✅ {writer.count - 1} {mode} scenarios over {len(factors)} instructions → {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Pack the collection's repeated test-script code into a shared library.
+
+Most of every folder's scripts is the same baseline code; only a few tests
+differ per folder (expected fee, fields, rail, strategy). pack splits each
+script into pm.test blocks (script_model), finds the blocks that occur in
+more than one script, and stores each run of consecutive shared blocks once,
+as a collection variable named lib_<hash>. Each script then becomes a single
+eval over its library references and the few folder-specific blocks:
+
+    const __lib = (...keys) => keys.map(k => pm.collectionVariables.get('lib_' + k)).join('\\n');
+    eval([
+        __lib('3f9a0c2b', '0d5e7a11'),
+        "pm.test(\\"Input fields: email\\", function () {\\n...",
+        __lib('77c1d0e5'),
+    ].join('\\n'));
+
+Everything runs in one eval, so const declarations shared between blocks
+keep working. unpack restores the original exec lines exactly.
+
+The trade-off is eval: the code that runs is whatever the lib_* collection
+variables hold, so editing a variable in Postman changes every test that
+uses it, assertion line numbers point into the eval, and nothing reading
+the file (collection_runner.py, grep, a diff) sees the tests. The
+committed collection therefore stays unpacked. rebuild_billing_collection.py
+--pack writes a packed copy for importing or sharing, and the runners and
+the rebuild unpack a packed collection when they load one (load_unpacked).
+
+Usage:
+    python3 scripts/script_library.py pack -o /tmp/packed.postman_collection.json
+    python3 scripts/rebuild_billing_collection.py --pack /tmp/packed.postman_collection.json
+    python3 scripts/script_library.py unpack /tmp/packed.postman_collection.json -o /tmp/unpacked.json
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+from collections import Counter, defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from collection_passes import COLLECTION_PATH, load_collection, save_collection
+from script_model import parse_blocks
+
+LIBRARY_PREFIX = 'lib_'
+HEADER = '// Shared blocks live in collection variables lib_* (scripts/script_library.py)'
+LOADER = "const __lib = (...keys) => keys.map(k => pm.collectionVariables.get('lib_' + k)).join('\\n');"
+
+_LIB_REF = re.compile(r"^    __lib\(((?:'[0-9a-f]+'(?:, )?)+)\),$")
+_INLINE = re.compile(r'^    (".*"),$')
+
+
+def _scripts(collection):
+    """Every event script (dict with 'exec') in the collection."""
+    stack = list(collection.get('item', []))
+    while stack:
+        item = stack.pop()
+        stack.extend(item.get('item', []))
+        for event in item.get('event', []):
+            script = event.get('script', {})
+            if isinstance(script.get('exec'), list):
+                yield script
+    for event in collection.get('event', []):
+        yield event.get('script', {})
+
+
+def _library_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:8]
+
+
+def _is_packed(lines):
+    return bool(lines) and lines[0] == HEADER
+
+
+def _units(lines):
+    """Script blocks, with blank separator lines folded into the block before them."""
+    units = []
+    for block in parse_blocks(lines):
+        if units and not block.is_test and not any(line.strip() for line in block.lines):
+            units[-1].lines.extend(block.lines)
+        else:
+            units.append(block)
+    return units
+
+
+def _chunks(blocks, owners):
+    """
+    Group consecutive blocks found in exactly the same set of scripts.
+
+    Yields (shared, text). Blocks with the same owners always travel together,
+    so a run of them is one library entry used by all of those scripts.
+    """
+    run, run_owners = [], None
+    for block in blocks:
+        block_owners = owners['\n'.join(block.lines)]
+        if run and block_owners != run_owners:
+            yield len(run_owners) > 1, '\n'.join(run)
+            run = []
+        run.extend(block.lines)
+        run_owners = block_owners
+    if run:
+        yield len(run_owners) > 1, '\n'.join(run)
+
+
+def pack(collection):
+    """Move shared script code into lib_* collection variables; return the number of scripts packed."""
+    scripts = [s for s in _scripts(collection) if s['exec'] and not _is_packed(s['exec'])]
+    parsed = [_units(s['exec']) for s in scripts]
+
+    # Which scripts each distinct block appears in
+    owners = defaultdict(set)
+    for n, blocks in enumerate(parsed):
+        for block in blocks:
+            owners['\n'.join(block.lines)].add(n)
+    owners = {text: frozenset(ids) for text, ids in owners.items()}
+
+    chunked = [list(_chunks(blocks, owners)) for blocks in parsed]
+    chunk_counts = Counter()
+    for chunks in chunked:
+        chunk_counts.update({text for is_shared, text in chunks if is_shared})
+
+    library = {}
+    packed = 0
+    for script, chunks in zip(scripts, chunked):
+        if not any(is_shared and chunk_counts[text] > 1 for is_shared, text in chunks):
+            continue
+        elements, refs = [], []
+        for is_shared, text in chunks:
+            if is_shared and chunk_counts[text] > 1:
+                digest = _library_hash(text)
+                if library.setdefault(LIBRARY_PREFIX + digest, text) != text:
+                    raise ValueError(f"Library hash collision on {digest}")
+                refs.append(f"'{digest}'")
+                continue
+            if refs:
+                elements.append(f"    __lib({', '.join(refs)}),")
+                refs = []
+            elements.append(f"    {json.dumps(text, ensure_ascii=False)},")
+        if refs:
+            elements.append(f"    __lib({', '.join(refs)}),")
+        script['exec'] = [HEADER, LOADER, 'eval(['] + elements + ["].join('\\n'));"]
+        packed += 1
+
+    variables = [v for v in collection.get('variable', []) if not v.get('key', '').startswith(LIBRARY_PREFIX)]
+    existing = {v['key']: v['value'] for v in collection.get('variable', []) if v.get('key', '').startswith(LIBRARY_PREFIX)}
+    existing.update(library)
+    variables.extend({'key': key, 'value': text, 'type': 'string'} for key, text in sorted(existing.items()))
+    collection['variable'] = variables
+    return packed
+
+
+def unpack(collection):
+    """Inline lib_* references back into plain exec lines; return the number of scripts restored."""
+    library = {v['key']: v['value'] for v in collection.get('variable', [])
+               if v.get('key', '').startswith(LIBRARY_PREFIX)}
+    restored = 0
+    for script in _scripts(collection):
+        lines = script['exec']
+        if not _is_packed(lines):
+            continue
+        parts = []
+        for line in lines[3:-1]:
+            ref = _LIB_REF.match(line)
+            if ref:
+                parts.extend(library[LIBRARY_PREFIX + digest.strip("'")] for digest in ref.group(1).split(', '))
+                continue
+            inline = _INLINE.match(line)
+            if not inline:
+                raise ValueError(f"Unrecognised line in packed script: {line}")
+            parts.append(json.loads(inline.group(1)))
+        script['exec'] = '\n'.join(parts).split('\n')
+        restored += 1
+
+    collection['variable'] = [v for v in collection.get('variable', [])
+                              if not v.get('key', '').startswith(LIBRARY_PREFIX)]
+    return restored
+
+
+def load_unpacked(filepath=COLLECTION_PATH):
+    """Load a collection, inlining its lib_* blocks first if it was packed."""
+    collection = load_collection(filepath)
+    unpack(collection)
+    return collection
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pack or unpack shared test-script code.')
+    parser.add_argument('command', choices=['pack', 'unpack'])
+    parser.add_argument('collection', nargs='?', type=Path, default=COLLECTION_PATH)
+    parser.add_argument('-o', '--output', type=Path, required=True)
+    args = parser.parse_args()
+
+    before = args.collection.stat().st_size
+    collection = load_collection(args.collection)
+    if args.command == 'pack':
+        count = pack(collection)
+        libraries = sum(1 for v in collection['variable'] if v['key'].startswith(LIBRARY_PREFIX))
+        print(f"📦 Packed {count} scripts into {libraries} shared blocks")
+    else:
+        count = unpack(collection)
+        print(f"📂 Restored {count} scripts")
+
+    save_collection(collection, args.output)
+    after = args.output.stat().st_size
+    print(f"💾 {args.output}: {before / 1024:.0f} KB → {after / 1024:.0f} KB")
+
+
+if __name__ == '__main__':
+    main()
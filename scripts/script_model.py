@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Parsed model of a Postman script's exec lines.
+
+A script is split into blocks: each top-level pm.test(...) call is a named
+test block, and the lines between tests are unnamed statement blocks. Blocks
+are kept in a linked list with a name → block index, so fixers can look up,
+replace, insert or remove a test without rescanning the lines or counting
+offsets:
+
+    script = TestScript.parse(event['script']['exec'])
+    script.replace('Settlement rail default', new_test_lines)
+    event['script']['exec'] = script.to_exec()
+
+A test block runs from its pm.test( line to the first '});' at the same
+indentation, so callbacks nested inside the test ('    });') do not end it.
+"""
+
+import re
+
+_TEST_OPEN = re.compile(r'^(\s*)pm\.test\(\s*([\'"`])(.*?)\2')
+
+
+class Block:
+    """A run of exec lines: a pm.test call (name set) or plain statements."""
+
+    def __init__(self, lines, name=None):
+        self.lines = list(lines)
+        self.name = name
+        self.prev = None
+        self.next = None
+
+    @property
+    def is_test(self):
+        return self.name is not None
+
+    def __repr__(self):
+        kind = f"test {self.name!r}" if self.is_test else 'statements'
+        return f"Block({kind}, {len(self.lines)} lines)"
+
+
+def parse_blocks(lines):
+    """Split exec lines into a list of Blocks."""
+    blocks = []
+    pending = []
+    i = 0
+    while i < len(lines):
+        match = _TEST_OPEN.match(lines[i])
+        if not match:
+            pending.append(lines[i])
+            i += 1
+            continue
+
+        if pending:
+            blocks.append(Block(pending))
+            pending = []
+
+        opener = lines[i]
+        end = i
+        if opener.count('{') > opener.count('}'):
+            closing = match.group(1) + '});'
+            end = i + 1
+            while end < len(lines) and lines[end].rstrip() != closing:
+                end += 1
+            if end == len(lines):
+                raise ValueError(f"Unterminated pm.test block: {opener.strip()}")
+        blocks.append(Block(lines[i:end + 1], name=match.group(3)))
+        i = end + 1
+
+    if pending:
+        blocks.append(Block(pending))
+    return blocks
+
+
+class TestScript:
+    """Linked list of Blocks with an index of test blocks by name."""
+
+    def __init__(self, blocks=()):
+        self.head = None
+        self.tail = None
+        self._index = {}
+        for block in blocks:
+            self._link(block, after=self.tail)
+
+    @classmethod
+    def parse(cls, lines):
+        return cls(parse_blocks(lines))
+
+    def __iter__(self):
+        block = self.head
+        while block is not None:
+            yield block
+            block = block.next
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def tests(self):
+        """Names of the test blocks, in script order."""
+        return [block.name for block in self if block.is_test]
+
+    def get(self, name):
+        """The first test block called `name`, or None."""
+        blocks = self._index.get(name)
+        return blocks[0] if blocks else None
+
+    def find(self, prefix):
+        """The first test block whose name starts with `prefix`, or None."""
+        for block in self:
+            if block.is_test and block.name.startswith(prefix):
+                return block
+        return None
+
+    def replace(self, target, lines):
+        """Replace a block (or the test called `target`) with new lines."""
+        block = self._resolve(target)
+        anchor = block.prev
+        self._unlink(block)
+        return self._insert(lines, after=anchor)
+
+    def insert_before(self, target, lines):
+        block = self._resolve(target)
+        return self._insert(lines, after=block.prev)
+
+    def insert_after(self, target, lines):
+        return self._insert(lines, after=self._resolve(target))
+
+    def append(self, lines):
+        return self._insert(lines, after=self.tail)
+
+    def remove(self, target):
+        self._unlink(self._resolve(target))
+
+    def to_exec(self):
+        """Flatten back into a Postman exec array."""
+        lines = []
+        for block in self:
+            lines.extend(block.lines)
+        return lines
+
+    def _resolve(self, target):
+        if isinstance(target, Block):
+            return target
+        block = self.get(target)
+        if block is None:
+            raise KeyError(f"No pm.test named '{target}'")
+        return block
+
+    def _insert(self, lines, after):
+        """Parse lines and splice the blocks in after `after`; return the first new test block."""
+        first_test = None
+        for block in parse_blocks(lines):
+            self._link(block, after=after)
+            after = block
+            if first_test is None and block.is_test:
+                first_test = block
+        return first_test
+
+    def _link(self, block, after):
+        block.prev = after
+        block.next = after.next if after is not None else self.head
+        if block.next is not None:
+            block.next.prev = block
+        else:
+            self.tail = block
+        if after is not None:
+            after.next = block
+        else:
+            self.head = block
+        if block.is_test:
+            blocks = self._index.setdefault(block.name, [])
+            blocks.append(block)
+            if len(blocks) > 1:
+                # Keep duplicates in script order so get() returns the first
+                order = {id(b): n for n, b in enumerate(self)}
+                blocks.sort(key=lambda b: order[id(b)])
+
+    def _unlink(self, block):
+        if block.prev is not None:
+            block.prev.next = block.next
+        else:
+            self.head = block.next
+        if block.next is not None:
+            block.next.prev = block.prev
+        else:
+            self.tail = block.prev
+        block.prev = block.next = None
+        if block.is_test:
+            blocks = self._index[block.name]
+            blocks.remove(block)
+            if not blocks:
+                del self._index[block.name]
+
+
+def event_script(request, listen='test'):
+    """The first event of request listening to `listen`, or None."""
+    for event in request.get('event', []):
+        if event.get('listen') == listen:
+            return event
+    return None
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Settlement voucher round trip (test-settlement-voucher-flow.sh) that waits on
+completion signals instead of fixed sleeps.
+
+The shell flow sleeps SMS_SEND_GRACE_SEC (10s) before each confirmation and
+polls in 0.5s steps for queued notifications, so one round trip costs 20+
+seconds of mostly idle time. Here every step waits for its own signal, read
+through one state:probe worker (state_probe.py). Polls start at 50ms and back
+off by 1.5× up to 1s, so a step takes about as long as the work behind it:
+
+    disburse   POST /api/v1/redeem/wallet, then redeemed_at and the cash withdrawal
+               (with --token, also a final status from /transactions/{code}/refresh-status)
+    classify   POST /api/confirm-deposit, then the payment request's unconfirmed transfer
+    sms        the PaymentConfirmation notification SendPaymentConfirmationSms stores
+               once the job has run (the queue worker, or --drain)
+    confirm    GET the signed /pay/confirm link, then the transfer confirmed and the
+               request off 'pending'
+
+The repayment is split into --payments distinct whole-peso amounts. Deposits
+are classified by amount, so no two requests pending at once may share one.
+All of them are created by one webhook:seed-payment-requests call.
+
+Usage:
+    python3 scripts/settlement_flow.py SETTLE-AB12 --base-url http://redeem-x.test
+    python3 scripts/settlement_flow.py SETTLE-AB12 --base-url http://redeem-x.test --mobile 09171234567 --drain
+    python3 scripts/settlement_flow.py SETTLE-AB12 --base-url http://redeem-x.test --payments 4 --report /tmp/flow.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import shlex
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from api_stub import CONFIRM_DEPOSIT_PATH
+from http_pool import ConnectionPool, HttpError
+from state_probe import REPO_ROOT, ProbeError, StateProbe
+from webhook_replay import SENDER_INSTITUTION, deposit_payload
+
+DEFAULT_BORROWER = '09467438575'  # test-settlement-voucher-flow.sh default GCash number
+REFRESH_INTERVAL = 12.0  # refresh-status is throttled to 5 requests per minute
+
+
+class FlowError(Exception):
+    """A step failed or its completion signal never came."""
+
+
+def split_repayment(total, parts):
+    """`parts` distinct whole-peso amounts that add up to total."""
+    if total != int(total):
+        raise ValueError(f"₱{total} is not a whole-peso amount; deposits are whole pesos")
+    total = int(total)
+    first = (total - parts * (parts - 1) // 2) // parts
+    if first < 1:
+        raise ValueError(f"₱{total} cannot be split into {parts} distinct amounts")
+    amounts = [first + i for i in range(parts)]
+    amounts[-1] += total - sum(amounts)
+    return amounts
+
+
+async def wait_for(check, timeout, initial=0.05, factor=1.5, ceiling=1.0):
+    """
+    (value, seconds, polls): call check() until it returns something truthy,
+    sleeping initial, initial × factor, ... (at most ceiling) in between.
+    """
+    start = time.perf_counter()
+    delay, polls = initial, 0
+    while True:
+        polls += 1
+        value = check()
+        if asyncio.iscoroutine(value):
+            value = await value
+        elapsed = time.perf_counter() - start
+        if value:
+            return value, elapsed, polls
+        if elapsed >= timeout:
+            raise FlowError(f"still waiting after {timeout:g}s ({polls} polls)")
+        await asyncio.sleep(min(delay, timeout - elapsed))
+        delay = min(delay * factor, ceiling)
+
+
+def _json(response):
+    try:
+        return response.json() or {}
+    except ValueError:
+        return {}
+
+
+class SettlementFlow:
+    """Disburse a settlement voucher, then repay it in full through simulated deposits."""
+
+    def __init__(self, probe, base_url, code, borrower=DEFAULT_BORROWER, payments=2, artisan=('php', 'artisan'),
+                 token=None, drain=False, timeout=60.0, sms_timeout=30.0):
+        self.probe = probe
+        self.pool = ConnectionPool(limit=2)
+        self.base_url = base_url.rstrip('/')
+        self.code = code.upper()
+        self.borrower = borrower
+        self.payments = payments
+        self.artisan = list(artisan)
+        self.token = token
+        self.drain = drain
+        self.timeout = timeout
+        self.sms_timeout = sms_timeout
+        self.random = random.Random()
+        self.steps = []
+
+    def record(self, name, seconds, polls=0, **extra):
+        self.steps.append(dict({'step': name, 'seconds': round(seconds, 3), 'polls': polls}, **extra))
+        print(f"  ✓ {name:28} {seconds * 1000:9.1f}ms" + (f"  ({polls} polls)" if polls else ''))
+
+    async def request(self, method, url, body=None, headers=None):
+        send = {'Accept': 'application/json', **(headers or {})}
+        if body is not None:
+            send['Content-Type'] = 'application/json'
+        try:
+            return await self.pool.request(method, url, send, json.dumps(body) if body is not None else b'',
+                                           timeout=self.timeout)
+        except (HttpError, OSError, asyncio.TimeoutError) as e:
+            raise FlowError(f"{method} {url}: {e or type(e).__name__}") from e
+
+    async def artisan_call(self, *args):
+        process = await asyncio.create_subprocess_exec(*self.artisan, *args, cwd=REPO_ROOT,
+                                                       stdout=asyncio.subprocess.PIPE,
+                                                       stderr=asyncio.subprocess.STDOUT)
+        output, _ = await process.communicate()
+        if process.returncode != 0:
+            raise FlowError(f"{' '.join(args[:1])} failed: {output.decode('utf-8', 'replace').strip()[-300:]}")
+        return output
+
+    async def disburse(self):
+        start = time.perf_counter()
+        response = await self.request('POST', f"{self.base_url}/api/v1/redeem/wallet", {
+            'code': self.code, 'mobile': self.borrower,
+            'bank_code': SENDER_INSTITUTION, 'account_number': self.borrower,
+        })
+        if response.status != 200:
+            raise FlowError(f"redeem/wallet: {response.status} {_json(response).get('message')}")
+        self.record('redeem', time.perf_counter() - start)
+
+        def redeemed():
+            state = self.probe.voucher(self.code)
+            return state if state.get('redeemed_at') and state.get('redeemed_total', 0) > 0 else None
+        state, seconds, polls = await wait_for(redeemed, self.timeout)
+        self.record('disbursement withdrawn', seconds, polls)
+        print(f"    Redeemed ₱{state['redeemed_total']:,.2f} to GCash {self.borrower}; "
+              f"voucher cash ₱{state['voucher_cash']:,.2f}")
+
+        if self.token:
+            await self.disbursement_status()
+
+    async def disbursement_status(self):
+        url = f"{self.base_url}/api/v1/transactions/{self.code}/refresh-status"
+        headers = {'Authorization': f"Bearer {self.token}"}
+
+        async def settled():
+            response = await self.request('POST', url, {}, headers)
+            data = _json(response)
+            if response.status == 400:
+                return {'new_status': None, 'message': data.get('message')}
+            if response.status != 200:
+                raise FlowError(f"refresh-status: {response.status} {data.get('message')}")
+            status = (data.get('data') or {}).get('new_status')
+            return data['data'] if str(status or '').lower() not in ('', 'pending', 'processing') else None
+
+        result, seconds, polls = await wait_for(settled, self.timeout, initial=REFRESH_INTERVAL,
+                                                factor=1.0, ceiling=REFRESH_INTERVAL)
+        self.record('disbursement status', seconds, polls, status=result.get('new_status'))
+        print(f"    Gateway status: {result.get('new_status') or result.get('message')}")
+
+    async def seed(self, amounts):
+        with tempfile.NamedTemporaryFile(suffix='.json') as f:
+            start = time.perf_counter()
+            await self.artisan_call('webhook:seed-payment-requests', self.code,
+                                    f"--amounts={','.join(map(str, amounts))}", f"--output={f.name}")
+            self.record('payment requests', time.perf_counter() - start)
+            return json.load(open(f.name, encoding='utf-8'))['payment_requests']
+
+    async def repay(self, n, request, owner_mobile):
+        print(f"\n💸 Payment {n}/{self.payments}: ₱{request['amount']:,} ({request['reference_id']})")
+        drain = None
+        start = time.perf_counter()
+        response = await self.request('POST', self.base_url + CONFIRM_DEPOSIT_PATH,
+                                      deposit_payload(owner_mobile, request['amount'], self.random, self.borrower,
+                                                      sender_name='BORROWER'))
+        if response.status != 204:
+            raise FlowError(f"confirm-deposit: {response.status} {response.body[:200]!r}")
+        if self.drain:
+            drain = asyncio.ensure_future(self.artisan_call('queue:work', '--stop-when-empty'))
+
+        def classified():
+            state = self.probe.payment_request(request['id'])
+            return state if state.get('transaction') else None
+        state, seconds, polls = await wait_for(classified, self.timeout)
+        self.record('deposit classified', time.perf_counter() - start, polls)
+
+        def sms_stored():
+            notification = self.probe.notification(request['id'], 'PaymentConfirmation')
+            return notification if notification.get('found') else None
+        try:
+            _, seconds, polls = await wait_for(sms_stored, self.sms_timeout)
+            self.record('confirmation sms', seconds, polls)
+        except FlowError as e:
+            print(f"  ⚠️  No confirmation SMS stored ({e}); confirming anyway")
+
+        start = time.perf_counter()
+        response = await self.request('GET', state['confirm_url'])
+        if response.status >= 400:
+            raise FlowError(f"pay/confirm: {response.status}")
+
+        def confirmed():
+            current = self.probe.payment_request(request['id'])
+            transaction = current.get('transaction') or {}
+            return current if current.get('status') != 'pending' and transaction.get('confirmed') else None
+        current, _, polls = await wait_for(confirmed, self.timeout)
+        self.record('payment confirmed', time.perf_counter() - start, polls, status=current['status'])
+        if drain is not None:
+            await drain
+
+        snapshot = self.probe.snapshot(self.code)
+        print(f"    Voucher cash ₱{snapshot['voucher_cash']:,.2f}, paid ₱{snapshot['paid_total']:,.2f}, "
+              f"remaining ₱{snapshot['remaining']:,.2f}")
+
+    async def run(self):
+        """The final snapshot."""
+        try:
+            start = time.perf_counter()
+            state = self.probe.snapshot(self.code)
+            self.record('initial state', time.perf_counter() - start)
+            if state.get('type') != 'settlement':
+                raise FlowError(f"{self.code} is not a settlement voucher (found: {state.get('type')})")
+            if not state.get('owner_mobile'):
+                raise FlowError(f"The owner of {self.code} has no mobile to receive deposits")
+            print(f"\n🎫 {self.code} (owner {state['owner_email']}): target ₱{state['target_amount']:,.2f}, "
+                  f"paid ₱{state['paid_total']:,.2f}, remaining ₱{state['remaining']:,.2f}")
+            print(f"   System ₱{state['system_wallet']:,.2f}, owner ₱{state['owner_wallet']:,.2f}, "
+                  f"voucher cash ₱{state['voucher_cash']:,.2f}")
+
+            print('\n🏦 Phase 1: disbursement')
+            if state.get('redeemed_at'):
+                print(f"  ⏭️  Already disbursed at {state['redeemed_at']}")
+            else:
+                await self.disburse()
+
+            remaining = state['remaining']
+            if remaining <= 0:
+                print('\n⏭️  Nothing left to repay')
+                return self.probe.snapshot(self.code)
+
+            print(f"\n🔁 Phase 2: repayment of ₱{remaining:,.2f} in {self.payments} payment(s)")
+            try:
+                amounts = split_repayment(remaining, self.payments)
+            except ValueError as e:
+                raise FlowError(str(e)) from e
+            requests = await self.seed(amounts)
+            for n, request in enumerate(requests, start=1):
+                await self.repay(n, request, state['owner_mobile'])
+            return self.probe.snapshot(self.code)
+        finally:
+            await self.pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Settlement voucher round trip, waiting on completion signals.')
+    parser.add_argument('code', help='A SETTLEMENT voucher code')
+    parser.add_argument('--base-url', required=True, help='e.g. http://redeem-x.test')
+    parser.add_argument('--mobile', default=DEFAULT_BORROWER, help=f'Borrower GCash mobile (default: {DEFAULT_BORROWER})')
+    parser.add_argument('--payments', type=int, default=2, help='Repayments the remaining balance is split into')
+    parser.add_argument('--token', help="Owner's bearer token: also wait for a final disbursement status")
+    parser.add_argument('--drain', action='store_true',
+                        help='Run queue:work --stop-when-empty after each deposit (no worker running)')
+    parser.add_argument('--artisan', default='php artisan', help='How to run artisan (default: php artisan)')
+    parser.add_argument('--timeout', type=float, default=60.0, help='Seconds to wait for each completion signal')
+    parser.add_argument('--sms-timeout', type=float, default=30.0,
+                        help='Seconds to wait for the confirmation SMS before confirming anyway')
+    parser.add_argument('--report', type=Path, help='Write the step timings as JSON')
+    args = parser.parse_args()
+
+    if args.payments < 1:
+        parser.error('--payments must be at least 1')
+
+    artisan = shlex.split(args.artisan)
+    started = time.perf_counter()
+    try:
+        with StateProbe(artisan + ['state:probe'], timeout=args.timeout) as probe:
+            print(f"🔌 state:probe ready in {probe.boot_seconds:.2f}s")
+            flow = SettlementFlow(probe, args.base_url, args.code, args.mobile, args.payments, artisan,
+                                  args.token, args.drain, args.timeout, args.sms_timeout)
+            final = asyncio.run(flow.run())
+    except (FlowError, ProbeError) as e:
+        print(f"\n❌ {e}")
+        sys.exit(1)
+    seconds = time.perf_counter() - started
+
+    print(f"\n🏁 Voucher cash ₱{final['voucher_cash']:,.2f}, paid ₱{final['paid_total']:,.2f}, "
+          f"redeemed ₱{final['redeemed_total']:,.2f}, remaining ₱{final['remaining']:,.2f}")
+    waited = sum(step['seconds'] for step in flow.steps)
+    print(f"⏱️  {seconds:.2f}s total, {waited:.2f}s in {len(flow.steps)} steps")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'code': flow.code, 'seconds': round(seconds, 3), 'steps': flow.steps, 'final': final},
+                      f, indent=2, ensure_ascii=False)
+        print(f"💾 {args.report}")
+
+    if final['remaining'] == 0:
+        print('✅ Loan fully repaid, settlement complete')
+    else:
+        print(f"⚠️  Partial repayment: ₱{final['remaining']:,.2f} still remaining")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Split the generation-billing collection into N shards that can run side by side.
+
+Folders are assigned with longest-processing-time-first balancing: heaviest
+folder first, each to the currently lightest shard. The weight of a folder is
+its request count, or its recorded runtime when a timings file is given:
+
+    - a Newman JSON report (newman run ... --reporters json), or
+    - a plain {"folder name": seconds} map
+
+Every shard gets its own variable namespace: balance_before, voucher_code,
+etc. become s2_balance_before, s2_voucher_code in collection variables,
+environment reads/writes and {{templates}}, so shards sharing a Postman
+workspace or environment file never overwrite each other's snapshots.
+base_url and access_token stay shared. With --tenants, each shard also gets
+its own access_token (s2_access_token, set in the shard's collection
+variables), so every shard spends from a separate wallet.
+
+Usage:
+    python3 scripts/shard_collection.py -n 4 -o /tmp/shards
+    python3 scripts/shard_collection.py -n 4 --timings newman-report.json -o /tmp/shards
+    python3 scripts/shard_collection.py -n 4 --plan
+    python3 scripts/shard_collection.py -n 4 --tenants storage/app/billing-tenants.json -o /tmp/shards
+"""
+
+import argparse
+import copy
+import heapq
+import json
+import re
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from collection_passes import COLLECTION_PATH, load_collection, save_collection
+from tenants import load_tenants
+
+# Variables every shard reads from the same environment
+SHARED_VARIABLES = frozenset({'base_url', 'access_token'})
+
+_SCRIPT_VARIABLE = re.compile(
+    r"""(pm\.(?:collectionVariables|environment|variables|globals)\.(?:get|set|unset|has)\(\s*)(['"])(\w+)\2"""
+)
+_TEMPLATE_VARIABLE = re.compile(r'\{\{(\w+)\}\}')
+
+
+class Shard:
+    """A group of folders run as one collection."""
+
+    def __init__(self, index, total):
+        self.index = index
+        self.total = total
+        self.folders = []
+        self.weight = 0.0
+
+    @property
+    def prefix(self):
+        return f"s{self.index}_"
+
+    def __repr__(self):
+        return f"Shard({self.index}/{self.total}, folders={len(self.folders)}, weight={self.weight:g})"
+
+
+def request_count(folder):
+    return sum(1 for item in folder.get('item', []) if 'request' in item)
+
+
+def load_timings(path, collection):
+    """
+    Read per-folder runtimes (seconds) from a Newman JSON report or a name map.
+
+    Newman executions carry the request name only, so they are matched to
+    folders by walking the collection's requests in run order.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    if 'run' not in data:
+        return {name: float(seconds) for name, seconds in data.items()}
+
+    order = [(folder['name'], item['name'])
+             for folder in collection['item']
+             for item in folder.get('item', []) if 'request' in item]
+    timings = {}
+    position = 0
+    for execution in data['run'].get('executions', []):
+        name = execution.get('item', {}).get('name')
+        while position < len(order) and order[position][1] != name:
+            position += 1
+        if position == len(order):
+            break
+        folder = order[position][0]
+        millis = (execution.get('response') or {}).get('responseTime', 0)
+        timings[folder] = timings.get(folder, 0.0) + millis / 1000
+        position += 1
+    return timings
+
+
+def plan_shards(folders, count, weight):
+    """Assign folders to count shards, balancing the sum of weight(folder)."""
+    if count < 1:
+        raise ValueError(f"Shard count must be at least 1, got {count}")
+    shards = [Shard(i + 1, count) for i in range(count)]
+    heap = [(0.0, i) for i in range(count)]
+
+    ranked = sorted(enumerate(folders), key=lambda pair: (-weight(pair[1]), pair[0]))
+    assigned = [[] for _ in shards]
+    for position, folder in ranked:
+        load, i = heapq.heappop(heap)
+        assigned[i].append((position, folder))
+        shards[i].weight = load + weight(folder)
+        heapq.heappush(heap, (shards[i].weight, i))
+
+    # Keep the original folder order inside each shard
+    for shard, pairs in zip(shards, assigned):
+        shard.folders = [folder for _, folder in sorted(pairs, key=lambda pair: pair[0])]
+    return shards
+
+
+def _rename(prefix, shared=SHARED_VARIABLES):
+    def script(match):
+        name = match.group(3)
+        if name in shared:
+            return match.group(0)
+        return f"{match.group(1)}{match.group(2)}{prefix}{name}{match.group(2)}"
+
+    def template(match):
+        name = match.group(1)
+        return match.group(0) if name in shared else f"{{{{{prefix}{name}}}}}"
+
+    def rename(text):
+        return _TEMPLATE_VARIABLE.sub(template, _SCRIPT_VARIABLE.sub(script, text))
+    return rename
+
+
+def _map_strings(value, fn):
+    if isinstance(value, str):
+        return fn(value)
+    if isinstance(value, list):
+        return [_map_strings(v, fn) for v in value]
+    if isinstance(value, dict):
+        return {k: _map_strings(v, fn) for k, v in value.items()}
+    return value
+
+
+def namespace_folder(folder, prefix, shared=SHARED_VARIABLES):
+    """Copy of folder with every non-shared variable reference prefixed."""
+    return _map_strings(folder, _rename(prefix, shared))
+
+
+def shard_collection(collection, shard, tenant=None):
+    """Build the standalone collection for one shard, optionally bound to a tenant's token."""
+    result = {k: copy.deepcopy(v) for k, v in collection.items() if k != 'item'}
+    info = result.setdefault('info', {})
+    info['name'] = f"{info.get('name', 'Collection')} [shard {shard.index}/{shard.total}]"
+    if '_postman_id' in info:
+        info['_postman_id'] = f"{info['_postman_id']}-shard-{shard.index}-of-{shard.total}"
+
+    shared = SHARED_VARIABLES - {'access_token'} if tenant else SHARED_VARIABLES
+    rename = _rename(shard.prefix, shared)
+    if tenant and 'auth' in result:
+        result['auth'] = _map_strings(result['auth'], rename)
+
+    variables = []
+    for var in result.get('variable', []):
+        var = dict(var)
+        if var.get('key') not in shared:
+            var['key'] = shard.prefix + var['key']
+        if isinstance(var.get('value'), str):
+            # Shared script libraries (script_library.py) reference variables too
+            var['value'] = rename(var['value'])
+        variables.append(var)
+    if tenant:
+        token_key = shard.prefix + 'access_token'
+        variables = [v for v in variables if v.get('key') != token_key]
+        variables.append({'key': token_key, 'value': tenant.token, 'type': 'string'})
+    if variables:
+        result['variable'] = variables
+
+    result['item'] = [namespace_folder(folder, shard.prefix, shared) for folder in shard.folders]
+    return result
+
+
+def shard_path(output_dir, source, shard):
+    stem = source.name.replace('.postman_collection.json', '')
+    return Path(output_dir) / f"{stem}.shard-{shard.index}-of-{shard.total}.postman_collection.json"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Split a collection into runtime-balanced shards.')
+    parser.add_argument('collection', nargs='?', type=Path, default=COLLECTION_PATH)
+    parser.add_argument('-n', '--shards', type=int, required=True, help='Number of shards')
+    parser.add_argument('-o', '--output-dir', type=Path, help='Directory for the shard collections')
+    parser.add_argument('--timings', type=Path, help='Newman JSON report or {folder: seconds} map')
+    parser.add_argument('--tenants', type=Path, help='billing:provision-tenants file: one wallet per shard')
+    parser.add_argument('--plan', action='store_true', help='Print the assignment without writing files')
+    args = parser.parse_args()
+
+    if not args.plan and not args.output_dir:
+        parser.error('--output-dir is required unless --plan is given')
+
+    tenants = load_tenants(args.tenants) if args.tenants else None
+    if tenants and len(tenants) < args.shards:
+        parser.error(f"--tenants has {len(tenants)} tenant(s) for {args.shards} shards")
+
+    collection = load_collection(args.collection)
+    folders = collection['item']
+
+    if args.timings:
+        timings = load_timings(args.timings, collection)
+        missing = [f['name'] for f in folders if f['name'] not in timings]
+        # Unknown folders get the mean runtime per request
+        per_request = sum(timings.values()) / max(1, sum(request_count(f) for f in folders if f['name'] in timings))
+        weight = lambda f: timings.get(f['name'], request_count(f) * per_request)
+        unit = 's'
+        if missing:
+            print(f"⚠️  No timings for {len(missing)} folder(s), estimating from request count")
+    else:
+        weight = request_count
+        unit = ' requests'
+
+    shards = plan_shards(folders, args.shards, weight)
+    total = sum(s.weight for s in shards)
+    print(f"📦 {len(folders)} folders → {len(shards)} shards (total {total:g}{unit}, ideal {total / len(shards):.2f}{unit} each)\n")
+    for shard in shards:
+        print(f"  Shard {shard.index}: {len(shard.folders):3d} folders, {shard.weight:.2f}{unit}")
+
+    if args.plan:
+        for shard in shards:
+            print(f"\nShard {shard.index}:")
+            for folder in shard.folders:
+                print(f"  - {folder['name']}")
+        return
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    print()
+    for shard in shards:
+        path = shard_path(args.output_dir, args.collection, shard)
+        tenant = tenants[shard.index - 1] if tenants else None
+        save_collection(shard_collection(collection, shard, tenant), path)
+        print(f"💾 {path}" + (f" ({tenant.email})" if tenant else ''))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+One long-lived `php artisan state:probe` for reading wallet and voucher state.
+
+The flow scripts read state with `php artisan tinker --execute`, and every
+call boots the framework again. StateProbe boots it once. It sends batches of
+queries as JSON lines on the worker's stdin and reads one JSON line of
+results back per batch, so an owner wallet + voucher cash + system balance
+snapshot is one round trip of a few milliseconds:
+
+    with StateProbe() as probe:
+        before = probe.snapshot('SETTLE-AB12')
+        ...
+        after = probe.snapshot('SETTLE-AB12')
+        after['voucher_cash'] - before['voucher_cash']
+
+Queries ({"type": ..., ...}):
+
+    voucher          code       owner_wallet, voucher_cash, paid/redeemed totals, remaining, ...
+    system                      system_wallet
+    user             user       wallet of a user by email or mobile
+    payment_request  id or reference_id   status, unconfirmed transaction, signed confirm_url
+    notification     notifiable_id, kind  latest notification whose type contains kind
+    envelope         id         status, payload, checklist and signals
+
+Balances are read from the wallets table on every query, so they are never
+stale. The worker only reads and refuses to run in production. --command
+runs it somewhere else, e.g. "docker compose exec -T app php artisan state:probe".
+
+Usage:
+    python3 scripts/state_probe.py voucher=SETTLE-AB12 system
+    python3 scripts/state_probe.py user=09173011987 payment_request=12 --repeat 20
+    python3 scripts/state_probe.py --command "./vendor/bin/sail artisan state:probe" system
+"""
+
+import argparse
+import json
+import os
+import select
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_COMMAND = ('php', 'artisan', 'state:probe')
+# The field each query type takes as `type=VALUE` on the command line
+_CLI_FIELDS = {'voucher': 'code', 'user': 'user', 'payment_request': 'id', 'envelope': 'id'}
+
+
+class ProbeError(Exception):
+    """The worker could not be started, died, or did not answer in time."""
+
+
+class StateProbe:
+    """A state:probe worker process. Thread-safe; one batch is in flight at a time."""
+
+    def __init__(self, command=DEFAULT_COMMAND, cwd=REPO_ROOT, timeout=30.0):
+        self.command = shlex.split(command) if isinstance(command, str) else list(command)
+        self.cwd = cwd
+        self.timeout = timeout
+        self.process = None
+        self.pid = None
+        self.boot_seconds = None
+        self.batches = 0
+        self._buffer = b''
+        self._lock = threading.Lock()
+
+    def start(self):
+        start = time.perf_counter()
+        try:
+            self.process = subprocess.Popen(self.command, cwd=self.cwd, stdin=subprocess.PIPE,
+                                            stdout=subprocess.PIPE, bufsize=0)
+        except OSError as e:
+            raise ProbeError(f"Cannot start {' '.join(self.command)}: {e}") from e
+        ready = self._read('ready')
+        self.pid = ready.get('pid')
+        self.boot_seconds = time.perf_counter() - start
+        return self
+
+    def _readline(self, deadline):
+        while b'\n' not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise ProbeError(f"No answer from state:probe within {self.timeout:g}s")
+            readable, _, _ = select.select([self.process.stdout], [], [], remaining)
+            if readable:
+                chunk = os.read(self.process.stdout.fileno(), 65536)
+                if not chunk:
+                    raise ProbeError(f"state:probe exited (status {self.process.wait()})")
+                self._buffer += chunk
+        line, self._buffer = self._buffer.split(b'\n', 1)
+        return line
+
+    def _read(self, key):
+        """The next JSON object with `key`; anything else the framework prints is skipped."""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            line = self._readline(deadline).strip()
+            try:
+                data = json.loads(line.decode('utf-8'))
+            except ValueError:
+                continue
+            if isinstance(data, dict) and (key in data or 'error' in data):
+                return data
+
+    def query(self, *queries):
+        """Results for the queries, in order, from one round trip."""
+        if self.process is None:
+            self.start()
+        with self._lock:
+            self.batches += 1
+            batch_id = self.batches
+            try:
+                self.process.stdin.write(json.dumps({'id': batch_id, 'queries': list(queries)}).encode('utf-8') + b'\n')
+            except (BrokenPipeError, ValueError) as e:
+                raise ProbeError(f"state:probe is gone: {e}") from e
+            answer = self._read('results')
+        if answer.get('id') != batch_id or 'results' not in answer:
+            raise ProbeError(f"Unexpected answer from state:probe: {answer}")
+        return answer['results']
+
+    def one(self, query):
+        return self.query(query)[0]
+
+    def voucher(self, code):
+        return self.one({'type': 'voucher', 'code': code})
+
+    def system(self):
+        return self.one({'type': 'system'})['system_wallet']
+
+    def user(self, identifier):
+        return self.one({'type': 'user', 'user': identifier})
+
+    def payment_request(self, id=None, reference_id=None):
+        return self.one({'type': 'payment_request', 'id': id} if reference_id is None
+                        else {'type': 'payment_request', 'reference_id': reference_id})
+
+    def notification(self, notifiable_id, kind=''):
+        return self.one({'type': 'notification', 'notifiable_id': notifiable_id, 'kind': kind})
+
+    def envelope(self, id):
+        return self.one({'type': 'envelope', 'id': id})
+
+    def snapshot(self, code):
+        """The voucher's state plus system_wallet, from one round trip."""
+        voucher, system = self.query({'type': 'voucher', 'code': code}, {'type': 'system'})
+        if 'error' in voucher:
+            raise ProbeError(voucher['error'])
+        return dict(voucher, system_wallet=system.get('system_wallet'))
+
+    def close(self):
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+            self.process.wait()
+        self.process = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def parse_query(text):
+    """'voucher=CODE' → {'type': 'voucher', 'code': 'CODE'}; 'system' → {'type': 'system'}."""
+    kind, _, value = text.partition('=')
+    if kind not in _CLI_FIELDS and kind != 'system':
+        raise ValueError(f"Unknown query {text!r} (voucher=CODE, system, user=EMAIL|MOBILE, "
+                         f"payment_request=ID, envelope=ID)")
+    if kind == 'system':
+        return {'type': 'system'}
+    if not value:
+        raise ValueError(f"{kind} needs a value ({kind}=...)")
+    return {'type': kind, _CLI_FIELDS[kind]: value}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query wallet and voucher state through one state:probe worker.')
+    parser.add_argument('queries', nargs='+', help='voucher=CODE, system, user=EMAIL|MOBILE, payment_request=ID, envelope=ID')
+    parser.add_argument('--command', default=' '.join(DEFAULT_COMMAND), help='How to start the worker')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Seconds to wait for the worker')
+    parser.add_argument('--repeat', type=int, default=1, help='Send the batch this many times (timing)')
+    args = parser.parse_args()
+
+    try:
+        queries = [parse_query(text) for text in args.queries]
+    except ValueError as e:
+        parser.error(str(e))
+
+    try:
+        with StateProbe(args.command, timeout=args.timeout) as probe:
+            print(f"🔌 state:probe (pid {probe.pid}) ready in {probe.boot_seconds:.2f}s", file=sys.stderr)
+            times = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                results = probe.query(*queries)
+                times.append(time.perf_counter() - start)
+    except ProbeError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    print(f"⚡ {len(queries)} queries × {args.repeat}: {min(times) * 1000:.1f}ms best, "
+          f"{sum(times) / len(times) * 1000:.1f}ms mean per batch", file=sys.stderr)
+    sys.exit(1 if any('error' in r for r in results) else 0)
+
+
+if __name__ == '__main__':
+    main()
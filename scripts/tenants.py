@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Billing tenants: one funded API user per folder (or shard).
+
+Every billing folder asserts before/after deltas on the caller's wallet, so
+folders sharing one user cannot run at the same time. Tenants are provisioned
+in bulk on the server:
+
+    php artisan billing:provision-tenants 8 --balance=10000 --output=storage/app/billing-tenants.json
+
+which writes {"balance": ..., "tenants": [{"email", "token", "balance"}, ...]}.
+collection_runner.py --tenants and shard_collection.py --tenants read it and
+give each folder (or shard) its own access_token. With --mobile-prefix each
+tenant also gets a mobile, so webhook_replay.py can send deposits to it.
+
+Tenants isolate the user wallet only. The system and product wallets are
+global, so the System Balances checks stay accumulation-tolerant
+(fix_accumulation_tests_v3.py).
+"""
+
+import json
+
+
+class Tenant:
+    """An API user with its own wallet and bearer token."""
+
+    def __init__(self, email, token, balance=None, mobile=None):
+        self.email = email
+        self.token = token
+        self.balance = balance
+        self.mobile = mobile
+
+    def __repr__(self):
+        return f"Tenant({self.email!r})"
+
+
+def load_tenants(path):
+    """Tenants from a billing:provision-tenants file, in order."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    tenants = [Tenant(t['email'], t['token'], t.get('balance'), t.get('mobile')) for t in data.get('tenants', [])]
+    if not tenants:
+        raise ValueError(f"No tenants in {path}")
+    return tenants
+
+
+def assign(items, tenants):
+    """
+    Spread items over the tenants round-robin.
+
+    Returns [(tenant, [items...]), ...] with one entry per tenant that got at
+    least one item. Items sharing a tenant must run one after another.
+    """
+    lanes = [(tenant, []) for tenant in tenants[:len(items)]]
+    for i, item in enumerate(items):
+        lanes[i % len(lanes)][1].append(item)
+    return lanes
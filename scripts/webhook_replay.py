@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+Replay NetBank deposit webhooks at a target rate and measure how fast they
+are classified and credited.
+
+NetBank confirms every InstaPay deposit with POST /api/confirm-deposit
+(payment-gateway package, ConfirmDepositController). The deposit tops up the
+recipient's wallet, then CustomNetbankPaymentGateway classifies it inside the
+same request: a deposit whose amount matches a pending PaymentRequest from
+the last 10 minutes is also paid, unconfirmed, into that voucher's cash.
+(/api/v1/webhooks/payment is a placeholder that answers 501.)
+
+Payloads are built the way simulate:deposit builds them. Top-ups go to
+tenants with a mobile, and voucher payments to the owners of seeded payment
+requests:
+
+    php artisan billing:provision-tenants 8 --mobile-prefix=0917555 --output=storage/app/billing-tenants.json
+    php artisan webhook:seed-payment-requests PAY-AB12 --count=50 --output=storage/app/payment-requests.json
+
+The controller drops merchant_details.payment_request_reference (it is not a
+validated field), so payments are matched by amount alone. Every seeded
+request has its own whole-peso amount, and top-up amounts are drawn from
+--amount without them. Replay within 10 minutes of seeding.
+
+Deposits are sent at --rate per second (Poisson arrivals), whether or not
+earlier ones have been answered. Arrivals that find --concurrency deposits
+in flight are dropped and counted. Classification throughput is the rate of
+204 answers. For every recipient with a token, GET /api/v1/wallet/balance is
+polled every --poll seconds. A deposit counts as credited at the first poll
+whose balance increase covers it and every deposit sent to that recipient
+before it, so credit latency is only as fine as --poll. The API throttles at
+60 requests per minute per user; keep --poll at 1 second or more.
+
+Usage:
+    python3 scripts/webhook_replay.py --base-url http://redeem-x.test --tenants storage/app/billing-tenants.json \\
+        --rate 50 --count 2000
+    python3 scripts/webhook_replay.py --base-url http://redeem-x.test --tenants storage/app/billing-tenants.json \\
+        --payment-requests storage/app/payment-requests.json --payments 0.3 --rate 20 --count 500 --report /tmp/replay.json
+    python3 scripts/webhook_replay.py --base-url http://127.0.0.1:8000 --mobile 09173011987 --rate 5 --count 10
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from api_stub import CONFIRM_DEPOSIT_PATH, DEPOSIT_ALIAS, MANILA, national_mobile
+from collection_runner import percentile
+from http_pool import ConnectionPool
+from latency_histogram import LatencyRecorder
+from tenants import load_tenants
+
+SENDER_INSTITUTION = 'GXCHPHM2XXX'  # simulate:deposit --sender-institution default
+BALANCE_PATH = '/api/v1/wallet/balance'
+
+
+class Recipient:
+    """A mobile that deposits are sent to, and the bearer token to watch its balance with."""
+
+    def __init__(self, mobile, token=None):
+        self.mobile = national_mobile(mobile)
+        self.token = token
+
+
+class Deposit:
+    """One replayed webhook and what became of it (perf_counter seconds)."""
+
+    def __init__(self, kind, recipient, amount, payload, reference=None):
+        self.kind = kind
+        self.recipient = recipient
+        self.amount = amount
+        self.payload = payload
+        self.reference = reference
+        self.sent = None
+        self.status = None
+        self.elapsed = None
+        self.error = None
+        self.credited = None
+
+    @property
+    def accepted(self):
+        return self.status == 204
+
+    @property
+    def credit_latency(self):
+        return self.credited - self.sent if self.credited is not None else None
+
+
+def deposit_payload(mobile, amount, rng, sender_mobile, sender_name='REPLAY SENDER', alias=DEPOSIT_ALIAS):
+    """A NetBank deposit confirmation, as SimulateDepositCommand builds it (amount in whole pesos)."""
+    today = datetime.now(MANILA)
+    reference_number = f"{today:%Y%m%d}{SENDER_INSTITUTION}B{rng.randint(1, 999999):06d}"
+    return {
+        'alias': alias,
+        'amount': int(amount),
+        'channel': 'INSTAPAY',
+        'commandId': rng.randint(100000000, 999999999),
+        'externalTransferStatus': 'SETTLED',
+        'operationId': rng.randint(100000000, 999999999),
+        'productBranchCode': '000',
+        'recipientAccountNumber': alias + mobile,
+        'recipientAccountNumberBankFormat': '113-001-00001-9',
+        'referenceCode': mobile[1:],
+        'referenceNumber': reference_number,
+        'registrationTime': today.isoformat(timespec='seconds'),
+        'remarks': f"InstaPay transfer #{reference_number}",
+        'sender': {'accountNumber': sender_mobile, 'name': sender_name, 'institutionCode': SENDER_INSTITUTION},
+        'transferType': 'QR_P2M',
+        'merchant_details': {'merchant_code': '1', 'merchant_account': mobile},
+    }
+
+
+def parse_amounts(text):
+    """(low, high) whole pesos from 'LOW-HIGH' or a single amount."""
+    low, _, high = text.partition('-')
+    low, high = int(low), int(high or low)
+    if low < 1 or high < low:
+        raise ValueError(f"Invalid amount range {text!r} (expected LOW-HIGH pesos, LOW ≥ 1)")
+    return low, high
+
+
+def plan(count, recipients, payment_requests, payments, amounts, rng, senders=50):
+    """
+    `count` deposits: a `payments` share pays the payment requests (cycling
+    through them) and the rest are top-ups of recipients with amounts that
+    no payment request has.
+    """
+    low, high = amounts
+    reserved = {request['amount'] for request in payment_requests}
+    topup_amounts = [amount for amount in range(low, high + 1) if amount not in reserved]
+    if payments < 1 and not topup_amounts:
+        raise ValueError(f"Every top-up amount in {low}-{high} belongs to a payment request")
+    by_mobile = {r.mobile: r for r in recipients}
+    sender_mobiles = [f"0918{rng.randint(0, 9999999):07d}" for _ in range(senders)]
+
+    deposits, paid = [], 0
+    for n in range(count):
+        sender = sender_mobiles[n % len(sender_mobiles)]
+        if payment_requests and rng.random() < payments:
+            request = payment_requests[paid % len(payment_requests)]
+            paid += 1
+            # Voucher owners that are also tenants get their balance watched
+            mobile = national_mobile(request['mobile'])
+            recipient = by_mobile.setdefault(mobile, Recipient(mobile))
+            deposits.append(Deposit('payment', recipient, request['amount'],
+                                    deposit_payload(mobile, request['amount'], rng, sender),
+                                    request['reference_id']))
+        else:
+            recipient = recipients[n % len(recipients)]
+            amount = rng.choice(topup_amounts)
+            deposits.append(Deposit('topup', recipient, amount, deposit_payload(recipient.mobile, amount, rng, sender)))
+    return deposits
+
+
+class CreditWatcher:
+    """Polls one recipient's wallet balance and marks its deposits credited."""
+
+    def __init__(self, pool, base_url, recipient, interval, timeout=30.0):
+        self.pool = pool
+        self.url = base_url.rstrip('/') + BALANCE_PATH
+        self.headers = {'Accept': 'application/json', 'Authorization': f"Bearer {recipient.token}"}
+        self.recipient = recipient
+        self.interval = interval
+        self.timeout = timeout
+        self.deposits = []
+        self.baseline = None
+        self.polls = 0
+        self.errors = 0
+
+    async def balance(self):
+        """Balance in centavos, or None when the poll failed (429s included)."""
+        try:
+            response = await self.pool.request('GET', self.url, self.headers, timeout=self.timeout)
+        except (OSError, asyncio.TimeoutError):
+            self.errors += 1
+            return None
+        self.polls += 1
+        if response.status != 200:
+            self.errors += 1
+            return None
+        data = (response.json() or {}).get('data') or {}
+        if 'balance_cents' in data:
+            return int(data['balance_cents'])
+        return round(float(str(data.get('balance', 0)).replace(',', '')) * 100)
+
+    async def start(self):
+        while self.baseline is None:
+            self.baseline = await self.balance()
+            if self.baseline is None:
+                await asyncio.sleep(self.interval)
+
+    def observe(self, centavos, seen):
+        """Credit, in send order, the deposits the increase since the baseline covers."""
+        covered = centavos - self.baseline
+        for deposit in sorted((d for d in self.deposits if d.accepted), key=lambda d: d.sent):
+            covered -= deposit.amount * 100
+            if covered < 0:
+                break
+            if deposit.credited is None:
+                deposit.credited = seen
+
+    def pending(self):
+        return [d for d in self.deposits if d.accepted and d.credited is None]
+
+    async def watch(self, sending, deadline):
+        """Poll until sending is done and every accepted deposit is credited, or `deadline` seconds after that."""
+        finished = None
+        while True:
+            await asyncio.sleep(self.interval)
+            centavos = await self.balance()
+            if centavos is not None:
+                self.observe(centavos, time.perf_counter())
+            if sending.done():
+                finished = finished or time.perf_counter()
+                if not self.pending() or time.perf_counter() - finished >= deadline:
+                    return
+
+
+class Replay:
+    """Open-model arrivals of deposits over one connection pool."""
+
+    def __init__(self, base_url, deposits, rate, concurrency, path=CONFIRM_DEPOSIT_PATH, connections=None,
+                 timeout=30.0, poll=1.5, settle=30.0, seed=None):
+        self.url = base_url.rstrip('/') + path
+        self.base_url = base_url
+        self.deposits = deposits
+        self.rate = rate
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.poll = poll
+        self.settle = settle
+        self.random = random.Random(seed)
+        self.pool = ConnectionPool(limit=connections or concurrency)
+        self.watch_pool = ConnectionPool(limit=16)
+        self.watchers = {}
+        for deposit in deposits:
+            recipient = deposit.recipient
+            if recipient.token and recipient.mobile not in self.watchers:
+                self.watchers[recipient.mobile] = CreditWatcher(self.watch_pool, base_url, recipient, poll, timeout)
+            if recipient.mobile in self.watchers:
+                self.watchers[recipient.mobile].deposits.append(deposit)
+        self.sent = []
+        self.dropped = 0
+        self.in_flight = 0
+
+    async def post(self, deposit):
+        headers = {'Accept': 'application/json', 'Content-Type': 'application/json'}
+        try:
+            response = await self.pool.request('POST', self.url, headers, json.dumps(deposit.payload),
+                                               timeout=self.timeout)
+            deposit.status, deposit.elapsed = response.status, response.elapsed
+        except (OSError, asyncio.TimeoutError) as e:
+            deposit.error = str(e) or type(e).__name__
+        finally:
+            self.in_flight -= 1
+
+    async def send(self):
+        loop_start = time.perf_counter()
+        next_arrival = loop_start
+        tasks = []
+        for deposit in self.deposits:
+            next_arrival += self.random.expovariate(self.rate)
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if self.in_flight >= self.concurrency:
+                self.dropped += 1
+                continue
+            self.in_flight += 1
+            deposit.sent = time.perf_counter()
+            self.sent.append(deposit)
+            tasks.append(asyncio.ensure_future(self.post(deposit)))
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - loop_start
+
+    async def run(self):
+        """Seconds spent sending."""
+        try:
+            await asyncio.gather(*(watcher.start() for watcher in self.watchers.values()))
+            sending = asyncio.ensure_future(self.send())
+            await asyncio.gather(sending, *(watcher.watch(sending, self.settle) for watcher in self.watchers.values()))
+            return sending.result()
+        finally:
+            await self.pool.close()
+            await self.watch_pool.close()
+
+
+def _stats(values):
+    if not values:
+        return {'count': 0, 'p50': None, 'p95': None, 'p99': None, 'max': None}
+    return {'count': len(values), 'p50': round(percentile(values, 50), 2), 'p95': round(percentile(values, 95), 2),
+            'p99': round(percentile(values, 99), 2), 'max': round(max(values), 2)}
+
+
+def summarize(replay, seconds):
+    """{'kinds': {kind: stats}, ...} with times in milliseconds."""
+    kinds = {}
+    for kind in sorted({d.kind for d in replay.deposits}):
+        sent = [d for d in replay.sent if d.kind == kind]
+        accepted = [d for d in sent if d.accepted]
+        watched = [d for d in accepted if d.recipient.mobile in replay.watchers]
+        statuses = {}
+        for d in sent:
+            key = str(d.status) if d.status is not None else 'error'
+            statuses[key] = statuses.get(key, 0) + 1
+        kinds[kind] = {
+            'sent': len(sent),
+            'accepted': len(accepted),
+            'statuses': statuses,
+            'amount': sum(d.amount for d in accepted),
+            'classification': _stats([d.elapsed * 1000 for d in accepted]),
+            'credit': dict(_stats([d.credit_latency * 1000 for d in watched if d.credited is not None]),
+                           watched=len(watched), uncredited=sum(1 for d in watched if d.credited is None)),
+        }
+    accepted = sum(k['accepted'] for k in kinds.values())
+    return {
+        'seconds': round(seconds, 3),
+        'url': replay.url,
+        'offered_rate': replay.rate,
+        'planned': len(replay.deposits),
+        'sent': len(replay.sent),
+        'dropped': replay.dropped,
+        'accepted': accepted,
+        'throughput': round(accepted / seconds, 2) if seconds else 0,
+        'poll_interval': replay.poll,
+        'watchers': {mobile: {'polls': w.polls, 'errors': w.errors} for mobile, w in replay.watchers.items()},
+        'kinds': kinds,
+    }
+
+
+def print_summary(summary):
+    def row(label, stats):
+        if not stats['count']:
+            return f"    {label:22}  {0:6d}  {'-':>8}  {'-':>8}  {'-':>8}  {'-':>8}"
+        return (f"    {label:22}  {stats['count']:6d}  {stats['p50']:8.1f}  {stats['p95']:8.1f}  "
+                f"{stats['p99']:8.1f}  {stats['max']:8.1f}")
+
+    print(f"\n⏱️  {'':22}  {'n':>6}  {'p50':>8}  {'p95':>8}  {'p99':>8}  {'max':>8}  (ms)")
+    for kind, stats in summary['kinds'].items():
+        print(row(f"{kind} classification", stats['classification']))
+        if stats['credit']['watched']:
+            print(row(f"{kind} credit", stats['credit']))
+    for kind, stats in summary['kinds'].items():
+        other = {status: n for status, n in stats['statuses'].items() if status != '204'}
+        print(f"   {kind}: {stats['accepted']}/{stats['sent']} accepted, ₱{stats['amount']:,}"
+              + (f", {stats['credit']['uncredited']} never credited" if stats['credit']['uncredited'] else '')
+              + (f"  ⚠️  {other}" if other else ''))
+
+    failed = summary['sent'] - summary['accepted']
+    uncredited = sum(k['credit']['uncredited'] for k in summary['kinds'].values())
+    icon = '✅' if not failed and not summary['dropped'] and not uncredited else '❌'
+    print(f"\n{icon} {summary['accepted']}/{summary['planned']} deposits accepted in {summary['seconds']:.2f}s "
+          f"= {summary['throughput']:.1f}/s classified (offered {summary['offered_rate']:g}/s), "
+          f"{summary['dropped']} dropped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay NetBank deposit webhooks at a target rate.')
+    parser.add_argument('--base-url', required=True, help='e.g. http://redeem-x.test')
+    parser.add_argument('--path', default=CONFIRM_DEPOSIT_PATH, help=f'Webhook path (default: {CONFIRM_DEPOSIT_PATH})')
+    parser.add_argument('--tenants', type=Path,
+                        help='billing:provision-tenants --mobile-prefix file: top-up recipients, balances watched')
+    parser.add_argument('--mobile', action='append', default=[], help='Another top-up recipient (not watched)')
+    parser.add_argument('--payment-requests', type=Path, help='webhook:seed-payment-requests file')
+    parser.add_argument('--payments', type=float, help='Share of deposits that pay a payment request '
+                                                       '(default: 0.5 with --payment-requests)')
+    parser.add_argument('--amount', default='1-500', help='Top-up amounts in whole pesos, LOW-HIGH (default: 1-500)')
+    parser.add_argument('--rate', type=float, required=True, help='Deposits per second')
+    parser.add_argument('--count', type=int, default=100, help='Deposits to send')
+    parser.add_argument('--concurrency', type=int, default=64, help='Most deposits in flight (later arrivals drop)')
+    parser.add_argument('--connections', type=int, help='Pooled connections (default: --concurrency)')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout in seconds')
+    parser.add_argument('--poll', type=float, default=1.5, help='Seconds between balance polls per recipient')
+    parser.add_argument('--settle', type=float, default=30.0,
+                        help='Seconds to keep polling for credits after the last deposit is answered')
+    parser.add_argument('--seed', type=int, help='Seed payloads, amounts and arrivals')
+    parser.add_argument('--report', type=Path, help='Write the summary as JSON')
+    parser.add_argument('--histograms', type=Path, help='Write classification and credit latency histograms')
+    args = parser.parse_args()
+
+    if args.rate <= 0 or args.count < 1 or args.concurrency < 1 or args.poll <= 0:
+        parser.error('--rate and --poll must be positive, --count and --concurrency at least 1')
+    try:
+        amounts = parse_amounts(args.amount)
+    except ValueError as e:
+        parser.error(str(e))
+
+    recipients = []
+    if args.tenants:
+        recipients += [Recipient(t.mobile, t.token) for t in load_tenants(args.tenants) if t.mobile]
+    recipients += [Recipient(mobile) for mobile in args.mobile]
+    payment_requests = []
+    if args.payment_requests:
+        with open(args.payment_requests, 'r', encoding='utf-8') as f:
+            payment_requests = json.load(f)['payment_requests']
+    payments = args.payments if args.payments is not None else (0.5 if payment_requests else 0.0)
+    if not 0 <= payments <= 1:
+        parser.error('--payments must be between 0 and 1')
+    if payments > 0 and not payment_requests:
+        parser.error('--payments needs --payment-requests')
+    if payments < 1 and not recipients:
+        parser.error('No top-up recipients: --tenants (with --mobile-prefix mobiles) or --mobile')
+
+    rng = random.Random(args.seed)
+    try:
+        deposits = plan(args.count, recipients, payment_requests, payments, amounts, rng)
+    except ValueError as e:
+        parser.error(str(e))
+
+    replay = Replay(args.base_url, deposits, args.rate, args.concurrency, args.path, args.connections,
+                    args.timeout, args.poll, args.settle, args.seed)
+    planned = {kind: sum(1 for d in deposits if d.kind == kind) for kind in ('topup', 'payment')}
+    print(f"🏦 {len(deposits)} deposits → {replay.url}: {planned['topup']} top-ups, {planned['payment']} payments "
+          f"at {args.rate:g}/s (≤ {args.concurrency} in flight), watching {len(replay.watchers)} balance(s)")
+
+    seconds = asyncio.run(replay.run())
+    summary = summarize(replay, seconds)
+    print_summary(summary)
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        print(f"💾 {args.report}")
+    if args.histograms:
+        recorder = LatencyRecorder(meta={'runner': 'webhook_replay', 'base_url': args.base_url, 'rate': args.rate})
+        for deposit in replay.sent:
+            if deposit.accepted:
+                recorder.histogram(f"POST {args.path} {deposit.kind}").record(deposit.elapsed * 1_000_000)
+                if deposit.credited is not None:
+                    recorder.histogram(f"CREDIT {deposit.kind}").record(deposit.credit_latency * 1_000_000)
+        recorder.save(args.histograms)
+        print(f"💾 {args.histograms}")
+
+    failed = summary['sent'] - summary['accepted']
+    uncredited = sum(k['credit']['uncredited'] for k in summary['kinds'].values())
+    sys.exit(0 if not failed and not uncredited else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+<?php
+
+use App\Models\InstructionItem;
+use App\Models\User;
+use Illuminate\Foundation\Testing\RefreshDatabase;
+
+uses(RefreshDatabase::class);
+
+beforeEach(function () {
+    $this->user = User::factory()->create();
+
+    InstructionItem::create([
+        'name' => 'Cash Amount',
+        'index' => 'cash.amount',
+        'type' => 'cash',
+        'price' => 1500,
+    ]);
+
+    InstructionItem::create([
+        'name' => 'Email',
+        'index' => 'feedback.email',
+        'type' => 'feedback',
+        'price' => 100,
+    ]);
+
+    $this->payloads = tempnam(sys_get_temp_dir(), 'cost-payloads');
+    $this->golden = tempnam(sys_get_temp_dir(), 'cost-golden');
+
+    $lines = [
+        ['seed' => 1, 'count' => 2, 'dimensions' => 'abc123', 'skeleton' => [
+            'cash' => ['amount' => 0.0, 'currency' => 'PHP', 'validation' => ['country' => 'PH']],
+            'inputs' => ['fields' => []],
+            'feedback' => ['email' => null, 'mobile' => null, 'webhook' => null],
+            'rider' => ['message' => null, 'url' => null],
+            'count' => 1,
+            'prefix' => 'DIFF',
+            'mask' => '****',
+            'ttl' => null,
+        ]],
+        ['id' => 0, 'dims' => [1, 3], 'instructions' => ['cash' => ['amount' => 100.0], 'count' => 2, 'feedback' => ['email' => 'a@example.com']]],
+        ['id' => 1, 'dims' => [1, 0], 'instructions' => ['cash' => ['amount' => 100.0], 'feedback' => ['email' => '   ']]],
+    ];
+    file_put_contents($this->payloads, implode("\n", array_map('json_encode', $lines))."\n");
+});
+
+afterEach(function () {
+    @unlink($this->payloads);
+    @unlink($this->golden);
+});
+
+test('export writes a header and one result per payload', function () {
+    $this->artisan('billing:export-cost-golden', [
+        'payloads' => $this->payloads,
+        'output' => $this->golden,
+        '--user' => $this->user->email,
+    ])->assertExitCode(0);
+
+    $rows = array_map(fn ($line) => json_decode($line, true), file($this->golden, FILE_IGNORE_NEW_LINES));
+
+    expect($rows)->toHaveCount(3)
+        ->and($rows[0]['dimensions'])->toBe('abc123')
+        ->and($rows[0]['customer'])->toBe($this->user->email)
+        ->and($rows[0]['exempt'])->toBeFalse()
+        ->and($rows[0]['items'])->toBe(['cash.amount' => 1500, 'feedback.email' => 100]);
+
+    expect($rows[1]['dims'])->toBe([1, 3])
+        ->and($rows[1]['charges'])->toEqualCanonicalizing([
+            ['cash.amount', 1500, 2, 1],
+            ['feedback.email', 100, 2, 1],
+        ]);
+
+    // Whitespace-only strings are not charged
+    expect($rows[2]['charges'])->toBe([['cash.amount', 1500, 1, 1]]);
+});
+
+test('export fails without a payload header', function () {
+    file_put_contents($this->payloads, json_encode(['id' => 0, 'dims' => [], 'instructions' => []])."\n");
+
+    $this->artisan('billing:export-cost-golden', [
+        'payloads' => $this->payloads,
+        'output' => $this->golden,
+    ])->assertExitCode(1);
+});
@@ -0,0 +1,117 @@
+<?php
+
+use App\Models\Campaign;
+use App\Models\User;
+use Illuminate\Foundation\Testing\RefreshDatabase;
+use Illuminate\Support\Facades\Http;
+
+uses(RefreshDatabase::class);
+
+beforeEach(function () {
+    Http::fake([
+        '*/v1/collect/checkout' => Http::response([
+            'redirect_url' => 'https://checkout.netbank.ph/pay-test-123',
+            'reference_no' => 'TOPUP-TEST',
+        ], 200),
+    ]);
+
+    $this->output = tempnam(sys_get_temp_dir(), 'tenants');
+});
+
+afterEach(function () {
+    @unlink($this->output);
+});
+
+test('provisions funded tenants with their own tokens', function () {
+    $this->artisan('billing:provision-tenants', [
+        'count' => 2,
+        '--balance' => 1500,
+        '--output' => $this->output,
+    ])->assertExitCode(0);
+
+    $file = json_decode(file_get_contents($this->output), true);
+
+    expect($file['tenants'])->toHaveCount(2)
+        ->and($file['tenants'][0]['email'])->toBe('billing-tenant-1@example.com')
+        ->and($file['tenants'][0]['token'])->not->toBe($file['tenants'][1]['token']);
+
+    foreach ($file['tenants'] as $tenant) {
+        $user = User::where('email', $tenant['email'])->first();
+        expect($user->balanceFloat)->toEqual(1500.0)
+            ->and($user->tokens()->count())->toBe(1);
+    }
+});
+
+test('re-provisioning tops up only the shortfall and rotates the token', function () {
+    $this->artisan('billing:provision-tenants', ['count' => 1, '--balance' => 1000, '--output' => $this->output]);
+    $first = json_decode(file_get_contents($this->output), true)['tenants'][0]['token'];
+
+    $user = User::where('email', 'billing-tenant-1@example.com')->first();
+    $user->withdrawFloat(250);
+
+    $this->artisan('billing:provision-tenants', ['count' => 1, '--balance' => 1000, '--output' => $this->output])
+        ->assertExitCode(0);
+    $second = json_decode(file_get_contents($this->output), true)['tenants'][0]['token'];
+
+    expect($user->fresh()->balanceFloat)->toEqual(1000.0)
+        ->and($user->topUps()->count())->toBe(2)
+        ->and($user->tokens()->count())->toBe(1)
+        ->and($second)->not->toBe($first);
+});
+
+test('creates the bulk-create campaigns for every tenant', function () {
+    $campaigns = tempnam(sys_get_temp_dir(), 'campaigns');
+    file_put_contents($campaigns, json_encode(['campaigns' => [[
+        'name' => 'billing-0123456789ab',
+        'description' => '01 - Simplest Voucher (₱100)',
+        'instructions' => [
+            'cash' => ['amount' => 100, 'currency' => 'PHP', 'validation' => ['country' => 'PH']],
+            'inputs' => ['fields' => []],
+            'feedback' => ['email' => null, 'mobile' => null, 'webhook' => null],
+            'rider' => ['message' => null, 'url' => null],
+            'count' => 1,
+            'prefix' => '',
+            'mask' => '',
+            'ttl' => null,
+        ],
+    ]]]));
+
+    foreach (range(1, 2) as $run) {
+        $this->artisan('billing:provision-tenants', [
+            'count' => 2,
+            '--balance' => 500,
+            '--output' => $this->output,
+            '--campaigns' => $campaigns,
+        ])->assertExitCode(0);
+    }
+    @unlink($campaigns);
+
+    foreach (User::where('email', 'like', 'billing-tenant-%')->get() as $user) {
+        $campaign = Campaign::where('user_id', $user->id)->sole();
+        expect($campaign->name)->toBe('billing-0123456789ab')
+            ->and($campaign->status)->toBe('active')
+            ->and($campaign->instructions->cash->amount)->toEqual(100.0);
+    }
+});
+
+test('gives tenants webhook mobiles with --mobile-prefix', function () {
+    $this->artisan('billing:provision-tenants', [
+        'count' => 2,
+        '--balance' => 100,
+        '--output' => $this->output,
+        '--mobile-prefix' => '0917555',
+    ])->assertExitCode(0);
+
+    $tenants = json_decode(file_get_contents($this->output), true)['tenants'];
+
+    expect(array_column($tenants, 'mobile'))->toBe(['09175550001', '09175550002'])
+        ->and(User::findByMobile('09175550002')?->email)->toBe('billing-tenant-2@example.com');
+});
+
+test('rejects a mobile prefix that is not a PH mobile', function () {
+    $this->artisan('billing:provision-tenants', [
+        'count' => 1,
+        '--output' => $this->output,
+        '--mobile-prefix' => '12345',
+    ])->assertExitCode(1);
+});
@@ -0,0 +1,98 @@
+<?php
+
+use App\Models\PaymentRequest;
+use App\Models\User;
+use Illuminate\Foundation\Testing\RefreshDatabase;
+use LBHurtado\Voucher\Actions\GenerateVouchers;
+use LBHurtado\Voucher\Data\VoucherInstructionsData;
+use LBHurtado\Voucher\Enums\VoucherState;
+use LBHurtado\Voucher\Enums\VoucherType;
+use LBHurtado\Voucher\Models\Voucher;
+
+uses(RefreshDatabase::class);
+
+function payableVoucher(User $owner): Voucher
+{
+    $owner->deposit(1000000);
+    test()->actingAs($owner);
+
+    $instructions = VoucherInstructionsData::generateFromScratch()->toArray();
+    $instructions['count'] = 1;
+    $voucher = GenerateVouchers::run(VoucherInstructionsData::from($instructions))->first();
+
+    $voucher->voucher_type = VoucherType::PAYABLE;
+    $voucher->state = VoucherState::ACTIVE;
+    $voucher->target_amount = 5000;
+    $voucher->save();
+
+    return $voucher->fresh();
+}
+
+beforeEach(function () {
+    $this->output = tempnam(sys_get_temp_dir(), 'payment-requests');
+});
+
+afterEach(function () {
+    @unlink($this->output);
+});
+
+test('seeds pending payment requests with distinct amounts', function () {
+    $first = payableVoucher(User::factory()->create(['mobile' => '09171110001']));
+    $second = payableVoucher(User::factory()->create(['mobile' => '09171110002']));
+
+    $this->artisan('webhook:seed-payment-requests', [
+        'vouchers' => [$first->code, $second->code],
+        '--count' => 2,
+        '--amount' => 250,
+        '--output' => $this->output,
+    ])->assertExitCode(0);
+
+    $requests = json_decode(file_get_contents($this->output), true)['payment_requests'];
+
+    expect(array_column($requests, 'amount'))->toBe([250, 251, 252, 253])
+        ->and(array_column($requests, 'mobile'))->toBe(['09171110001', '09171110001', '09171110002', '09171110002'])
+        ->and(PaymentRequest::pending()->where('voucher_id', $second->id)->pluck('amount')->all())->toBe([25200, 25300]);
+});
+
+test('refuses vouchers that cannot accept payments', function () {
+    $voucher = payableVoucher(User::factory()->create(['mobile' => '09171110003']));
+    $voucher->voucher_type = VoucherType::REDEEMABLE;
+    $voucher->save();
+
+    $this->artisan('webhook:seed-payment-requests', [
+        'vouchers' => [$voucher->code],
+        '--output' => $this->output,
+    ])->assertExitCode(1);
+
+    expect(PaymentRequest::count())->toBe(0);
+});
+
+test('seeds the exact amounts given with --amounts', function () {
+    $voucher = payableVoucher(User::factory()->create(['mobile' => '09171110005']));
+
+    $this->artisan('webhook:seed-payment-requests', [
+        'vouchers' => [$voucher->code],
+        '--amounts' => '499,501',
+        '--output' => $this->output,
+    ])->assertExitCode(0);
+
+    expect(PaymentRequest::pending()->pluck('amount')->all())->toBe([49900, 50100]);
+});
+
+test('seeds a per-voucher plan with --plan', function () {
+    $first = payableVoucher(User::factory()->create(['mobile' => '09171110006']));
+    $second = payableVoucher(User::factory()->create(['mobile' => '09171110007']));
+    $plan = tempnam(sys_get_temp_dir(), 'plan');
+    file_put_contents($plan, json_encode([$first->code => [700, 300], $second->code => [1000]]));
+
+    $this->artisan('webhook:seed-payment-requests', [
+        '--plan' => $plan,
+        '--output' => $this->output,
+    ])->assertExitCode(0);
+    @unlink($plan);
+
+    $requests = json_decode(file_get_contents($this->output), true)['payment_requests'];
+
+    expect(array_column($requests, 'voucher_code'))->toBe([$first->code, $first->code, $second->code])
+        ->and(array_column($requests, 'amount'))->toBe([700, 300, 1000]);
+});
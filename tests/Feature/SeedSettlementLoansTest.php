@@ -0,0 +1,61 @@
+<?php
+
+use App\Models\User;
+use Illuminate\Foundation\Testing\RefreshDatabase;
+use LBHurtado\Voucher\Enums\VoucherType;
+use LBHurtado\Voucher\Models\Voucher;
+
+uses(RefreshDatabase::class);
+
+beforeEach(function () {
+    config(['voucher-pipeline.post-redemption' => array_filter(
+        config('voucher-pipeline.post-redemption'),
+        fn ($class) => ! str_contains($class, 'DisburseCash')
+    )]);
+
+    $owner = User::factory()->create(['mobile' => '09173000001']);
+    $owner->deposit(1000000);
+
+    $this->tenants = tempnam(sys_get_temp_dir(), 'tenants');
+    file_put_contents($this->tenants, json_encode(['tenants' => [['email' => $owner->email]]]));
+    $this->output = tempnam(sys_get_temp_dir(), 'loans');
+});
+
+afterEach(function () {
+    @unlink($this->tenants);
+    @unlink($this->output);
+});
+
+test('generates and disburses settlement loans', function () {
+    $this->artisan('settlement:seed-loans', [
+        'count' => 2,
+        '--tenants' => $this->tenants,
+        '--principal' => 1000,
+        '--interest' => 10,
+        '--output' => $this->output,
+    ])->assertExitCode(0);
+
+    $loans = json_decode(file_get_contents($this->output), true)['loans'];
+    $voucher = Voucher::where('code', $loans[0]['code'])->first();
+
+    expect($loans)->toHaveCount(2)
+        ->and($loans[0]['target'])->toBe(1100)
+        ->and($loans[0]['mobile'])->toBe('09173000001')
+        ->and($voucher->voucher_type)->toBe(VoucherType::SETTLEMENT)
+        ->and($voucher->redeemed_at)->not->toBeNull();
+});
+
+test('refuses to run while disbursement is enabled', function () {
+    config(['voucher-pipeline.post-redemption' => [
+        ...config('voucher-pipeline.post-redemption'),
+        \LBHurtado\Voucher\Pipelines\RedeemedVoucher\DisburseCash::class,
+    ]]);
+
+    $this->artisan('settlement:seed-loans', [
+        'count' => 1,
+        '--tenants' => $this->tenants,
+        '--output' => $this->output,
+    ])->assertExitCode(1);
+
+    expect(Voucher::count())->toBe(0);
+});
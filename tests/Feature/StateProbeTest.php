@@ -0,0 +1,54 @@
+<?php
+
+use App\Models\User;
+use Illuminate\Foundation\Testing\RefreshDatabase;
+use Illuminate\Support\Facades\Artisan;
+
+uses(RefreshDatabase::class);
+
+beforeEach(function () {
+    $this->input = tempnam(sys_get_temp_dir(), 'probe');
+
+    config(['account.system_user.identifier' => 'system@disburse.cash']);
+    User::factory()->create(['email' => 'system@disburse.cash'])->depositFloat(500);
+});
+
+afterEach(function () {
+    @unlink($this->input);
+});
+
+function probe(string $input, array ...$batches): array
+{
+    file_put_contents($input, implode("\n", array_map('json_encode', $batches))."\n");
+    Artisan::call('state:probe', ['--input' => $input]);
+
+    return array_map(fn ($line) => json_decode($line, true), array_filter(explode("\n", Artisan::output())));
+}
+
+test('answers each batch on its own line, in query order', function () {
+    $user = User::factory()->create(['email' => 'owner@example.com', 'mobile' => '09171110004']);
+    $user->depositFloat(1234.5);
+
+    [$ready, $first, $second] = probe($this->input,
+        ['id' => 1, 'queries' => [['type' => 'system'], ['type' => 'user', 'user' => 'owner@example.com']]],
+        ['id' => 2, 'queries' => [['type' => 'user', 'user' => '09171110004']]],
+    );
+
+    expect($ready['ready'])->toBeTrue()
+        ->and($first['id'])->toBe(1)
+        ->and($first['results'][0]['system_wallet'])->toEqual(500.0)
+        ->and($first['results'][1])->toMatchArray(['email' => 'owner@example.com', 'wallet' => 1234.5])
+        ->and($second['results'][0]['mobile'])->toBe('09171110004');
+});
+
+test('reports failed queries without dropping the batch', function () {
+    [, $batch] = probe($this->input, ['id' => 'x', 'queries' => [
+        ['type' => 'voucher', 'code' => 'NOPE'],
+        ['type' => 'bogus'],
+        ['type' => 'system'],
+    ]]);
+
+    expect($batch['results'][0]['error'])->toContain('Voucher not found')
+        ->and($batch['results'][1]['error'])->toContain('Unknown query type')
+        ->and($batch['results'][2]['system_wallet'])->toEqual(500.0);
+});